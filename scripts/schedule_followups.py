@@ -3,6 +3,9 @@ Gera mensagens de follow-up para contatos que ainda não responderam.
 Modo de uso:
   - `python scripts/schedule_followups.py` -> gera `logs/followups_to_send.json` com follow-ups
   - Se quiser enviar automaticamente, rode com `--send` e defina `$env:GMAIL_APP_PASSWORD` (mesmo fluxo do send_wave1_emails)
+  - Com `--enqueue --after-days N`, agenda cada follow-up na fila persistente
+    (`$AGENT_QUEUE_DB`) com not_before = agora + N dias, em vez de depender de envio manual.
+    A dedup_key (email + data do follow-up) evita duplicatas ao rodar de novo no mesmo dia (ex: cron)
 
 Lógica básica:
   - Carrega `wave1_sending_results.json` e `email_monitoring_wave1.json`
@@ -12,7 +15,8 @@ Lógica básica:
 
 import json
 import os
-from datetime import datetime
+import sys
+from datetime import datetime, timedelta
 import argparse
 
 IN_SEND = "wave1_sending_results.json"
@@ -79,8 +83,52 @@ parser.add_argument(
     action="store_true",
     help="Enviar os followups via SMTP (requer GMAIL_APP_PASSWORD)",
 )
+parser.add_argument(
+    "--enqueue",
+    action="store_true",
+    help="Agendar os followups na fila persistente (queue) em vez de só gerar o JSON",
+)
+parser.add_argument(
+    "--after-days",
+    type=int,
+    default=3,
+    help="Com --enqueue: dias até o followup ficar pronto para envio (padrão: 3)",
+)
 args = parser.parse_args()
 
+if args.enqueue:
+    PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    from src.core.agent_queue import TaskPriority
+    from src.core.persistent_queue import PersistentAgentQueue
+
+    not_before = datetime.now() + timedelta(days=args.after_days)
+    queue = PersistentAgentQueue(os.getenv("AGENT_QUEUE_DB", "data/agent_queue.db"))
+    scheduled_before = queue.scheduled_size()
+    task_ids = queue.push_many(
+        [
+            {
+                "priority": TaskPriority.MEDIUM,
+                "deadline": not_before + timedelta(days=2),
+                "cost": 1,
+                "agent_name": "followup_email",
+                "client_id": fup["email"] or "unknown_client",
+                "payload": fup,
+                "not_before": not_before,
+                # Mesmo contato e mesma data de follow-up: rodar de novo não duplica
+                "dedup_key": f"followup:{fup['email'] or 'unknown_client'}:{not_before:%Y-%m-%d}",
+            }
+            for fup in followups
+        ]
+    )
+    added = queue.scheduled_size() - scheduled_before
+    queue.close()
+    print(
+        f"Followups agendados na fila: {added} novo(s), {len(task_ids) - added} já agendado(s)"
+        f" (a partir de {not_before:%Y-%m-%d %H:%M})"
+    )
+
 if args.send:
     # Lazy import to avoid SMTP deps at top-level
     import smtplib
@@ -4,12 +4,25 @@ import json
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from src.core.breaker_registry import get_circuit_breaker_registry
+from src.core.circuit_breaker import CircuitBreaker, CircuitBreakerConfig
 from src.utils.logging_utils import get_logger
 from src.utils.llm_client import gerar_texto_simples
 
 logger = get_logger(__name__)
 
 
+def _llm_breaker() -> CircuitBreaker:
+    """Breaker do LLM, resolvido no registro no uso (não no import do módulo).
+
+    Explicações do LLM são leituras idempotentes: com o LLM fora do ar, o mesmo
+    prompt (mesmo modelo de venda) é atendido pelo último texto bom em cache.
+    """
+    return get_circuit_breaker_registry().get_or_create(
+        "llm_nf_agent", CircuitBreakerConfig(cache_ttl=3600)
+    )
+
+
 def load_sales(path: str | Path) -> Optional[Dict[str, Any]]:
     """Carrega um arquivo JSON com registros de vendas.
 
@@ -41,6 +54,12 @@ def _get_field(record: Dict[str, Any], *keys: str, default: Any = None) -> Any:
     return default
 
 
+def _explicacao_padrao(prompt: str) -> str:
+    """Texto usado quando o LLM falha ou o circuito está aberto (sem cache)."""
+    logger.warning("LLM indisponível, usando explicação padrão")
+    return "Siga os passos listados para emitir a nota fiscal no portal da prefeitura."
+
+
 def prepare_invoice_steps(sales_record: Dict[str, Any]) -> Dict[str, Any]:
     """Monta os passos e uma explicação para emitir uma NFS-e com base em um registro de venda.
 
@@ -109,13 +128,9 @@ def prepare_invoice_steps(sales_record: Dict[str, Any]) -> Dict[str, Any]:
         resumo += f"; Serviço: {descricao}"
     prompt = resumo + ". " + prompt
 
-    try:
-        explicacao = gerar_texto_simples(prompt)
-    except Exception as e:
-        logger.warning("LLM falhou ao gerar explicação: %s", e)
-        explicacao = (
-            "Siga os passos listados para emitir a nota fiscal no portal da prefeitura."
-        )
+    explicacao = _llm_breaker().call(
+        gerar_texto_simples, prompt, fallback=_explicacao_padrao
+    )
 
     result: Dict[str, Any] = {"steps": steps, "explicacao": explicacao}
     if missing:
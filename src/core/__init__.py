@@ -13,12 +13,41 @@ from src.core.agent_queue import (
     create_deadline,
     create_critical_deadline,
 )
+from src.core.persistent_queue import PersistentAgentQueue
+from src.core.queue_snapshot import QueueSnapshot
+from src.core.concurrent_queue import AsyncAgentQueue, ThreadSafeAgentQueue
+from src.core.sharded_queue import ShardedAgentQueue
+from src.core.shared_memory_queue import SharedMemoryAgentQueue
+from src.core.scheduling import (
+    AgingPolicy,
+    EDFPolicy,
+    PriorityPolicy,
+    SchedulingPolicy,
+    WeightedFairPolicy,
+    create_policy,
+)
+from src.core.dispatcher import AgentDispatcher, MissingHandlerError, TaskResult
+from src.core.cost_window import AgentCostWindow
+from src.core.retry import DeadLetter, RetryPolicy
+from src.core.payload_store import (
+    InMemoryPayloadStore,
+    PayloadStore,
+    SQLitePayloadStore,
+)
 from src.core.circuit_breaker import (
     CircuitBreaker,
     CircuitBreakerConfig,
     CircuitBreakerStats,
+    CircuitBreakerTimeout,
     CircuitState,
 )
+from src.core.breaker_registry import (
+    BreakerStateStore,
+    CircuitBreakerRegistry,
+    SharedCircuitBreaker,
+    SQLiteBreakerStateStore,
+    get_circuit_breaker_registry,
+)
 
 __all__ = [
     "AgentQueue",
@@ -26,8 +55,35 @@ __all__ = [
     "TaskPriority",
     "create_deadline",
     "create_critical_deadline",
+    "PersistentAgentQueue",
+    "QueueSnapshot",
+    "ThreadSafeAgentQueue",
+    "AsyncAgentQueue",
+    "ShardedAgentQueue",
+    "SharedMemoryAgentQueue",
+    "SchedulingPolicy",
+    "PriorityPolicy",
+    "AgingPolicy",
+    "EDFPolicy",
+    "WeightedFairPolicy",
+    "create_policy",
+    "PayloadStore",
+    "InMemoryPayloadStore",
+    "SQLitePayloadStore",
+    "AgentDispatcher",
+    "MissingHandlerError",
+    "TaskResult",
+    "AgentCostWindow",
+    "RetryPolicy",
+    "DeadLetter",
     "CircuitBreaker",
     "CircuitBreakerConfig",
     "CircuitBreakerStats",
+    "CircuitBreakerTimeout",
     "CircuitState",
+    "CircuitBreakerRegistry",
+    "SharedCircuitBreaker",
+    "BreakerStateStore",
+    "SQLiteBreakerStateStore",
+    "get_circuit_breaker_registry",
 ]
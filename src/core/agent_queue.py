@@ -1,12 +1,14 @@
 """
 Fila de Prioridade para Orquestração de Agentes.
 
-Implementação de Min-Heap (usando heapq) para garantir que agentes críticos
-(ex: Prazos DAS vencendo amanhã) sejam executados antes de tarefas triviais.
+Implementação de Min-Heap indexada (mapa task_id -> posição) para garantir que
+agentes críticos (ex: Prazos DAS vencendo amanhã) sejam executados antes de
+tarefas triviais.
 
 FUNDAMENTO TEÓRICO:
 - Disciplina CS: Estruturas de Dados (Heaps)
 - Complexidade: O(log n) para inserção/remoção, O(1) para min
+- Heap indexado: mapa task_id -> posição permite remover/repriorizar em O(log n)
 - Trade-off: Memória O(n), construção O(n log n)
 - Alternativas: Red-Black Tree O(log n), mas Heap é mais simples
 
@@ -22,16 +24,55 @@ QUANDO NÃO USAR:
 ❌ Processamento em lote (ordenação simples suficiente)
 """
 
+import gc
 import heapq
+import itertools
+import math
+import os
+import sys
+import time
 import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Any, Optional, List, Dict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Deque,
+    Optional,
+    List,
+    Dict,
+    Iterable,
+    Iterator,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 from enum import IntEnum
 import logging
 
+from src.core.cost_window import AgentCostWindow
+from src.core.payload_store import PayloadStore
+from src.core.scheduling import PriorityPolicy, SchedulingPolicy, SortKey
+
+if TYPE_CHECKING:
+    from src.core.retry import DeadLetter, RetryPolicy
+
 logger = logging.getLogger("agent_queue")
 
+# Entrada da heap: (sort_key, seq, task). A chave é montada uma única vez no
+# push e seq (monotônico, único) garante FIFO estrito e que a comparação de
+# tuplas nunca chegue ao AgentTask.
+HeapEntry = Tuple[Tuple[Any, ...], int, "AgentTask"]
+
+# Políticas de merge de push(dedup_key=...) quando a chave já está na fila:
+# - earliest_deadline: mantém a tarefa e adianta o deadline se o novo é menor
+# - highest_priority: mantém a tarefa e sobe a prioridade se a nova é maior
+# - replace: remove a tarefa enfileirada e insere a nova
+DEDUP_POLICIES = ("earliest_deadline", "highest_priority", "replace")
+
 
 class TaskPriority(IntEnum):
     """Níveis de prioridade (menor valor = maior urgência)."""
@@ -43,10 +84,13 @@ class TaskPriority(IntEnum):
     DEFERRED = 5  # Pode esperar indefinidamente (análise futura)
 
 
-@dataclass(order=True)
+@dataclass(order=True, slots=True)
 class AgentTask:
     """Tarefa de agente para fila de prioridade.
 
+    Registro compacto (__slots__, sem __dict__); agent_name e client_id são
+    internados para que milhões de tarefas compartilhem as mesmas strings.
+
     Atributos:
         priority (int): Nível de prioridade (TaskPriority enum)
         deadline (float): Timestamp Unix do vencimento
@@ -54,14 +98,23 @@ class AgentTask:
         task_id (str): ID único da tarefa (auto-gerado)
         agent_name (str): Nome do agente executando (ex: "deadlines_agent")
         client_id (str): ID do cliente associado
-        payload (dict): Dados da tarefa (não afeta ordenação)
+        payload (dict): Dados da tarefa (não afeta ordenação). None enquanto
+            enfileirada numa AgentQueue com payload_store (recarregado no pop)
         created_at (float): Timestamp de criação (para tiebreaker)
+        not_before (float): Timestamp a partir do qual a tarefa pode sair da
+            fila (0 = imediatamente). Ver AgentQueue.push(not_before=...)
+        dedup_key (str): Chave do trabalho lógico (None = sem deduplicação).
+            Ver AgentQueue.push(dedup_key=...)
+        attempts (int): Execuções que já falharam (ver AgentQueue.retry)
 
-    Ordem de comparação (tiebreaker):
+    Ordem na AgentQueue com a política padrão (PriorityPolicy):
     1. priority (menor = mais urgente)
     2. deadline (mais próximo = mais urgente)
     3. cost (menor custo = mais eficiente rodar antes)
-    4. created_at (FIFO para mesma prioridade/deadline/cost)
+    4. ordem de inserção (FIFO estrito via número de sequência da fila)
+
+    A fila não usa o __lt__ gerado pelo dataclass: ela pré-computa a chave
+    da política no push e compara tuplas (sort_key, seq, task).
     """
 
     priority: int
@@ -70,8 +123,18 @@ class AgentTask:
     task_id: str = field(default_factory=lambda: str(uuid.uuid4())[:8])
     agent_name: str = field(default="unknown_agent")
     client_id: str = field(default="unknown_client")
-    payload: Dict[str, Any] = field(default_factory=dict, compare=False)
+    payload: Optional[Dict[str, Any]] = field(default_factory=dict, compare=False)
     created_at: float = field(default_factory=lambda: datetime.now().timestamp())
+    not_before: float = 0.0
+    dedup_key: Optional[str] = field(default=None, compare=False)
+    attempts: int = field(default=0, compare=False)
+
+    def __post_init__(self) -> None:
+        """Interna nomes repetidos (agentes/clientes) para economizar memória."""
+        if type(self.agent_name) is str:
+            self.agent_name = sys.intern(self.agent_name)
+        if type(self.client_id) is str:
+            self.client_id = sys.intern(self.client_id)
 
     def __repr__(self) -> str:
         """Representação legível."""
@@ -87,7 +150,7 @@ class AgentTask:
 
     def seconds_until_deadline(self) -> float:
         """Calcula segundos restantes até o deadline."""
-        return self.deadline - datetime.now().timestamp()
+        return self.deadline - time.time()
 
     def is_overdue(self) -> bool:
         """Verifica se a tarefa já venceu."""
@@ -125,24 +188,113 @@ class AgentQueue:
             task = queue.pop()
             resultado = executar_agente(task)
             if not resultado['sucesso']:
-                # Reinsert com penalty de prioridade
-                queue.push_task(task)  # re-push na heap
+                # Volta agendada com backoff (ou vai para dead-letter)
+                queue.retry(task, resultado['erro'])
     """
 
-    def __init__(self, max_size: Optional[int] = None):
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        payload_store: Optional[PayloadStore] = None,
+        policy: Optional[SchedulingPolicy] = None,
+        lazy_delete: bool = False,
+        compact_ratio: float = 0.5,
+        dedup_policy: str = "earliest_deadline",
+        dedup_ttl: float = 0.0,
+        dedup_max_keys: int = 100_000,
+        retry_policy: Optional["RetryPolicy"] = None,
+    ):
         """Inicializa a fila.
 
         Args:
             max_size: Limite máximo de tarefas (None = ilimitado).
                      Útil para evitar memory leaks em ambientes com
                      produção de tarefas muito rápida.
+            payload_store: Store opcional para manter payloads fora da heap.
+                     Payloads não vazios são gravados no push e recarregados
+                     por task_id no pop (task.payload fica None enquanto
+                     enfileirada; use get_payload() para consultar).
+            policy: Política de escalonamento (padrão: PriorityPolicy, ordem
+                     priority -> deadline -> cost). Ver src.core.scheduling.
+            lazy_delete: Se True, remove_task() só marca a entrada da heap
+                     como morta (tombstone, O(1)); pop/peek descartam as
+                     mortas ao encontrá-las no topo. Útil com muitos
+                     cancelamentos.
+            compact_ratio: Fração de tombstones na heap que dispara a
+                     compactação (reconstrução O(n)) no modo lazy_delete
+                     (1.0 = só quando todas as entradas estão mortas).
+            dedup_policy: O que fazer quando push(dedup_key=...) encontra a
+                     chave já enfileirada (ver DEDUP_POLICIES).
+            dedup_ttl: Segundos em que a chave de uma tarefa já retirada
+                     (pop/drain/pop_batch) ainda absorve novos pushes
+                     (0 = só deduplica tarefas enfileiradas).
+            dedup_max_keys: Máximo de chaves concluídas lembradas; as mais
+                     antigas expiram antes do ttl quando o limite é atingido.
+            retry_policy: Backoff, limite de tentativas e orçamento por
+                     agente de retry() (padrão: RetryPolicy()).
+
+        Raises:
+            ValueError: Se compact_ratio fora de (0, 1], dedup_policy
+                desconhecida, dedup_ttl < 0 ou dedup_max_keys < 1
         """
-        self._heap: List[AgentTask] = []
+        if not 0 < compact_ratio <= 1:
+            raise ValueError(
+                f"compact_ratio deve estar em (0, 1], recebido {compact_ratio}"
+            )
+        if dedup_policy not in DEDUP_POLICIES:
+            raise ValueError(
+                f"dedup_policy desconhecida: {dedup_policy!r} "
+                f"(opções: {', '.join(DEDUP_POLICIES)})"
+            )
+        if dedup_ttl < 0:
+            raise ValueError(f"dedup_ttl deve ser >= 0, recebido {dedup_ttl}")
+        if dedup_max_keys < 1:
+            raise ValueError(f"dedup_max_keys deve ser >= 1, recebido {dedup_max_keys}")
+
+        self.payload_store = payload_store
+        self.policy = policy or PriorityPolicy()
+        self._heap: List[HeapEntry] = []
+        self._seq = itertools.count()
+        # Índice task_id -> posição na heap (mantido a cada sift)
+        self._index: Dict[str, int] = {}
+        # Índices secundários: agent_name/client_id -> {task_id: AgentTask}
+        self._by_agent: Dict[str, Dict[str, AgentTask]] = {}
+        self._by_client: Dict[str, Dict[str, AgentTask]] = {}
+        # Tarefas agendadas (not_before no futuro): heap (not_before, seq, task)
+        # com remoção preguiçosa; _scheduled (task_id -> task) é a fonte da verdade
+        self._delayed: List[HeapEntry] = []
+        self._scheduled: Dict[str, AgentTask] = {}
+        # Modo lazy_delete: task_ids removidos cuja entrada ainda está na heap
+        # (continuam em _index até saírem do topo ou a heap ser compactada)
+        self.lazy_delete = lazy_delete
+        self.compact_ratio = compact_ratio
+        self._tombstones: Set[str] = set()
+        # Deduplicação: dedup_key -> task_id das tarefas enfileiradas (prontas
+        # ou agendadas) e, por dedup_ttl, das já retiradas: dedup_key ->
+        # (expira_em monotônico, task_id), em ordem de expiração
+        self.dedup_policy = dedup_policy
+        self.dedup_ttl = dedup_ttl
+        self.dedup_max_keys = dedup_max_keys
+        self._dedup: Dict[str, str] = {}
+        self._done_keys: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        # Retry: tarefas que esgotaram tentativas/orçamento (mais recentes no fim)
+        from src.core.retry import RetryPolicy
+
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._dead_letters: Deque["DeadLetter"] = deque(
+            maxlen=self.retry_policy.max_dead_letters
+        )
         self.max_size = max_size
         self.stats = {
             "total_pushed": 0,
             "total_popped": 0,
             "total_rejected": 0,  # Rejeitadas por max_size
+            "total_overdue": 0,  # Retiradas após o deadline
+            "total_promoted": 0,  # Agendadas que ficaram prontas
+            "total_compactions": 0,  # Compactações de tombstones (lazy_delete)
+            "total_deduplicated": 0,  # Pushes absorvidos por dedup_key
+            "total_retried": 0,  # Reagendadas por retry()
+            "total_dead_lettered": 0,  # Desistências de retry()
         }
 
     def push(
@@ -154,6 +306,8 @@ class AgentQueue:
         client_id: str,
         payload: Dict[str, Any],
         task_id: Optional[str] = None,
+        not_before: Optional[datetime] = None,
+        dedup_key: Optional[str] = None,
     ) -> Optional[str]:
         """Insere tarefa na fila (O(log n)).
 
@@ -165,100 +319,535 @@ class AgentQueue:
             client_id: ID do cliente
             payload: Dados da tarefa
             task_id: ID único (auto-gerado se None)
+            not_before: Só libera a tarefa a partir deste datetime (None =
+                imediatamente). Até lá ela fica numa heap de agendadas, fora
+                de pop/peek/size, e é promovida quando vence.
+            dedup_key: Identifica o trabalho lógico (ex: "das:client_123:2024-05").
+                Se já há tarefa enfileirada com a chave (checagem O(1)), o
+                push é resolvido por dedup_policy; se a chave foi retirada há
+                menos de dedup_ttl segundos, o push é descartado.
 
         Returns:
-            task_id da tarefa inserida, ou None se rejeitada por max_size
+            task_id da tarefa inserida (ou da tarefa que absorveu o push
+            duplicado), ou None se rejeitada por max_size
 
         Raises:
-            ValueError: Se priority, cost ou deadline inválidos
+            ValueError: Se priority, cost, deadline ou not_before inválidos,
+                ou task_id já presente na fila
         """
-        # Validações
-        if not isinstance(priority, int) or priority < 1 or priority > 5:
-            raise ValueError(f"Priority inválida: {priority} (deve ser 1-5)")
+        self._validate(priority, cost, deadline)
+        if not_before is not None and not isinstance(not_before, datetime):
+            raise ValueError(
+                f"not_before deve ser datetime, recebido {type(not_before)}"
+            )
 
-        if cost < 0:
-            raise ValueError(f"Cost não pode ser negativo: {cost}")
+        if dedup_key is not None:
+            merged = self._merge_duplicate(dedup_key, priority, deadline.timestamp())
+            if merged is not None:
+                return merged
 
-        if not isinstance(deadline, datetime):
-            raise ValueError(f"Deadline deve ser datetime, recebido {type(deadline)}")
-
-        # Verificar limite máximo
-        if self.max_size and self.size() >= self.max_size:
+        # Verificar limite máximo (prontas + agendadas)
+        if self.max_size and self._count() >= self.max_size:
             logger.warning(
-                f"Fila cheia ({self.size()}/{self.max_size}). "
+                f"Fila cheia ({self._count()}/{self.max_size}). "
                 f"Rejeitando tarefa {agent_name}/{client_id}"
             )
             self.stats["total_rejected"] += 1
             return None
 
+        if task_id is None:
+            task_id = self._new_task_id()
+        elif task_id in self:
+            raise ValueError(f"task_id duplicado na fila: {task_id}")
+
         # Criar e inserir tarefa
         deadline_ts = deadline.timestamp()
         task = AgentTask(
             priority=priority,
             deadline=deadline_ts,
             cost=cost,
-            task_id=task_id or str(uuid.uuid4())[:8],
+            task_id=task_id,
             agent_name=agent_name,
             client_id=client_id,
             payload=payload,
+            not_before=not_before.timestamp() if not_before is not None else 0.0,
+            dedup_key=dedup_key,
         )
 
-        heapq.heappush(self._heap, task)
+        self._insert(task)
         self.stats["total_pushed"] += 1
 
-        logger.debug(f"[PUSH] {task}")
+        logger.debug("[PUSH] %s", task)
         return task.task_id
 
+    def push_many(self, items: Iterable[Union[AgentTask, Dict[str, Any]]]) -> List[str]:
+        """Insere um lote de tarefas de uma vez.
+
+        O lote inteiro é validado antes de qualquer inserção (tudo ou nada).
+        Quando o lote é grande em relação à fila, as entradas são anexadas e
+        a heap é reconstruída com heapify (O(n + k)); lotes pequenos usam
+        sift individual (O(k log n)).
+
+        Args:
+            items: AgentTasks prontas ou dicts com os mesmos argumentos de
+                push() (priority, deadline, cost, agent_name, client_id,
+                payload e, opcionalmente, task_id, not_before e dedup_key)
+
+        Returns:
+            task_ids inseridos, na ordem do lote. Itens cuja dedup_key já
+            estava na fila (ou se repete no lote) retornam o task_id que os
+            absorveu. Tarefas além do max_size são rejeitadas
+            (contabilizadas em total_rejected).
+
+        Raises:
+            ValueError: Se algum item é inválido ou repete task_id
+        """
+        return [task_id for task_id in self._push_many(items) if task_id is not None]
+
+    def _push_many(
+        self, items: Iterable[Union[AgentTask, Dict[str, Any]]]
+    ) -> List[Optional[str]]:
+        """push_many() com um resultado por item (None = rejeitado por max_size)."""
+        tasks: List[AgentTask] = []
+        batch_ids = set()
+        for item in items:
+            if isinstance(item, AgentTask):
+                self._validate(item.priority, item.cost)
+                task = item
+            else:
+                self._validate(item["priority"], item["cost"], item["deadline"])
+                not_before = item.get("not_before")
+                if not_before is not None and not isinstance(not_before, datetime):
+                    raise ValueError(
+                        f"not_before deve ser datetime, recebido {type(not_before)}"
+                    )
+                task_id = item.get("task_id")
+                if task_id is None:
+                    task_id = self._new_task_id()
+                    while task_id in batch_ids:
+                        task_id = self._new_task_id()
+                task = AgentTask(
+                    priority=item["priority"],
+                    deadline=item["deadline"].timestamp(),
+                    cost=item["cost"],
+                    task_id=task_id,
+                    agent_name=item.get("agent_name", "unknown_agent"),
+                    client_id=item.get("client_id", "unknown_client"),
+                    payload=item.get("payload", {}),
+                    not_before=(
+                        not_before.timestamp() if not_before is not None else 0.0
+                    ),
+                    dedup_key=item.get("dedup_key"),
+                )
+
+            if task.task_id in self or task.task_id in batch_ids:
+                raise ValueError(f"task_id duplicado na fila: {task.task_id}")
+            batch_ids.add(task.task_id)
+            tasks.append(task)
+
+        # Chaves já conhecidas (ou repetidas no lote) passam por
+        # _merge_duplicate depois que o restante do lote entrou
+        fresh = tasks
+        duplicates: List[Tuple[int, AgentTask]] = []
+        if self._dedup or self._done_keys or any(task.dedup_key for task in tasks):
+            fresh = []
+            batch_keys = set()
+            for pos, task in enumerate(tasks):
+                key = task.dedup_key
+                if key is None:
+                    fresh.append(task)
+                elif key in batch_keys or key in self._dedup or key in self._done_keys:
+                    duplicates.append((pos, task))
+                else:
+                    batch_keys.add(key)
+                    fresh.append(task)
+
+        rejected: Set[str] = set()
+        if self.max_size:
+            room = max(0, self.max_size - self._count())
+            if len(fresh) > room:
+                logger.warning(
+                    "Fila cheia (%d/%d). Rejeitando %d tarefa(s) do lote",
+                    self._count(),
+                    self.max_size,
+                    len(fresh) - room,
+                )
+                self.stats["total_rejected"] += len(fresh) - room
+                rejected = {task.task_id for task in fresh[room:]}
+                fresh = fresh[:room]
+
+        self._insert_many(fresh)
+        self.stats["total_pushed"] += len(fresh)
+        results: List[Optional[str]] = [
+            None if task.task_id in rejected else task.task_id for task in tasks
+        ]
+
+        for pos, task in duplicates:
+            merged = self._merge_duplicate(task.dedup_key, task.priority, task.deadline)
+            if merged is None:
+                if self.max_size and self._count() >= self.max_size:
+                    self.stats["total_rejected"] += 1
+                    results[pos] = None
+                    continue
+                self._insert(task)
+                self.stats["total_pushed"] += 1
+                merged = task.task_id
+            results[pos] = merged
+
+        logger.debug(
+            "[PUSH_MANY] %d tarefa(s), %d duplicada(s)", len(fresh), len(duplicates)
+        )
+        return results
+
     def push_task(self, task: AgentTask) -> None:
         """Insere AgentTask pré-construída (útil para retry).
 
         Args:
-            task: AgentTask a inserir
+            task: AgentTask a inserir (task.not_before no futuro = agendada)
+
+        Raises:
+            ValueError: Se já existe tarefa com o mesmo task_id na fila
         """
-        heapq.heappush(self._heap, task)
+        if task.task_id in self:
+            raise ValueError(f"task_id duplicado na fila: {task.task_id}")
+
+        self._insert(task)
         self.stats["total_pushed"] += 1
-        logger.debug(f"[PUSH_TASK] {task}")
+        logger.debug("[PUSH_TASK] %s", task)
+
+    def retry(self, task: AgentTask, error: Any = None) -> Optional[str]:
+        """Reenfileira uma tarefa que falhou, com backoff exponencial e jitter.
+
+        Diferente de push_task(), a tarefa não volta pronta: fica agendada
+        (not_before = agora + retry_policy.delay) com a mesma prioridade, e
+        só compete com o trabalho novo quando o atraso vence. Com
+        task.attempts >= max_attempts, ou com o orçamento de retries do
+        agente esgotado, vai para a lista de dead-letter.
+
+        Args:
+            task: Tarefa retirada da fila (pop/drain/pop_batch) que falhou
+            error: Exceção ou mensagem da falha (guardada no dead-letter)
+
+        Returns:
+            task_id se reagendada, ou None se foi para dead-letter
+
+        Raises:
+            ValueError: Se a tarefa ainda está na fila
+        """
+        from src.core.retry import DeadLetter
+
+        if task.task_id in self:
+            raise ValueError(f"task_id duplicado na fila: {task.task_id}")
+
+        if isinstance(error, BaseException):
+            error = f"{type(error).__name__}: {error}"
+        task.attempts += 1
+        delay, reason = self.retry_policy.schedule(task)
+        if reason is not None:
+            self._dead_letter(DeadLetter(task, str(error or ""), reason, time.time()))
+            return None
+
+        task.not_before = time.time() + delay
+        self.push_task(task)
+        self.stats["total_retried"] += 1
+        logger.warning(
+            "[RETRY] %s falha %d/%d, nova tentativa em %.1fs: %s",
+            task.task_id,
+            task.attempts,
+            self.retry_policy.max_attempts,
+            delay,
+            error,
+        )
+        return task.task_id
+
+    def get_dead_letters(self) -> List["DeadLetter"]:
+        """Retorna as tarefas que desistiram de retry() (mais antigas primeiro)."""
+        return list(self._dead_letters)
 
     def pop(self) -> Optional[AgentTask]:
         """Remove e retorna tarefa de maior prioridade (O(log n)).
 
         Returns:
-            Próxima AgentTask com maior prioridade, ou None se vazio
+            Próxima AgentTask com maior prioridade, ou None se não há
+            tarefa pronta
         """
+        if self._delayed:
+            self._promote_due()
+        if self._tombstones:
+            self._drop_dead_top()
         if not self._heap:
             logger.debug("[POP] Fila vazia")
             return None
 
-        task = heapq.heappop(self._heap)
+        key = self._heap[0][0]
+        task = self._remove_at(0)
+        self.policy.on_pop(key)
         self.stats["total_popped"] += 1
+        if task.dedup_key is not None and self.dedup_ttl:
+            self._retire_key(task)
+        if self.payload_store is not None:
+            self._load_payload(task)
 
-        if task.is_overdue():
-            logger.warning(f"[POP] Tarefa vencida: {task}")
+        if task.deadline < time.time():
+            self.stats["total_overdue"] += 1
+            logger.warning("[POP] Tarefa vencida: %s", task)
 
-        logger.debug(f"[POP] {task}")
+        logger.debug("[POP] %s", task)
         return task
 
+    def pop_many(self, n: int) -> List[AgentTask]:
+        """Remove e retorna até n tarefas em ordem de prioridade.
+
+        Args:
+            n: Número máximo de tarefas
+
+        Returns:
+            List de AgentTasks (vazia se a fila estiver vazia)
+        """
+        return self.drain(max_tasks=n)
+
+    def drain(
+        self, max_cost: Optional[int] = None, max_tasks: Optional[int] = None
+    ) -> List[AgentTask]:
+        """Remove tarefas em ordem de prioridade até atingir um limite.
+
+        Para na primeira tarefa cujo custo estouraria max_cost (a ordem de
+        prioridade é estrita: tarefas mais baratas atrás dela não passam na
+        frente).
+
+        Args:
+            max_cost: Soma máxima de `cost` das tarefas retornadas (None = sem limite)
+            max_tasks: Número máximo de tarefas (None = sem limite)
+
+        Returns:
+            List de AgentTasks removidas
+        """
+        if self._delayed:
+            self._promote_due()
+        heap = self._heap
+        on_pop = self.policy.on_pop
+        tasks: List[AgentTask] = []
+        spent = 0
+        overdue = 0
+        now = time.time()
+
+        while heap and (max_tasks is None or len(tasks) < max_tasks):
+            if self._tombstones:
+                self._drop_dead_top()
+                if not heap:
+                    break
+            key, _, head = heap[0]
+            cost = head.cost
+            if max_cost is not None and spent + cost > max_cost:
+                break
+            task = self._remove_at(0)
+            on_pop(key)
+            if task.dedup_key is not None and self.dedup_ttl:
+                self._retire_key(task)
+            if self.payload_store is not None:
+                self._load_payload(task)
+            if task.deadline < now:
+                overdue += 1
+            spent += cost
+            tasks.append(task)
+
+        self.stats["total_popped"] += len(tasks)
+        self.stats["total_overdue"] += overdue
+        if overdue:
+            logger.warning("[DRAIN] %d tarefa(s) vencida(s) no lote", overdue)
+        logger.debug("[DRAIN] %d tarefa(s), custo=%d", len(tasks), spent)
+        return tasks
+
+    def pop_batch(
+        self,
+        budget: Optional[int] = None,
+        max_tasks: Optional[int] = None,
+        cost_window: Optional[AgentCostWindow] = None,
+        max_scan: int = 1000,
+    ) -> List[AgentTask]:
+        """Remove o melhor lote de tarefas cujo custo somado cabe no orçamento.
+
+        Guloso em ordem de prioridade: cada tarefa que cabe no orçamento (e na
+        cota do agente em cost_window) é retirada; as que não cabem são
+        puladas e permanecem na fila, sem bloquear as seguintes (diferente de
+        drain(), que para na primeira que não cabe).
+
+        A heap é percorrida em ordem por uma fronteira (só filhos de nós já
+        visitados entram), então o custo é O((k + s) log n) para k tarefas
+        retiradas e s puladas. Quando as puladas chegam a max_scan com
+        agentes sem cota, ou sem nenhuma tarefa selecionada (topo tomado por
+        tarefas caras demais para o orçamento), o restante da heap é filtrado
+        numa passada O(n) pelas tarefas que ainda cabem: tarefas
+        prioritárias que não cabem nunca bloqueiam a fila inteira.
+
+        Args:
+            budget: Soma máxima de `cost` do lote (None = sem limite)
+            max_tasks: Número máximo de tarefas (None = sem limite)
+            cost_window: Cotas por agente em janela deslizante; o custo das
+                tarefas retiradas é registrado nela
+            max_scan: Máximo de tarefas puladas na varredura ordenada antes de
+                passar à busca linear (as retiradas não contam)
+
+        Returns:
+            List de AgentTasks removidas, em ordem de prioridade
+        """
+        if self._delayed:
+            self._promote_due()
+        heap = self._heap
+        if not heap:
+            return []
+
+        remaining = budget
+        selected: Dict[str, HeapEntry] = {}
+        # Agente -> menor custo que já não coube na cota
+        exhausted: Dict[str, float] = {}
+
+        def done() -> bool:
+            if max_tasks is not None and len(selected) >= max_tasks:
+                return True
+            return remaining is not None and remaining <= 0
+
+        tombstones = self._tombstones
+
+        def consider(entry: HeapEntry) -> bool:
+            """Seleciona a tarefa se ela cabe; False = pulada."""
+            nonlocal remaining
+            task = entry[2]
+            if tombstones and task.task_id in tombstones:
+                return True  # morta: não conta como pulada
+            if remaining is not None and task.cost > remaining:
+                return False
+            if cost_window is not None:
+                agent_name = task.agent_name
+                if task.cost >= exhausted.get(agent_name, math.inf):
+                    return False
+                if not cost_window.can_spend(agent_name, task.cost):
+                    exhausted[agent_name] = task.cost
+                    return False
+                cost_window.record(agent_name, task.cost)
+            selected[task.task_id] = entry
+            if remaining is not None:
+                remaining -= task.cost
+            return True
+
+        frontier: List[Tuple[HeapEntry, int]] = [(heap[0], 0)]
+        skipped = 0
+        while frontier and skipped < max_scan and not done():
+            entry, pos = heapq.heappop(frontier)
+            for child in (2 * pos + 1, 2 * pos + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+            if not consider(entry):
+                skipped += 1
+
+        if frontier and (exhausted or not selected) and not done():
+            # Limite de puladas atingido atrás de agentes sem cota (ou com o
+            # lote vazio): busca pelo índice por agente as tarefas dos demais
+            # agentes que ainda cabem no orçamento
+            index = self._index
+            candidates = [
+                heap[index[task_id]]
+                for agent_name, bucket in self._by_agent.items()
+                if agent_name not in exhausted
+                for task_id, task in bucket.items()
+                if (remaining is None or task.cost <= remaining)
+                and task_id in index
+                and task_id not in selected
+            ]
+            heapq.heapify(candidates)
+            while candidates and not done():
+                consider(heapq.heappop(candidates))
+
+        ordered = sorted(selected.values())
+        tasks: List[AgentTask] = []
+        overdue = 0
+        now = time.time()
+        for key, _, task in ordered:
+            self._remove_at(self._index[task.task_id])
+            self.policy.on_pop(key)
+            if task.dedup_key is not None and self.dedup_ttl:
+                self._retire_key(task)
+            if self.payload_store is not None:
+                self._load_payload(task)
+            if task.deadline < now:
+                overdue += 1
+            tasks.append(task)
+
+        self.stats["total_popped"] += len(tasks)
+        self.stats["total_overdue"] += overdue
+        if overdue:
+            logger.warning("[POP_BATCH] %d tarefa(s) vencida(s) no lote", overdue)
+        logger.debug(
+            "[POP_BATCH] %d tarefa(s), custo=%d, puladas=%d",
+            len(tasks),
+            sum(task.cost for task in tasks),
+            skipped,
+        )
+        return tasks
+
     def peek(self) -> Optional[AgentTask]:
         """Retorna próxima tarefa SEM remover (O(1)).
 
         Útil para inspecionar antes de processar, ou para métricas.
 
         Returns:
-            Próxima AgentTask, ou None se vazio
+            Próxima AgentTask, ou None se não há tarefa pronta
         """
-        return self._heap[0] if self._heap else None
+        if self._delayed:
+            self._promote_due()
+        if self._tombstones:
+            self._drop_dead_top()
+        return self._heap[0][2] if self._heap else None
 
     def size(self) -> int:
-        """Retorna número de tarefas na fila (O(1))."""
-        return len(self._heap)
+        """Retorna número de tarefas prontas na fila (O(1)).
+
+        Tarefas agendadas ainda não liberadas não entram na conta; ver
+        scheduled_size().
+        """
+        if self._delayed:
+            self._promote_due()
+        return self._ready_count()
 
     def is_empty(self) -> bool:
-        """Verifica se a fila está vazia (O(1))."""
-        return len(self._heap) == 0
+        """Verifica se não há tarefa pronta na fila (O(1))."""
+        return self.size() == 0
+
+    def scheduled_size(self) -> int:
+        """Retorna número de tarefas agendadas (not_before no futuro)."""
+        if self._delayed:
+            self._promote_due()
+        return len(self._scheduled)
+
+    def next_due_in(self) -> Optional[float]:
+        """Segundos até a próxima tarefa agendada ficar pronta.
+
+        Returns:
+            Segundos (>= 0), ou None se não há tarefas agendadas
+        """
+        delayed = self._delayed
+        scheduled = self._scheduled
+        # Descarta entradas obsoletas (tarefas removidas) do topo
+        while delayed and scheduled.get(delayed[0][2].task_id) is not delayed[0][2]:
+            heapq.heappop(delayed)
+        if not delayed:
+            return None
+        return max(0.0, delayed[0][0] - time.time())
 
     def clear(self) -> None:
         """Limpa a fila (O(1))."""
         self._heap.clear()
+        self._index.clear()
+        self._by_agent.clear()
+        self._by_client.clear()
+        self._delayed.clear()
+        self._scheduled.clear()
+        self._tombstones.clear()
+        self._dedup.clear()
+        self._done_keys.clear()
+        if self.payload_store is not None:
+            self.payload_store.clear()
+        self.policy.reset()
         logger.info("[CLEAR] Fila esvaziada")
 
     def get_all_tasks(self) -> List[AgentTask]:
@@ -268,44 +857,77 @@ class AgentQueue:
         Use com moderação (ex: apenas para debugging/logging).
 
         Returns:
-            List de tarefas ordenadas por prioridade
+            List de tarefas prontas ordenadas por prioridade (agendadas:
+            get_scheduled_tasks())
         """
-        # Cópia para não modificar a heap original
-        heap_copy = self._heap.copy()
-        sorted_tasks = []
+        return [entry[2] for entry in self._ordered_entries()]
 
-        while heap_copy:
-            sorted_tasks.append(heapq.heappop(heap_copy))
+    def iter_ordered(self, limit: Optional[int] = None) -> Iterator[AgentTask]:
+        """Percorre as tarefas prontas em ordem de saída, sem copiar a heap.
 
-        return sorted_tasks
+        Gerador preguiçoso: uma heap auxiliar (fronteira) guarda os filhos
+        das entradas já emitidas, e a próxima tarefa está sempre nela. As k
+        primeiras custam O(k log k), independente do tamanho da fila. A fila
+        não deve ser modificada durante a iteração.
+
+        Args:
+            limit: Máximo de tarefas (None = todas)
+
+        Returns:
+            Iterador de AgentTasks prontas em ordem de prioridade
+
+        Raises:
+            ValueError: Se limit < 0
+        """
+        if limit is not None and limit < 0:
+            raise ValueError(f"limit deve ser >= 0, recebido {limit}")
+        return (entry[2] for entry in itertools.islice(self._iter_entries(), limit))
+
+    def get_scheduled_tasks(self) -> List[AgentTask]:
+        """Retorna as tarefas agendadas em ordem de liberação (O(k log k))."""
+        if self._delayed:
+            self._promote_due()
+        return sorted(self._scheduled.values(), key=lambda task: task.not_before)
 
     def get_tasks_for_agent(self, agent_name: str) -> List[AgentTask]:
-        """Retorna todas as tarefas de um agente específico (O(n)).
+        """Retorna todas as tarefas de um agente específico (O(k)).
+
+        Usa o índice secundário por agente: o custo é proporcional ao
+        número k de tarefas retornadas, não ao tamanho da fila.
 
         Args:
             agent_name: Nome do agente (ex: "deadlines_agent")
 
         Returns:
-            List de AgentTasks para esse agente
+            List de AgentTasks para esse agente (ordem de inserção)
         """
-        return [t for t in self._heap if t.agent_name == agent_name]
+        return list(self._by_agent.get(agent_name, {}).values())
 
     def get_tasks_for_client(self, client_id: str) -> List[AgentTask]:
-        """Retorna todas as tarefas de um cliente (O(n)).
+        """Retorna todas as tarefas de um cliente (O(k)).
 
         Args:
             client_id: ID do cliente
 
         Returns:
-            List de AgentTasks para esse cliente
+            List de AgentTasks para esse cliente (ordem de inserção)
         """
-        return [t for t in self._heap if t.client_id == client_id]
+        return list(self._by_client.get(client_id, {}).values())
+
+    def count_tasks_for_agent(self, agent_name: str) -> int:
+        """Retorna número de tarefas de um agente (O(1))."""
+        return len(self._by_agent.get(agent_name, ()))
+
+    def count_tasks_for_client(self, client_id: str) -> int:
+        """Retorna número de tarefas de um cliente (O(1))."""
+        return len(self._by_client.get(client_id, ()))
 
     def remove_task(self, task_id: str) -> bool:
-        """Remove tarefa específica por ID (O(n)).
+        """Remove tarefa específica por ID (O(log n); O(1) com lazy_delete).
 
-        CUIDADO: Esta operação é O(n) porque precisa encontrar a tarefa
-        antes de remover. Use apenas quando absolutamente necessário.
+        A posição da tarefa é obtida pelo índice task_id -> posição; o último
+        elemento ocupa o lugar e é reposicionado com um único sift. Com
+        lazy_delete a entrada só é marcada como morta (tombstone).
 
         Args:
             task_id: ID da tarefa a remover
@@ -313,32 +935,722 @@ class AgentQueue:
         Returns:
             True se removida, False se não encontrada
         """
-        for i, task in enumerate(self._heap):
-            if task.task_id == task_id:
-                # Trocar com último elemento e heappop
-                self._heap[i] = self._heap[-1]
-                self._heap.pop()
+        pos = self._ready_pos(task_id)
+        if pos is not None:
+            if self.lazy_delete:
+                self._tombstone(pos)
+            else:
+                self._remove_at(pos)
+        elif task_id in self._scheduled:
+            self._unschedule(task_id)
+        else:
+            logger.warning(f"[REMOVE] Tarefa {task_id} não encontrada")
+            return False
+
+        if self.payload_store is not None:
+            self.payload_store.delete(task_id)
+        logger.info(f"[REMOVE] Tarefa {task_id} removida")
+        return True
+
+    def update_priority(self, task_id: str, priority: int) -> bool:
+        """Altera a prioridade de uma tarefa já enfileirada (O(log n)).
+
+        Args:
+            task_id: ID da tarefa
+            priority: Novo nível TaskPriority (1-5)
+
+        Returns:
+            True se atualizada, False se não encontrada
+
+        Raises:
+            ValueError: Se priority inválida
+        """
+        if not isinstance(priority, int) or priority < 1 or priority > 5:
+            raise ValueError(f"Priority inválida: {priority} (deve ser 1-5)")
+
+        pos = self._ready_pos(task_id)
+        if pos is None:
+            if task_id in self._scheduled:
+                # A chave só é calculada quando a tarefa é promovida
+                self._scheduled[task_id].priority = priority
+                return True
+            logger.warning(f"[UPDATE] Tarefa {task_id} não encontrada")
+            return False
 
-                # Reheapify (pode descer ou subir a posição)
-                if i < len(self._heap):
-                    heapq.heapify(self._heap)
+        old_key, seq, task = self._heap[pos]
+        task.priority = priority
+        self._heap[pos] = (self.policy.rekey(task, old_key), seq, task)
+        self._reposition(pos)
+        logger.debug(f"[UPDATE] {task_id} priority={priority}")
+        return True
+
+    def update_deadline(self, task_id: str, deadline: datetime) -> bool:
+        """Altera o deadline de uma tarefa já enfileirada (O(log n)).
+
+        Args:
+            task_id: ID da tarefa
+            deadline: Novo datetime de vencimento
+
+        Returns:
+            True se atualizada, False se não encontrada
+
+        Raises:
+            ValueError: Se deadline não for datetime
+        """
+        if not isinstance(deadline, datetime):
+            raise ValueError(f"Deadline deve ser datetime, recebido {type(deadline)}")
 
-                logger.info(f"[REMOVE] Tarefa {task_id} removida")
+        pos = self._ready_pos(task_id)
+        if pos is None:
+            if task_id in self._scheduled:
+                self._scheduled[task_id].deadline = deadline.timestamp()
                 return True
+            logger.warning(f"[UPDATE] Tarefa {task_id} não encontrada")
+            return False
+
+        old_key, seq, task = self._heap[pos]
+        task.deadline = deadline.timestamp()
+        self._heap[pos] = (self.policy.rekey(task, old_key), seq, task)
+        self._reposition(pos)
+        logger.debug(f"[UPDATE] {task_id} deadline={deadline.isoformat()}")
+        return True
+
+    def get_payload(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna o payload de uma tarefa enfileirada sem removê-la.
+
+        Com payload_store, o payload é lido do store por task_id (lazy);
+        sem store, é o próprio dict da tarefa.
 
-        logger.warning(f"[REMOVE] Tarefa {task_id} não encontrada")
-        return False
+        Returns:
+            Payload da tarefa, ou None se a tarefa não está na fila
+        """
+        task = self._find(task_id)
+        if task is None:
+            return None
+
+        if task.payload is None and self.payload_store is not None:
+            return self.payload_store.get(task_id)
+        return task.payload
+
+    def snapshot(self, path: str) -> int:
+        """Grava a fila num snapshot binário colunar (O(n), sem ordenar).
+
+        A heap é gravada na ordem do array (com as chaves da política), as
+        agendadas em seguida. Tombstones pendentes são compactados antes.
+        Formato e leitor: src.core.queue_snapshot.
+
+        Args:
+            path: Arquivo de destino (gravação atômica)
+
+        Returns:
+            Número de tarefas gravadas (prontas + agendadas)
+
+        Raises:
+            ValueError: Se a política gera chaves não numéricas, algum
+                task_id contém NUL ou algum payload não é serializável
+        """
+        from src.core.queue_snapshot import write_snapshot
+
+        start = time.perf_counter()
+        if self._tombstones:
+            self._compact()
+        scheduled = self.get_scheduled_tasks()
+        tasks = [entry[2] for entry in self._heap] + scheduled
+        if self.payload_store is None:
+            payloads = [task.payload for task in tasks]
+        else:
+            payloads = [
+                (
+                    task.payload
+                    if task.payload is not None
+                    else self.payload_store.get(task.task_id) or {}
+                )
+                for task in tasks
+            ]
+
+        with _gc_paused():
+            count = write_snapshot(
+                path,
+                self._heap,
+                scheduled,
+                payloads,
+                self.policy.name,
+                self.stats,
+                self.policy.state(),
+                self.policy.config(),
+            )
+        logger.info(
+            "[SNAPSHOT] %d tarefa(s) gravada(s) em %s em %.3fs",
+            count,
+            path,
+            time.perf_counter() - start,
+        )
+        return count
+
+    @classmethod
+    def load(cls, snapshot_path: str, **kwargs: Any) -> "AgentQueue":
+        """Cria uma fila a partir de um snapshot gravado por snapshot() (O(n)).
+
+        Com a mesma política e a mesma config (SchedulingPolicy.config()) de
+        quem gravou, as chaves e o estado da política (ex: tempo virtual do
+        fair queuing) são restaurados como estavam; com outra política ou
+        outra config as chaves são recalculadas em ordem de chegada.
+        Os números de sequência gravados preservam o FIFO entre empates e os
+        contadores de stats são restaurados.
+
+        Args:
+            snapshot_path: Arquivo gravado por snapshot()
+            **kwargs: Argumentos do construtor (max_size, policy, ...; o
+                `path` do banco no caso da PersistentAgentQueue)
+
+        Returns:
+            Nova fila (do tipo `cls`) com as tarefas do snapshot
+
+        Raises:
+            ValueError: Se o arquivo não é um snapshot, a fila criada já tem
+                tarefas (ex: banco persistente em uso) ou o snapshot excede
+                max_size
+        """
+        from src.core.queue_snapshot import QueueSnapshot
+
+        start = time.perf_counter()
+        snapshot = QueueSnapshot(snapshot_path)
+        queue = cls(**kwargs)
+        if queue._count():
+            raise ValueError("load() requer uma fila vazia")
+        if queue.max_size and len(snapshot) > queue.max_size:
+            raise ValueError(
+                f"Snapshot com {len(snapshot)} tarefas excede max_size={queue.max_size}"
+            )
+
+        keys = None
+        if (
+            snapshot.policy == queue.policy.name
+            and snapshot.policy_config == queue.policy.config()
+        ):
+            keys = snapshot.keys()
+            queue.policy.restore_state(snapshot.policy_state)
+
+        with _gc_paused():
+            queue._restore(snapshot.tasks(), snapshot.seq, snapshot.ready, keys)
+        queue.stats.update(snapshot.stats)
+
+        logger.info(
+            "[LOAD] %d tarefa(s) restaurada(s) de %s em %.3fs",
+            len(snapshot),
+            snapshot_path,
+            time.perf_counter() - start,
+        )
+        return queue
+
+    def __contains__(self, task_id: str) -> bool:
+        """Verifica se task_id está na fila, pronta ou agendada (O(1))."""
+        return self._ready_pos(task_id) is not None or task_id in self._scheduled
+
+    # ------------------------------------------------------------------
+    # Heap indexado (sift manual mantendo task_id -> posição)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _validate(priority: int, cost: int, deadline: Any = None) -> None:
+        """Valida campos de tarefa (deadline só é checado quando informado)."""
+        if not isinstance(priority, int) or priority < 1 or priority > 5:
+            raise ValueError(f"Priority inválida: {priority} (deve ser 1-5)")
+
+        if cost < 0:
+            raise ValueError(f"Cost não pode ser negativo: {cost}")
+
+        if deadline is not None and not isinstance(deadline, datetime):
+            raise ValueError(f"Deadline deve ser datetime, recebido {type(deadline)}")
+
+    def _new_task_id(self) -> str:
+        """Gera ID curto (8 hex) inédito na fila.
+
+        Mesmo formato de str(uuid4())[:8], mas ~6x mais barato; como são só
+        32 bits, colisões com tarefas enfileiradas são sorteadas novamente.
+        """
+        task_id = os.urandom(4).hex()
+        while task_id in self._index or task_id in self._scheduled:
+            task_id = os.urandom(4).hex()
+        return task_id
+
+    def _sort_key(self, task: AgentTask) -> Tuple[Any, ...]:
+        """Chave de ordenação pré-computada (menor = sai primeiro)."""
+        return self.policy.sort_key(task)
+
+    def _count(self) -> int:
+        """Total de tarefas na fila (prontas + agendadas), sem promover."""
+        return self._ready_count() + len(self._scheduled)
+
+    def _ready_count(self) -> int:
+        """Tarefas prontas vivas (entradas da heap menos tombstones)."""
+        return len(self._heap) - len(self._tombstones)
+
+    def _ready_pos(self, task_id: str) -> Optional[int]:
+        """Posição na heap de uma tarefa pronta viva, ou None."""
+        pos = self._index.get(task_id)
+        if pos is None or (self._tombstones and task_id in self._tombstones):
+            return None
+        return pos
+
+    def _head_key(self) -> Optional[Tuple[Any, ...]]:
+        """Chave da próxima tarefa pronta (None se não há), após promover agendadas."""
+        if self._delayed:
+            self._promote_due()
+        if self._tombstones:
+            self._drop_dead_top()
+        return self._heap[0][0] if self._heap else None
+
+    def _ordered_entries(self) -> List[HeapEntry]:
+        """Entradas vivas da heap em ordem de saída (O(n log n))."""
+        if self._delayed:
+            self._promote_due()
+        # Cópia para não modificar a heap original
+        heap_copy = self._heap.copy()
+        tombstones = self._tombstones
+        entries = []
+
+        while heap_copy:
+            entry = heapq.heappop(heap_copy)
+            if entry[2].task_id not in tombstones:
+                entries.append(entry)
+
+        return entries
+
+    def _iter_entries(self) -> Iterator[HeapEntry]:
+        """Entradas vivas em ordem de saída, por fronteira sobre a heap.
+
+        Em ordem de heap, a próxima entrada é sempre a raiz ou filha de uma
+        já emitida: a fronteira tem no máximo k + 1 entradas após k passos.
+        """
+        if self._delayed:
+            self._promote_due()
+        heap = self._heap
+        tombstones = self._tombstones
+        size = len(heap)
+        if not size:
+            return
+
+        frontier = [(heap[0], 0)]
+        while frontier:
+            entry, pos = heapq.heappop(frontier)
+            if not tombstones or entry[2].task_id not in tombstones:
+                yield entry
+            child = 2 * pos + 1
+            if child < size:
+                heapq.heappush(frontier, (heap[child], child))
+                if child + 1 < size:
+                    heapq.heappush(frontier, (heap[child + 1], child + 1))
+
+    def _find(self, task_id: str) -> Optional[AgentTask]:
+        """Retorna a tarefa (pronta ou agendada) com o task_id, ou None."""
+        pos = self._ready_pos(task_id)
+        if pos is not None:
+            return self._heap[pos][2]
+        return self._scheduled.get(task_id)
+
+    def _dead_letter(self, dead: "DeadLetter") -> None:
+        """Guarda a tarefa na lista de dead-letter (limitada a max_dead_letters)."""
+        self._dead_letters.append(dead)
+        self.stats["total_dead_lettered"] += 1
+        logger.error(
+            "[DEAD_LETTER] %s após %d falha(s) (%s): %s",
+            dead.task,
+            dead.task.attempts,
+            dead.reason,
+            dead.error,
+        )
+
+    def _merge_duplicate(
+        self, dedup_key: str, priority: int, deadline: float
+    ) -> Optional[str]:
+        """Resolve um push cuja dedup_key pode já ser conhecida (O(log n)).
+
+        Com a chave enfileirada aplica dedup_policy; com a chave retirada há
+        menos de dedup_ttl o push é descartado.
+
+        Returns:
+            task_id que absorveu o push, ou None se a nova tarefa deve ser
+            inserida (chave desconhecida, ou a anterior foi removida por
+            dedup_policy="replace")
+        """
+        task_id = self._dedup.get(dedup_key)
+        if task_id is None:
+            task_id = self._done_key(dedup_key)
+            if task_id is not None:
+                self.stats["total_deduplicated"] += 1
+                logger.debug("[DEDUP] %s já retirada (%s)", dedup_key, task_id)
+            return task_id
+
+        self.stats["total_deduplicated"] += 1
+        if self.dedup_policy == "replace":
+            self.remove_task(task_id)
+            logger.debug("[DEDUP] %s substituída (%s)", dedup_key, task_id)
+            return None
+
+        task = self._find(task_id)
+        if self.dedup_policy == "earliest_deadline":
+            if deadline < task.deadline:
+                self.update_deadline(task_id, datetime.fromtimestamp(deadline))
+        elif priority < task.priority:
+            self.update_priority(task_id, priority)
+        logger.debug("[DEDUP] %s absorvida por %s", dedup_key, task_id)
+        return task_id
+
+    def _retire_key(self, task: AgentTask) -> None:
+        """Lembra a dedup_key de uma tarefa retirada por dedup_ttl segundos."""
+        now = time.monotonic()
+        done = self._done_keys
+        done.pop(task.dedup_key, None)
+        done[task.dedup_key] = (now + self.dedup_ttl, task.task_id)
+        self._expire_done_keys(now)
+        while len(done) > self.dedup_max_keys:
+            done.popitem(last=False)
+
+    def _done_key(self, dedup_key: str) -> Optional[str]:
+        """task_id da tarefa retirada com a chave, se ainda não expirou."""
+        if not self._done_keys:
+            return None
+        self._expire_done_keys(time.monotonic())
+        entry = self._done_keys.get(dedup_key)
+        return entry[1] if entry is not None else None
+
+    def _expire_done_keys(self, now: float) -> None:
+        """Descarta as chaves retiradas vencidas (O(1) amortizado).
+
+        Com ttl fixo a ordem de inserção é a de expiração: as vencidas estão
+        sempre na frente.
+        """
+        done = self._done_keys
+        while done:
+            key, (expires_at, _) = next(iter(done.items()))
+            if expires_at > now:
+                break
+            del done[key]
+
+    def _insert(self, task: AgentTask) -> None:
+        """Insere tarefa na heap de prontas ou, se not_before no futuro, nas agendadas."""
+        if self.payload_store is not None and task.payload:
+            self._offload_payload(task)
+        if task.not_before and task.not_before > time.time():
+            self._schedule(task)
+        else:
+            self._push_ready(task)
+
+    def _push_ready(self, task: AgentTask) -> None:
+        """Anexa tarefa ao fim da heap e sobe até a posição correta."""
+        if task.task_id in self._tombstones:
+            self._purge(task.task_id)
+        self._heap.append((self._sort_key(task), next(self._seq), task))
+        self._sift_up(len(self._heap) - 1)
+        self._index_add(task)
+
+    def _schedule(self, task: AgentTask) -> None:
+        """Guarda tarefa na heap de agendadas (ordenada por not_before)."""
+        if task.task_id in self._tombstones:
+            self._purge(task.task_id)
+        self._scheduled[task.task_id] = task
+        heapq.heappush(self._delayed, (task.not_before, next(self._seq), task))
+        self._index_add(task)
+
+    def _unschedule(self, task_id: str) -> AgentTask:
+        """Remove tarefa agendada (a entrada na heap vira obsoleta)."""
+        task = self._scheduled.pop(task_id)
+        self._index_discard(task)
+        # Compacta quando as entradas obsoletas passam a dominar a heap
+        if len(self._delayed) > 2 * len(self._scheduled) + 64:
+            scheduled = self._scheduled
+            self._delayed = [
+                entry
+                for entry in self._delayed
+                if scheduled.get(entry[2].task_id) is entry[2]
+            ]
+            heapq.heapify(self._delayed)
+        return task
+
+    def _promote_due(self) -> None:
+        """Move para a heap de prontas as tarefas agendadas já liberadas.
+
+        Só o topo da heap de agendadas é inspecionado: tarefas futuras não
+        são percorridas (O(k log n) para k tarefas promovidas).
+        """
+        delayed = self._delayed
+        scheduled = self._scheduled
+        now = time.time()
+        promoted = 0
+        while delayed and delayed[0][0] <= now:
+            task = heapq.heappop(delayed)[2]
+            if scheduled.get(task.task_id) is not task:
+                continue  # entrada obsoleta (tarefa removida)
+            del scheduled[task.task_id]
+            self._push_ready(task)
+            promoted += 1
+
+        if promoted:
+            self.stats["total_promoted"] += promoted
+            logger.debug("[PROMOTE] %d tarefa(s) agendada(s) liberada(s)", promoted)
+
+    def _insert_many(self, tasks: List[AgentTask]) -> None:
+        """Insere lote escolhendo entre sift individual e heapify.
+
+        heapify custa O(n + k) e k sifts custam O(k log(n + k)): reconstrói
+        quando o lote domina a fila.
+        """
+        if self.payload_store is not None:
+            # Antes de tocar na heap: um payload inválido não deixa lote pela metade
+            self._offload_payloads(tasks)
+
+        heap = self._heap
+        total = len(heap) + len(tasks)
+        if len(tasks) * total.bit_length() <= total:
+            for task in tasks:
+                self._insert(task)
+            return
+
+        if self._tombstones:
+            # A heap vai ser reconstruída de qualquer forma: descarta as mortas
+            tombstones = self._tombstones
+            heap[:] = [entry for entry in heap if entry[2].task_id not in tombstones]
+            tombstones.clear()
+
+        seq = self._seq
+        now = time.time()
+        for task in tasks:
+            if task.not_before and task.not_before > now:
+                self._schedule(task)
+                continue
+            heap.append((self._sort_key(task), next(seq), task))
+            self._index_add(task)
+
+        heapq.heapify(heap)
+        self._index = {entry[2].task_id: pos for pos, entry in enumerate(heap)}
+
+    def _restore(
+        self,
+        tasks: List[AgentTask],
+        seqs: Sequence[int],
+        ready: int,
+        keys: Optional[List[SortKey]] = None,
+    ) -> None:
+        """Carrega numa fila vazia as tarefas de um snapshot (O(n)).
+
+        As `ready` primeiras são prontas, na ordem da heap gravada, com seus
+        números de sequência em `seqs` e, se dadas, as chaves gravadas em
+        `keys`; as demais são agendadas. Sem `keys` as chaves são
+        recalculadas pela política (em ordem de seq se ela tem estado, para
+        que o fair queuing mantenha o FIFO de cada cliente).
+        """
+        heap = self._heap
+        ready_tasks = tasks[:ready]
+        if keys is None:
+            sort_key = self.policy.sort_key
+            if self.policy.stateful:
+                keys = [None] * ready
+                for pos in sorted(range(ready), key=seqs.__getitem__):
+                    keys[pos] = sort_key(ready_tasks[pos])
+            else:
+                keys = list(map(sort_key, ready_tasks))
+        heap.extend(zip(keys, seqs, ready_tasks))
+        # No-op com as chaves gravadas (a heap já está em ordem)
+        heapq.heapify(heap)
+        self._index = dict(zip([entry[2].task_id for entry in heap], itertools.count()))
+        self._seq = itertools.count(max((entry[1] for entry in heap), default=-1) + 1)
+
+        by_agent = self._by_agent
+        by_client = self._by_client
+        for task in ready_tasks:
+            task_id = task.task_id
+            bucket = by_agent.get(task.agent_name)
+            if bucket is None:
+                bucket = by_agent[task.agent_name] = {}
+            bucket[task_id] = task
+            bucket = by_client.get(task.client_id)
+            if bucket is None:
+                bucket = by_client[task.client_id] = {}
+            bucket[task_id] = task
+            if task.dedup_key is not None:
+                self._dedup[task.dedup_key] = task_id
+
+        for task in tasks[ready:]:
+            self._schedule(task)
+
+        if self.payload_store is not None:
+            for task in tasks:
+                if task.payload:
+                    self._offload_payload(task)
+
+    def _remove_at(self, pos: int) -> AgentTask:
+        """Remove e retorna a tarefa na posição `pos`, mantendo o invariante."""
+        task = self._heap_remove(pos)
+        self._index_discard(task)
+        return task
+
+    def _tombstone(self, pos: int) -> AgentTask:
+        """Marca a tarefa na posição `pos` como removida sem mexer na heap.
+
+        Compacta a heap quando os tombstones atingem compact_ratio.
+        """
+        task = self._heap[pos][2]
+        self._tombstones.add(task.task_id)
+        self._index_discard(task)
+        if len(self._tombstones) >= self.compact_ratio * len(self._heap):
+            self._compact()
+        return task
+
+    def _drop_dead_top(self) -> None:
+        """Descarta entradas mortas do topo da heap."""
+        heap = self._heap
+        tombstones = self._tombstones
+        while heap and heap[0][2].task_id in tombstones:
+            tombstones.discard(self._heap_remove(0).task_id)
+
+    def _purge(self, task_id: str) -> None:
+        """Remove fisicamente a entrada morta de task_id (reinserção do ID)."""
+        self._tombstones.discard(task_id)
+        self._heap_remove(self._index[task_id])
+
+    def _compact(self) -> None:
+        """Reconstrói a heap sem as entradas mortas (O(n))."""
+        tombstones = self._tombstones
+        heap = self._heap
+        dead = len(tombstones)
+        heap[:] = [entry for entry in heap if entry[2].task_id not in tombstones]
+        heapq.heapify(heap)
+        self._index = {entry[2].task_id: pos for pos, entry in enumerate(heap)}
+        tombstones.clear()
+        self.stats["total_compactions"] += 1
+        logger.debug("[COMPACT] %d tombstone(s) descartado(s)", dead)
+
+    def _heap_remove(self, pos: int) -> AgentTask:
+        """Tira a entrada `pos` da heap e de _index (sem os índices secundários)."""
+        heap = self._heap
+        last = heap.pop()
+        if pos == len(heap):
+            task = last[2]
+            del self._index[task.task_id]
+        else:
+            task = heap[pos][2]
+            del self._index[task.task_id]
+            heap[pos] = last
+            self._reposition(pos)
+        return task
+
+    def _offload_payload(self, task: AgentTask) -> None:
+        """Move o payload da tarefa para o payload_store."""
+        self.payload_store.put(task.task_id, task.payload)
+        task.payload = None
+
+    def _offload_payloads(self, tasks: List[AgentTask]) -> None:
+        """Move os payloads do lote para o payload_store (tudo ou nada).
+
+        Se algum put falha, os payloads já gravados saem do store e voltam
+        às suas tarefas antes de o erro ser propagado.
+        """
+        stored: List[Tuple[AgentTask, Dict[str, Any]]] = []
+        try:
+            for task in tasks:
+                if task.payload:
+                    payload = task.payload
+                    self._offload_payload(task)
+                    stored.append((task, payload))
+        except Exception:
+            for task, payload in stored:
+                self.payload_store.delete(task.task_id)
+                task.payload = payload
+            raise
+
+    def _load_payload(self, task: AgentTask) -> None:
+        """Reanexa à tarefa o payload guardado no store (se houver)."""
+        if self.payload_store is not None and task.payload is None:
+            task.payload = self.payload_store.pop(task.task_id) or {}
+
+    def _index_add(self, task: AgentTask) -> None:
+        """Registra a tarefa nos índices por agente, por cliente e por dedup_key."""
+        self._by_agent.setdefault(task.agent_name, {})[task.task_id] = task
+        self._by_client.setdefault(task.client_id, {})[task.task_id] = task
+        if task.dedup_key is not None:
+            self._dedup[task.dedup_key] = task.task_id
+
+    def _index_discard(self, task: AgentTask) -> None:
+        """Remove a tarefa dos índices, descartando buckets vazios."""
+        if (
+            task.dedup_key is not None
+            and self._dedup.get(task.dedup_key) == task.task_id
+        ):
+            del self._dedup[task.dedup_key]
+
+        bucket = self._by_agent[task.agent_name]
+        del bucket[task.task_id]
+        if not bucket:
+            del self._by_agent[task.agent_name]
+
+        bucket = self._by_client[task.client_id]
+        del bucket[task.task_id]
+        if not bucket:
+            del self._by_client[task.client_id]
+
+    def _reposition(self, pos: int) -> None:
+        """Restaura o invariante após a chave em `pos` mudar."""
+        heap = self._heap
+        if pos > 0 and heap[pos] < heap[(pos - 1) >> 1]:
+            self._sift_up(pos)
+        else:
+            self._sift_down(pos)
+
+    def _sift_up(self, pos: int) -> None:
+        heap = self._heap
+        index = self._index
+        item = heap[pos]
+        while pos > 0:
+            parent_pos = (pos - 1) >> 1
+            parent = heap[parent_pos]
+            if not item < parent:
+                break
+            heap[pos] = parent
+            index[parent[2].task_id] = pos
+            pos = parent_pos
+        heap[pos] = item
+        index[item[2].task_id] = pos
+
+    def _sift_down(self, pos: int) -> None:
+        heap = self._heap
+        index = self._index
+        size = len(heap)
+        item = heap[pos]
+        child = 2 * pos + 1
+        while child < size:
+            right = child + 1
+            if right < size and heap[right] < heap[child]:
+                child = right
+            child_item = heap[child]
+            if not child_item < item:
+                break
+            heap[pos] = child_item
+            index[child_item[2].task_id] = pos
+            pos = child
+            child = 2 * pos + 1
+        heap[pos] = item
+        index[item[2].task_id] = pos
 
     def get_stats(self) -> Dict[str, Any]:
         """Retorna estatísticas de uso da fila.
 
         Returns:
-            Dict com total_pushed, total_popped, total_rejected, size_atual
+            Dict com total_pushed, total_popped, total_rejected, total_overdue,
+            total_promoted, total_compactions, size_atual (prontas), scheduled
+            (agendadas), tombstones, tombstone_ratio (fração da heap), max_size
+            e policy
         """
+        size = self.size()
+        tombstones = len(self._tombstones)
         return {
             **self.stats,
-            "size_atual": self.size(),
+            "size_atual": size,
+            "scheduled": len(self._scheduled),
+            "tombstones": tombstones,
+            "tombstone_ratio": tombstones / max(1, size + tombstones),
             "max_size": self.max_size,
+            "policy": self.policy.name,
         }
 
     def print_stats(self) -> str:
@@ -349,7 +1661,10 @@ class AgentQueue:
             f"Total Pushed: {stats['total_pushed']}\n"
             f"Total Popped: {stats['total_popped']}\n"
             f"Total Rejected: {stats['total_rejected']}\n"
+            f"Total Overdue: {stats['total_overdue']}\n"
             f"Current Size: {stats['size_atual']}/{stats['max_size'] or '∞'}\n"
+            f"Scheduled: {stats['scheduled']}\n"
+            f"Tombstones: {stats['tombstones']} ({stats['tombstone_ratio'] * 100:.1f}%)\n"
             f"Efficiency (popped/pushed): {stats['total_popped'] / max(1, stats['total_pushed']) * 100:.1f}%"
         )
 
@@ -359,6 +1674,22 @@ class AgentQueue:
 # ============================================================================
 
 
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    """Suspende o gc cíclico durante cargas em massa (snapshot/load).
+
+    Milhões de objetos novos de uma vez disparam coletas completas seguidas
+    que não liberam nada (nenhum deles é lixo).
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
 def create_deadline(days_ahead: int, hours: int = 0, minutes: int = 0) -> datetime:
     """Cria deadline relativo (dias a partir de agora).
 
@@ -0,0 +1,373 @@
+"""Registro nomeado de circuit breakers com estado compartilhado entre processos.
+
+Cada módulo que criava seu próprio CircuitBreaker(config) aprendia sozinho
+que o WhatsApp caiu, e cada worker gastava failure_threshold requisições
+condenadas antes de abrir. O CircuitBreakerRegistry devolve sempre o mesmo
+breaker por nome dentro do processo e, com um BreakerStateStore, propaga as
+decisões OPEN/CLOSED para os breakers de mesmo nome nos outros processos:
+
+- Quem abre (ou fecha após HALF_OPEN bem-sucedido) publica o estado no store
+- Os demais consultam o store a cada poll_interval (padrão 50ms) e adotam
+  OPEN com o tempo restante do timeout de quem abriu (já com o backoff
+  daquela abertura), ou CLOSED
+- HALF_OPEN é local: cada processo testa a recuperação com suas próprias
+  chamadas de teste, e uma falha reabre (e republica) para todos
+- Publicação e consulta ao store são feitas fora do lock do breaker: um
+  banco travado atrasa só a thread que grava ou consulta, não as demais
+- Falhas do store (ex: banco travado) são logadas e não afetam as chamadas
+
+Exemplo:
+    registry = CircuitBreakerRegistry(
+        store=SQLiteBreakerStateStore("data/circuit_breakers.db"),
+        default_config=CircuitBreakerConfig(failure_threshold=5, timeout=60),
+    )
+    whatsapp = registry.get_or_create("whatsapp")
+
+    # Em qualquer módulo do processo (mesmo banco via CIRCUIT_BREAKER_STATE_DB):
+    cb = get_circuit_breaker_registry().get_or_create("whatsapp")
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import replace
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.core.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    CircuitState,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BreakerStateStore(ABC):
+    """Interface do estado compartilhado dos breakers, indexado por nome.
+
+    Cada publicação incrementa a versão do nome; quem lê compara a versão
+    com a última vista para saber se há decisão nova.
+    """
+
+    @abstractmethod
+    def publish(
+        self, name: str, state: str, opened_at: float, open_timeout: float = 0.0
+    ) -> int:
+        """Grava o estado, o timestamp Unix da abertura e a duração do OPEN.
+
+        Returns:
+            Nova versão do nome
+        """
+
+    @abstractmethod
+    def read(self, name: str) -> Optional[Tuple[str, float, int, float]]:
+        """Retorna (estado, opened_at, versão, open_timeout) ou None se nunca publicado."""
+
+    def close(self) -> None:
+        """Libera recursos do store."""
+
+
+class SQLiteBreakerStateStore(BreakerStateStore):
+    """Store em SQLite (uma linha por breaker), compartilhável entre processos.
+
+    WAL permite que os workers leiam sem bloquear quem publica; cada
+    publicação faz commit imediato para ficar visível aos demais.
+
+    Args:
+        path: Caminho do banco compartilhado pelos processos
+        timeout: Segundos de espera quando outro processo está gravando
+    """
+
+    def __init__(self, path: str, timeout: float = 5.0) -> None:
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS breakers ("
+            "name TEXT PRIMARY KEY, state TEXT NOT NULL, "
+            "opened_at REAL NOT NULL, version INTEGER NOT NULL, "
+            "open_timeout REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def publish(
+        self, name: str, state: str, opened_at: float, open_timeout: float = 0.0
+    ) -> int:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO breakers (name, state, opened_at, version, open_timeout) "
+                "VALUES (?, ?, ?, 1, ?) "
+                "ON CONFLICT(name) DO UPDATE SET state = excluded.state, "
+                "opened_at = excluded.opened_at, version = version + 1, "
+                "open_timeout = excluded.open_timeout",
+                (name, state, opened_at, open_timeout),
+            )
+            version = self._conn.execute(
+                "SELECT version FROM breakers WHERE name = ?", (name,)
+            ).fetchone()[0]
+            self._conn.commit()
+        return version
+
+    def read(self, name: str) -> Optional[Tuple[str, float, int, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, opened_at, version, open_timeout FROM breakers WHERE name = ?",
+                (name,),
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SharedCircuitBreaker(CircuitBreaker):
+    """CircuitBreaker que publica e adota OPEN/CLOSED via BreakerStateStore.
+
+    O caminho rápido em CLOSED ganha só uma leitura do relógio: o store é
+    consultado no máximo uma vez a cada poll_interval por processo.
+
+    Transições OPEN/CLOSED ficam numa caixa de saída (a mais recente vence)
+    preenchida sob o lock do breaker; quem causou a transição publica depois
+    de soltá-lo. O _publish_lock serializa as publicações, então o store
+    termina sempre com o estado local mais recente.
+
+    Args:
+        config: Configuração (config.name identifica o breaker no store)
+        store: Estado compartilhado
+        poll_interval: Intervalo (s) mínimo entre consultas ao store
+        clock: Relógio monotônico local (injetável em testes)
+        wall_clock: Relógio Unix comparável entre processos (injetável em testes)
+    """
+
+    def __init__(
+        self,
+        config: CircuitBreakerConfig,
+        store: BreakerStateStore,
+        poll_interval: float = 0.05,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+    ) -> None:
+        super().__init__(config, clock=clock)
+        self._store = store
+        self.poll_interval = poll_interval
+        self._wall_clock = wall_clock
+        self._seen_version = 0
+        self._next_sync = clock()
+        self._outbox: Optional[Tuple[str, float, float]] = None
+        self._publish_lock = threading.Lock()
+
+    def _admit(self) -> Optional[bool]:
+        now = self._clock()
+        if now >= self._next_sync:
+            self._sync(now)
+        return super()._admit()
+
+    def _sync(self, now: float) -> None:
+        """Adota a última decisão publicada por outro processo, se houver.
+
+        O store é lido fora do lock do breaker (um banco travado atrasa só a
+        thread que consulta); o resultado é aplicado sob o lock.
+        """
+        with self._lock:
+            if now < self._next_sync:
+                return  # outra thread acabou de consultar
+            self._next_sync = now + self.poll_interval
+        try:
+            row = self._store.read(self.config.name)
+        except sqlite3.Error as e:
+            logger.warning(
+                "CircuitBreaker '%s': falha ao ler estado compartilhado: %s",
+                self.config.name,
+                e,
+            )
+            return
+        with self._lock:
+            # Versão já vista (inclusive publicada por nós enquanto líamos),
+            # ou decisão local ainda não publicada: nada a adotar
+            if row is None or row[2] <= self._seen_version or self._outbox:
+                return
+            state, opened_at, self._seen_version, open_timeout = row
+            remote = CircuitState(state)
+
+            if remote == CircuitState.OPEN:
+                if self.state != CircuitState.OPEN:
+                    CircuitBreaker._transition_to(self, CircuitState.OPEN)
+                # O timeout conta desde a abertura em quem publicou
+                elapsed = max(0.0, self._wall_clock() - opened_at)
+                self._opened_at = now - elapsed
+                if open_timeout > 0:
+                    self._open_timeout = open_timeout
+            elif remote == CircuitState.CLOSED and self.state != CircuitState.CLOSED:
+                CircuitBreaker._transition_to(self, CircuitState.CLOSED)
+
+    def _transition_to(self, new_state: CircuitState) -> None:
+        super()._transition_to(new_state)
+        if new_state != CircuitState.HALF_OPEN:
+            self._outbox = (new_state.value, self._wall_clock(), self._open_timeout)
+
+    def _publish(self) -> None:
+        """Publica a transição pendente (chamado fora do lock do breaker)."""
+        if self._outbox is None:
+            return
+        with self._publish_lock:
+            with self._lock:
+                pending, self._outbox = self._outbox, None
+            if pending is None:
+                return  # outra thread já publicou
+            state, opened_at, open_timeout = pending
+            try:
+                version = self._store.publish(
+                    self.config.name, state, opened_at, open_timeout
+                )
+            except sqlite3.Error as e:
+                logger.warning(
+                    "CircuitBreaker '%s': falha ao publicar estado %s: %s",
+                    self.config.name,
+                    state,
+                    e,
+                )
+                return
+            with self._lock:
+                self._seen_version = max(self._seen_version, version)
+
+    def _on_success(self, duration: float = 0.0, probe: bool = False) -> None:
+        super()._on_success(duration, probe)
+        self._publish()
+
+    def _on_failure(
+        self, reason: str, duration: float = 0.0, probe: bool = False
+    ) -> None:
+        super()._on_failure(reason, duration, probe)
+        self._publish()
+
+    def reset(self) -> None:
+        super().reset()
+        self._publish()
+
+    def force_open(self) -> None:
+        super().force_open()
+        self._publish()
+
+    def force_closed(self) -> None:
+        super().force_closed()
+        self._publish()
+
+
+class CircuitBreakerRegistry:
+    """Breakers nomeados do processo (um por API/dependência).
+
+    Args:
+        store: Estado compartilhado entre processos (None = só no processo)
+        default_config: Configuração base de get_or_create() sem config
+            (o name é substituído pelo nome pedido)
+        poll_interval: Intervalo (s) entre consultas ao store
+    """
+
+    def __init__(
+        self,
+        store: Optional[BreakerStateStore] = None,
+        default_config: Optional[CircuitBreakerConfig] = None,
+        poll_interval: float = 0.05,
+    ) -> None:
+        self.store = store
+        self.default_config = default_config or CircuitBreakerConfig()
+        self.poll_interval = poll_interval
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(
+        self, name: str, config: Optional[CircuitBreakerConfig] = None
+    ) -> CircuitBreaker:
+        """Retorna o breaker `name`, criando-o na primeira chamada.
+
+        Args:
+            name: Identificador do breaker (ex: "whatsapp", "gmail")
+            config: Configuração usada só na criação (padrão: default_config)
+
+        Returns:
+            O mesmo CircuitBreaker para o mesmo nome
+        """
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                config = replace(config or self.default_config, name=name)
+                if self.store is None:
+                    breaker = CircuitBreaker(config)
+                else:
+                    breaker = SharedCircuitBreaker(
+                        config, self.store, poll_interval=self.poll_interval
+                    )
+                self._breakers[name] = breaker
+            return breaker
+
+    def get(self, name: str) -> Optional[CircuitBreaker]:
+        """Retorna o breaker `name` ou None se não foi criado."""
+        return self._breakers.get(name)
+
+    def names(self) -> List[str]:
+        """Nomes dos breakers registrados."""
+        return list(self._breakers)
+
+    def get_all_stats(self) -> Dict[str, dict]:
+        """get_stats() de todos os breakers, por nome."""
+        return {
+            name: breaker.get_stats() for name, breaker in list(self._breakers.items())
+        }
+
+    def cleanup(self) -> None:
+        """Libera executores dos breakers e fecha o store."""
+        for breaker in list(self._breakers.values()):
+            breaker.cleanup()
+        if self.store is not None:
+            self.store.close()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._breakers
+
+    def __len__(self) -> int:
+        return len(self._breakers)
+
+
+# Instância global
+_registry: Optional[CircuitBreakerRegistry] = None
+
+
+def get_circuit_breaker_registry() -> CircuitBreakerRegistry:
+    """Retorna o registro global (singleton).
+
+    Se CIRCUIT_BREAKER_STATE_DB estiver definido, os breakers compartilham
+    estado com os outros processos que usam o mesmo banco.
+
+    Returns:
+        CircuitBreakerRegistry singleton
+    """
+    global _registry
+
+    if _registry is None:
+        path = os.getenv("CIRCUIT_BREAKER_STATE_DB")
+        _registry = CircuitBreakerRegistry(
+            store=SQLiteBreakerStateStore(path) if path else None
+        )
+
+    return _registry
+
+
+def reset_circuit_breaker_registry() -> None:
+    """Reseta a instância global (útil para testes)."""
+    global _registry
+
+    if _registry is not None:
+        _registry.cleanup()
+
+    _registry = None
@@ -9,23 +9,80 @@ Usado para:
 - Proteger APIs externas (Gmail, WhatsApp, Telegram, Email)
 - Evitar cascata de falhas em sistema distribuído
 - Implementar fallback automático
-- Recuperação com backoff exponencial
+- Recuperação com backoff exponencial (backoff_multiplier/max_timeout)
 
-Inspiração: Netflix Hystrix, AWS Lambda Circuit Breakers
+Critério de abertura (CircuitBreakerConfig.window_type):
+- "consecutive" (padrão): abre após failure_threshold falhas seguidas
+- "count": janela deslizante das últimas window_size chamadas (ring buffer)
+- "time": janela deslizante dos últimos window_size segundos (buckets de 1s)
+
+Nas janelas o circuito abre pela taxa de falha ou pela taxa de chamadas
+lentas (duração >= slow_call_duration), desde que a janela tenha pelo menos
+minimum_calls chamadas: uma API que falha 40% das vezes nunca acumula
+failure_threshold falhas seguidas, mas estoura failure_rate_threshold=30.
+
+Com call_timeout a função roda num ThreadPoolExecutor do breaker e a
+chamada que passa do prazo levanta CircuitBreakerTimeout e conta como falha
+(a thread presa não é interrompida, mas o chamador é liberado). A latência
+de toda chamada executada vai para um histograma de buckets logarítmicos e
+get_stats() expõe p50/p95/p99.
+
+Thread-safety: um breaker pode proteger um cliente compartilhado entre
+threads (ex: executor do SagaOrchestrator). Em CLOSED a admissão é uma
+única leitura de `state`, sem lock; contadores, janela e transições são
+atualizados sob um lock ao fim da chamada. OPEN usa relógio monotônico e
+HALF_OPEN admite no máximo half_open_max_calls chamadas de teste
+simultâneas (as demais são rejeitadas como em OPEN).
+
+Async: async_call()/async_guard() compartilham estado e contadores com a
+API síncrona (o lock nunca é mantido através de um await). call_timeout
+vira asyncio.timeout() na própria coroutine, sem thread; uma chamada
+cancelada (CancelledError) não conta como falha do serviço, mas devolve a
+vaga de teste em HALF_OPEN.
+
+Resposta degradada: call(func, ..., fallback=f) e cache_ttl (cache
+last-known-good por função + argumentos). Quando a chamada é rejeitada
+(OPEN) ou falha, o breaker devolve o último resultado bom ainda válido
+para os mesmos argumentos; sem ele, o resultado de fallback(*args, **kwargs);
+sem nenhum dos dois, mantém o comportamento original (None se rejeitada,
+exceção propagada se falhou). Indicado para leituras idempotentes (ex:
+explicação do LLM para o mesmo modelo de venda).
+
+Backoff do OPEN: cada teste em HALF_OPEN que falha reabre o circuito por
+timeout * backoff_multiplier^n segundos (n = ciclos seguidos sem recuperar),
+limitado a max_timeout e reduzido aleatoriamente em até timeout_jitter
+(mesma fórmula da RetryPolicy). Um fechamento bem-sucedido volta ao timeout
+base. Assim um timeout base curto recupera rápido de instabilidades breves
+sem virar uma rajada de testes a cada minuto numa queda longa.
+
+Inspiração: Netflix Hystrix, Resilience4j, AWS Lambda Circuit Breakers
 Complexidade: O(1) per request (apenas counter checks)
 """
 
 from __future__ import annotations
 
+import asyncio
+import inspect
 import logging
+import math
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from collections import OrderedDict
 from enum import Enum
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Callable, Any, Optional
+from typing import Awaitable, Callable, Any, Optional, Tuple
 from functools import wraps
 
 logger = logging.getLogger(__name__)
 
+# Critérios de abertura aceitos em CircuitBreakerConfig.window_type
+WINDOW_TYPES = ("consecutive", "count", "time")
+
 
 class CircuitState(Enum):
     """Estados do Circuit Breaker."""
@@ -42,14 +99,110 @@ class CircuitBreakerConfig:
     Attributes:
         failure_threshold: Número de falhas consecutivas para abrir (padrão: 5)
         success_threshold: Número de sucessos em HALF_OPEN para fechar (padrão: 2)
-        timeout: Segundos em OPEN antes de tentar HALF_OPEN (padrão: 60)
+        timeout: Segundos em OPEN antes de tentar HALF_OPEN (padrão: 60); com
+            backoff, é a duração da primeira abertura
         name: Nome identificador para logging
+        window_type: Critério de abertura: "consecutive" (falhas seguidas),
+            "count" (últimas window_size chamadas) ou "time" (últimos
+            window_size segundos)
+        window_size: Tamanho da janela deslizante (chamadas ou segundos)
+        minimum_calls: Chamadas mínimas na janela antes de avaliar as taxas
+        failure_rate_threshold: Taxa de falha (0-100%) na janela que abre
+        slow_call_duration: Segundos a partir dos quais a chamada é lenta
+            (None = não mede chamadas lentas)
+        slow_call_rate_threshold: Taxa de chamadas lentas (0-100%) que abre
+        call_timeout: Prazo (s) de cada chamada; excedido, levanta
+            CircuitBreakerTimeout e conta como falha (None = sem prazo)
+        timeout_workers: Threads do executor usado com call_timeout
+        half_open_max_calls: Chamadas de teste simultâneas em HALF_OPEN
+        cache_ttl: Validade (s) do cache last-known-good (None = sem cache)
+        cache_max_entries: Entradas do cache (as menos usadas saem)
+        backoff_multiplier: Fator de crescimento do OPEN a cada teste em
+            HALF_OPEN que falha (1.0 = timeout fixo)
+        max_timeout: Teto (s) da duração do OPEN (None = sem teto)
+        timeout_jitter: Fração da duração do OPEN sorteada para baixo, em [0, 1]
+
+    Raises:
+        ValueError: Se algum parâmetro da janela está fora do intervalo válido
     """
 
     failure_threshold: int = 5
     success_threshold: int = 2
     timeout: int = 60
     name: str = "CircuitBreaker"
+    window_type: str = "consecutive"
+    window_size: int = 100
+    minimum_calls: int = 10
+    failure_rate_threshold: float = 50.0
+    slow_call_duration: Optional[float] = None
+    slow_call_rate_threshold: float = 100.0
+    call_timeout: Optional[float] = None
+    timeout_workers: int = 8
+    half_open_max_calls: int = 1
+    cache_ttl: Optional[float] = None
+    cache_max_entries: int = 1024
+    backoff_multiplier: float = 1.0
+    max_timeout: Optional[float] = None
+    timeout_jitter: float = 0.0
+
+    def __post_init__(self) -> None:
+        if self.window_type not in WINDOW_TYPES:
+            raise ValueError(
+                f"window_type inválido: {self.window_type!r} (use um de {WINDOW_TYPES})"
+            )
+        if self.window_size < 1:
+            raise ValueError(f"window_size deve ser >= 1, recebido {self.window_size}")
+        if self.minimum_calls < 1:
+            raise ValueError(
+                f"minimum_calls deve ser >= 1, recebido {self.minimum_calls}"
+            )
+        if self.window_type == "count" and self.minimum_calls > self.window_size:
+            raise ValueError(
+                f"minimum_calls ({self.minimum_calls}) maior que a janela "
+                f"de {self.window_size} chamadas: o circuito nunca abriria"
+            )
+        for field_name in ("failure_rate_threshold", "slow_call_rate_threshold"):
+            value = getattr(self, field_name)
+            if not 0 < value <= 100:
+                raise ValueError(
+                    f"{field_name} deve estar em (0, 100], recebido {value}"
+                )
+        if self.slow_call_duration is not None and self.slow_call_duration <= 0:
+            raise ValueError(
+                f"slow_call_duration deve ser > 0, recebido {self.slow_call_duration}"
+            )
+        if self.call_timeout is not None and self.call_timeout <= 0:
+            raise ValueError(f"call_timeout deve ser > 0, recebido {self.call_timeout}")
+        if self.timeout_workers < 1:
+            raise ValueError(
+                f"timeout_workers deve ser >= 1, recebido {self.timeout_workers}"
+            )
+        if self.half_open_max_calls < 1:
+            raise ValueError(
+                f"half_open_max_calls deve ser >= 1, recebido {self.half_open_max_calls}"
+            )
+        if self.cache_ttl is not None and self.cache_ttl <= 0:
+            raise ValueError(f"cache_ttl deve ser > 0, recebido {self.cache_ttl}")
+        if self.cache_max_entries < 1:
+            raise ValueError(
+                f"cache_max_entries deve ser >= 1, recebido {self.cache_max_entries}"
+            )
+        if self.backoff_multiplier < 1:
+            raise ValueError(
+                f"backoff_multiplier deve ser >= 1, recebido {self.backoff_multiplier}"
+            )
+        if self.max_timeout is not None and self.max_timeout < self.timeout:
+            raise ValueError(
+                f"max_timeout ({self.max_timeout}) menor que timeout ({self.timeout})"
+            )
+        if not 0 <= self.timeout_jitter <= 1:
+            raise ValueError(
+                f"timeout_jitter deve estar em [0, 1], recebido {self.timeout_jitter}"
+            )
+
+
+class CircuitBreakerTimeout(TimeoutError):
+    """Chamada protegida excedeu CircuitBreakerConfig.call_timeout."""
 
 
 @dataclass
@@ -66,6 +219,10 @@ class CircuitBreakerStats:
     last_state_change: Optional[datetime] = None
     last_failure_time: Optional[datetime] = None
     last_failure_reason: Optional[str] = None
+    total_slow_calls: int = 0  # Chamadas com duração >= slow_call_duration
+    total_timeouts: int = 0  # Chamadas interrompidas por call_timeout
+    total_cache_hits: int = 0  # Respostas servidas do cache last-known-good
+    total_fallbacks: int = 0  # Respostas servidas pelo fallback
 
     def success_rate(self) -> float:
         """Calcula taxa de sucesso (0-100%)."""
@@ -78,6 +235,141 @@ class CircuitBreakerStats:
         return 100.0 - self.success_rate()
 
 
+# Bits do resultado gravado em cada posição do ring buffer
+_RECORDED = 1
+_FAILED = 2
+_SLOW = 4
+
+
+class _CountWindow:
+    """Janela das últimas `size` chamadas (ring buffer com totais correntes).
+
+    Cada chamada sobrescreve a mais antiga e ajusta os totais: O(1).
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._ring = bytearray(size)
+        self._pos = 0
+        self._calls = 0
+        self._failures = 0
+        self._slow = 0
+
+    def record(self, failed: bool, slow: bool) -> None:
+        old = self._ring[self._pos]
+        if old:
+            self._calls -= 1
+            self._failures -= bool(old & _FAILED)
+            self._slow -= bool(old & _SLOW)
+        self._ring[self._pos] = (
+            _RECORDED | (_FAILED if failed else 0) | (_SLOW if slow else 0)
+        )
+        self._pos = (self._pos + 1) % self.size
+        self._calls += 1
+        self._failures += failed
+        self._slow += slow
+
+    def totals(self) -> Tuple[int, int, int]:
+        """(chamadas, falhas, lentas) na janela."""
+        return self._calls, self._failures, self._slow
+
+    def reset(self) -> None:
+        self._ring = bytearray(self.size)
+        self._pos = 0
+        self._calls = self._failures = self._slow = 0
+
+
+class _TimeWindow:
+    """Janela dos últimos `size` segundos em buckets de 1s com totais correntes.
+
+    Ao avançar o relógio só os buckets dos segundos que passaram são zerados
+    (no máximo `size`, uma vez por segundo): O(1) amortizado por chamada.
+    """
+
+    def __init__(self, size: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.size = size
+        self._clock = clock
+        self.reset()
+
+    def reset(self) -> None:
+        self._calls = [0] * self.size
+        self._failures = [0] * self.size
+        self._slow = [0] * self.size
+        self._head = int(self._clock())
+        self._total_calls = self._total_failures = self._total_slow = 0
+
+    def _advance(self) -> int:
+        now = int(self._clock())
+        if now - self._head >= self.size:
+            self.reset()
+            self._head = now
+        else:
+            for second in range(self._head + 1, now + 1):
+                i = second % self.size
+                self._total_calls -= self._calls[i]
+                self._total_failures -= self._failures[i]
+                self._total_slow -= self._slow[i]
+                self._calls[i] = self._failures[i] = self._slow[i] = 0
+            self._head = max(self._head, now)
+        return self._head % self.size
+
+    def record(self, failed: bool, slow: bool) -> None:
+        i = self._advance()
+        self._calls[i] += 1
+        self._failures[i] += failed
+        self._slow[i] += slow
+        self._total_calls += 1
+        self._total_failures += failed
+        self._total_slow += slow
+
+    def totals(self) -> Tuple[int, int, int]:
+        """(chamadas, falhas, lentas) nos últimos `size` segundos."""
+        self._advance()
+        return self._total_calls, self._total_failures, self._total_slow
+
+
+class _LatencyHistogram:
+    """Histograma de latência com buckets logarítmicos (resolução de ~5%).
+
+    Memória fixa e record() O(1); percentile() percorre os buckets.
+    O bucket i cobre (_MIN * _GROWTH^(i-1), _MIN * _GROWTH^i] segundos,
+    de 10µs a ~50min (o último bucket acumula o excedente).
+    """
+
+    _MIN = 1e-5
+    _GROWTH = 1.05
+    _BUCKETS = 420
+
+    def __init__(self) -> None:
+        self._counts = [0] * self._BUCKETS
+        self._log_growth = math.log(self._GROWTH)
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        if seconds <= self._MIN:
+            i = 0
+        else:
+            i = math.ceil(math.log(seconds / self._MIN) / self._log_growth)
+            i = min(i, self._BUCKETS - 1)
+        self._counts[i] += 1
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latência (s) do percentil q (0-100), ou None sem amostras."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        for i, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return min(self.max, self._MIN * self._GROWTH**i)
+        return self.max
+
+
 class CircuitBreaker:
     """Circuit Breaker para proteger chamadas a APIs externas.
 
@@ -105,16 +397,40 @@ class CircuitBreaker:
         ...     print(f"Email enviado: {result}")
     """
 
-    def __init__(self, config: CircuitBreakerConfig | None = None) -> None:
+    def __init__(
+        self,
+        config: CircuitBreakerConfig | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None,
+    ) -> None:
         """Inicializa Circuit Breaker.
 
         Args:
             config: Configuração do breaker (padrão: default config)
+            clock: Relógio monotônico do timeout em OPEN e da janela "time"
+                (injetável em testes)
+            rng: Gerador aleatório do timeout_jitter (injetável em testes)
         """
         self.config = config or CircuitBreakerConfig()
         self.state = CircuitState.CLOSED
         self.stats = CircuitBreakerStats()
-        self._last_failure_time: Optional[datetime] = None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._opened_at = clock()
+        self._rng = rng or random.Random()
+        self._open_cycles = 0  # Aberturas seguidas sem recuperar (backoff)
+        self._open_timeout = float(self.config.timeout)
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._window: _CountWindow | _TimeWindow | None = None
+        if self.config.window_type == "count":
+            self._window = _CountWindow(self.config.window_size)
+        elif self.config.window_type == "time":
+            self._window = _TimeWindow(self.config.window_size, clock)
+        self._latency = _LatencyHistogram()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # chave (func, args, kwargs) -> (expira em, resultado)
+        self._cache: OrderedDict[Any, Tuple[float, Any]] = OrderedDict()
 
         logger.info(
             "CircuitBreaker '%s' inicializado | "
@@ -130,23 +446,57 @@ class CircuitBreaker:
 
         Retorna True se:
         - Estado é OPEN
-        - Tempo de timeout expirou desde última falha
+        - Duração do OPEN (timeout com backoff) expirou desde a abertura
+          (relógio monotônico)
         """
         if self.state != CircuitState.OPEN:
             return False
+        return self._clock() - self._opened_at >= self._open_timeout
 
-        if self._last_failure_time is None:
-            return True
+    def _next_open_timeout(self) -> float:
+        """Duração (s) do próximo OPEN: backoff exponencial com teto e jitter.
 
-        elapsed = (datetime.now() - self._last_failure_time).total_seconds()
-        return elapsed >= self.config.timeout
+        O expoente para no ciclo em que a duração já atinge o teto (max_timeout
+        ou, sem teto, o maior float): multiplier ** ciclos sem limite levanta
+        OverflowError depois de ~1000 testes em HALF_OPEN que falharam.
+        """
+        config = self.config
+        multiplier = config.backoff_multiplier
+        ceiling = (
+            sys.float_info.max if config.max_timeout is None else config.max_timeout
+        )
+        exponent = 0
+        if multiplier > 1 and config.timeout > 0:
+            exponent = math.ceil(
+                math.log(ceiling, multiplier) - math.log(config.timeout, multiplier)
+            )
+            # multiplier ** exponent também precisa caber num float
+            max_exponent = math.floor(math.log(sys.float_info.max, multiplier)) - 1
+            exponent = max(0, min(self._open_cycles, exponent, max_exponent))
+        timeout = min(ceiling, config.timeout * multiplier**exponent)
+        return timeout * (1 - config.timeout_jitter * self._rng.random())
 
     def _transition_to(self, new_state: CircuitState) -> None:
-        """Transiciona para novo estado com logging."""
+        """Transiciona para novo estado com logging (chamado sob self._lock)."""
         old_state = self.state
         self.state = new_state
         self.stats.state_changes += 1
         self.stats.last_state_change = datetime.now()
+        if new_state == CircuitState.OPEN:
+            # Reabrir após HALF_OPEN conta mais um ciclo sem recuperação
+            if old_state == CircuitState.HALF_OPEN:
+                self._open_cycles += 1
+            else:
+                self._open_cycles = 0
+            self._open_timeout = self._next_open_timeout()
+            self._opened_at = self._clock()
+        elif new_state == CircuitState.HALF_OPEN:
+            self._probe_successes = 0
+        else:
+            self._open_cycles = 0
+        if self._window is not None:
+            # Cada estado avalia só as chamadas feitas nele
+            self._window.reset()
 
         logger.warning(
             "CircuitBreaker '%s' transição: %s -> %s",
@@ -155,82 +505,421 @@ class CircuitBreaker:
             new_state.value,
         )
 
-    def call(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    def call(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        fallback: Optional[Callable[..., Any]] = None,
+        **kwargs: Any,
+    ) -> Any:
         """Executa função com proteção de circuit breaker.
 
         Args:
             func: Função a executar
             *args: Argumentos posicionais
+            fallback: Chamado com os mesmos argumentos quando a chamada é
+                rejeitada ou falha e não há resultado válido no cache
             **kwargs: Argumentos nomeados
 
         Returns:
-            Resultado da função ou None se circuit está OPEN
+            Resultado da função; se rejeitada ou falhou, o resultado em cache
+            ou o do fallback; None se circuit está OPEN sem nenhum dos dois
 
         Raises:
             Propaga exceções de func se circuit está CLOSED/HALF_OPEN
+            (sem cache válido nem fallback)
+            CircuitBreakerTimeout: Se func excede config.call_timeout
         """
-        self.stats.total_requests += 1
-
-        # Se está OPEN e pode tentar reset, vai para HALF_OPEN
-        if self._can_attempt_reset():
-            self._transition_to(CircuitState.HALF_OPEN)
-            logger.info("CircuitBreaker '%s' tentando recuperação", self.config.name)
-
-        # Se está OPEN (e não pode tentar reset), fail fast
-        if self.state == CircuitState.OPEN:
-            self.stats.total_rejections += 1
-            logger.warning(
-                "CircuitBreaker '%s' OPEN — rejeitando requisição (%d rejections)",
-                self.config.name,
-                self.stats.total_rejections,
-            )
-            return None
+        key = self._cache_key(func, args, kwargs)
+        probe = self._admit()
+        if probe is None:
+            return self._degraded(key, fallback, args, kwargs)[1]
 
         # Executa em CLOSED ou HALF_OPEN
+        start = time.perf_counter()
         try:
-            result = func(*args, **kwargs)
-            self._on_success()
-            return result
+            if self.config.call_timeout is None:
+                result = func(*args, **kwargs)
+            else:
+                result = self._call_with_timeout(func, args, kwargs)
         except Exception as e:
-            self._on_failure(str(e))
+            self._on_failure(str(e), time.perf_counter() - start, probe)
+            served, value = self._degraded(key, fallback, args, kwargs)
+            if not served:
+                raise
+            return value
+        except BaseException:
+            self._release(probe)
             raise
+        self._on_success(time.perf_counter() - start, probe)
+        self._cache_put(key, result)
+        return result
+
+    def _cache_key(self, func: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        """Chave do cache last-known-good, ou None (sem cache ou argumentos não-hashable)."""
+        if self.config.cache_ttl is None:
+            return None
+        key = (func, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _cache_put(self, key: Any, result: Any) -> None:
+        """Grava o resultado bom no cache (LRU).
+
+        Só roda com cache_ttl ligado: o sucesso sem cache continua sem lock.
+        A gravação inteira fica sob o lock porque _degraded move e remove
+        entradas do mesmo OrderedDict em outras threads.
+        """
+        if key is None:
+            return
+        with self._lock:
+            self._cache[key] = (self._clock() + self.config.cache_ttl, result)
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.config.cache_max_entries:
+                self._cache.popitem(last=False)
+
+    def _degraded(
+        self,
+        key: Any,
+        fallback: Optional[Callable[..., Any]],
+        args: tuple,
+        kwargs: dict,
+    ) -> Tuple[bool, Any]:
+        """Resposta para chamada rejeitada ou que falhou.
+
+        Returns:
+            (True, resultado em cache ainda válido), (True, resultado do
+            fallback) ou (False, None) se não há nenhum dos dois
+        """
+        if key is not None:
+            with self._lock:
+                entry = self._cache.get(key)
+                if entry is not None and entry[0] > self._clock():
+                    self._cache.move_to_end(key)
+                    self.stats.total_cache_hits += 1
+                    return True, entry[1]
+                if entry is not None:
+                    del self._cache[key]
+        if fallback is None:
+            return False, None
+        with self._lock:
+            self.stats.total_fallbacks += 1
+        return True, fallback(*args, **kwargs)
+
+    def _admit(self) -> Optional[bool]:
+        """Decide se a chamada pode executar.
 
-    def _on_success(self) -> None:
-        """Callback após sucesso."""
-        self.stats.total_successes += 1
-        self.stats.consecutive_successes += 1
-        self.stats.consecutive_failures = 0
+        Returns:
+            False para chamada normal (CLOSED), True para chamada de teste
+            em HALF_OPEN ou None se rejeitada (OPEN ou HALF_OPEN lotado)
+        """
+        # Caminho rápido: em CLOSED basta uma leitura, sem lock
+        if self.state == CircuitState.CLOSED:
+            return False
 
-        # Em HALF_OPEN: se atingiu threshold de sucessos, fecha
-        if self.state == CircuitState.HALF_OPEN:
-            if self.stats.consecutive_successes >= self.config.success_threshold:
-                self._transition_to(CircuitState.CLOSED)
+        with self._lock:
+            if self.state == CircuitState.CLOSED:
+                return False
+            # Se está OPEN e pode tentar reset, vai para HALF_OPEN
+            if self._can_attempt_reset():
+                self._transition_to(CircuitState.HALF_OPEN)
                 logger.info(
-                    "CircuitBreaker '%s' RECUPERADO (CLOSED)",
-                    self.config.name,
+                    "CircuitBreaker '%s' tentando recuperação", self.config.name
                 )
+            if (
+                self.state == CircuitState.HALF_OPEN
+                and self._probes_in_flight < self.config.half_open_max_calls
+            ):
+                self._probes_in_flight += 1
+                return True
+            # OPEN (timeout não expirou) ou HALF_OPEN sem vaga: fail fast
+            self.stats.total_requests += 1
+            self.stats.total_rejections += 1
+            rejections = self.stats.total_rejections
+            state = self.state
 
-    def _on_failure(self, reason: str) -> None:
-        """Callback após falha."""
-        self.stats.total_failures += 1
-        self.stats.consecutive_failures += 1
-        self.stats.consecutive_successes = 0
-        self.stats.last_failure_time = datetime.now()
-        self.stats.last_failure_reason = reason
-        self._last_failure_time = datetime.now()
-
-        # Se atingiu threshold de falhas em CLOSED/HALF_OPEN, abre
-        if self.state in (CircuitState.CLOSED, CircuitState.HALF_OPEN):
-            if self.stats.consecutive_failures >= self.config.failure_threshold:
-                self._transition_to(CircuitState.OPEN)
+        logger.warning(
+            "CircuitBreaker '%s' %s — rejeitando requisição (%d rejections)",
+            self.config.name,
+            state.value,
+            rejections,
+        )
+        return None
+
+    def _release(self, probe: bool) -> None:
+        """Contabiliza chamada interrompida sem resultado (ex: KeyboardInterrupt).
+
+        Não conta como sucesso nem falha, mas devolve a vaga de teste.
+        """
+        with self._lock:
+            self.stats.total_requests += 1
+            if probe:
+                self._probes_in_flight -= 1
+
+    def _call_with_timeout(
+        self, func: Callable[..., Any], args: tuple, kwargs: dict
+    ) -> Any:
+        """Executa func no executor do breaker esperando até call_timeout.
+
+        O prazo conta a partir da submissão: com todas as threads presas em
+        chamadas penduradas, as novas expiram na fila em vez de acumular.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.config.timeout_workers,
+                    thread_name_prefix=f"cb-{self.config.name}",
+                )
+            executor = self._executor
+        future = executor.submit(func, *args, **kwargs)
+        try:
+            return future.result(timeout=self.config.call_timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self.stats.total_timeouts += 1
+            raise CircuitBreakerTimeout(
+                f"CircuitBreaker '{self.config.name}': chamada excedeu "
+                f"{self.config.call_timeout}s"
+            ) from None
+
+    def _is_slow(self, duration: float) -> bool:
+        """True se a chamada levou slow_call_duration ou mais."""
+        slow = self.config.slow_call_duration
+        if slow is None or duration < slow:
+            return False
+        self.stats.total_slow_calls += 1
+        return True
+
+    def _window_tripped(self, failed: bool, duration: float) -> Optional[str]:
+        """Registra a chamada na janela e diz por que o circuito deve abrir.
+
+        Returns:
+            Motivo da abertura ou None se as taxas estão abaixo dos limites
+            (ou a janela ainda não tem minimum_calls chamadas)
+        """
+        self._window.record(failed, self._is_slow(duration))
+        if self.state != CircuitState.CLOSED:
+            return None
+        config = self.config
+        calls, failures, slow = self._window.totals()
+        if calls < config.minimum_calls:
+            return None
+        if config.window_type == "count":
+            window = f"janela das últimas {config.window_size} chamadas"
+        else:
+            window = f"janela de {config.window_size}s"
+        if failures * 100 >= config.failure_rate_threshold * calls:
+            return (
+                f"taxa de falha {failures * 100 / calls:.1f}% "
+                f"(limite {config.failure_rate_threshold:g}%) em {calls} chamadas, {window}"
+            )
+        if slow * 100 >= config.slow_call_rate_threshold * calls:
+            return (
+                f"taxa de chamadas lentas {slow * 100 / calls:.1f}% "
+                f"(limite {config.slow_call_rate_threshold:g}%) em {calls} chamadas, {window}"
+            )
+        return None
+
+    def _on_success(self, duration: float = 0.0, probe: bool = False) -> None:
+        """Callback após sucesso.
+
+        Só chamadas de teste (probe) decidem o fechamento em HALF_OPEN;
+        resultados de chamadas admitidas antes de uma transição só entram
+        nos contadores.
+        """
+        with self._lock:
+            self.stats.total_requests += 1
+            self.stats.total_successes += 1
+            self.stats.consecutive_successes += 1
+            self.stats.consecutive_failures = 0
+            self._latency.record(duration)
+            if probe:
+                self._probes_in_flight -= 1
+
+            if self._window is None:
+                self._is_slow(duration)
+            else:
+                reason = self._window_tripped(False, duration)
+                if reason is not None:
+                    self._transition_to(CircuitState.OPEN)
+                    logger.error(
+                        "CircuitBreaker '%s' ABERTO por %s",
+                        self.config.name,
+                        reason,
+                    )
+                    return
+
+            # Em HALF_OPEN: se atingiu threshold de sucessos de teste, fecha
+            if probe and self.state == CircuitState.HALF_OPEN:
+                self._probe_successes += 1
+                if self._probe_successes >= self.config.success_threshold:
+                    self._transition_to(CircuitState.CLOSED)
+                    logger.info(
+                        "CircuitBreaker '%s' RECUPERADO (CLOSED)",
+                        self.config.name,
+                    )
+
+    def _on_failure(
+        self, reason: str, duration: float = 0.0, probe: bool = False
+    ) -> None:
+        """Callback após falha (chamada de teste que falha reabre o circuito)."""
+        with self._lock:
+            self.stats.total_requests += 1
+            self.stats.total_failures += 1
+            self.stats.consecutive_failures += 1
+            self.stats.consecutive_successes = 0
+            self.stats.last_failure_time = datetime.now()
+            self.stats.last_failure_reason = reason
+            self._latency.record(duration)
+            if probe:
+                self._probes_in_flight -= 1
+
+            window_reason = None
+            if self._window is None:
+                self._is_slow(duration)
+                tripped = (
+                    self.state == CircuitState.CLOSED
+                    and self.stats.consecutive_failures >= self.config.failure_threshold
+                )
+            else:
+                window_reason = self._window_tripped(True, duration)
+                tripped = window_reason is not None
+            probe_failed = probe and self.state == CircuitState.HALF_OPEN
+            if not (tripped or probe_failed):
+                return
+
+            self._transition_to(CircuitState.OPEN)
+            if probe_failed:
+                logger.error(
+                    "CircuitBreaker '%s' ABERTO: chamada de teste falhou | Motivo: %s",
+                    self.config.name,
+                    reason,
+                )
+            elif window_reason is not None:
+                logger.error(
+                    "CircuitBreaker '%s' ABERTO por %s | Última falha: %s",
+                    self.config.name,
+                    window_reason,
+                    reason,
+                )
+            else:
                 logger.error(
-                    "CircuitBreaker '%s' ABERTO após %d falhas | Motivo: %s",
+                    "CircuitBreaker '%s' ABERTO após %d falhas consecutivas | Motivo: %s",
                     self.config.name,
-                    self.config.failure_threshold,
+                    self.stats.consecutive_failures,
                     reason,
                 )
 
-    def guard(self) -> Callable:
+    async def async_call(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        *args: Any,
+        fallback: Optional[Callable[..., Any]] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Versão async de call(): aguarda func(*args, **kwargs) com proteção.
+
+        Args:
+            func: Função async (ou que retorna awaitable) a executar
+            *args: Argumentos posicionais
+            fallback: Como em call(); pode ser sync ou async
+            **kwargs: Argumentos nomeados
+
+        Returns:
+            Resultado da coroutine; se rejeitada ou falhou, o resultado em
+            cache ou o do fallback; None se circuit está OPEN sem nenhum dos dois
+
+        Raises:
+            Propaga exceções de func se circuit está CLOSED/HALF_OPEN
+            (sem cache válido nem fallback)
+            CircuitBreakerTimeout: Se func excede config.call_timeout
+            asyncio.CancelledError: Propagado sem contar como falha
+        """
+        key = self._cache_key(func, args, kwargs)
+        probe = self._admit()
+        if probe is None:
+            return await self._async_degraded(key, fallback, args, kwargs, None)
+
+        start = time.perf_counter()
+        deadline = None
+        try:
+            if self.config.call_timeout is None:
+                result = await func(*args, **kwargs)
+            else:
+                async with asyncio.timeout(self.config.call_timeout) as deadline:
+                    result = await func(*args, **kwargs)
+        except Exception as e:
+            duration = time.perf_counter() - start
+            if deadline is not None and deadline.expired():
+                with self._lock:
+                    self.stats.total_timeouts += 1
+                error = CircuitBreakerTimeout(
+                    f"CircuitBreaker '{self.config.name}': chamada excedeu "
+                    f"{self.config.call_timeout}s"
+                )
+                error.__suppress_context__ = True
+                self._on_failure(str(error), duration, probe)
+                return await self._async_degraded(key, fallback, args, kwargs, error)
+            self._on_failure(str(e), duration, probe)
+            return await self._async_degraded(key, fallback, args, kwargs, e)
+        except BaseException:
+            # Cancelamento (ou KeyboardInterrupt) não diz nada sobre o serviço
+            self._release(probe)
+            raise
+        self._on_success(time.perf_counter() - start, probe)
+        self._cache_put(key, result)
+        return result
+
+    async def _async_degraded(
+        self,
+        key: Any,
+        fallback: Optional[Callable[..., Any]],
+        args: tuple,
+        kwargs: dict,
+        error: Optional[Exception],
+    ) -> Any:
+        """Como _degraded(), aguardando fallback async.
+
+        Sem resposta degradada levanta `error` (falha) ou retorna None (rejeitada).
+        """
+        served, value = self._degraded(key, fallback, args, kwargs)
+        if not served:
+            if error is not None:
+                raise error
+            return None
+        if inspect.isawaitable(value):
+            value = await value
+        return value
+
+    def async_guard(self, fallback: Optional[Callable[..., Any]] = None) -> Callable:
+        """Decorator para proteger função async com circuit breaker.
+
+        Uso:
+            @circuit_breaker.async_guard()
+            async def minha_funcao():
+                pass
+
+        Args:
+            fallback: Repassado a async_call()
+
+        Returns:
+            Decorator function
+        """
+
+        def decorator(func: Callable[..., Awaitable[Any]]) -> Callable:
+            @wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                return await self.async_call(func, *args, fallback=fallback, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def guard(self, fallback: Optional[Callable[..., Any]] = None) -> Callable:
         """Decorator para proteger função com circuit breaker.
 
         Uso:
@@ -238,6 +927,9 @@ class CircuitBreaker:
             def minha_funcao():
                 pass
 
+        Args:
+            fallback: Repassado a call()
+
         Returns:
             Decorator function
         """
@@ -245,7 +937,7 @@ class CircuitBreaker:
         def decorator(func: Callable) -> Callable:
             @wraps(func)
             def wrapper(*args: Any, **kwargs: Any) -> Any:
-                return self.call(func, *args, **kwargs)
+                return self.call(func, *args, fallback=fallback, **kwargs)
 
             return wrapper
 
@@ -256,8 +948,14 @@ class CircuitBreaker:
 
         Returns:
             Dict com métricas (total_requests, success_rate, state, etc)
+            latency_p50_ms/latency_p95_ms/latency_p99_ms (None sem chamadas)
+            e, no modo janela, window_calls/window_failure_rate/window_slow_call_rate
         """
-        return {
+        with self._lock:
+            return self._stats_snapshot()
+
+    def _stats_snapshot(self) -> dict:
+        stats = {
             "name": self.config.name,
             "state": self.state.value,
             "total_requests": self.stats.total_requests,
@@ -273,7 +971,29 @@ class CircuitBreaker:
             if self.stats.last_state_change
             else None,
             "last_failure_reason": self.stats.last_failure_reason,
+            "total_slow_calls": self.stats.total_slow_calls,
+            "total_timeouts": self.stats.total_timeouts,
+            "total_cache_hits": self.stats.total_cache_hits,
+            "total_fallbacks": self.stats.total_fallbacks,
+            "open_cycles": self._open_cycles,
+            "open_timeout": round(self._open_timeout, 3),
         }
+        for q in (50, 95, 99):
+            latency = self._latency.percentile(q)
+            stats[f"latency_p{q}_ms"] = (
+                round(latency * 1000, 3) if latency is not None else None
+            )
+        if self._window is not None:
+            calls, failures, slow = self._window.totals()
+            stats["window_type"] = self.config.window_type
+            stats["window_calls"] = calls
+            stats["window_failure_rate"] = (
+                f"{failures * 100 / calls if calls else 0:.1f}%"
+            )
+            stats["window_slow_call_rate"] = (
+                f"{slow * 100 / calls if calls else 0:.1f}%"
+            )
+        return stats
 
     def print_stats(self) -> str:
         """Retorna string formatada com estatísticas."""
@@ -291,21 +1011,35 @@ class CircuitBreaker:
             f"State Changes: {stats['state_changes']}",
             f"Last State Change: {stats['last_state_change']}",
             f"Last Failure: {stats['last_failure_reason']}",
+            f"Latency p50/p95/p99 (ms): {stats['latency_p50_ms']} / "
+            f"{stats['latency_p95_ms']} / {stats['latency_p99_ms']}",
         ]
         return "\n".join(lines)
 
     def reset(self) -> None:
         """Reset circuit breaker para estado CLOSED com stats zeradas."""
-        self._transition_to(CircuitState.CLOSED)
-        self.stats = CircuitBreakerStats()
+        with self._lock:
+            self._transition_to(CircuitState.CLOSED)
+            self.stats = CircuitBreakerStats()
+            self._latency = _LatencyHistogram()
+            self._cache.clear()
         logger.info("CircuitBreaker '%s' resetado", self.config.name)
 
+    def cleanup(self) -> None:
+        """Libera o executor de call_timeout (sem esperar chamadas presas)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
     def force_open(self) -> None:
         """Force circuit breaker para estado OPEN (útil para testes/manutenção)."""
-        self._transition_to(CircuitState.OPEN)
+        with self._lock:
+            self._transition_to(CircuitState.OPEN)
         logger.warning("CircuitBreaker '%s' forçado para OPEN", self.config.name)
 
     def force_closed(self) -> None:
         """Force circuit breaker para estado CLOSED."""
-        self._transition_to(CircuitState.CLOSED)
+        with self._lock:
+            self._transition_to(CircuitState.CLOSED)
         logger.warning("CircuitBreaker '%s' forçado para CLOSED", self.config.name)
@@ -0,0 +1,285 @@
+"""Variantes concorrentes da AgentQueue (threads e asyncio).
+
+A AgentQueue não tem sincronização: heap, índices e `stats` são mutados sem
+lock, então não pode ser compartilhada entre threads produtoras e o pool do
+SagaOrchestrator. Este módulo oferece:
+
+- ThreadSafeAgentQueue: todas as operações públicas sob um RLock e `get()`
+  bloqueante (Condition, sem polling) com timeout opcional
+- AsyncAgentQueue: `await get()` / `await put()` para uso num event loop;
+  consumidores e produtores esperam em futures acordados pelo push/pop
+
+Exemplo (threads):
+    queue = ThreadSafeAgentQueue(max_size=10_000)
+    # produtores
+    queue.push(TaskPriority.HIGH, deadline, 1, "nf_agent", "client_1", {})
+    # consumidores
+    task = queue.get(timeout=5)  # None se nada chegar em 5s
+
+Exemplo (asyncio):
+    queue = AsyncAgentQueue(max_size=1_000)
+    await queue.put(TaskPriority.HIGH, deadline, 1, "nf_agent", "client_1", {})
+    task = await queue.get()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from src.core.agent_queue import AgentQueue, AgentTask
+
+# Operações públicas da AgentQueue executadas sob o lock da ThreadSafeAgentQueue
+_SYNCHRONIZED_METHODS = (
+    "push",
+    "push_many",
+    "_push_many",  # chamado direto pela ShardedAgentQueue
+    "push_task",
+    "retry",
+    "get_dead_letters",
+    "pop",
+    "pop_many",
+    "pop_batch",
+    "drain",
+    "peek",
+    "size",
+    "is_empty",
+    "scheduled_size",
+    "next_due_in",
+    "clear",
+    "snapshot",
+    "get_all_tasks",
+    "get_scheduled_tasks",
+    "get_tasks_for_agent",
+    "get_tasks_for_client",
+    "count_tasks_for_agent",
+    "count_tasks_for_client",
+    "remove_task",
+    "update_priority",
+    "update_deadline",
+    "get_payload",
+    "__contains__",
+    "get_stats",
+    "print_stats",
+)
+
+
+def _synchronized(name: str) -> Callable[..., Any]:
+    """Cria método que chama a implementação seguinte no MRO sob o lock."""
+
+    @functools.wraps(getattr(AgentQueue, name))
+    def method(self: "ThreadSafeAgentQueue", *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            return getattr(super(ThreadSafeAgentQueue, self), name)(*args, **kwargs)
+
+    return method
+
+
+class ThreadSafeAgentQueue(AgentQueue):
+    """AgentQueue compartilhável entre threads.
+
+    Todas as operações públicas são atômicas (RLock reentrante, pois algumas
+    chamam outras, ex: pop_many -> drain). Inserções notificam consumidores
+    bloqueados em get().
+
+    Combina com outras variantes via herança múltipla, ex:
+        class SharedPersistentQueue(ThreadSafeAgentQueue, PersistentAgentQueue): ...
+
+    Args:
+        Os mesmos da AgentQueue (ou da classe combinada).
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self._lock = threading.RLock()
+        self._not_empty = threading.Condition(self._lock)
+        # Subclasses podem inserir no __init__ (ex: replay da fila persistente)
+        with self._lock:
+            super().__init__(*args, **kwargs)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[AgentTask]:
+        """Remove a tarefa de maior prioridade, bloqueando enquanto vazia.
+
+        Args:
+            timeout: Segundos máximos de espera (None = esperar indefinidamente)
+
+        Tarefas agendadas (not_before) acordam o consumidor quando vencem.
+
+        Returns:
+            Próxima AgentTask, ou None se o timeout expirar com a fila vazia
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._not_empty:
+            while not self.size():
+                wait = self.next_due_in()
+                if end is not None:
+                    remaining = end - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._not_empty.wait(wait)
+            return self.pop()
+
+    def iter_ordered(self, limit: Optional[int] = None) -> Iterator[AgentTask]:
+        """Como AgentQueue.iter_ordered, mas lendo a heap sob o lock.
+
+        Um gerador não pode segurar o lock entre yields: as `limit` primeiras
+        tarefas são coletadas de uma vez (O(k log k)) e o iterador percorre
+        essa cópia.
+        """
+        with self._lock:
+            return iter(list(super().iter_ordered(limit)))
+
+    def _insert(self, task: AgentTask) -> None:
+        super()._insert(task)
+        self._not_empty.notify()
+
+    def _insert_many(self, tasks: List[AgentTask]) -> None:
+        super()._insert_many(tasks)
+        self._not_empty.notify(len(tasks))
+
+
+for _name in _SYNCHRONIZED_METHODS:
+    setattr(ThreadSafeAgentQueue, _name, _synchronized(_name))
+
+
+class AsyncAgentQueue(AgentQueue):
+    """AgentQueue para um único event loop asyncio.
+
+    `get()` aguarda uma tarefa e `put()` aguarda espaço (max_size) sem
+    polling: cada espera é um future acordado pela inserção/remoção
+    correspondente, inclusive quando feita pelos métodos síncronos
+    (push, push_many, pop, drain...). Não é thread-safe: use apenas a partir
+    das coroutines do loop dono da fila.
+
+    Args:
+        Os mesmos da AgentQueue.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self._getters: Deque[asyncio.Future] = deque()
+        self._putters: Deque[asyncio.Future] = deque()
+        super().__init__(*args, **kwargs)
+
+    async def get(self) -> AgentTask:
+        """Remove a tarefa de maior prioridade, aguardando enquanto vazia.
+
+        Tarefas agendadas (not_before) acordam o consumidor quando vencem.
+        """
+        while not self.size():
+            delay = self.next_due_in()
+            if delay is None:
+                await self._wait(self._getters, self._has_tasks)
+                continue
+            try:
+                await asyncio.wait_for(
+                    self._wait(self._getters, self._has_tasks), delay
+                )
+            except asyncio.TimeoutError:
+                pass
+        return self.pop()
+
+    async def put(
+        self,
+        priority: int,
+        deadline: datetime,
+        cost: int,
+        agent_name: str,
+        client_id: str,
+        payload: Dict[str, Any],
+        task_id: Optional[str] = None,
+        dedup_key: Optional[str] = None,
+    ) -> str:
+        """Insere tarefa, aguardando espaço se a fila estiver cheia.
+
+        Mesmos argumentos e validações de push(); em vez de rejeitar por
+        max_size, espera até que um consumidor libere espaço. Um push cuja
+        dedup_key já está na fila não ocupa espaço novo e não espera.
+
+        Returns:
+            task_id da tarefa inserida (ou da que absorveu o push duplicado)
+        """
+        while self._is_full() and (dedup_key is None or dedup_key not in self._dedup):
+            await self._wait(self._putters, self._has_room)
+        return self.push(
+            priority,
+            deadline,
+            cost,
+            agent_name,
+            client_id,
+            payload,
+            task_id,
+            dedup_key=dedup_key,
+        )
+
+    def clear(self) -> None:
+        super().clear()
+        while self._putters and self._has_room():
+            self._wakeup_next(self._putters)
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _is_full(self) -> bool:
+        return bool(self.max_size) and self._count() >= self.max_size
+
+    def _has_tasks(self) -> bool:
+        return self._ready_count() > 0
+
+    def _has_room(self) -> bool:
+        return not self._is_full()
+
+    async def _wait(
+        self, waiters: Deque[asyncio.Future], ready: Callable[[], bool]
+    ) -> None:
+        """Aguarda ser acordado; se cancelado após o aviso, repassa-o."""
+        waiter = asyncio.get_running_loop().create_future()
+        waiters.append(waiter)
+        try:
+            await waiter
+        except BaseException:
+            waiter.cancel()
+            try:
+                waiters.remove(waiter)
+            except ValueError:
+                pass
+            if ready() and not waiter.cancelled():
+                self._wakeup_next(waiters)
+            raise
+
+    @staticmethod
+    def _wakeup_next(waiters: Deque[asyncio.Future]) -> None:
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+    def _insert(self, task: AgentTask) -> None:
+        super()._insert(task)
+        self._wakeup_next(self._getters)
+
+    def _insert_many(self, tasks: List[AgentTask]) -> None:
+        super()._insert_many(tasks)
+        for _ in range(min(len(tasks), len(self._getters))):
+            self._wakeup_next(self._getters)
+
+    def _remove_at(self, pos: int) -> AgentTask:
+        task = super()._remove_at(pos)
+        self._wakeup_next(self._putters)
+        return task
+
+    def _tombstone(self, pos: int) -> AgentTask:
+        task = super()._tombstone(pos)
+        self._wakeup_next(self._putters)
+        return task
+
+    def _unschedule(self, task_id: str) -> AgentTask:
+        task = super()._unschedule(task_id)
+        self._wakeup_next(self._putters)
+        return task
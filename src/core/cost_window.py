@@ -0,0 +1,116 @@
+"""Contabilidade de custo por agente em janela deslizante.
+
+APIs externas (WhatsApp, LLM) cobram/limitam por minuto. O AgentCostWindow
+registra o `cost` de cada tarefa retirada da fila por agente e informa quanto
+ainda cabe na janela atual, para que AgentQueue.pop_batch() e o
+AgentDispatcher mantenham cada API logo abaixo da cota — pulando apenas as
+tarefas do agente saturado, sem bloquear as demais.
+
+Exemplo:
+    window = AgentCostWindow({"attendance_agent": 80, "llm_agent": 500}, window_seconds=60)
+    tasks = queue.pop_batch(budget=100, cost_window=window)
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+
+class AgentCostWindow:
+    """Cota de custo por agente numa janela deslizante.
+
+    Agentes sem entrada em `limits` não têm cota (não são contabilizados).
+
+    Args:
+        limits: Mapa agent_name -> custo máximo por janela
+        window_seconds: Tamanho da janela deslizante em segundos
+        clock: Relógio monotônico (injetável em testes)
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, int],
+        window_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if window_seconds <= 0:
+            raise ValueError(f"window_seconds deve ser > 0, recebido {window_seconds}")
+        for agent_name, limit in limits.items():
+            if limit < 0:
+                raise ValueError(f"Cota inválida para {agent_name}: {limit} (>= 0)")
+
+        self.limits = dict(limits)
+        self.window_seconds = window_seconds
+        self._clock = clock
+        # agent_name -> eventos (instante, custo) dentro da janela
+        self._events: Dict[str, Deque[Tuple[float, int]]] = {}
+        self._used: Dict[str, int] = {}
+
+    def used(self, agent_name: str) -> int:
+        """Custo gasto pelo agente na janela atual."""
+        self._expire(agent_name, self._clock())
+        return self._used.get(agent_name, 0)
+
+    def remaining(self, agent_name: str) -> Optional[int]:
+        """Custo ainda disponível na janela (None = agente sem cota)."""
+        limit = self.limits.get(agent_name)
+        if limit is None:
+            return None
+        return max(0, limit - self.used(agent_name))
+
+    def can_spend(self, agent_name: str, cost: int) -> bool:
+        """Verifica se `cost` cabe na cota atual do agente."""
+        limit = self.limits.get(agent_name)
+        if limit is None:
+            return True
+        return self.used(agent_name) + cost <= limit
+
+    def record(self, agent_name: str, cost: int) -> None:
+        """Registra gasto do agente (no-op para agentes sem cota)."""
+        if agent_name not in self.limits or cost <= 0:
+            return
+        self._events.setdefault(agent_name, deque()).append((self._clock(), cost))
+        self._used[agent_name] = self._used.get(agent_name, 0) + cost
+
+    def next_available_in(self, agent_name: str, cost: int) -> float:
+        """Segundos até `cost` caber na cota do agente.
+
+        Returns:
+            0.0 se já cabe; math.inf se cost excede a própria cota
+        """
+        limit = self.limits.get(agent_name)
+        if limit is None or self.can_spend(agent_name, cost):
+            return 0.0
+        if cost > limit:
+            return math.inf
+
+        now = self._clock()
+        excess = self._used[agent_name] + cost - limit
+        for instant, spent in self._events[agent_name]:
+            excess -= spent
+            if excess <= 0:
+                return max(0.0, instant + self.window_seconds - now)
+        return 0.0
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Uso atual por agente com cota."""
+        return {
+            agent_name: {
+                "used": self.used(agent_name),
+                "limit": limit,
+                "window_seconds": self.window_seconds,
+            }
+            for agent_name, limit in self.limits.items()
+        }
+
+    def _expire(self, agent_name: str, now: float) -> None:
+        """Descarta eventos que saíram da janela."""
+        events = self._events.get(agent_name)
+        if not events:
+            return
+        cutoff = now - self.window_seconds
+        while events and events[0][0] <= cutoff:
+            self._used[agent_name] -= events.popleft()[1]
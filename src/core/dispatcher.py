@@ -0,0 +1,312 @@
+"""Dispatcher concorrente para tarefas da AgentQueue.
+
+Retira tarefas da fila em ordem de prioridade e executa os handlers de cada
+agente num pool de threads (agentes I/O-bound: WhatsApp, Gmail, LLM).
+
+- Limite global de workers (max_workers)
+- Limite de concorrência por agente (ex: no máximo 2 `nf_agent` simultâneos)
+  sem bloquear a fila: tarefas de um agente saturado ficam num buffer local
+  enquanto tarefas de outros agentes seguem sendo despachadas
+- Cotas de custo por agente em janela deslizante (AgentCostWindow): tarefas
+  de um agente sem cota são puladas e ficam na fila, as demais seguem
+- Retry com relatório de sucesso/falha/retry: por padrão as falhas voltam
+  por AgentQueue.retry() (agendadas com backoff exponencial e jitter,
+  dead-letter e orçamento por agente); backoff=False reinsere na hora
+
+Apenas a thread coordenadora (quem chama run()) acessa a fila; os workers
+executam somente o handler, então a AgentQueue não precisa de locks aqui.
+
+Exemplo:
+    dispatcher = AgentDispatcher(
+        queue,
+        handlers={"nf_agent": emitir_nf, "attendance_agent": enviar_whatsapp},
+        max_workers=8,
+        agent_limits={"nf_agent": 2},
+    )
+    results = dispatcher.run()
+    print(dispatcher.get_stats())
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from src.core.agent_queue import AgentQueue, AgentTask
+from src.core.cost_window import AgentCostWindow
+
+logger = logging.getLogger("agent_dispatcher")
+
+TaskHandler = Callable[[AgentTask], Any]
+
+
+class MissingHandlerError(LookupError):
+    """Nenhum handler registrado para o agente da tarefa (não há retry)."""
+
+
+@dataclass
+class TaskResult:
+    """Resultado de uma tentativa de execução de tarefa.
+
+    Attributes:
+        task: Tarefa executada
+        status: "success", "failed" ou "retry" (falhou e voltou para a fila)
+        result: Retorno do handler (em caso de sucesso)
+        error: Mensagem de erro (em caso de falha/retry)
+        attempt: Número da tentativa (1 = primeira execução)
+        duration_ms: Duração da execução do handler
+    """
+
+    task: AgentTask
+    status: str
+    result: Any = None
+    error: Optional[str] = None
+    attempt: int = 1
+    duration_ms: float = 0.0
+
+
+class AgentDispatcher:
+    """Executa tarefas da AgentQueue num pool de threads.
+
+    Args:
+        queue: Fila de onde as tarefas são retiradas
+        handlers: Mapa agent_name -> handler(task)
+        max_workers: Número de threads do pool
+        agent_limits: Mapa agent_name -> máximo de execuções simultâneas
+        max_retries: Tentativas extras por tarefa antes de marcar como falha
+            (só com backoff=False)
+        default_handler: Handler para agentes sem entrada em `handlers`
+        on_result: Callback chamado (na thread coordenadora) a cada TaskResult
+        cost_window: Cotas de custo por agente (janela deslizante); tarefas
+            que estourariam a cota ficam na fila para um próximo run()
+        backoff: Se True (padrão), falhas são reagendadas por queue.retry();
+            tentativas e dead-letter seguem a retry_policy da fila
+            (max_retries é ignorado) e a tarefa reagendada fica para o run()
+            em que o atraso já venceu. Se False, a falha volta pronta na
+            hora (push_task), sem atraso, até max_retries
+    """
+
+    def __init__(
+        self,
+        queue: AgentQueue,
+        handlers: Optional[Dict[str, TaskHandler]] = None,
+        max_workers: int = 4,
+        agent_limits: Optional[Dict[str, int]] = None,
+        max_retries: int = 2,
+        default_handler: Optional[TaskHandler] = None,
+        on_result: Optional[Callable[[TaskResult], None]] = None,
+        cost_window: Optional[AgentCostWindow] = None,
+        backoff: bool = True,
+    ):
+        if max_workers < 1:
+            raise ValueError(f"max_workers deve ser >= 1, recebido {max_workers}")
+        for agent_name, limit in (agent_limits or {}).items():
+            if limit < 1:
+                raise ValueError(f"Limite inválido para {agent_name}: {limit} (>= 1)")
+        if max_retries < 0:
+            raise ValueError(f"max_retries deve ser >= 0, recebido {max_retries}")
+
+        self.queue = queue
+        self.handlers = dict(handlers or {})
+        self.max_workers = max_workers
+        self.agent_limits = dict(agent_limits or {})
+        self.max_retries = max_retries
+        self.default_handler = default_handler
+        self.on_result = on_result
+        self.cost_window = cost_window
+        self.backoff = backoff
+        # Buffer de tarefas já retiradas da fila cujo agente está no limite
+        self.max_deferred = max_workers * 4
+        self._attempts: Dict[str, int] = {}
+        self.stats = {
+            "dispatched": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "retried": 0,
+        }
+
+    def run(
+        self, max_tasks: Optional[int] = None, max_cost: Optional[int] = None
+    ) -> List[TaskResult]:
+        """Processa tarefas até a fila esvaziar ou um limite ser atingido.
+
+        Args:
+            max_tasks: Máximo de tarefas novas retiradas da fila (None =
+                todas); retries de tarefas que já falharam não contam
+            max_cost: Soma máxima de `cost` das tarefas retiradas (None = sem limite)
+
+        Returns:
+            TaskResults de todas as tentativas, na ordem de conclusão
+        """
+        results: List[TaskResult] = []
+        in_flight: Dict[Future, AgentTask] = {}
+        started: Dict[Future, float] = {}
+        running: Counter = Counter()
+        deferred: Dict[str, Deque[AgentTask]] = {}
+        deferred_count = 0
+        taken = 0
+        spent = 0
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="agent-worker"
+        ) as executor:
+            while True:
+                # 1. Preenche workers livres: primeiro tarefas adiadas, depois a fila
+                while len(in_flight) < self.max_workers:
+                    task = self._next_deferred(deferred, running)
+                    if task is not None:
+                        deferred_count -= 1
+                    else:
+                        if deferred_count >= self.max_deferred:
+                            break
+                        task = self._take(
+                            None if max_cost is None else max_cost - spent,
+                            retries_only=max_tasks is not None and taken >= max_tasks,
+                        )
+                        if task is None:
+                            break
+                        if not self._is_retry(task):
+                            taken += 1
+                        spent += task.cost
+
+                        if not self._has_slot(task.agent_name, running):
+                            deferred.setdefault(task.agent_name, deque()).append(task)
+                            deferred_count += 1
+                            continue
+
+                    running[task.agent_name] += 1
+                    future = executor.submit(self._execute, task)
+                    in_flight[future] = task
+                    started[future] = time.perf_counter()
+                    self.stats["dispatched"] += 1
+
+                if not in_flight:
+                    break
+
+                # 2. Aguarda ao menos uma conclusão e registra resultados
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = in_flight.pop(future)
+                    duration_ms = (time.perf_counter() - started.pop(future)) * 1000
+                    running[task.agent_name] -= 1
+                    result = self._collect(task, future, duration_ms)
+                    results.append(result)
+                    if self.on_result is not None:
+                        self.on_result(result)
+
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna contadores de despacho."""
+        stats = {
+            **self.stats,
+            "max_workers": self.max_workers,
+            "agent_limits": dict(self.agent_limits),
+        }
+        if self.cost_window is not None:
+            stats["cost_window"] = self.cost_window.get_stats()
+        return stats
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _take(
+        self, budget: Optional[int], retries_only: bool = False
+    ) -> Optional[AgentTask]:
+        """Retira a próxima tarefa que cabe no orçamento (e na cota do agente).
+
+        Com retries_only (max_tasks atingido), só retira a cabeça da fila se
+        ela é um retry.
+        """
+        if self.cost_window is not None and not retries_only:
+            batch = self.queue.pop_batch(
+                budget=budget, max_tasks=1, cost_window=self.cost_window
+            )
+            return batch[0] if batch else None
+
+        head = self.queue.peek()
+        if head is None or (budget is not None and head.cost > budget):
+            return None
+        if retries_only:
+            if not self._is_retry(head):
+                return None
+            if self.cost_window is not None:
+                if not self.cost_window.can_spend(head.agent_name, head.cost):
+                    return None
+                self.cost_window.record(head.agent_name, head.cost)
+        return self.queue.pop()
+
+    def _is_retry(self, task: AgentTask) -> bool:
+        """A tarefa já falhou antes (reagendada por retry() ou reinserida)."""
+        return task.attempts > 0 or task.task_id in self._attempts
+
+    def _has_slot(self, agent_name: str, running: Counter) -> bool:
+        limit = self.agent_limits.get(agent_name)
+        return limit is None or running[agent_name] < limit
+
+    def _next_deferred(
+        self, deferred: Dict[str, Deque[AgentTask]], running: Counter
+    ) -> Optional[AgentTask]:
+        """Retorna a tarefa adiada de um agente que ganhou slot livre."""
+        for agent_name, tasks in deferred.items():
+            if self._has_slot(agent_name, running):
+                task = tasks.popleft()
+                if not tasks:
+                    del deferred[agent_name]
+                return task
+        return None
+
+    def _execute(self, task: AgentTask) -> Any:
+        handler = self.handlers.get(task.agent_name, self.default_handler)
+        if handler is None:
+            raise MissingHandlerError(
+                f"Nenhum handler para o agente '{task.agent_name}'"
+            )
+        return handler(task)
+
+    def _collect(
+        self, task: AgentTask, future: Future, duration_ms: float
+    ) -> TaskResult:
+        """Converte a conclusão do future em TaskResult (com retry se cabível)."""
+        if self.backoff:
+            attempt = task.attempts + 1
+        else:
+            attempt = self._attempts.get(task.task_id, 0) + 1
+        error = future.exception()
+
+        if error is None:
+            self._attempts.pop(task.task_id, None)
+            self.stats["succeeded"] += 1
+            logger.debug("[DONE] %s em %.1fms", task, duration_ms)
+            return TaskResult(
+                task, "success", future.result(), None, attempt, duration_ms
+            )
+
+        # KeyError/IndexError do handler são falhas comuns: só handler ausente não tem retry
+        retryable = not isinstance(error, MissingHandlerError)
+        if retryable and self.backoff:
+            if self.queue.retry(task, error) is not None:
+                self.stats["retried"] += 1
+                return TaskResult(task, "retry", None, str(error), attempt, duration_ms)
+        elif retryable and attempt <= self.max_retries:
+            self._attempts[task.task_id] = attempt
+            self.queue.push_task(task)
+            self.stats["retried"] += 1
+            logger.warning(
+                "[RETRY] %s tentativa %d/%d: %s",
+                task.task_id,
+                attempt,
+                self.max_retries + 1,
+                error,
+            )
+            return TaskResult(task, "retry", None, str(error), attempt, duration_ms)
+
+        self._attempts.pop(task.task_id, None)
+        self.stats["failed"] += 1
+        logger.error("[FAILED] %s após %d tentativa(s): %s", task, attempt, error)
+        return TaskResult(task, "failed", None, str(error), attempt, duration_ms)
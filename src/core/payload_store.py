@@ -0,0 +1,132 @@
+"""Armazenamento de payloads fora da heap da AgentQueue.
+
+Com milhões de tarefas enfileiradas, os dicts de payload dominam o uso de
+memória. Um PayloadStore guarda esses dados fora dos objetos AgentTask
+(em SQLite, arquivo ou memória), indexados por task_id, e a fila os recarrega
+apenas quando a tarefa sai (pop) ou quando solicitado explicitamente.
+
+Exemplo:
+    store = SQLitePayloadStore("data/payloads.db")
+    queue = AgentQueue(payload_store=store)
+    queue.push(..., payload={"pdf_base64": "..."})  # payload vai para o disco
+    task = queue.pop()  # task.payload recarregado por task_id
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+
+class PayloadStore(ABC):
+    """Interface de armazenamento de payloads indexados por task_id.
+
+    Implementações devem ser baratas para put/get/delete individuais; a fila
+    chama put() no push e pop()/delete() quando a tarefa sai ou é removida.
+    Subclasses incompletas falham já na construção (TypeError).
+    """
+
+    @abstractmethod
+    def put(self, task_id: str, payload: Dict[str, Any]) -> None:
+        """Armazena (ou substitui) o payload da tarefa."""
+
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna o payload sem removê-lo, ou None se ausente."""
+
+    @abstractmethod
+    def delete(self, task_id: str) -> None:
+        """Remove o payload (no-op se ausente)."""
+
+    def pop(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna e remove o payload, ou None se ausente."""
+        payload = self.get(task_id)
+        if payload is not None:
+            self.delete(task_id)
+        return payload
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove todos os payloads."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Quantidade de payloads armazenados."""
+
+
+class InMemoryPayloadStore(PayloadStore):
+    """Store em memória (serializado em JSON para reduzir overhead de dicts)."""
+
+    def __init__(self) -> None:
+        self._data: Dict[str, str] = {}
+
+    def put(self, task_id: str, payload: Dict[str, Any]) -> None:
+        self._data[task_id] = json.dumps(payload, ensure_ascii=False)
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        raw = self._data.get(task_id)
+        return json.loads(raw) if raw is not None else None
+
+    def delete(self, task_id: str) -> None:
+        self._data.pop(task_id, None)
+
+    def pop(self, task_id: str) -> Optional[Dict[str, Any]]:
+        raw = self._data.pop(task_id, None)
+        return json.loads(raw) if raw is not None else None
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLitePayloadStore(PayloadStore):
+    """Store em SQLite (fora da heap do processo).
+
+    Escritas não fazem commit individual (o store espelha a fila em memória,
+    não é a fonte de durabilidade); use flush() para forçar o commit.
+
+    Args:
+        path: Caminho do banco (":memory:" para testes)
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS payloads (task_id TEXT PRIMARY KEY, data TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def put(self, task_id: str, payload: Dict[str, Any]) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO payloads (task_id, data) VALUES (?, ?)",
+            (task_id, json.dumps(payload, ensure_ascii=False)),
+        )
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(
+            "SELECT data FROM payloads WHERE task_id = ?", (task_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, task_id: str) -> None:
+        self._conn.execute("DELETE FROM payloads WHERE task_id = ?", (task_id,))
+
+    def clear(self) -> None:
+        self._conn.execute("DELETE FROM payloads")
+
+    def flush(self) -> None:
+        """Confirma (commit) as escritas pendentes."""
+        self._conn.commit()
+
+    def close(self) -> None:
+        """Confirma escritas pendentes e fecha a conexão com o banco."""
+        self._conn.commit()
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM payloads").fetchone()[0]
@@ -0,0 +1,475 @@
+"""AgentQueue persistente (crash-safe) em SQLite modo WAL.
+
+A AgentQueue vive apenas na memória do processo: cada execução de
+`python -m src.orchestrator queue ...` começava com a fila vazia. A
+PersistentAgentQueue mantém a mesma interface e espelha cada mutação numa
+tabela SQLite:
+
+- Startup: replay de todas as linhas (ordem de inserção) com heapify O(n);
+  tarefas agendadas (not_before) voltam para a heap de agendadas
+- Promoção de agendadas para prontas não escreve no banco (a linha já
+  guarda not_before)
+- Mutações: registradas num buffer coalescido por task_id (última operação
+  vence) e gravadas em lote (group commit) a cada `commit_every` operações
+  ou `commit_interval` segundos
+- WAL + synchronous=NORMAL: commits baratos e sem corromper o banco em crash
+
+Garantia: após flush()/close() (ou a cada commit automático) o estado da
+fila sobrevive a reinícios. Com commit_every > 1, um crash perde no máximo
+as operações ainda no buffer.
+
+Exemplo:
+    queue = PersistentAgentQueue("data/agent_queue.db", commit_every=500)
+    queue.push_many(tarefas_noturnas)
+    queue.close()  # commit final
+
+    queue = PersistentAgentQueue("data/agent_queue.db")  # outro processo
+    task = queue.pop()
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.core.agent_queue import AgentQueue, AgentTask
+from src.core.payload_store import PayloadStore
+from src.core.retry import DeadLetter, RetryPolicy
+from src.core.scheduling import SchedulingPolicy, SortKey
+
+logger = logging.getLogger("agent_queue")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    priority INTEGER NOT NULL,
+    deadline REAL NOT NULL,
+    cost INTEGER NOT NULL,
+    agent_name TEXT NOT NULL,
+    client_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    not_before REAL NOT NULL DEFAULT 0,
+    dedup_key TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS dead_letters (
+    task_id TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    deadline REAL NOT NULL,
+    cost INTEGER NOT NULL,
+    agent_name TEXT NOT NULL,
+    client_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    error TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    failed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Operações pendentes no buffer de group commit
+_PUT = "put"
+_UPDATE = "update"
+_DELETE = "delete"
+
+
+class PersistentAgentQueue(AgentQueue):
+    """AgentQueue com persistência em SQLite (WAL) e group commit.
+
+    Args:
+        path: Caminho do banco SQLite (diretório é criado se necessário)
+        max_size: Limite máximo de tarefas (None = ilimitado)
+        commit_every: Operações acumuladas antes de um commit automático
+            (1 = commit a cada mutação)
+        commit_interval: Segundos máximos entre commits com operações pendentes
+        payload_store: Store opcional de payloads (ver AgentQueue)
+        policy: Política de escalonamento (ver AgentQueue). As chaves são
+            recalculadas no replay, na ordem de inserção
+        lazy_delete: Remoção por tombstone (ver AgentQueue); o DELETE no
+            banco é registrado na hora, só a heap em memória é preguiçosa
+        compact_ratio: Fração de tombstones que dispara a compactação
+        dedup_policy: Merge de push(dedup_key=...) duplicado (ver AgentQueue).
+            As chaves das tarefas enfileiradas são gravadas e voltam no
+            replay; as chaves já retiradas (dedup_ttl) ficam só em memória
+        dedup_ttl: Segundos em que chaves retiradas absorvem pushes
+        dedup_max_keys: Máximo de chaves retiradas lembradas
+        retry_policy: Backoff/dead-letter de retry() (ver AgentQueue). As
+            tentativas ficam na tarefa gravada e os dead-letters numa tabela
+            própria (as max_dead_letters mais recentes voltam no replay)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_size: Optional[int] = None,
+        commit_every: int = 1,
+        commit_interval: float = 1.0,
+        payload_store: Optional[PayloadStore] = None,
+        policy: Optional[SchedulingPolicy] = None,
+        lazy_delete: bool = False,
+        compact_ratio: float = 0.5,
+        dedup_policy: str = "earliest_deadline",
+        dedup_ttl: float = 0.0,
+        dedup_max_keys: int = 100_000,
+        retry_policy: Optional[RetryPolicy] = None,
+    ):
+        if commit_every < 1:
+            raise ValueError(f"commit_every deve ser >= 1, recebido {commit_every}")
+
+        super().__init__(
+            max_size=max_size,
+            payload_store=payload_store,
+            policy=policy,
+            lazy_delete=lazy_delete,
+            compact_ratio=compact_ratio,
+            dedup_policy=dedup_policy,
+            dedup_ttl=dedup_ttl,
+            dedup_max_keys=dedup_max_keys,
+            retry_policy=retry_policy,
+        )
+        self.path = path
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        # task_id -> (operação, tarefa, payload em JSON serializado no insert)
+        self._pending: Dict[str, Tuple[str, Optional[AgentTask], Optional[str]]] = {}
+        self._pending_dead: List[Tuple[DeadLetter, str]] = []
+        self._last_commit = time.monotonic()
+        self._replaying = False
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn: Optional[sqlite3.Connection] = sqlite3.connect(
+            path, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+        self._replay()
+
+    # ------------------------------------------------------------------
+    # Startup / durabilidade
+    # ------------------------------------------------------------------
+
+    def _replay(self) -> None:
+        """Reconstrói a heap a partir do banco (ordem de inserção)."""
+        start = time.perf_counter()
+        rows = self._conn.execute(
+            "SELECT priority, deadline, cost, task_id, agent_name, client_id,"
+            " payload, created_at, not_before, dedup_key, attempts"
+            " FROM tasks ORDER BY rowid"
+        ).fetchall()
+        tasks = [
+            AgentTask(
+                priority=priority,
+                deadline=deadline,
+                cost=cost,
+                task_id=task_id,
+                agent_name=agent_name,
+                client_id=client_id,
+                payload=json.loads(payload),
+                created_at=created_at,
+                not_before=not_before,
+                dedup_key=dedup_key,
+                attempts=attempts,
+            )
+            for (
+                priority,
+                deadline,
+                cost,
+                task_id,
+                agent_name,
+                client_id,
+                payload,
+                created_at,
+                not_before,
+                dedup_key,
+                attempts,
+            ) in rows
+        ]
+
+        self._replaying = True
+        try:
+            self._insert_many(tasks)
+        finally:
+            self._replaying = False
+
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = 'stats'"
+        ).fetchone()
+        if row:
+            self.stats.update(json.loads(row[0]))
+
+        dead_rows = self._conn.execute(
+            "SELECT task_id, priority, deadline, cost, agent_name, client_id, payload,"
+            " created_at, attempts, error, reason, failed_at FROM dead_letters"
+            " ORDER BY rowid DESC LIMIT ?",
+            (self.retry_policy.max_dead_letters,),
+        ).fetchall()
+        self._dead_letters.extend(
+            DeadLetter(
+                AgentTask(
+                    priority=priority,
+                    deadline=deadline,
+                    cost=cost,
+                    task_id=task_id,
+                    agent_name=agent_name,
+                    client_id=client_id,
+                    payload=json.loads(payload),
+                    created_at=created_at,
+                    attempts=attempts,
+                ),
+                error,
+                reason,
+                failed_at,
+            )
+            for (
+                task_id,
+                priority,
+                deadline,
+                cost,
+                agent_name,
+                client_id,
+                payload,
+                created_at,
+                attempts,
+                error,
+                reason,
+                failed_at,
+            ) in reversed(dead_rows)
+        )
+
+        logger.info(
+            "[REPLAY] %d tarefa(s) restaurada(s) de %s em %.3fs",
+            len(tasks),
+            self.path,
+            time.perf_counter() - start,
+        )
+
+    def flush(self) -> None:
+        """Grava as operações pendentes e o contador de stats (commit)."""
+        if self._conn is None:
+            return
+
+        puts: List[Tuple[Any, ...]] = []
+        updates: List[Tuple[Any, ...]] = []
+        deletes: List[Tuple[str]] = []
+        for task_id, (op, task, payload) in self._pending.items():
+            if op == _PUT:
+                puts.append(
+                    (
+                        task_id,
+                        int(task.priority),
+                        task.deadline,
+                        task.cost,
+                        task.agent_name,
+                        task.client_id,
+                        payload,
+                        task.created_at,
+                        task.not_before,
+                        task.dedup_key,
+                        task.attempts,
+                    )
+                )
+            elif op == _UPDATE:
+                updates.append((int(task.priority), task.deadline, task.cost, task_id))
+            else:
+                deletes.append((task_id,))
+
+        with self._conn:
+            if deletes:
+                self._conn.executemany("DELETE FROM tasks WHERE task_id = ?", deletes)
+            if puts:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO tasks (task_id, priority, deadline, cost,"
+                    " agent_name, client_id, payload, created_at, not_before,"
+                    " dedup_key, attempts) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    puts,
+                )
+            if updates:
+                self._conn.executemany(
+                    "UPDATE tasks SET priority = ?, deadline = ?, cost = ?"
+                    " WHERE task_id = ?",
+                    updates,
+                )
+            if self._pending_dead:
+                self._conn.executemany(
+                    "INSERT INTO dead_letters (task_id, priority, deadline, cost,"
+                    " agent_name, client_id, payload, created_at, attempts, error,"
+                    " reason, failed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            dead.task.task_id,
+                            int(dead.task.priority),
+                            dead.task.deadline,
+                            dead.task.cost,
+                            dead.task.agent_name,
+                            dead.task.client_id,
+                            payload,
+                            dead.task.created_at,
+                            dead.task.attempts,
+                            dead.error,
+                            dead.reason,
+                            dead.failed_at,
+                        )
+                        for dead, payload in self._pending_dead
+                    ],
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('stats', ?)",
+                (json.dumps(self.stats),),
+            )
+
+        self._pending.clear()
+        self._pending_dead.clear()
+        self._last_commit = time.monotonic()
+
+    def close(self) -> None:
+        """Faz o commit final e fecha o banco."""
+        if self._conn is None:
+            return
+        self.flush()
+        self._conn.close()
+        self._conn = None
+        logger.info("[CLOSE] Fila persistente %s fechada", self.path)
+
+    def _record(
+        self,
+        task_id: str,
+        op: str,
+        task: Optional[AgentTask],
+        payload: Optional[str] = None,
+    ) -> None:
+        """Acumula operação no buffer e dispara group commit se necessário."""
+        if self._replaying:
+            return
+
+        previous = self._pending.get(task_id)
+        if op == _UPDATE and previous is not None and previous[0] == _PUT:
+            # INSERT ainda pendente já grava os campos atuais da tarefa
+            return
+        if op == _PUT:
+            # Reinserção vai para o fim: a ordem do buffer vira a ordem de rowid
+            self._pending.pop(task_id, None)
+        self._pending[task_id] = (op, task, payload)
+        self._maybe_flush()
+
+    def _dump_payload(self, task: AgentTask) -> Optional[str]:
+        """Serializa o payload em JSON antes de a tarefa entrar na fila.
+
+        Raises:
+            ValueError: Se o payload não é serializável (datetime, Decimal,
+                bytes...): a fila fica intacta em vez de travar no flush
+        """
+        if self._replaying:
+            return None
+        try:
+            return json.dumps(task.payload or {}, ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            raise ValueError(
+                f"payload da tarefa {task.task_id} não é serializável em JSON: {e}"
+            ) from e
+
+    def _maybe_flush(self) -> None:
+        """Group commit: grava ao atingir commit_every ou commit_interval."""
+        if (
+            len(self._pending) + len(self._pending_dead) >= self.commit_every
+            or time.monotonic() - self._last_commit >= self.commit_interval
+        ):
+            self.flush()
+
+    # ------------------------------------------------------------------
+    # Pontos de mutação da AgentQueue
+    # ------------------------------------------------------------------
+
+    def _insert(self, task: AgentTask) -> None:
+        payload = self._dump_payload(task)
+        super()._insert(task)
+        self._record(task.task_id, _PUT, task, payload)
+
+    def _insert_many(self, tasks: List[AgentTask]) -> None:
+        payloads = [self._dump_payload(task) for task in tasks]
+        super()._insert_many(tasks)
+        for task, payload in zip(tasks, payloads):
+            self._record(task.task_id, _PUT, task, payload)
+
+    def _restore(
+        self,
+        tasks: List[AgentTask],
+        seqs: Sequence[int],
+        ready: int,
+        keys: Optional[List[SortKey]] = None,
+    ) -> None:
+        payloads = [self._dump_payload(task) for task in tasks]
+        super()._restore(tasks, seqs, ready, keys)
+        for task, payload in zip(tasks, payloads):
+            self._record(task.task_id, _PUT, task, payload)
+
+    def _remove_at(self, pos: int) -> AgentTask:
+        task = super()._remove_at(pos)
+        self._record(task.task_id, _DELETE, None)
+        return task
+
+    def _tombstone(self, pos: int) -> AgentTask:
+        task = super()._tombstone(pos)
+        self._record(task.task_id, _DELETE, None)
+        return task
+
+    def _unschedule(self, task_id: str) -> AgentTask:
+        task = super()._unschedule(task_id)
+        self._record(task_id, _DELETE, None)
+        return task
+
+    def _dead_letter(self, dead: DeadLetter) -> None:
+        try:
+            payload = json.dumps(dead.task.payload or {}, ensure_ascii=False)
+        except (TypeError, ValueError):
+            # O handler pode ter alterado o payload: grava a representação
+            payload = json.dumps(dead.task.payload, ensure_ascii=False, default=repr)
+        super()._dead_letter(dead)
+        self._pending_dead.append((dead, payload))
+        self._maybe_flush()
+
+    def update_priority(self, task_id: str, priority: int) -> bool:
+        updated = super().update_priority(task_id, priority)
+        if updated:
+            self._record(task_id, _UPDATE, self._find(task_id))
+        return updated
+
+    def update_deadline(self, task_id: str, deadline: datetime) -> bool:
+        updated = super().update_deadline(task_id, deadline)
+        if updated:
+            self._record(task_id, _UPDATE, self._find(task_id))
+        return updated
+
+    def clear(self) -> None:
+        """Esvazia a fila, os dead-letters e as stats, no banco e em memória.
+
+        Tudo numa transação: após reiniciar, nada do que foi limpo volta.
+        """
+        super().clear()
+        self._pending.clear()
+        self._pending_dead.clear()
+        self._dead_letters.clear()
+        for key in self.stats:
+            self.stats[key] = 0
+        if self._conn is not None:
+            with self._conn:
+                self._conn.execute("DELETE FROM tasks")
+                self._conn.execute("DELETE FROM dead_letters")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('stats', ?)",
+                    (json.dumps(self.stats),),
+                )
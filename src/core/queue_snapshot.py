@@ -0,0 +1,357 @@
+"""Snapshot binário colunar da AgentQueue (export e restore rápidos).
+
+get_all_tasks() copia a heap e desempilha tudo (O(n log n)) e a única
+exportação era a tabela impressa por `queue list`. O snapshot grava a heap
+como ela está, coluna por coluna (array/struct, sem pickle):
+
+    [MAGIC][u32 + metadados JSON][coluna: u64 tamanho + bytes]...
+
+- Linhas prontas na ordem do array da heap (o invariante de heap vale no
+  arquivo), seguidas das agendadas em ordem de not_before
+- Colunas numéricas em array nativo: seq e chave da política (só das
+  prontas; uma coluna 'd' por componente da chave), priority, deadline,
+  cost, created_at, not_before
+- agent_name/client_id por dicionário (tabelas nos metadados + código 'I')
+- task_ids num blob UTF-8 separado por NUL, com offsets por linha
+- dedup_keys (esparsas) como JSON [[linha, chave], ...]
+- attempts (esparsas, só tarefas em retry) como JSON [[linha, n], ...]
+- payloads num único array JSON no fim do arquivo (lido só quando pedido)
+- config e estado da política (ex: slack do aging, tempo virtual do fair
+  queuing) nos metadados, para que load() com a mesma política e a mesma
+  config reaproveite as chaves gravadas
+
+Gravar e restaurar são O(n), sem ordenar. QueueSnapshot lê as colunas sem
+criar AgentTasks e percorre a heap gravada em ordem de prioridade por uma
+fronteira (O(k log k) para as k primeiras), então `queue list --snapshot`
+não materializa a fila.
+
+Exemplo:
+    queue.snapshot("data/agent_queue.snap")
+    queue = AgentQueue.load("data/agent_queue.snap", max_size=50_000)
+
+    for task in QueueSnapshot("data/agent_queue.snap").iter_tasks():
+        print(task)
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import json
+import os
+import struct
+import sys
+import time
+from array import array
+import operator
+from operator import attrgetter
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.core.agent_queue import AgentTask, HeapEntry
+
+MAGIC = b"AGQSNAP1"
+SNAPSHOT_VERSION = 1
+
+_META_LENGTH = struct.Struct("<I")
+_COLUMN_LENGTH = struct.Struct("<Q")
+
+# Colunas por tarefa (prontas + agendadas), na ordem do arquivo; o leitor
+# (QueueSnapshot.__init__) segue a mesma ordem
+_TASK_COLUMNS = (
+    ("priority", "b"),
+    ("deadline", "d"),
+    ("cost", "q"),
+    ("created_at", "d"),
+    ("not_before", "d"),
+)
+
+
+def write_snapshot(
+    path: str,
+    entries: Sequence[HeapEntry],
+    scheduled: Sequence[AgentTask],
+    payloads: Sequence[Optional[Dict[str, Any]]],
+    policy: str,
+    stats: Dict[str, Any],
+    policy_state: Optional[Dict[str, Any]] = None,
+    policy_config: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Grava o snapshot em `path` (atômico: arquivo temporário + rename).
+
+    Args:
+        path: Arquivo de destino (diretório é criado se necessário)
+        entries: Entradas (key, seq, task) na ordem do array da heap, sem
+            tombstones
+        scheduled: Tarefas agendadas (gravadas depois das prontas)
+        payloads: Payload de cada tarefa, na ordem entries + scheduled
+        policy: Nome da política que gerou as chaves
+        stats: Contadores da fila
+        policy_state: SchedulingPolicy.state() da fila
+        policy_config: SchedulingPolicy.config() da fila
+
+    Returns:
+        Número de tarefas gravadas
+
+    Raises:
+        ValueError: Se as chaves não são tuplas numéricas de mesmo tamanho,
+            algum task_id contém NUL ou algum payload não é serializável em
+            JSON (o arquivo anterior fica intacto)
+    """
+    tasks = [entry[2] for entry in entries]
+    tasks.extend(scheduled)
+    keys = [entry[0] for entry in entries]
+    width = len(keys[0]) if keys else 0
+    if len(set(map(len, keys))) > 1:
+        raise ValueError("Snapshot requer chaves de mesmo tamanho")
+    try:
+        key_columns = [array("d", column) for column in zip(*keys)]
+    except TypeError as exc:
+        raise ValueError(f"Snapshot requer chaves numéricas ({policy}): {exc}") from exc
+
+    agents, agent_codes = _encode_names(list(map(attrgetter("agent_name"), tasks)))
+    clients, client_codes = _encode_names(list(map(attrgetter("client_id"), tasks)))
+
+    task_ids = list(map(attrgetter("task_id"), tasks))
+    text = "\x00".join(task_ids)
+    if text.count("\x00") != max(0, len(task_ids) - 1):
+        raise ValueError("task_id com caractere NUL não pode ir para o snapshot")
+    blob = text.encode("utf-8")
+    try:
+        payload_bytes = json.dumps(
+            list(payloads), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+    except TypeError as exc:
+        raise ValueError(f"Payload não serializável em JSON: {exc}") from exc
+    if len(blob) == len(text):
+        sizes = map(len, task_ids)
+    else:
+        sizes = (len(task_id.encode("utf-8")) for task_id in task_ids)
+    # Início de cada task_id no blob (+1 por separador); n + 1 offsets
+    offsets = array(
+        "Q",
+        map(operator.add, itertools.accumulate(sizes, initial=0), itertools.count()),
+    )
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "byteorder": sys.byteorder,
+        "policy": policy,
+        "ready": len(entries),
+        "scheduled": len(scheduled),
+        "key_width": width,
+        "agents": agents,
+        "clients": clients,
+        "stats": dict(stats),
+        "policy_config": policy_config or {},
+        "policy_state": policy_state or {},
+        "saved_at": time.time(),
+    }
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb") as fh:
+            meta_bytes = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+            fh.write(MAGIC)
+            fh.write(_META_LENGTH.pack(len(meta_bytes)))
+            fh.write(meta_bytes)
+            _write_column(fh, array("Q", [entry[1] for entry in entries]))
+            for column in key_columns:
+                _write_column(fh, column)
+            for name, typecode in _TASK_COLUMNS:
+                _write_column(fh, array(typecode, map(attrgetter(name), tasks)))
+            _write_column(fh, agent_codes)
+            _write_column(fh, client_codes)
+            _write_column(fh, offsets)
+            _write_column(fh, blob)
+            _write_column(
+                fh,
+                json.dumps(
+                    [
+                        [row, task.dedup_key]
+                        for row, task in enumerate(tasks)
+                        if task.dedup_key is not None
+                    ],
+                    ensure_ascii=False,
+                ).encode("utf-8"),
+            )
+            _write_column(
+                fh,
+                json.dumps(
+                    [
+                        [row, task.attempts]
+                        for row, task in enumerate(tasks)
+                        if task.attempts
+                    ]
+                ).encode("utf-8"),
+            )
+            _write_column(fh, payload_bytes)
+        os.replace(tmp_path, target)
+    finally:
+        # Falha no meio da gravação não deixa o temporário para trás
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return len(tasks)
+
+
+class QueueSnapshot:
+    """Leitor de snapshot: colunas em arrays, AgentTasks criadas sob demanda.
+
+    Args:
+        path: Arquivo gravado por AgentQueue.snapshot()
+
+    Raises:
+        ValueError: Se o arquivo não é um snapshot ou a versão é desconhecida
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as fh:
+            if fh.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Arquivo não é um snapshot da AgentQueue: {path}")
+            (meta_length,) = _META_LENGTH.unpack(fh.read(_META_LENGTH.size))
+            meta = json.loads(fh.read(meta_length))
+            if meta["version"] != SNAPSHOT_VERSION:
+                raise ValueError(f"Versão de snapshot não suportada: {meta['version']}")
+
+            self._swap = meta["byteorder"] != sys.byteorder
+            self.policy: str = meta["policy"]
+            self.ready: int = meta["ready"]
+            self.scheduled: int = meta["scheduled"]
+            self.stats: Dict[str, Any] = meta["stats"]
+            self.policy_config: Dict[str, Any] = meta["policy_config"]
+            self.policy_state: Dict[str, Any] = meta["policy_state"]
+            self.saved_at: float = meta["saved_at"]
+            self.agents = [sys.intern(name) for name in meta["agents"]]
+            self.clients = [sys.intern(name) for name in meta["clients"]]
+
+            self.seq = self._read_array(fh, "Q")
+            self._keys = [self._read_array(fh, "d") for _ in range(meta["key_width"])]
+            self.priority = self._read_array(fh, "b")
+            self.deadline = self._read_array(fh, "d")
+            self.cost = self._read_array(fh, "q")
+            self.created_at = self._read_array(fh, "d")
+            self.not_before = self._read_array(fh, "d")
+            self._agent_codes = self._read_array(fh, "I")
+            self._client_codes = self._read_array(fh, "I")
+            self._offsets = self._read_array(fh, "Q")
+            self._task_ids = _read_column(fh)
+            self._dedup_keys: Dict[int, str] = dict(json.loads(_read_column(fh)))
+            self._attempts: Dict[int, int] = dict(json.loads(_read_column(fh)))
+            self._payloads_at = fh.tell()
+        self._payloads: Optional[List[Optional[Dict[str, Any]]]] = None
+
+    def __len__(self) -> int:
+        """Total de tarefas (prontas + agendadas)."""
+        return self.ready + self.scheduled
+
+    def task(self, row: int) -> AgentTask:
+        """Monta a AgentTask da linha `row` (payload None; ver payloads())."""
+        offsets = self._offsets
+        return AgentTask(
+            priority=self.priority[row],
+            deadline=self.deadline[row],
+            cost=self.cost[row],
+            task_id=self._task_ids[offsets[row] : offsets[row + 1] - 1].decode("utf-8"),
+            agent_name=self.agents[self._agent_codes[row]],
+            client_id=self.clients[self._client_codes[row]],
+            payload=None,
+            created_at=self.created_at[row],
+            not_before=self.not_before[row],
+            dedup_key=self._dedup_keys.get(row),
+            attempts=self._attempts.get(row, 0),
+        )
+
+    def keys(self) -> List[Tuple[float, ...]]:
+        """Chaves da política gravadas para as linhas prontas (ordem da heap)."""
+        return list(zip(*self._keys))
+
+    def iter_tasks(self) -> Iterator[AgentTask]:
+        """Tarefas prontas em ordem de saída, sem materializar as demais.
+
+        A heap gravada é percorrida por fronteira: a próxima tarefa é sempre
+        a raiz ou filha de uma já emitida (O(k log k) para as k primeiras).
+        """
+        size = self.ready
+        if not size:
+            return
+        keys = self._keys
+        seq = self.seq
+
+        frontier = [(tuple(column[0] for column in keys), seq[0], 0)]
+        while frontier:
+            row = heapq.heappop(frontier)[2]
+            yield self.task(row)
+            for child in (2 * row + 1, 2 * row + 2):
+                if child < size:
+                    heapq.heappush(
+                        frontier,
+                        (tuple(column[child] for column in keys), seq[child], child),
+                    )
+
+    def iter_scheduled(self) -> Iterator[AgentTask]:
+        """Tarefas agendadas em ordem de not_before."""
+        for row in range(self.ready, len(self)):
+            yield self.task(row)
+
+    def payloads(self) -> List[Optional[Dict[str, Any]]]:
+        """Payloads de todas as linhas (lidos do arquivo na primeira chamada)."""
+        if self._payloads is None:
+            with open(self.path, "rb") as fh:
+                fh.seek(self._payloads_at)
+                self._payloads = json.loads(_read_column(fh))
+        return self._payloads
+
+    def tasks(self) -> List[AgentTask]:
+        """Todas as tarefas com payload (prontas na ordem da heap + agendadas)."""
+        if not len(self):
+            return []
+        agents = self.agents
+        clients = self.clients
+        tasks = list(
+            map(
+                AgentTask,
+                self.priority,
+                self.deadline,
+                self.cost,
+                self._task_ids.decode("utf-8").split("\x00"),
+                [agents[code] for code in self._agent_codes],
+                [clients[code] for code in self._client_codes],
+                self.payloads(),
+                self.created_at,
+                self.not_before,
+            )
+        )
+        for row, dedup_key in self._dedup_keys.items():
+            tasks[row].dedup_key = dedup_key
+        for row, attempts in self._attempts.items():
+            tasks[row].attempts = attempts
+        return tasks
+
+    def _read_array(self, fh: BinaryIO, typecode: str) -> array:
+        column = array(typecode)
+        column.frombytes(_read_column(fh))
+        if self._swap:
+            column.byteswap()
+        return column
+
+
+def _encode_names(names: List[str]) -> Tuple[List[str], array]:
+    """Codificação por dicionário: (tabela de nomes distintos, código por linha)."""
+    table = list(dict.fromkeys(names))
+    codes = {name: code for code, name in enumerate(table)}
+    return table, array("I", map(codes.__getitem__, names))
+
+
+def _write_column(fh: BinaryIO, data: Any) -> None:
+    """Grava uma coluna (array ou bytes) precedida do tamanho em bytes."""
+    raw = data.tobytes() if isinstance(data, array) else data
+    fh.write(_COLUMN_LENGTH.pack(len(raw)))
+    fh.write(raw)
+
+
+def _read_column(fh: BinaryIO) -> bytes:
+    (length,) = _COLUMN_LENGTH.unpack(fh.read(_COLUMN_LENGTH.size))
+    return fh.read(length)
@@ -0,0 +1,157 @@
+"""Retry com backoff exponencial, jitter e dead-letter para a AgentQueue.
+
+Reinserir uma tarefa que falhou com push_task() a devolve na hora, com a
+mesma prioridade: contra uma API fora do ar isso vira um loop quente de
+falhas que ocupa a cabeça da fila. AgentQueue.retry(task, error) usa uma
+RetryPolicy:
+
+- Backoff exponencial com jitter: a tarefa volta agendada (not_before) para
+  daqui a base_delay * multiplier^(n-1) segundos (limitado a max_delay),
+  reduzido aleatoriamente em até `jitter` (1.0 = "full jitter"), para que
+  falhas simultâneas não voltem todas no mesmo instante
+- Contagem de tentativas na própria tarefa (task.attempts); após
+  max_attempts execuções a tarefa vai para a lista de dead-letter
+- Orçamento de retries por agente numa janela deslizante (AgentCostWindow,
+  custo 1 por retry): um agente em tempestade de falhas esgota o orçamento
+  e as falhas seguintes vão direto para dead-letter, sem disputar a fila
+  com trabalho novo (ex: tarefas CRITICAL)
+
+Exemplo:
+    queue = AgentQueue(
+        retry_policy=RetryPolicy(
+            base_delay=10, max_delay=600, max_attempts=5,
+            budgets={"attendance_agent": 20}, budget_window=60,
+        )
+    )
+    task = queue.pop()
+    try:
+        executar_agente(task)
+    except Exception as exc:
+        queue.retry(task, exc)  # agendada com backoff ou dead-letter
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from src.core.agent_queue import AgentTask
+from src.core.cost_window import AgentCostWindow
+
+# Motivos de dead-letter
+MAX_ATTEMPTS = "max_attempts"
+RETRY_BUDGET = "retry_budget"
+
+
+@dataclass
+class DeadLetter:
+    """Tarefa que desistiu de ser reexecutada.
+
+    Attributes:
+        task: Tarefa (com payload e task.attempts execuções)
+        error: Último erro registrado
+        reason: "max_attempts" ou "retry_budget"
+        failed_at: Timestamp Unix da desistência
+    """
+
+    task: AgentTask
+    error: str
+    reason: str
+    failed_at: float
+
+
+class RetryPolicy:
+    """Backoff, limite de tentativas e orçamento de retries por agente.
+
+    Args:
+        base_delay: Atraso (s) antes da 2ª execução
+        max_delay: Teto (finito) do atraso (s) entre tentativas
+        multiplier: Fator de crescimento do atraso a cada falha
+        jitter: Fração do atraso sorteada para baixo, em [0, 1]
+            (0 = determinístico, 0.5 = "equal jitter", 1 = "full jitter")
+        max_attempts: Execuções totais antes do dead-letter
+        budgets: Mapa agent_name -> retries máximos por janela (agentes
+            fora do mapa não têm orçamento)
+        budget_window: Janela (s) dos orçamentos
+        max_dead_letters: Dead-letters guardadas (as mais antigas saem)
+        rng: Gerador aleatório do jitter (injetável em testes)
+        clock: Relógio monotônico dos orçamentos (injetável em testes)
+
+    Raises:
+        ValueError: Se algum parâmetro está fora do intervalo válido
+    """
+
+    def __init__(
+        self,
+        base_delay: float = 5.0,
+        max_delay: float = 900.0,
+        multiplier: float = 2.0,
+        jitter: float = 1.0,
+        max_attempts: int = 5,
+        budgets: Optional[Dict[str, int]] = None,
+        budget_window: float = 60.0,
+        max_dead_letters: int = 10_000,
+        rng: Optional[random.Random] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if base_delay < 0 or max_delay < base_delay or not math.isfinite(max_delay):
+            raise ValueError(
+                f"Atrasos inválidos: base_delay={base_delay}, max_delay={max_delay}"
+            )
+        if multiplier < 1:
+            raise ValueError(f"multiplier deve ser >= 1, recebido {multiplier}")
+        if not 0 <= jitter <= 1:
+            raise ValueError(f"jitter deve estar em [0, 1], recebido {jitter}")
+        if max_attempts < 1:
+            raise ValueError(f"max_attempts deve ser >= 1, recebido {max_attempts}")
+        if max_dead_letters < 1:
+            raise ValueError(
+                f"max_dead_letters deve ser >= 1, recebido {max_dead_letters}"
+            )
+
+        # Expoente a partir do qual o backoff já atinge max_delay: limita
+        # multiplier ** n (OverflowError com milhares de tentativas)
+        self._max_exponent = 0
+        if multiplier > 1 and base_delay > 0:
+            try:
+                self._max_exponent = max(
+                    0, math.ceil(math.log(max_delay / base_delay, multiplier))
+                )
+                base_delay * multiplier**self._max_exponent
+            except OverflowError:
+                raise ValueError(
+                    f"multiplier={multiplier} grande demais para max_delay={max_delay}"
+                ) from None
+
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.max_attempts = max_attempts
+        self.max_dead_letters = max_dead_letters
+        self.budget = AgentCostWindow(budgets or {}, budget_window, clock=clock)
+        self._rng = rng or random.Random()
+
+    def delay(self, attempts: int) -> float:
+        """Atraso (s) antes da próxima execução após `attempts` falhas."""
+        exponent = min(attempts - 1, self._max_exponent)
+        backoff = self.base_delay * self.multiplier**exponent
+        backoff = min(self.max_delay, backoff)
+        return backoff * (1 - self.jitter * self._rng.random())
+
+    def schedule(self, task: AgentTask) -> Tuple[Optional[float], Optional[str]]:
+        """Decide o destino da tarefa que acabou de falhar (task.attempts já conta a falha).
+
+        Returns:
+            (atraso em segundos, None) para reexecutar, ou (None, motivo)
+            para dead-letter. O retry aceito é descontado do orçamento do agente.
+        """
+        if task.attempts >= self.max_attempts:
+            return None, MAX_ATTEMPTS
+        if not self.budget.can_spend(task.agent_name, 1):
+            return None, RETRY_BUDGET
+        self.budget.record(task.agent_name, 1)
+        return self.delay(task.attempts), None
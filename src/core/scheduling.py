@@ -0,0 +1,217 @@
+"""Políticas de escalonamento plugáveis para a AgentQueue.
+
+A AgentQueue ordena as entradas por uma chave pré-computada no push. A
+política define essa chave (e, opcionalmente, reage a cada pop), então
+trocar de política não muda a complexidade: push/pop continuam O(log n).
+
+Políticas disponíveis:
+- PriorityPolicy: prioridade estática, depois deadline e custo (padrão).
+  Sob carga CRITICAL contínua, LOW/DEFERRED podem nunca sair.
+- AgingPolicy: converte prioridade em folga de tempo; a chave é
+  deadline + slack[priority]. Uma tarefa LOW perto do vencimento passa na
+  frente de CRITICAL com deadline distante (espera limitada).
+- EDFPolicy: Earliest Deadline First puro (prioridade só desempata).
+- WeightedFairPolicy: fair queuing ponderado por client_id com tempo de
+  término virtual (self-clocked fair queuing): um cliente que enfileira
+  milhares de tarefas não monopoliza a fila.
+
+Exemplo:
+    queue = AgentQueue(policy=AgingPolicy())
+    queue = AgentQueue(policy=create_policy("wfq"))
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from src.core.agent_queue import AgentTask
+
+SortKey = Tuple[Any, ...]
+
+
+class SchedulingPolicy:
+    """Interface de política: define a chave de ordenação das tarefas.
+
+    Chaves menores saem primeiro. sort_key() é chamado uma vez por inserção;
+    políticas com estado (ex: fair queuing) atualizam-no ali e em on_pop(),
+    marcam `stateful` e exportam o estado em state() para o snapshot.
+    """
+
+    name = "base"
+    # A chave depende das inserções anteriores (a ordem de sort_key importa)
+    stateful = False
+
+    def sort_key(self, task: "AgentTask") -> SortKey:
+        """Chave de uma tarefa sendo inserida."""
+        raise NotImplementedError
+
+    def rekey(self, task: "AgentTask", old_key: SortKey) -> SortKey:
+        """Chave após update_priority/update_deadline de tarefa enfileirada."""
+        return self.sort_key(task)
+
+    def on_pop(self, key: SortKey) -> None:
+        """Notificação de que a tarefa com `key` saiu da frente da fila."""
+
+    def reset(self) -> None:
+        """Descarta o estado da política (chamado no clear da fila)."""
+
+    def config(self) -> Dict[str, Any]:
+        """Parâmetros que definem as chaves, serializáveis em JSON.
+
+        O snapshot grava config(); load() só reaproveita as chaves gravadas
+        quando a fila que carrega tem a mesma política e a mesma config.
+        """
+        return {}
+
+    def state(self) -> Dict[str, Any]:
+        """Estado serializável em JSON (gravado pelo snapshot)."""
+        return {}
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """Restaura o estado exportado por state() (load do snapshot)."""
+
+
+class PriorityPolicy(SchedulingPolicy):
+    """Ordem clássica: (priority, deadline, cost)."""
+
+    name = "priority"
+
+    def sort_key(self, task: "AgentTask") -> SortKey:
+        return (task.priority, task.deadline, task.cost)
+
+
+class AgingPolicy(SchedulingPolicy):
+    """Aging por folga: chave = deadline + slack[priority].
+
+    Cada nível de prioridade equivale a uma antecipação fixa do deadline. Uma
+    tarefa LOW com deadline D sai antes de qualquer CRITICAL com deadline
+    posterior a D + (slack[LOW] - slack[CRITICAL]), então nenhuma tarefa com
+    deadline fica presa indefinidamente atrás de carga mais prioritária.
+
+    Args:
+        slack: Mapa priority -> segundos somados ao deadline (padrão: DEFAULT_SLACK)
+    """
+
+    name = "aging"
+
+    DEFAULT_SLACK: Dict[int, float] = {
+        1: 0.0,  # CRITICAL
+        2: 3600.0,  # HIGH: 1h
+        3: 6 * 3600.0,  # MEDIUM: 6h
+        4: 24 * 3600.0,  # LOW: 1 dia
+        5: 72 * 3600.0,  # DEFERRED: 3 dias
+    }
+
+    def __init__(self, slack: Optional[Dict[int, float]] = None):
+        self.slack = {**self.DEFAULT_SLACK, **(slack or {})}
+
+    def sort_key(self, task: "AgentTask") -> SortKey:
+        return (task.deadline + self.slack[task.priority], task.priority, task.cost)
+
+    def config(self) -> Dict[str, Any]:
+        # Chaves como texto: é assim que voltam do JSON
+        return {"slack": {str(p): s for p, s in sorted(self.slack.items())}}
+
+
+class EDFPolicy(SchedulingPolicy):
+    """Earliest Deadline First: (deadline, priority, cost)."""
+
+    name = "edf"
+
+    def sort_key(self, task: "AgentTask") -> SortKey:
+        return (task.deadline, task.priority, task.cost)
+
+
+# Tamanho mínimo de WeightedFairPolicy._finish antes de varrer finishes vencidos
+_WFQ_PRUNE_MIN = 64
+
+
+class WeightedFairPolicy(SchedulingPolicy):
+    """Weighted fair queuing por client_id (tempo de término virtual).
+
+    Cada tarefa recebe finish = max(V, último finish do cliente) + cost / peso,
+    onde V (tempo virtual) é o finish da última tarefa retirada. Clientes
+    recebem vazão proporcional ao peso, independente de quantas tarefas
+    enfileiram. Dentro de um cliente a ordem é de chegada; prioridade e
+    deadline só desempatam entre clientes. Tarefas de custo 0 contam como 1.
+    Finishes <= V são descartados no on_pop (max(V, finish) já os ignora), de
+    forma amortizada: o mapa fica limitado a ~2x os clientes ativos.
+
+    Args:
+        weights: Mapa client_id -> peso (maior = mais vazão)
+        default_weight: Peso de clientes sem entrada em `weights`
+    """
+
+    name = "wfq"
+    stateful = True
+
+    def __init__(
+        self, weights: Optional[Dict[str, float]] = None, default_weight: float = 1.0
+    ):
+        if default_weight <= 0 or any(w <= 0 for w in (weights or {}).values()):
+            raise ValueError("Pesos do fair queuing devem ser > 0")
+        self.weights = dict(weights or {})
+        self.default_weight = default_weight
+        self.virtual_time = 0.0
+        self._finish: Dict[str, float] = {}
+        self._prune_at = _WFQ_PRUNE_MIN
+
+    def sort_key(self, task: "AgentTask") -> SortKey:
+        weight = self.weights.get(task.client_id, self.default_weight)
+        start = max(self.virtual_time, self._finish.get(task.client_id, 0.0))
+        finish = start + max(task.cost, 1) / weight
+        self._finish[task.client_id] = finish
+        return (finish, task.priority, task.deadline)
+
+    def rekey(self, task: "AgentTask", old_key: SortKey) -> SortKey:
+        # Mantém a posição justa já conquistada; só os desempates mudam
+        return (old_key[0], task.priority, task.deadline)
+
+    def on_pop(self, key: SortKey) -> None:
+        if key[0] > self.virtual_time:
+            self.virtual_time = key[0]
+        if len(self._finish) > self._prune_at:
+            self._prune()
+
+    def _prune(self) -> None:
+        vt = self.virtual_time
+        self._finish = {c: f for c, f in self._finish.items() if f > vt}
+        self._prune_at = max(_WFQ_PRUNE_MIN, 2 * len(self._finish))
+
+    def reset(self) -> None:
+        self.virtual_time = 0.0
+        self._finish.clear()
+        self._prune_at = _WFQ_PRUNE_MIN
+
+    def config(self) -> Dict[str, Any]:
+        return {"weights": dict(self.weights), "default_weight": self.default_weight}
+
+    def state(self) -> Dict[str, Any]:
+        return {"virtual_time": self.virtual_time, "finish": dict(self._finish)}
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        self.virtual_time = state["virtual_time"]
+        self._finish = dict(state["finish"])
+
+
+POLICIES = {
+    PriorityPolicy.name: PriorityPolicy,
+    AgingPolicy.name: AgingPolicy,
+    EDFPolicy.name: EDFPolicy,
+    WeightedFairPolicy.name: WeightedFairPolicy,
+}
+
+
+def create_policy(name: str) -> SchedulingPolicy:
+    """Cria política pelo nome ("priority", "aging", "edf" ou "wfq").
+
+    Raises:
+        ValueError: Se o nome não for conhecido
+    """
+    try:
+        return POLICIES[name]()
+    except KeyError:
+        raise ValueError(
+            f"Política desconhecida: {name!r} (opções: {', '.join(POLICIES)})"
+        ) from None
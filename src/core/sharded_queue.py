@@ -0,0 +1,487 @@
+"""AgentQueue particionada por client_id (shards).
+
+Uma única heap num único processo limita a vazão e concentra falhas. A
+ShardedAgentQueue distribui as tarefas em N shards (AgentQueue comuns, ou
+qualquer variante: PersistentAgentQueue, ThreadSafeAgentQueue...) pelo hash
+estável de client_id:
+
+- Todas as tarefas de um cliente ficam no mesmo shard, então a ordem FIFO
+  por cliente é a da própria heap do shard (empates entre clientes de
+  shards diferentes saem pelo índice do shard, não pela ordem de chegada)
+- O roteamento usa CRC32 (não o hash() aleatorizado do Python): qualquer
+  processo calcula o mesmo shard com shard_for(client_id, num_shards), o que
+  permite que cada worker abra só o seu shard (ex: um arquivo SQLite por
+  shard via PersistentAgentQueue)
+- pop() faz merge das cabeças dos shards; com refresh_interval > 0 usa
+  cabeças em cache (erro limitado no tempo, ver pop())
+
+Exemplo:
+    queue = ShardedAgentQueue(
+        num_shards=4,
+        shard_factory=lambda i: PersistentAgentQueue(f"data/queue_{i}.db"),
+    )
+    queue.push(TaskPriority.HIGH, deadline, 1, "nf_agent", "client_1", {})
+    task = queue.pop()
+    print(queue.get_stats()["shard_sizes"])
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import os
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from src.core.agent_queue import AgentQueue, AgentTask
+from src.core.retry import DeadLetter
+
+logger = logging.getLogger("sharded_queue")
+
+SortKey = Tuple[Any, ...]
+
+
+def shard_for(client_id: str, num_shards: int) -> int:
+    """Índice do shard de um cliente (estável entre processos)."""
+    return zlib.crc32(client_id.encode("utf-8")) % num_shards
+
+
+class ShardedAgentQueue:
+    """Fila de prioridade particionada por hash de client_id.
+
+    Mesma interface principal da AgentQueue (push/pop/peek/drain/remove...).
+    Não é thread-safe: use a partir de uma única thread coordenadora (os
+    shards podem ser ThreadSafeAgentQueue se também forem acessados
+    diretamente por outras threads).
+
+    Args:
+        num_shards: Número de partições
+        shard_factory: Cria o shard de índice i (padrão: AgentQueue()). Todos
+            os shards devem usar o mesmo tipo de política de escalonamento,
+            pois as chaves de shards diferentes são comparadas no merge
+        refresh_interval: 0 = merge exato (consulta a cabeça de todos os
+            shards a cada pop). > 0 = merge sobre cabeças em cache,
+            reconsultadas a cada refresh_interval segundos (ver pop())
+
+    Raises:
+        ValueError: Se num_shards < 1 ou refresh_interval < 0
+    """
+
+    def __init__(
+        self,
+        num_shards: int = 4,
+        shard_factory: Optional[Callable[[int], AgentQueue]] = None,
+        refresh_interval: float = 0.0,
+    ):
+        if num_shards < 1:
+            raise ValueError(f"num_shards deve ser >= 1, recebido {num_shards}")
+        if refresh_interval < 0:
+            raise ValueError(
+                f"refresh_interval deve ser >= 0, recebido {refresh_interval}"
+            )
+
+        factory = shard_factory or (lambda index: AgentQueue())
+        self.shards: List[AgentQueue] = [factory(i) for i in range(num_shards)]
+        self.num_shards = num_shards
+        self.refresh_interval = refresh_interval
+        # Chave da cabeça de cada shard (None = shard sem tarefa pronta)
+        self._heads: List[Optional[SortKey]] = [None] * num_shards
+        self._refreshed_at = float("-inf")
+        self._refresh_all()
+
+    # ------------------------------------------------------------------
+    # Inserção (roteada por client_id)
+    # ------------------------------------------------------------------
+
+    def shard_index(self, client_id: str) -> int:
+        """Índice do shard que guarda as tarefas do cliente."""
+        return shard_for(client_id, self.num_shards)
+
+    def push(
+        self,
+        priority: int,
+        deadline: datetime,
+        cost: int,
+        agent_name: str,
+        client_id: str,
+        payload: Dict[str, Any],
+        task_id: Optional[str] = None,
+        not_before: Optional[datetime] = None,
+        dedup_key: Optional[str] = None,
+    ) -> Optional[str]:
+        """Insere tarefa no shard do cliente (mesmos argumentos de AgentQueue.push).
+
+        A dedup_key é verificada no shard do cliente: a política de merge é a
+        do shard (shard_factory) e chaves iguais de clientes em shards
+        diferentes não colidem.
+
+        Raises:
+            ValueError: Se campos inválidos ou task_id já presente em algum shard
+        """
+        if task_id is None:
+            task_id = self._new_task_id()
+        elif task_id in self:
+            raise ValueError(f"task_id duplicado na fila: {task_id}")
+
+        index = self.shard_index(client_id)
+        task_id = self.shards[index].push(
+            priority,
+            deadline,
+            cost,
+            agent_name,
+            client_id,
+            payload,
+            task_id=task_id,
+            not_before=not_before,
+            dedup_key=dedup_key,
+        )
+        self._refresh(index)
+        return task_id
+
+    def push_many(self, items: Iterable[Union[AgentTask, Dict[str, Any]]]) -> List[str]:
+        """Insere lote, agrupando os itens por shard (um push_many por shard).
+
+        Campos e task_ids do lote inteiro são validados antes de qualquer
+        inserção (tudo ou nada, como em AgentQueue.push_many).
+
+        Returns:
+            task_ids inseridos, na ordem do lote (rejeitados por max_size de
+            um shard ficam de fora; duplicados por dedup_key retornam o
+            task_id que os absorveu no shard)
+
+        Raises:
+            ValueError: Se algum item é inválido ou repete task_id
+        """
+        groups: Dict[int, List[Union[AgentTask, Dict[str, Any]]]] = defaultdict(list)
+        # (shard, posição no grupo) de cada item, na ordem do lote
+        order: List[Tuple[int, int]] = []
+        batch_ids = set()
+        for item in items:
+            if isinstance(item, AgentTask):
+                AgentQueue._validate(item.priority, item.cost)
+                task_id, client_id = item.task_id, item.client_id
+            else:
+                AgentQueue._validate(item["priority"], item["cost"], item["deadline"])
+                not_before = item.get("not_before")
+                if not_before is not None and not isinstance(not_before, datetime):
+                    raise ValueError(
+                        f"not_before deve ser datetime, recebido {type(not_before)}"
+                    )
+                client_id = item.get("client_id", "unknown_client")
+                task_id = item.get("task_id")
+                if task_id is None:
+                    task_id = self._new_task_id()
+                    while task_id in batch_ids:
+                        task_id = self._new_task_id()
+                    item = {**item, "task_id": task_id}
+            if task_id in self or task_id in batch_ids:
+                raise ValueError(f"task_id duplicado na fila: {task_id}")
+            batch_ids.add(task_id)
+            index = self.shard_index(client_id)
+            order.append((index, len(groups[index])))
+            groups[index].append(item)
+
+        results: Dict[int, List[Optional[str]]] = {}
+        for index, group in groups.items():
+            results[index] = self.shards[index]._push_many(group)
+            self._refresh(index)
+        task_ids = (results[index][pos] for index, pos in order)
+        return [task_id for task_id in task_ids if task_id is not None]
+
+    def push_task(self, task: AgentTask) -> None:
+        """Reinsere AgentTask pré-construída no shard do cliente (retry)."""
+        if task.task_id in self:
+            raise ValueError(f"task_id duplicado na fila: {task.task_id}")
+        index = self.shard_index(task.client_id)
+        self.shards[index].push_task(task)
+        self._refresh(index)
+
+    def retry(self, task: AgentTask, error: Any = None) -> Optional[str]:
+        """Reagenda tarefa que falhou no shard do cliente (ver AgentQueue.retry).
+
+        Backoff, tentativas e orçamento por agente seguem a retry_policy do
+        shard.
+        """
+        if task.task_id in self:
+            raise ValueError(f"task_id duplicado na fila: {task.task_id}")
+        index = self.shard_index(task.client_id)
+        task_id = self.shards[index].retry(task, error)
+        self._refresh(index)
+        return task_id
+
+    def get_dead_letters(self) -> List[DeadLetter]:
+        """Dead-letters de todos os shards, em ordem de desistência."""
+        return sorted(
+            (dead for shard in self.shards for dead in shard.get_dead_letters()),
+            key=lambda dead: dead.failed_at,
+        )
+
+    # ------------------------------------------------------------------
+    # Retirada (merge das cabeças)
+    # ------------------------------------------------------------------
+
+    def pop(self) -> Optional[AgentTask]:
+        """Remove a melhor tarefa entre as cabeças dos shards.
+
+        Com refresh_interval == 0 o resultado é exatamente o de uma fila
+        única (O(N) cabeças + O(log n)). Com refresh_interval > 0 as cabeças
+        só são reconsultadas periodicamente; inserções e remoções feitas por
+        esta fila atualizam o cache na hora, então o único erro possível vem
+        de mudanças externas (agendadas que vencem, acesso direto a um shard):
+        uma tarefa assim espera no máximo refresh_interval segundos a mais.
+
+        Returns:
+            Próxima AgentTask, ou None se nenhum shard tem tarefa pronta
+        """
+        if self._stale():
+            self._refresh_all()
+        index = self._best_shard()
+        if index is None and self.refresh_interval:
+            # Cache pode ter perdido tarefas promovidas desde o último refresh
+            self._refresh_all()
+            index = self._best_shard()
+        if index is None:
+            return None
+
+        task = self.shards[index].pop()
+        self._refresh(index)
+        if task is None:
+            # Cabeça em cache obsoleta (shard alterado por fora): tenta de novo
+            self._refresh_all()
+            return self.pop()
+        return task
+
+    def pop_many(self, n: int) -> List[AgentTask]:
+        """Remove até n tarefas em ordem de prioridade global."""
+        return self.drain(max_tasks=n)
+
+    def drain(
+        self, max_cost: Optional[int] = None, max_tasks: Optional[int] = None
+    ) -> List[AgentTask]:
+        """Remove tarefas em ordem global até atingir um limite.
+
+        Mesma semântica de AgentQueue.drain(): para na primeira tarefa cujo
+        custo estouraria max_cost.
+        """
+        tasks: List[AgentTask] = []
+        spent = 0
+        while max_tasks is None or len(tasks) < max_tasks:
+            head = self.peek()
+            if head is None:
+                break
+            if max_cost is not None and spent + head.cost > max_cost:
+                break
+            task = self.pop()
+            spent += task.cost
+            tasks.append(task)
+        return tasks
+
+    def peek(self) -> Optional[AgentTask]:
+        """Retorna a próxima tarefa (pelo mesmo merge do pop) sem remover."""
+        if self._stale():
+            self._refresh_all()
+        index = self._best_shard()
+        if index is None and self.refresh_interval:
+            self._refresh_all()
+            index = self._best_shard()
+        return self.shards[index].peek() if index is not None else None
+
+    # ------------------------------------------------------------------
+    # Consulta e mutação por task_id
+    # ------------------------------------------------------------------
+
+    def size(self) -> int:
+        """Total de tarefas prontas em todos os shards."""
+        return sum(shard.size() for shard in self.shards)
+
+    def is_empty(self) -> bool:
+        """Verifica se nenhum shard tem tarefa pronta."""
+        return all(shard.is_empty() for shard in self.shards)
+
+    def scheduled_size(self) -> int:
+        """Total de tarefas agendadas em todos os shards."""
+        return sum(shard.scheduled_size() for shard in self.shards)
+
+    def clear(self) -> None:
+        """Limpa todos os shards."""
+        for shard in self.shards:
+            shard.clear()
+        self._refresh_all()
+
+    def get_all_tasks(self) -> List[AgentTask]:
+        """Todas as tarefas prontas em ordem global (merge O(n log n))."""
+        merged = heapq.merge(
+            *(shard._ordered_entries() for shard in self.shards),
+            key=lambda entry: entry[0],
+        )
+        return [entry[2] for entry in merged]
+
+    def iter_ordered(self, limit: Optional[int] = None) -> Iterator[AgentTask]:
+        """Tarefas prontas em ordem global, sem copiar as heaps.
+
+        Merge preguiçoso dos iteradores por fronteira de cada shard: as k
+        primeiras custam O(k log k + N log N).
+
+        Raises:
+            ValueError: Se limit < 0
+        """
+        if limit is not None and limit < 0:
+            raise ValueError(f"limit deve ser >= 0, recebido {limit}")
+        merged = heapq.merge(
+            *(shard._iter_entries() for shard in self.shards),
+            key=lambda entry: entry[0],
+        )
+        return (entry[2] for entry in itertools.islice(merged, limit))
+
+    def get_tasks_for_agent(self, agent_name: str) -> List[AgentTask]:
+        """Tarefas de um agente em todos os shards (O(k + N))."""
+        return [
+            task
+            for shard in self.shards
+            for task in shard.get_tasks_for_agent(agent_name)
+        ]
+
+    def get_tasks_for_client(self, client_id: str) -> List[AgentTask]:
+        """Tarefas de um cliente (consulta só o shard dele)."""
+        return self.shards[self.shard_index(client_id)].get_tasks_for_client(client_id)
+
+    def count_tasks_for_agent(self, agent_name: str) -> int:
+        """Número de tarefas de um agente em todos os shards."""
+        return sum(shard.count_tasks_for_agent(agent_name) for shard in self.shards)
+
+    def count_tasks_for_client(self, client_id: str) -> int:
+        """Número de tarefas de um cliente (O(1))."""
+        return self.shards[self.shard_index(client_id)].count_tasks_for_client(
+            client_id
+        )
+
+    def remove_task(self, task_id: str) -> bool:
+        """Remove tarefa por ID (procura nos N shards)."""
+        index = self._locate(task_id)
+        if index is None:
+            logger.warning(f"[REMOVE] Tarefa {task_id} não encontrada")
+            return False
+        removed = self.shards[index].remove_task(task_id)
+        self._refresh(index)
+        return removed
+
+    def update_priority(self, task_id: str, priority: int) -> bool:
+        """Altera a prioridade de uma tarefa enfileirada (procura nos N shards)."""
+        index = self._locate(task_id)
+        if index is None:
+            logger.warning(f"[UPDATE] Tarefa {task_id} não encontrada")
+            return False
+        updated = self.shards[index].update_priority(task_id, priority)
+        self._refresh(index)
+        return updated
+
+    def update_deadline(self, task_id: str, deadline: datetime) -> bool:
+        """Altera o deadline de uma tarefa enfileirada (procura nos N shards)."""
+        index = self._locate(task_id)
+        if index is None:
+            logger.warning(f"[UPDATE] Tarefa {task_id} não encontrada")
+            return False
+        updated = self.shards[index].update_deadline(task_id, deadline)
+        self._refresh(index)
+        return updated
+
+    def get_payload(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Payload de uma tarefa enfileirada, ou None se não encontrada."""
+        index = self._locate(task_id)
+        return self.shards[index].get_payload(task_id) if index is not None else None
+
+    def __contains__(self, task_id: str) -> bool:
+        return self._locate(task_id) is not None
+
+    # ------------------------------------------------------------------
+    # Estatísticas
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas agregadas dos shards.
+
+        Returns:
+            Dict com os contadores numéricos da AgentQueue somados
+            (total_pushed, total_popped, size_atual, scheduled...), mais
+            num_shards, shard_sizes e imbalance (maior shard / média)
+        """
+        per_shard = [shard.get_stats() for shard in self.shards]
+        stats: Dict[str, Any] = {}
+        for shard_stats in per_shard:
+            for name, value in shard_stats.items():
+                if isinstance(value, int) and not isinstance(value, bool):
+                    stats[name] = stats.get(name, 0) + value
+
+        sizes = [shard_stats["size_atual"] for shard_stats in per_shard]
+        mean = sum(sizes) / self.num_shards
+        stats["num_shards"] = self.num_shards
+        stats["shard_sizes"] = sizes
+        stats["imbalance"] = max(sizes) / mean if mean else 1.0
+        stats["policy"] = per_shard[0]["policy"]
+        return stats
+
+    def print_stats(self) -> str:
+        """Retorna string formatada com estatísticas agregadas."""
+        stats = self.get_stats()
+        return (
+            f"=== SHARDED AGENT QUEUE STATS ===\n"
+            f"Shards: {stats['num_shards']}\n"
+            f"Total Pushed: {stats['total_pushed']}\n"
+            f"Total Popped: {stats['total_popped']}\n"
+            f"Total Rejected: {stats['total_rejected']}\n"
+            f"Current Size: {stats['size_atual']}\n"
+            f"Shard Sizes: {stats['shard_sizes']}\n"
+            f"Imbalance (max/mean): {stats['imbalance']:.2f}"
+        )
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _new_task_id(self) -> str:
+        """Gera ID curto (8 hex) inédito em todos os shards."""
+        task_id = os.urandom(4).hex()
+        while task_id in self:
+            task_id = os.urandom(4).hex()
+        return task_id
+
+    def _locate(self, task_id: str) -> Optional[int]:
+        """Índice do shard que contém task_id, ou None."""
+        for index, shard in enumerate(self.shards):
+            if task_id in shard:
+                return index
+        return None
+
+    def _stale(self) -> bool:
+        return time.monotonic() - self._refreshed_at >= self.refresh_interval
+
+    def _refresh(self, index: int) -> None:
+        self._heads[index] = self.shards[index]._head_key()
+
+    def _refresh_all(self) -> None:
+        for index in range(self.num_shards):
+            self._refresh(index)
+        self._refreshed_at = time.monotonic()
+
+    def _best_shard(self) -> Optional[int]:
+        """Shard com a menor chave de cabeça (empate: menor índice)."""
+        best = None
+        best_key = None
+        for index, key in enumerate(self._heads):
+            if key is not None and (best_key is None or key < best_key):
+                best, best_key = index, key
+        return best
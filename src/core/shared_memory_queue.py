@@ -0,0 +1,533 @@
+"""AgentQueue em memória compartilhada para workers multiprocessing.
+
+Agentes CPU-bound (pós-processamento de respostas do LLM, renderização de
+PDF/NF) precisam de processos, não threads. A AgentQueue vive no heap Python
+de um processo; mandar AgentTasks por pipes custa um pickle por tarefa. A
+SharedMemoryAgentQueue guarda registros de tamanho fixo num bloco de
+`multiprocessing.shared_memory` e mantém a heap binária sobre esses
+registros, protegida por um lock entre processos:
+
+    [cabeçalho][heap: capacity entradas][pilha de slots livres][índice][slots]
+
+- Entrada da heap (25 bytes): chave (priority, deadline, cost, seq) em
+  big-endian, então comparar entradas é comparar bytes, mais o índice do
+  slot da tarefa; os sifts só movem essas entradas
+- Slot (tamanho fixo): task_id, agent_name, client_id, tamanho do payload e
+  o payload em JSON (até `payload_size` bytes); slots são alocados/liberados
+  numa pilha também compartilhada
+- Índice task_id -> slot (hash aberto com sondagem linear, >= 2x capacity
+  posições): push rejeita task_id duplicado em O(1), como a AgentQueue
+- Ordem: sempre a da PriorityPolicy (priority -> deadline -> cost -> FIFO);
+  sem políticas plugáveis nem tarefas agendadas
+
+Exemplo:
+    queue = SharedMemoryAgentQueue(capacity=10_000)
+    queue.push(TaskPriority.HIGH, deadline, 3, "nf_agent", "client_1", {"nf": 42})
+
+    def worker(queue):
+        while (task := queue.get(timeout=1)) is not None:
+            render(task)
+
+    procs = [multiprocessing.Process(target=worker, args=(queue,)) for _ in range(4)]
+    ...
+    queue.close()
+    queue.unlink()  # só no processo dono
+
+A fila só pode ser passada a processos criados pelo multiprocessing (o lock
+é herdado na criação do processo).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import os
+import struct
+import time
+import zlib
+from datetime import datetime
+from multiprocessing import shared_memory
+from multiprocessing.context import BaseContext
+from typing import Any, Dict, Optional
+
+from src.core.agent_queue import AgentQueue, AgentTask
+
+logger = logging.getLogger("shared_memory_queue")
+
+# Cabeçalho (uint64): size, next_seq, total_pushed, total_popped,
+# total_rejected, total_overdue, free_top
+_HEADER_FIELDS = 7
+(
+    _SIZE,
+    _NEXT_SEQ,
+    _PUSHED,
+    _POPPED,
+    _REJECTED,
+    _OVERDUE,
+    _FREE_TOP,
+) = range(_HEADER_FIELDS)
+_HEADER_SIZE = _HEADER_FIELDS * 8
+
+# Entrada da heap: chave big-endian (ordenável por bytes) + slot
+_ENTRY = struct.Struct(">BdIQI")
+# Cabeçalho do slot: task_id, agent_name, client_id, tamanho do payload
+_RECORD = struct.Struct(">16s32s32sI")
+# Posição livre no índice task_id -> slot
+_EMPTY = 0xFFFFFFFF
+
+MAX_TASK_ID = 16
+MAX_NAME = 32
+# cost é gravado como uint32 na entrada da heap
+MAX_COST = 2**32 - 1
+
+
+class SharedMemoryAgentQueue:
+    """Fila de prioridade compartilhada entre processos.
+
+    Args:
+        capacity: Número máximo de tarefas (registros pré-alocados); pushes
+            além disso são rejeitados (retornam None), como max_size
+        payload_size: Bytes máximos do payload serializado em JSON
+        context: Contexto multiprocessing usado para criar o lock (padrão:
+            o contexto global)
+
+    Raises:
+        ValueError: Se capacity < 1 ou payload_size < 2
+    """
+
+    def __init__(
+        self,
+        capacity: int = 10_000,
+        payload_size: int = 1024,
+        context: Optional[BaseContext] = None,
+    ):
+        if capacity < 1:
+            raise ValueError(f"capacity deve ser >= 1, recebido {capacity}")
+        if payload_size < 2:
+            raise ValueError(f"payload_size deve ser >= 2, recebido {payload_size}")
+
+        self.capacity = capacity
+        self.payload_size = payload_size
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=self._total_size(capacity, payload_size)
+        )
+        # Só o processo criador destrói o bloco (filhos via fork herdam o objeto)
+        self._owner_pid = os.getpid()
+        self._cond = (context or multiprocessing).Condition()
+        self._layout()
+
+        for field in range(_HEADER_FIELDS):
+            self._header[field] = 0
+        self._reset_free_slots()
+        self._reset_index()
+        logger.info(
+            "[SHM] Fila %s criada (%d registros, payload até %d bytes)",
+            self.name,
+            capacity,
+            payload_size,
+        )
+
+    # ------------------------------------------------------------------
+    # Compartilhamento entre processos
+    # ------------------------------------------------------------------
+
+    @property
+    def name(self) -> str:
+        """Nome do bloco de memória compartilhada."""
+        return self._shm.name
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            "name": self._shm.name,
+            "capacity": self.capacity,
+            "payload_size": self.payload_size,
+            "cond": self._cond,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.capacity = state["capacity"]
+        self.payload_size = state["payload_size"]
+        self._cond = state["cond"]
+        self._shm = shared_memory.SharedMemory(name=state["name"])
+        self._owner_pid = None
+        self._layout()
+
+    def close(self) -> None:
+        """Desanexa o bloco deste processo (os demais continuam usando)."""
+        for view in (self._header, self._heap, self._free, self._index):
+            view.release()
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """Destrói o bloco (só tem efeito no processo dono; chamar após close)."""
+        if self._owner_pid == os.getpid():
+            self._shm.unlink()
+            logger.info("[SHM] Fila %s destruída", self.name)
+
+    def __enter__(self) -> "SharedMemoryAgentQueue":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+        self.unlink()
+
+    # ------------------------------------------------------------------
+    # Operações
+    # ------------------------------------------------------------------
+
+    def push(
+        self,
+        priority: int,
+        deadline: datetime,
+        cost: int,
+        agent_name: str,
+        client_id: str,
+        payload: Dict[str, Any],
+        task_id: Optional[str] = None,
+    ) -> Optional[str]:
+        """Insere tarefa (O(log n) sob o lock).
+
+        Args:
+            Os mesmos de AgentQueue.push (sem not_before). task_id,
+            agent_name e client_id são limitados a 16/32/32 bytes UTF-8 e
+            cost a MAX_COST (uint32).
+
+        Returns:
+            task_id da tarefa inserida, ou None se a fila está cheia
+
+        Raises:
+            ValueError: Se campos inválidos, textos longos demais, payload
+                maior que payload_size ou task_id já na fila
+        """
+        AgentQueue._validate(priority, cost, deadline)
+        task = AgentTask(
+            priority=priority,
+            deadline=deadline.timestamp(),
+            cost=cost,
+            task_id=task_id or self._new_task_id(),
+            agent_name=agent_name,
+            client_id=client_id,
+            payload=payload,
+        )
+        return task.task_id if self.push_task(task) else None
+
+    def push_task(self, task: AgentTask) -> bool:
+        """Insere AgentTask pré-construída (útil para retry).
+
+        Returns:
+            True se inserida, False se a fila está cheia
+
+        Raises:
+            ValueError: Mesmas validações de push()
+        """
+        AgentQueue._validate(task.priority, task.cost)
+        if not isinstance(task.cost, int) or task.cost > MAX_COST:
+            raise ValueError(f"Cost deve ser inteiro em [0, {MAX_COST}]: {task.cost}")
+        fields = (
+            self._encode(task.task_id, MAX_TASK_ID, "task_id"),
+            self._encode(task.agent_name, MAX_NAME, "agent_name"),
+            self._encode(task.client_id, MAX_NAME, "client_id"),
+        )
+        if task.deadline < 0:
+            raise ValueError(f"Deadline anterior a 1970: {task.deadline}")
+        payload = json.dumps(task.payload or {}, ensure_ascii=False).encode("utf-8")
+        if len(payload) > self.payload_size:
+            raise ValueError(
+                f"Payload de {len(payload)} bytes excede payload_size={self.payload_size}"
+            )
+
+        key = fields[0].ljust(MAX_TASK_ID, b"\0")
+
+        with self._cond:
+            pos = self._find(key)
+            if self._index[pos] != _EMPTY:
+                raise ValueError(f"task_id duplicado na fila: {task.task_id}")
+            header = self._header
+            size = header[_SIZE]
+            if size >= self.capacity:
+                header[_REJECTED] += 1
+                logger.warning(
+                    "Fila cheia (%d/%d). Rejeitando tarefa %s/%s",
+                    size,
+                    self.capacity,
+                    task.agent_name,
+                    task.client_id,
+                )
+                return False
+
+            top = header[_FREE_TOP] - 1
+            header[_FREE_TOP] = top
+            slot = self._free[top]
+            offset = self._slots_offset + slot * self._slot_size
+            buf = self._shm.buf
+            _RECORD.pack_into(buf, offset, *fields, len(payload))
+            offset += _RECORD.size
+            buf[offset : offset + len(payload)] = payload
+            self._index[pos] = slot
+
+            seq = header[_NEXT_SEQ]
+            header[_NEXT_SEQ] = seq + 1
+            entry = _ENTRY.pack(task.priority, task.deadline, task.cost, seq, slot)
+            header[_SIZE] = size + 1
+            self._sift_up(size, entry)
+            header[_PUSHED] += 1
+            self._cond.notify()
+
+        logger.debug("[PUSH] %s", task)
+        return True
+
+    def pop(self) -> Optional[AgentTask]:
+        """Remove e retorna a tarefa de maior prioridade (None se vazia)."""
+        with self._cond:
+            return self._pop_locked()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[AgentTask]:
+        """Remove a tarefa de maior prioridade, bloqueando enquanto vazia.
+
+        Args:
+            timeout: Segundos máximos de espera (None = indefinidamente)
+
+        Returns:
+            Próxima AgentTask, ou None se o timeout expirar com a fila vazia
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._header[_SIZE]:
+                remaining = None if end is None else end - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return self._pop_locked()
+
+    def peek(self) -> Optional[AgentTask]:
+        """Retorna a próxima tarefa sem remover."""
+        with self._cond:
+            if not self._header[_SIZE]:
+                return None
+            return self._decode(self._heap[: _ENTRY.size])
+
+    def __contains__(self, task_id: str) -> bool:
+        """Verifica se task_id está na fila (O(1))."""
+        key = task_id.encode("utf-8").ljust(MAX_TASK_ID, b"\0")
+        if len(key) > MAX_TASK_ID:
+            return False
+        with self._cond:
+            return self._index[self._find(key)] != _EMPTY
+
+    def size(self) -> int:
+        """Número de tarefas na fila."""
+        with self._cond:
+            return self._header[_SIZE]
+
+    def is_empty(self) -> bool:
+        """Verifica se a fila está vazia."""
+        return self.size() == 0
+
+    def clear(self) -> None:
+        """Esvazia a fila (contadores de estatística são mantidos)."""
+        with self._cond:
+            self._header[_SIZE] = 0
+            self._reset_free_slots()
+            self._reset_index()
+        logger.info("[CLEAR] Fila compartilhada %s esvaziada", self.name)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas (compartilhadas por todos os processos).
+
+        Returns:
+            Dict com total_pushed, total_popped, total_rejected,
+            total_overdue, size_atual, max_size e payload_size
+        """
+        with self._cond:
+            header = self._header
+            return {
+                "total_pushed": header[_PUSHED],
+                "total_popped": header[_POPPED],
+                "total_rejected": header[_REJECTED],
+                "total_overdue": header[_OVERDUE],
+                "size_atual": header[_SIZE],
+                "max_size": self.capacity,
+                "payload_size": self.payload_size,
+            }
+
+    # ------------------------------------------------------------------
+    # Internos (chamados com o lock adquirido)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _total_size(capacity: int, payload_size: int) -> int:
+        slot_size = _RECORD.size + payload_size
+        index_bytes = SharedMemoryAgentQueue._index_size(capacity) * 4
+        return _HEADER_SIZE + capacity * (_ENTRY.size + 4 + slot_size) + index_bytes
+
+    @staticmethod
+    def _index_size(capacity: int) -> int:
+        """Posições do índice: potência de 2 >= 2 * capacity (sempre há vaga)."""
+        return 1 << (2 * capacity - 1).bit_length()
+
+    def _layout(self) -> None:
+        """Calcula os offsets das regiões e cria as views sobre o bloco."""
+        buf = self._shm.buf
+        heap_end = _HEADER_SIZE + self.capacity * _ENTRY.size
+        free_end = heap_end + self.capacity * 4
+        index_end = free_end + self._index_size(self.capacity) * 4
+        self._header = buf[:_HEADER_SIZE].cast("Q")
+        self._heap = buf[_HEADER_SIZE:heap_end]
+        self._free = buf[heap_end:free_end].cast("I")
+        self._index = buf[free_end:index_end].cast("I")
+        self._slots_offset = index_end
+        self._slot_size = _RECORD.size + self.payload_size
+
+    def _reset_free_slots(self) -> None:
+        free = self._free
+        for slot in range(self.capacity):
+            free[slot] = slot
+        self._header[_FREE_TOP] = self.capacity
+
+    def _reset_index(self) -> None:
+        self._index.cast("B")[:] = b"\xff" * self._index.nbytes
+
+    def _new_task_id(self) -> str:
+        """Gera ID curto (8 hex) inédito na fila (mesmo formato da AgentQueue)."""
+        task_id = os.urandom(4).hex()
+        while task_id in self:
+            task_id = os.urandom(4).hex()
+        return task_id
+
+    def _slot_key(self, slot: int) -> bytes:
+        """task_id (16 bytes, completado com NUL) gravado no slot."""
+        offset = self._slots_offset + slot * self._slot_size
+        return bytes(self._shm.buf[offset : offset + MAX_TASK_ID])
+
+    def _find(self, key: bytes) -> int:
+        """Posição de `key` no índice, ou a vaga vazia onde ela entraria.
+
+        crc32 (e não hash()) porque a posição precisa ser a mesma em todos
+        os processos.
+        """
+        index = self._index
+        mask = len(index) - 1
+        pos = zlib.crc32(key) & mask
+        while True:
+            slot = index[pos]
+            if slot == _EMPTY or self._slot_key(slot) == key:
+                return pos
+            pos = (pos + 1) & mask
+
+    def _index_remove(self, key: bytes) -> None:
+        """Remove `key` do índice puxando para trás as entradas seguintes.
+
+        Sem tombstones: cada entrada do cluster que pode ocupar o buraco sem
+        ficar antes da sua posição ideal é movida para ele.
+        """
+        index = self._index
+        mask = len(index) - 1
+        hole = self._find(key)
+        pos = (hole + 1) & mask
+        while index[pos] != _EMPTY:
+            home = zlib.crc32(self._slot_key(index[pos])) & mask
+            if (pos - home) & mask >= (pos - hole) & mask:
+                index[hole] = index[pos]
+                hole = pos
+            pos = (pos + 1) & mask
+        index[hole] = _EMPTY
+
+    # Como seq é único, a ordem das entradas completas (chave + slot) é a
+    # ordem das chaves: os sifts comparam os bytes inteiros da entrada.
+
+    def _sift_up(self, pos: int, entry: bytes) -> None:
+        heap = self._heap
+        size = _ENTRY.size
+        while pos > 0:
+            parent_pos = (pos - 1) >> 1
+            start = parent_pos * size
+            parent = bytes(heap[start : start + size])
+            if not entry < parent:
+                break
+            heap[pos * size : pos * size + size] = parent
+            pos = parent_pos
+        heap[pos * size : pos * size + size] = entry
+
+    def _sift_down(self, pos: int, entry: bytes, count: int) -> None:
+        """Desce o buraco até uma folha pelo menor filho e sobe `entry` dali.
+
+        Mesma estratégia do heapq: ~log n comparações entre filhos em vez de
+        2 log n, já que a entrada reposicionada (a última) costuma voltar
+        para perto das folhas.
+        """
+        heap = self._heap
+        size = _ENTRY.size
+        start_pos = pos
+        child = 2 * pos + 1
+        while child < count:
+            child_entry = bytes(heap[child * size : child * size + size])
+            right = child + 1
+            if right < count:
+                right_entry = bytes(heap[right * size : right * size + size])
+                if right_entry < child_entry:
+                    child, child_entry = right, right_entry
+            heap[pos * size : pos * size + size] = child_entry
+            pos = child
+            child = 2 * pos + 1
+
+        while pos > start_pos:
+            parent_pos = (pos - 1) >> 1
+            parent = bytes(heap[parent_pos * size : parent_pos * size + size])
+            if not entry < parent:
+                break
+            heap[pos * size : pos * size + size] = parent
+            pos = parent_pos
+        heap[pos * size : pos * size + size] = entry
+
+    def _pop_locked(self) -> Optional[AgentTask]:
+        header = self._header
+        count = header[_SIZE]
+        if not count:
+            return None
+
+        size = _ENTRY.size
+        entry = bytes(self._heap[:size])
+        task = self._decode(entry)
+        slot = _ENTRY.unpack(entry)[-1]
+        self._index_remove(self._slot_key(slot))
+        top = header[_FREE_TOP]
+        self._free[top] = slot
+        header[_FREE_TOP] = top + 1
+
+        count -= 1
+        header[_SIZE] = count
+        if count:
+            last = bytes(self._heap[count * size : count * size + size])
+            self._sift_down(0, last, count)
+
+        header[_POPPED] += 1
+        if task.deadline < time.time():
+            header[_OVERDUE] += 1
+            logger.warning("[POP] Tarefa vencida: %s", task)
+        logger.debug("[POP] %s", task)
+        return task
+
+    def _decode(self, entry: bytes) -> AgentTask:
+        """Monta a AgentTask (com payload) a partir de uma entrada da heap."""
+        priority, deadline, cost, _, slot = _ENTRY.unpack(entry)
+        buf = self._shm.buf
+        offset = self._slots_offset + slot * self._slot_size
+        task_id, agent_name, client_id, length = _RECORD.unpack_from(buf, offset)
+        offset += _RECORD.size
+        return AgentTask(
+            priority=priority,
+            deadline=deadline,
+            cost=cost,
+            task_id=task_id.rstrip(b"\0").decode("utf-8"),
+            agent_name=agent_name.rstrip(b"\0").decode("utf-8"),
+            client_id=client_id.rstrip(b"\0").decode("utf-8"),
+            payload=json.loads(bytes(buf[offset : offset + length]).decode("utf-8")),
+        )
+
+    @staticmethod
+    def _encode(value: str, limit: int, field: str) -> bytes:
+        data = value.encode("utf-8")
+        if len(data) > limit:
+            raise ValueError(f"{field} excede {limit} bytes: {value!r}")
+        return data
@@ -7,13 +7,20 @@ de tarefas baseado em urgência, deadline e custo computacional.
 from __future__ import annotations
 
 import argparse
+import itertools
 import json
+import os
 import sys
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
 
 from src.agents import site_agent
 from src.agents import nf_agent
-from src.core.agent_queue import AgentQueue, create_deadline
+from src.core.agent_queue import AgentQueue, AgentTask, create_deadline
+from src.core.dispatcher import AgentDispatcher
+from src.core.persistent_queue import PersistentAgentQueue
+from src.core.queue_snapshot import QueueSnapshot
+from src.core.scheduling import POLICIES, create_policy
 from src.utils.logging_utils import get_logger
 from src.utils.formatting_utils import clean_markdown
 
@@ -22,23 +29,60 @@ logger = get_logger("orchestrator")
 # Instância global da fila de tarefas
 _TASK_QUEUE = None
 
+# Banco padrão da fila persistente usada pelos comandos `queue` da CLI
+DEFAULT_QUEUE_DB = os.getenv("AGENT_QUEUE_DB", "data/agent_queue.db")
+DEFAULT_QUEUE_POLICY = os.getenv("AGENT_QUEUE_POLICY", "priority")
 
-def get_task_queue(max_size: int = 1000) -> AgentQueue:
+
+def get_task_queue(
+    max_size: int = 1000,
+    db_path: Optional[str] = None,
+    policy: Optional[str] = None,
+) -> AgentQueue:
     """Obtém ou cria a instância global da fila de tarefas.
 
     Args:
         max_size: Tamanho máximo da fila (padrão: 1000).
+        db_path: Banco SQLite para fila persistente (None = apenas em memória).
+            Só tem efeito na primeira chamada.
+        policy: Política de escalonamento ("priority", "aging", "edf", "wfq";
+            padrão: $AGENT_QUEUE_POLICY). Só tem efeito na primeira chamada.
 
     Returns:
         AgentQueue configurada.
     """
     global _TASK_QUEUE
     if _TASK_QUEUE is None:
-        _TASK_QUEUE = AgentQueue(max_size=max_size)
-        logger.info("Task queue inicializada com max_size=%d", max_size)
+        scheduling = create_policy(policy or DEFAULT_QUEUE_POLICY)
+        if db_path:
+            _TASK_QUEUE = PersistentAgentQueue(
+                db_path, max_size=max_size, policy=scheduling
+            )
+            logger.info(
+                "Task queue persistente inicializada (%s, max_size=%d, policy=%s, %d tarefas)",
+                db_path,
+                max_size,
+                scheduling.name,
+                _TASK_QUEUE.size(),
+            )
+        else:
+            _TASK_QUEUE = AgentQueue(max_size=max_size, policy=scheduling)
+            logger.info(
+                "Task queue inicializada com max_size=%d, policy=%s",
+                max_size,
+                scheduling.name,
+            )
     return _TASK_QUEUE
 
 
+def close_task_queue() -> None:
+    """Grava e fecha a fila global (no-op para fila em memória)."""
+    global _TASK_QUEUE
+    if isinstance(_TASK_QUEUE, PersistentAgentQueue):
+        _TASK_QUEUE.close()
+    _TASK_QUEUE = None
+
+
 # Lembrar: respeite sempre os Termos de Uso do serviço alvo antes de rodar automações.
 
 
@@ -49,12 +93,62 @@ def _handle_queue_stats() -> int:
     return 0
 
 
-def _handle_queue_list() -> int:
-    """Lista todas as tarefas na fila."""
-    queue = get_task_queue()
-    tasks = queue.get_all_tasks()
+def _handle_queue_list(
+    snapshot_path: Optional[str] = None,
+    top: Optional[int] = None,
+    offset: int = 0,
+) -> int:
+    """Lista as tarefas da fila (ou de um snapshot, sem carregá-lo).
+
+    Com --top só as offset + top primeiras tarefas são visitadas
+    (iter_ordered / QueueSnapshot.iter_tasks), sem copiar nem ordenar a fila
+    inteira; o snapshot é sempre lido em streaming.
 
-    if not tasks:
+    Args:
+        snapshot_path: Snapshot gravado por `queue snapshot` (None = fila atual)
+        top: Máximo de tarefas exibidas (None = todas); também limita as agendadas
+        offset: Tarefas prontas puladas antes da primeira exibida
+    """
+    if (top is not None and top < 0) or offset < 0:
+        print("✗ Erro: --top e --offset devem ser >= 0")
+        return 1
+    stop = None if top is None else offset + top
+
+    if snapshot_path:
+        try:
+            snapshot = QueueSnapshot(snapshot_path)
+        except (OSError, ValueError) as e:
+            logger.error("Erro ao abrir snapshot %s: %s", snapshot_path, e)
+            print(f"✗ Erro: {e}")
+            return 1
+        print(f"Snapshot: {snapshot_path} ({snapshot.policy})")
+        tasks = itertools.islice(snapshot.iter_tasks(), offset, stop)
+        total = snapshot.ready
+        scheduled = snapshot.iter_scheduled()
+        scheduled_total = snapshot.scheduled
+    else:
+        queue = get_task_queue()
+        # Sem --top a fila inteira é percorrida: copiar e desempilhar a heap
+        # (get_all_tasks) é mais rápido que a fronteira nesse caso
+        ordered = queue.get_all_tasks() if stop is None else queue.iter_ordered(stop)
+        tasks = itertools.islice(ordered, offset, None)
+        total = queue.size()
+        scheduled = queue.get_scheduled_tasks()
+        scheduled_total = len(scheduled)
+
+    return _print_task_list(
+        tasks, total, itertools.islice(scheduled, top), scheduled_total
+    )
+
+
+def _print_task_list(
+    tasks: Iterable[AgentTask],
+    total: int,
+    scheduled: Iterable[AgentTask],
+    scheduled_total: int,
+) -> int:
+    """Imprime tarefas prontas (em ordem) e agendadas; aceita iteradores."""
+    if not total and not scheduled_total:
         print("Fila vazia.")
         return 0
 
@@ -63,13 +157,43 @@ def _handle_queue_list() -> int:
     )
     print("-" * 83)
 
+    shown = 0
     for task in tasks:
         deadline_str = datetime.fromtimestamp(task.deadline).strftime("%Y-%m-%d %H:%M")
         print(
             f"{task.task_id:<12} {task.priority:<10} {task.agent_name:<20} {task.client_id:<15} {deadline_str:<20} {task.cost:<6}"
         )
+        shown += 1
+
+    if shown == total:
+        print(f"\nTotal: {total} tarefas")
+    else:
+        print(f"\nExibindo {shown} de {total} tarefas")
+
+    if scheduled_total:
+        print(f"\nAgendadas: {scheduled_total}")
+        print(f"{'ID':<12} {'LIBERA EM':<20} {'AGENT':<20} {'CLIENT':<15}")
+        print("-" * 83)
+        for task in scheduled:
+            not_before_str = datetime.fromtimestamp(task.not_before).strftime(
+                "%Y-%m-%d %H:%M"
+            )
+            print(
+                f"{task.task_id:<12} {not_before_str:<20} {task.agent_name:<20} {task.client_id:<15}"
+            )
+    return 0
 
-    print(f"\nTotal: {len(tasks)} tarefas")
+
+def _handle_queue_snapshot(path: str) -> int:
+    """Grava a fila num snapshot binário (ver AgentQueue.snapshot)."""
+    queue = get_task_queue()
+    try:
+        count = queue.snapshot(path)
+    except (OSError, ValueError) as e:
+        logger.exception("Erro ao gravar snapshot: %s", e)
+        print(f"✗ Erro: {e}")
+        return 1
+    print(f"✓ Snapshot gravado: {path} ({count} tarefas)")
     return 0
 
 
@@ -83,36 +207,76 @@ def _handle_queue_clear() -> int:
     return 0
 
 
-def _handle_queue_process(count: int) -> int:
-    """Processa N tarefas da fila sequencialmente."""
+def _report_processed(index: int, task) -> None:
+    """Imprime e registra uma tarefa processada."""
+    overdue_marker = " [OVERDUE]" if task.is_overdue() else ""
+    print(
+        f"[{index}] Processando: {task.agent_name} (client: {task.client_id}, priority: {task.priority}){overdue_marker}"
+    )
+    logger.info(
+        "Task processed: task_id=%s, agent=%s, client=%s",
+        task.task_id,
+        task.agent_name,
+        task.client_id,
+    )
+
+
+def _handle_queue_process(
+    count: int,
+    max_cost: Optional[int] = None,
+    workers: int = 1,
+    agent_limits: Optional[Dict[str, int]] = None,
+) -> int:
+    """Processa até N tarefas da fila.
+
+    Com workers == 1 as tarefas são retiradas em lote (pop_batch: tarefas
+    que estourariam max_cost são puladas, não bloqueiam as seguintes) e
+    processadas em sequência; com workers > 1 um AgentDispatcher executa em
+    paralelo.
+
+    Args:
+        count: Número máximo de tarefas
+        max_cost: Orçamento de custo somado do lote (None = sem limite)
+        workers: Número de workers concorrentes
+        agent_limits: Máximo de execuções simultâneas por agente
+    """
     queue = get_task_queue()
 
     if queue.is_empty():
         print("Fila vazia. Nada a processar.")
         return 0
 
-    processed = 0
-    for i in range(count):
-        task = queue.pop()
-        if task is None:
-            break
-
-        processed += 1
-        overdue_marker = " [OVERDUE]" if task.is_overdue() else ""
-        print(
-            f"[{i + 1}] Processando: {task.agent_name} (client: {task.client_id}, priority: {task.priority}){overdue_marker}"
-        )
-        logger.info(
-            "Task processed: task_id=%s, agent=%s, client=%s",
-            task.task_id,
-            task.agent_name,
-            task.client_id,
+    if workers <= 1:
+        tasks = queue.pop_batch(budget=max_cost, max_tasks=count)
+        for i, task in enumerate(tasks):
+            _report_processed(i + 1, task)
+        processed = len(tasks)
+    else:
+        counter = itertools.count(1)
+        dispatcher = AgentDispatcher(
+            queue,
+            max_workers=workers,
+            agent_limits=agent_limits,
+            default_handler=lambda task: _report_processed(next(counter), task),
         )
+        results = dispatcher.run(max_tasks=count, max_cost=max_cost)
+        processed = sum(1 for r in results if r.status == "success")
+        failed = sum(1 for r in results if r.status == "failed")
+        if failed:
+            print(f"✗ {failed} tarefa(s) falharam")
 
     print(f"\n✓ {processed} tarefa(s) processada(s)")
     return 0
 
 
+def _parse_agent_limit(value: str) -> Tuple[str, int]:
+    """Tipo argparse de --agent-limit: "nf_agent=2" -> ("nf_agent", 2)."""
+    agent_name, _, limit = value.partition("=")
+    if not agent_name or not limit.isdigit():
+        raise argparse.ArgumentTypeError(f"Limite inválido: {value!r} (use agente=N)")
+    return agent_name, int(limit)
+
+
 def _handle_queue_push(args) -> int:
     """Adiciona tarefa manualmente à fila."""
     queue = get_task_queue()
@@ -122,6 +286,9 @@ def _handle_queue_push(args) -> int:
         payload = {}
         if args.payload:
             payload = json.loads(args.payload)
+        not_before = None
+        if args.delay_minutes:
+            not_before = datetime.now() + timedelta(minutes=args.delay_minutes)
 
         task_id = queue.push(
             priority=args.priority,
@@ -130,6 +297,8 @@ def _handle_queue_push(args) -> int:
             agent_name=args.agent,
             client_id=args.client,
             payload=payload,
+            not_before=not_before,
+            dedup_key=args.dedup_key,
         )
 
         if task_id is None:
@@ -142,6 +311,8 @@ def _handle_queue_push(args) -> int:
         print(f"  Priority: {args.priority}")
         print(f"  Deadline: {deadline.strftime('%Y-%m-%d %H:%M')}")
         print(f"  Cost: {args.cost}")
+        if not_before is not None:
+            print(f"  Agendada para: {not_before.strftime('%Y-%m-%d %H:%M')}")
 
         return 0
     except json.JSONDecodeError:
@@ -154,6 +325,70 @@ def _handle_queue_push(args) -> int:
         return 1
 
 
+def _handle_queue_push_batch(path: str) -> int:
+    """Adiciona lote de tarefas a partir de arquivo JSON (lista de objetos).
+
+    Cada objeto aceita: agent, client (obrigatórios), priority (padrão 3),
+    days (padrão 1), cost (padrão 1), payload (padrão {}), delay_minutes
+    (agenda a tarefa; padrão: pronta imediatamente) e dedup_key (mescla com
+    a tarefa já enfileirada com a mesma chave).
+    """
+    queue = get_task_queue()
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        if not isinstance(entries, list):
+            raise ValueError(
+                "o arquivo deve conter uma lista JSON de tarefas, "
+                f"recebido {type(entries).__name__}"
+            )
+        for pos, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                raise ValueError(
+                    f"tarefa {pos} deve ser um objeto JSON, recebido {type(entry).__name__}"
+                )
+
+        now = datetime.now()
+        items = [
+            {
+                "priority": entry.get("priority", 3),
+                "deadline": create_deadline(days_ahead=entry.get("days", 1)),
+                "cost": entry.get("cost", 1),
+                "agent_name": entry["agent"],
+                "client_id": entry["client"],
+                "payload": entry.get("payload", {}),
+                "not_before": (
+                    now + timedelta(minutes=entry["delay_minutes"])
+                    if entry.get("delay_minutes")
+                    else None
+                ),
+                "dedup_key": entry.get("dedup_key"),
+            }
+            for entry in entries
+        ]
+        task_ids = queue.push_many(items)
+    except FileNotFoundError:
+        logger.error("Arquivo de tarefas não encontrado: %s", path)
+        print(f"✗ Erro: Arquivo não encontrado: {path}")
+        return 1
+    except json.JSONDecodeError:
+        logger.exception("Erro ao decodificar arquivo JSON de tarefas")
+        print("✗ Erro: Arquivo JSON inválido")
+        return 1
+    except (KeyError, TypeError, ValueError) as e:
+        logger.exception("Erro ao criar lote de tarefas: %s", e)
+        print(f"✗ Erro: {e}")
+        return 1
+
+    rejected = len(items) - len(task_ids)
+    print(f"✓ {len(task_ids)} tarefa(s) adicionada(s)")
+    if rejected:
+        print(f"✗ {rejected} tarefa(s) rejeitada(s): fila cheia")
+        return 1
+    return 0
+
+
 def _parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Orquestrador de automações com Priority Queue"
@@ -214,10 +449,45 @@ def _parse_args() -> argparse.Namespace:
 
     # Novo: queue management
     queue_parser = subparsers.add_parser("queue", help="Gerenciar fila de tarefas")
+    queue_parser.add_argument(
+        "--db",
+        default=DEFAULT_QUEUE_DB,
+        help=f"Banco SQLite da fila persistente (padrão: $AGENT_QUEUE_DB ou {DEFAULT_QUEUE_DB})",
+    )
+    queue_parser.add_argument(
+        "--policy",
+        choices=sorted(POLICIES),
+        default=DEFAULT_QUEUE_POLICY,
+        help=f"Política de escalonamento (padrão: $AGENT_QUEUE_POLICY ou {DEFAULT_QUEUE_POLICY})",
+    )
     queue_subparsers = queue_parser.add_subparsers(dest="queue_cmd", required=True)
 
     queue_subparsers.add_parser("stats", help="Mostrar estatísticas da fila")
-    queue_subparsers.add_parser("list", help="Listar todas as tarefas na fila")
+    list_parser = queue_subparsers.add_parser(
+        "list", help="Listar todas as tarefas na fila"
+    )
+    list_parser.add_argument(
+        "--snapshot",
+        help="(Opcional) Listar a partir de um snapshot (sem abrir a fila)",
+    )
+    list_parser.add_argument(
+        "--top",
+        type=int,
+        help="(Opcional) Exibir só as N primeiras tarefas (prontas e agendadas)",
+    )
+    list_parser.add_argument(
+        "--offset",
+        type=int,
+        default=0,
+        help="Pular as N primeiras tarefas prontas (padrão: 0)",
+    )
+
+    snapshot_parser = queue_subparsers.add_parser(
+        "snapshot", help="Gravar a fila num snapshot binário"
+    )
+    snapshot_parser.add_argument(
+        "--output", required=True, help="Arquivo de destino do snapshot"
+    )
 
     queue_subparsers.add_parser("clear", help="Limpar todas as tarefas da fila")
 
@@ -227,6 +497,24 @@ def _parse_args() -> argparse.Namespace:
     process_parser.add_argument(
         "--count", type=int, default=1, help="Número de tarefas a processar (padrão: 1)"
     )
+    process_parser.add_argument(
+        "--max-cost",
+        type=int,
+        help="(Opcional) Custo total máximo do lote processado",
+    )
+    process_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Número de workers concorrentes (padrão: 1 = sequencial)",
+    )
+    process_parser.add_argument(
+        "--agent-limit",
+        action="append",
+        type=_parse_agent_limit,
+        metavar="AGENTE=N",
+        help="(Opcional) Máximo de execuções simultâneas por agente (repetível)",
+    )
 
     push_parser = queue_subparsers.add_parser(
         "push", help="Adicionar tarefa manualmente à fila"
@@ -249,6 +537,24 @@ def _parse_args() -> argparse.Namespace:
         "--cost", type=int, default=1, help="Custo computacional (padrão: 1)"
     )
     push_parser.add_argument("--payload", help="Payload JSON (opcional)")
+    push_parser.add_argument(
+        "--delay-minutes",
+        type=int,
+        help="(Opcional) Agendar: a tarefa só fica pronta após N minutos",
+    )
+    push_parser.add_argument(
+        "--dedup-key",
+        help="(Opcional) Chave do trabalho lógico: se já enfileirada, o push é mesclado à tarefa existente",
+    )
+
+    push_batch_parser = queue_subparsers.add_parser(
+        "push-batch", help="Adicionar lote de tarefas a partir de arquivo JSON"
+    )
+    push_batch_parser.add_argument(
+        "--file",
+        required=True,
+        help="Arquivo JSON com lista de tarefas (agent, client, priority, days, cost, payload, delay_minutes, dedup_key)",
+    )
 
     return parser.parse_args()
 
@@ -258,19 +564,35 @@ def main() -> int:
 
     # Novo: Comandos de gerenciamento de fila
     if args.comando == "queue":
-        if args.queue_cmd == "stats":
-            return _handle_queue_stats()
-        elif args.queue_cmd == "list":
-            return _handle_queue_list()
-        elif args.queue_cmd == "clear":
-            return _handle_queue_clear()
-        elif args.queue_cmd == "process":
-            return _handle_queue_process(args.count)
-        elif args.queue_cmd == "push":
-            return _handle_queue_push(args)
-        else:
-            logger.error("Comando de fila desconhecido: %s", args.queue_cmd)
-            return 1
+        if args.queue_cmd == "list" and args.snapshot:
+            return _handle_queue_list(args.snapshot, args.top, args.offset)
+
+        get_task_queue(db_path=args.db, policy=args.policy)
+        try:
+            if args.queue_cmd == "stats":
+                return _handle_queue_stats()
+            elif args.queue_cmd == "list":
+                return _handle_queue_list(top=args.top, offset=args.offset)
+            elif args.queue_cmd == "snapshot":
+                return _handle_queue_snapshot(args.output)
+            elif args.queue_cmd == "clear":
+                return _handle_queue_clear()
+            elif args.queue_cmd == "process":
+                return _handle_queue_process(
+                    args.count,
+                    args.max_cost,
+                    args.workers,
+                    dict(args.agent_limit or []),
+                )
+            elif args.queue_cmd == "push":
+                return _handle_queue_push(args)
+            elif args.queue_cmd == "push-batch":
+                return _handle_queue_push_batch(args.file)
+            else:
+                logger.error("Comando de fila desconhecido: %s", args.queue_cmd)
+                return 1
+        finally:
+            close_task_queue()
 
     if args.comando == "executar":
         site = args.site
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Benchmark: backoff exponencial do OPEN numa queda simulada de API.
+
+Simula (com relógio injetado, sem sleep) um cliente chamando uma API a cada
+`interval` segundos. A API fica fora do ar por `outage` segundos e volta.
+Para cada configuração do breaker mede (média sobre PHASES finais de queda
+distintos, para não depender do alinhamento com o relógio dos testes):
+
+1. Chamadas desperdiçadas: chamadas que chegaram à API fora do ar
+   (falhas até abrir + testes em HALF_OPEN que falharam)
+2. Latência de recuperação: segundos entre a volta da API e o primeiro sucesso
+3. Rejeições com a API no ar: chamadas barradas depois que ela voltou
+
+Uso:
+    python src/tests/benchmark_circuit_breaker_backoff.py [interval]
+"""
+
+import random
+import sys
+
+sys.path.insert(0, ".")
+
+from src.core.circuit_breaker import CircuitBreaker, CircuitBreakerConfig  # noqa: E402
+
+OUTAGES = [5, 60, 600, 3600]
+PHASES = [i * 3.0 for i in range(20)]  # desloca o fim da queda em [0, 60)
+
+CONFIGS = {
+    "fixo 60s": dict(timeout=60),
+    "fixo 5s": dict(timeout=5),
+    "backoff 5s→60s": dict(
+        timeout=5, backoff_multiplier=2, max_timeout=60, timeout_jitter=0.2
+    ),
+    "backoff 5s→300s": dict(
+        timeout=5, backoff_multiplier=2, max_timeout=300, timeout_jitter=0.2
+    ),
+}
+
+
+class SimClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def simulate(config: dict, outage: float, interval: float, seed: int = 42) -> dict:
+    """Roda uma queda simulada e devolve as métricas."""
+    clock = SimClock()
+    cb = CircuitBreaker(
+        CircuitBreakerConfig(failure_threshold=5, success_threshold=1, **config),
+        clock=clock,
+        rng=random.Random(seed),
+    )
+    start, end = 10.0, 10.0 + outage
+    wasted = 0
+    rejected_up = 0
+    recovered_at = None
+
+    def api():
+        nonlocal wasted
+        if start <= clock.now < end:
+            wasted += 1
+            raise ConnectionError("API fora do ar")
+        return "ok"
+
+    while recovered_at is None:
+        try:
+            result = cb.call(api)
+        except ConnectionError:
+            result = "falha"
+        if clock.now >= end:
+            if result is None:
+                rejected_up += 1
+            elif result == "ok":
+                recovered_at = clock.now
+        clock.now += interval
+
+    return {
+        "wasted": wasted,
+        "recovery": recovered_at - end,
+        "rejected_up": rejected_up,
+    }
+
+
+def main():
+    interval = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+
+    print("=" * 80)
+    print(
+        f"BENCHMARK: Circuit breaker em queda simulada (1 chamada a cada {interval}s)"
+    )
+    print("=" * 80)
+
+    for outage in OUTAGES:
+        print(f"\nQUEDA DE {outage}s")
+        print("-" * 80)
+        print(
+            f"{'config':<18} {'chamadas desperdiçadas':>24} "
+            f"{'recuperação (s)':>17} {'rejeitadas no ar':>18}"
+        )
+        for name, config in CONFIGS.items():
+            runs = [
+                simulate(config, outage + phase, interval, seed=i)
+                for i, phase in enumerate(PHASES)
+            ]
+            mean = {key: sum(r[key] for r in runs) / len(runs) for key in runs[0]}
+            print(
+                f"{name:<18} {mean['wasted']:>24.1f} "
+                f"{mean['recovery']:>17.1f} {mean['rejected_up']:>18.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
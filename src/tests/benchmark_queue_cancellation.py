@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Benchmark: Cancelamento em massa (remoção imediata vs lazy_delete).
+
+Enche a fila, cancela uma fração das tarefas com remove_task() e depois
+esvazia com pop(). Compara o modo padrão (remoção física O(log n)) com
+lazy_delete (tombstone O(1) + compactação) para várias frações de
+cancelamento e compact_ratio.
+
+Uso:
+    python src/tests/benchmark_queue_cancellation.py [num_tasks]
+"""
+
+import logging
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, ".")
+
+from src.core.agent_queue import AgentQueue  # noqa: E402
+
+
+def _run(num_tasks: int, cancel_fraction: float, **queue_kwargs) -> dict:
+    rng = random.Random(42)
+    queue = AgentQueue(**queue_kwargs)
+    deadline = datetime.now() + timedelta(days=1)
+    ids = [
+        queue.push(rng.randint(1, 5), deadline, 1, "agent", f"client_{i}", {})
+        for i in range(num_tasks)
+    ]
+    to_cancel = rng.sample(ids, int(num_tasks * cancel_fraction))
+
+    start = time.perf_counter()
+    for task_id in to_cancel:
+        queue.remove_task(task_id)
+    cancel_time = time.perf_counter() - start
+    stats = queue.get_stats()
+
+    start = time.perf_counter()
+    popped = 0
+    while queue.pop() is not None:
+        popped += 1
+    pop_time = time.perf_counter() - start
+
+    assert popped == num_tasks - len(to_cancel)
+    return {
+        "cancel_us": cancel_time / max(1, len(to_cancel)) * 1e6,
+        "pop_us": pop_time / max(1, popped) * 1e6,
+        "total_ms": (cancel_time + pop_time) * 1000,
+        "compactions": stats["total_compactions"],
+    }
+
+
+def main():
+    logging.getLogger("agent_queue").setLevel(logging.ERROR)
+    num_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    print("=" * 80)
+    print(f"BENCHMARK: Cancelamento em massa ({num_tasks:,} tarefas)")
+    print("=" * 80)
+    print(
+        f"\n{'CANCEL':>7} {'MODE':>16} {'µs/REMOVE':>10} {'µs/POP':>8} {'TOTAL ms':>10} {'COMPACT':>8}"
+    )
+    print("-" * 80)
+
+    modes = [
+        ("eager", {}),
+        ("lazy/0.25", {"lazy_delete": True, "compact_ratio": 0.25}),
+        ("lazy/0.5", {"lazy_delete": True, "compact_ratio": 0.5}),
+        ("lazy/1.0", {"lazy_delete": True, "compact_ratio": 1.0}),
+    ]
+    for fraction in (0.1, 0.5, 0.9):
+        for label, kwargs in modes:
+            result = _run(num_tasks, fraction, **kwargs)
+            print(
+                f"{fraction * 100:>6.0f}% {label:>16} {result['cancel_us']:>10.2f} {result['pop_us']:>8.2f} "
+                f"{result['total_ms']:>10.1f} {result['compactions']:>8}"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Benchmark: Contenção em ThreadSafeAgentQueue e AsyncAgentQueue.
+
+Executa N produtores e N consumidores (N = 1..32) movendo um total fixo de
+tarefas e mede a vazão (tarefas/s). Como referência, a mesma carga roda
+sobre queue.PriorityQueue da stdlib (tuplas simples, sem índices).
+
+Uso:
+    python src/tests/benchmark_queue_contention.py [num_tasks]
+"""
+
+import asyncio
+import queue as stdlib_queue
+import sys
+import threading
+import time
+
+sys.path.insert(0, ".")
+
+from src.core.agent_queue import TaskPriority, create_deadline  # noqa: E402
+from src.core.concurrent_queue import (  # noqa: E402
+    AsyncAgentQueue,
+    ThreadSafeAgentQueue,
+)
+
+WORKER_COUNTS = [1, 2, 4, 8, 16, 32]
+DEADLINE = create_deadline(days_ahead=1)
+
+
+def _split(total: int, parts: int) -> list:
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def run_threads(workers: int, num_tasks: int) -> float:
+    """N produtores + N consumidores sobre ThreadSafeAgentQueue."""
+    queue = ThreadSafeAgentQueue()
+
+    def produce(count: int, offset: int) -> None:
+        for i in range(count):
+            queue.push(
+                TaskPriority((i % 5) + 1),
+                DEADLINE,
+                1,
+                "agent",
+                f"client_{offset + i}",
+                {},
+            )
+
+    def consume(count: int) -> None:
+        for _ in range(count):
+            queue.get()
+
+    shares = _split(num_tasks, workers)
+    threads = [
+        threading.Thread(target=produce, args=(n, i * num_tasks))
+        for i, n in enumerate(shares)
+    ]
+    threads += [threading.Thread(target=consume, args=(n,)) for n in shares]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def run_stdlib(workers: int, num_tasks: int) -> float:
+    """Mesma carga sobre queue.PriorityQueue (referência)."""
+    queue = stdlib_queue.PriorityQueue()
+    deadline_ts = DEADLINE.timestamp()
+
+    def produce(count: int, offset: int) -> None:
+        for i in range(count):
+            queue.put(((i % 5) + 1, deadline_ts, offset + i))
+
+    def consume(count: int) -> None:
+        for _ in range(count):
+            queue.get()
+
+    shares = _split(num_tasks, workers)
+    threads = [
+        threading.Thread(target=produce, args=(n, i * num_tasks))
+        for i, n in enumerate(shares)
+    ]
+    threads += [threading.Thread(target=consume, args=(n,)) for n in shares]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def run_async(workers: int, num_tasks: int) -> float:
+    """N coroutines produtoras + N consumidoras sobre AsyncAgentQueue."""
+
+    async def scenario() -> float:
+        # max_size força produtores a aguardarem espaço (exercita put())
+        queue = AsyncAgentQueue(max_size=256)
+
+        async def produce(count: int, offset: int) -> None:
+            for i in range(count):
+                await queue.put(
+                    TaskPriority((i % 5) + 1),
+                    DEADLINE,
+                    1,
+                    "agent",
+                    f"client_{offset + i}",
+                    {},
+                )
+
+        async def consume(count: int) -> None:
+            for _ in range(count):
+                await queue.get()
+
+        shares = _split(num_tasks, workers)
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(produce(n, i * num_tasks) for i, n in enumerate(shares)),
+            *(consume(n) for n in shares),
+        )
+        return time.perf_counter() - start
+
+    return asyncio.run(scenario())
+
+
+def benchmark_contention(num_tasks: int = 20_000) -> None:
+    """Mede vazão para cada número de produtores/consumidores."""
+    print("=" * 80)
+    print(f"BENCHMARK: Queue Contention ({num_tasks:,} tarefas)")
+    print("=" * 80)
+    print(
+        f"\n{'PROD/CONS':>10} {'THREADSAFE/s':>14} {'STDLIB PQ/s':>13} {'ASYNC/s':>12}"
+    )
+    print("-" * 80)
+
+    for workers in WORKER_COUNTS:
+        threaded = run_threads(workers, num_tasks)
+        stdlib = run_stdlib(workers, num_tasks)
+        asynced = run_async(workers, num_tasks)
+        label = f"{workers}/{workers}"
+        print(
+            f"{label:>10} {num_tasks / threaded:>14,.0f} "
+            f"{num_tasks / stdlib:>13,.0f} {num_tasks / asynced:>12,.0f}"
+        )
+
+    print(
+        "\nSTDLIB PQ: queue.PriorityQueue com tuplas (sem índices/stats), apenas referência."
+    )
+
+
+def main():
+    num_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    benchmark_contention(num_tasks)
+
+
+if __name__ == "__main__":
+    main()
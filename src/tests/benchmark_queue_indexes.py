@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Benchmark: Lookups por agente/cliente vs tamanho da fila.
+
+Mede o custo de get_tasks_for_client / count_tasks_for_client com a fila
+crescendo de 1k até 1M tarefas. Com os índices secundários o custo deve
+permanecer estável (proporcional ao resultado, não à fila).
+
+Uso:
+    python src/tests/benchmark_queue_indexes.py [max_size]
+"""
+
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from src.core.agent_queue import AgentQueue, TaskPriority, create_deadline  # noqa: E402
+
+NUM_CLIENTS = 500
+LOOKUPS = 2000
+
+
+def fill_queue(queue: AgentQueue, start: int, end: int) -> None:
+    """Adiciona tarefas [start, end) distribuídas entre NUM_CLIENTS clientes."""
+    deadline = create_deadline(days_ahead=1)
+    for i in range(start, end):
+        queue.push(
+            priority=TaskPriority((i % 5) + 1),
+            deadline=deadline,
+            cost=1,
+            agent_name=f"agent_{i % 7}",
+            client_id=f"client_{i % NUM_CLIENTS}",
+            payload={},
+        )
+
+
+def benchmark_lookup_scaling(max_size: int = 1_000_000) -> None:
+    """Mede lookups por cliente com a fila crescendo 10x a cada etapa."""
+    print("=" * 80)
+    print("BENCHMARK: Secondary Index Lookups")
+    print("=" * 80)
+    print(
+        f"\n{'QUEUE SIZE':>12} {'COUNT (μs)':>12} {'LIST (μs)':>12} {'TASKS/CLIENT':>14}"
+    )
+    print("-" * 80)
+
+    queue = AgentQueue()
+    sizes = []
+    size = 1_000
+    while size <= max_size:
+        sizes.append(size)
+        size *= 10
+
+    filled = 0
+    for size in sizes:
+        fill_queue(queue, filled, size)
+        filled = size
+
+        # O resultado cresce com a fila; normalizamos por tarefa retornada
+        start = time.perf_counter()
+        for i in range(LOOKUPS):
+            queue.count_tasks_for_client(f"client_{i % NUM_CLIENTS}")
+        count_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        returned = 0
+        for i in range(LOOKUPS):
+            returned += len(queue.get_tasks_for_client(f"client_{i % NUM_CLIENTS}"))
+        list_time = time.perf_counter() - start
+
+        print(
+            f"{size:>12,} {count_time / LOOKUPS * 1_000_000:>12.3f} "
+            f"{list_time / max(1, returned) * 1_000_000:>12.4f} "
+            f"{returned // LOOKUPS:>14,}"
+        )
+
+    print("\nCOUNT: μs por chamada | LIST: μs por tarefa retornada")
+    print("Ambos devem permanecer estáveis enquanto a fila cresce 1000x.")
+
+
+def main():
+    max_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    benchmark_lookup_scaling(max_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Benchmark: Memória por tarefa na AgentQueue.
+
+Mede (via tracemalloc) os bytes alocados por tarefa enfileirada:
+1. Payload pequeno mantido no AgentTask (padrão)
+2. Payload pesado mantido no AgentTask
+3. Payload pesado fora da heap (SQLitePayloadStore)
+
+Uso:
+    python src/tests/benchmark_queue_memory.py [num_tasks]
+"""
+
+import gc
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, ".")
+
+from src.core.agent_queue import AgentQueue, TaskPriority, create_deadline  # noqa: E402
+from src.core.payload_store import SQLitePayloadStore  # noqa: E402
+
+
+def small_payload(i: int) -> dict:
+    return {"n": i}
+
+
+def heavy_payload(i: int) -> dict:
+    """Payload de ~0.5KB com conteúdo único por tarefa."""
+    return {"obligation": "DAS", "valor": 150.0, "notes": f"{i:08d}" + "x" * 512}
+
+
+def measure(label: str, num_tasks: int, queue: AgentQueue, make_payload) -> None:
+    """Enfileira num_tasks tarefas e imprime bytes alocados por tarefa."""
+    deadline = create_deadline(days_ahead=1)
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for i in range(num_tasks):
+        queue.push(
+            priority=TaskPriority((i % 5) + 1),
+            deadline=deadline,
+            cost=1,
+            agent_name=f"agent_{i % 7}",
+            client_id=f"client_{i % 500}",
+            payload=make_payload(i),
+        )
+
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_task = (current - baseline) / num_tasks
+    print(
+        f"{label:<36} {per_task:>10.0f} B/task "
+        f"{(current - baseline) / 1024 / 1024:>10.1f} MiB"
+    )
+
+
+def main():
+    num_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    print("=" * 80)
+    print(f"BENCHMARK: AgentQueue memory ({num_tasks:,} tasks)")
+    print("=" * 80)
+
+    measure("small payload (in task)", num_tasks, AgentQueue(), small_payload)
+    measure("heavy payload (in task)", num_tasks, AgentQueue(), heavy_payload)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLitePayloadStore(str(Path(tmp) / "payloads.db"))
+        measure(
+            "heavy payload (SQLitePayloadStore)",
+            num_tasks,
+            AgentQueue(payload_store=store),
+            heavy_payload,
+        )
+        store.close()
+
+    print("\nB/task inclui AgentTask, posição na heap e índices secundários.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Benchmark: PersistentAgentQueue (SQLite WAL).
+
+Mede:
+1. Taxa de push com commit por operação vs group commit
+2. Tempo de replay (startup) de uma fila grande
+
+Uso:
+    python src/tests/benchmark_queue_persistence.py [num_tasks]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, ".")
+
+from src.core.agent_queue import TaskPriority, create_deadline  # noqa: E402
+from src.core.persistent_queue import PersistentAgentQueue  # noqa: E402
+
+
+def benchmark_push_rate(tmp: Path, num_tasks: int) -> None:
+    """Compara commit a cada push com group commit."""
+    print("\n1. PUSH RATE (commit_every)")
+    print("-" * 80)
+    deadline = create_deadline(days_ahead=1)
+
+    for commit_every in (1, 100, 1000):
+        count = min(num_tasks, 5_000) if commit_every == 1 else num_tasks
+        queue = PersistentAgentQueue(
+            str(tmp / f"push_{commit_every}.db"), commit_every=commit_every
+        )
+        start = time.perf_counter()
+        for i in range(count):
+            queue.push(
+                TaskPriority((i % 5) + 1),
+                deadline,
+                1,
+                f"agent_{i % 7}",
+                f"client_{i % 500}",
+                {"i": i},
+            )
+        queue.close()
+        elapsed = time.perf_counter() - start
+        print(
+            f"commit_every={commit_every:<5} {count:>8,} pushes "
+            f"{elapsed:.2f}s ({count / elapsed:>10,.0f} push/s)"
+        )
+
+
+def benchmark_replay(tmp: Path, num_tasks: int) -> None:
+    """Mede o tempo para reabrir uma fila com num_tasks tarefas."""
+    print("\n2. REPLAY (startup)")
+    print("-" * 80)
+    path = str(tmp / "replay.db")
+    deadline = create_deadline(days_ahead=1)
+
+    queue = PersistentAgentQueue(path, commit_every=10_000)
+    queue.push_many(
+        {
+            "priority": TaskPriority((i % 5) + 1),
+            "deadline": deadline,
+            "cost": 1,
+            "agent_name": f"agent_{i % 7}",
+            "client_id": f"client_{i % 500}",
+            "payload": {"i": i},
+        }
+        for i in range(num_tasks)
+    )
+    queue.close()
+
+    start = time.perf_counter()
+    reopened = PersistentAgentQueue(path)
+    elapsed = time.perf_counter() - start
+    print(f"Replay {reopened.size():,} tasks: {elapsed:.2f}s")
+    reopened.close()
+
+
+def main():
+    num_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    print("=" * 80)
+    print(f"BENCHMARK: PersistentAgentQueue ({num_tasks:,} tasks)")
+    print("=" * 80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        benchmark_push_rate(Path(tmp), num_tasks)
+        benchmark_replay(Path(tmp), num_tasks)
+
+
+if __name__ == "__main__":
+    main()
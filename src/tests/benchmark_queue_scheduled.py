@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Benchmark: Custo de tarefas agendadas (not_before) na AgentQueue.
+
+Enche a fila com N follow-ups agendados para os próximos dias (0 a 1M) e
+mede push/pop de tarefas prontas. Como só o topo da heap de agendadas é
+inspecionado, o pop não deve degradar com o número de agendadas.
+
+Uso:
+    python src/tests/benchmark_queue_scheduled.py [max_scheduled]
+"""
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, ".")
+
+from src.core.agent_queue import AgentQueue, TaskPriority, create_deadline  # noqa: E402
+
+READY_TASKS = 10_000
+
+
+def benchmark_scheduled(max_scheduled: int = 1_000_000) -> None:
+    """Mede push/pop de prontas com volumes crescentes de agendadas."""
+    print("=" * 80)
+    print("BENCHMARK: Scheduled Tasks (not_before)")
+    print("=" * 80)
+    print(
+        f"\n{'SCHEDULED':>12} {'SCHEDULE (μs)':>14} {'PUSH (μs)':>11} {'POP (μs)':>10}"
+    )
+    print("-" * 80)
+
+    rng = random.Random(42)
+    deadline = create_deadline(days_ahead=30)
+    now = datetime.now()
+    sizes = [0] + [n for n in (10_000, 100_000, 1_000_000) if n <= max_scheduled]
+
+    for scheduled in sizes:
+        queue = AgentQueue()
+        not_befores = [
+            now + timedelta(minutes=rng.randint(60, 7 * 1440)) for _ in range(scheduled)
+        ]
+
+        start = time.perf_counter()
+        for i, not_before in enumerate(not_befores):
+            queue.push(
+                TaskPriority.MEDIUM,
+                deadline,
+                1,
+                "followup_agent",
+                f"client_{i % 1000}",
+                {},
+                not_before=not_before,
+            )
+        schedule_col = (
+            f"{(time.perf_counter() - start) / scheduled * 1_000_000:.2f}"
+            if scheduled
+            else "-"
+        )
+
+        start = time.perf_counter()
+        for i in range(READY_TASKS):
+            queue.push(
+                TaskPriority((i % 5) + 1), deadline, 1, "agent", f"client_{i}", {}
+            )
+        push_time = (time.perf_counter() - start) / READY_TASKS
+
+        start = time.perf_counter()
+        while queue.pop() is not None:
+            pass
+        pop_time = (time.perf_counter() - start) / READY_TASKS
+
+        assert queue.scheduled_size() == scheduled
+        print(
+            f"{scheduled:>12,} {schedule_col:>14} "
+            f"{push_time * 1_000_000:>11.2f} {pop_time * 1_000_000:>10.2f}"
+        )
+
+    print(
+        f"\nPUSH/POP: μs por tarefa pronta ({READY_TASKS:,}); devem ficar estáveis com mais agendadas."
+    )
+
+
+def main():
+    max_scheduled = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    benchmark_scheduled(max_scheduled)
+
+
+if __name__ == "__main__":
+    main()
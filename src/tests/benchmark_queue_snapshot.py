@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Benchmark: snapshot binário colunar da AgentQueue.
+
+Mede:
+1. snapshot() e load() vs replay da PersistentAgentQueue e get_all_tasks()
+2. Listagem das primeiras N tarefas: get_all_tasks() vs streaming do snapshot
+
+Uso:
+    python src/tests/benchmark_queue_snapshot.py [num_tasks]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, ".")
+
+from src.core.agent_queue import AgentQueue, AgentTask  # noqa: E402
+from src.core.persistent_queue import PersistentAgentQueue  # noqa: E402
+from src.core.queue_snapshot import QueueSnapshot  # noqa: E402
+
+
+def _build_queue(num_tasks: int) -> AgentQueue:
+    rng = random.Random(42)
+    base = time.time() + 86400
+    queue = AgentQueue()
+    queue.push_many(
+        AgentTask(
+            rng.randint(1, 5),
+            base + rng.randint(0, 86400 * 7),
+            rng.randint(0, 5),
+            f"{i:08x}",
+            f"agent_{i % 7}",
+            f"client_{i % 5000}",
+            {"i": i},
+        )
+        for i in range(num_tasks)
+    )
+    return queue
+
+
+def benchmark_save_load(tmp: Path, queue: AgentQueue) -> None:
+    """Compara snapshot/load com o replay do SQLite e com get_all_tasks."""
+    print("\n1. SAVE / RESTORE")
+    print("-" * 80)
+    path = str(tmp / "queue.snap")
+    num_tasks = queue.size()
+
+    start = time.perf_counter()
+    queue.snapshot(path)
+    elapsed = time.perf_counter() - start
+    size_mb = os.path.getsize(path) / 1024 / 1024
+    print(f"snapshot()        {elapsed:>7.2f}s  ({size_mb:.1f} MB)")
+
+    start = time.perf_counter()
+    loaded = AgentQueue.load(path)
+    elapsed = time.perf_counter() - start
+    print(f"load()            {elapsed:>7.2f}s  ({loaded.size():,} tasks)")
+    del loaded
+
+    start = time.perf_counter()
+    queue.get_all_tasks()
+    print(f"get_all_tasks()   {time.perf_counter() - start:>7.2f}s")
+
+    db_path = str(tmp / "queue.db")
+    persistent = PersistentAgentQueue.load(path, path=db_path, commit_every=10_000)
+    persistent.close()
+    start = time.perf_counter()
+    reopened = PersistentAgentQueue(db_path)
+    elapsed = time.perf_counter() - start
+    print(f"SQLite replay     {elapsed:>7.2f}s  ({reopened.size():,} tasks)")
+    reopened.close()
+    print(f"({num_tasks:,} tasks)")
+
+
+def benchmark_listing(tmp: Path, queue: AgentQueue, top: int = 50) -> None:
+    """Primeiras `top` tarefas: fila em memória vs snapshot em streaming."""
+    print(f"\n2. LISTAGEM (primeiras {top})")
+    print("-" * 80)
+    path = str(tmp / "queue.snap")
+
+    start = time.perf_counter()
+    queue.get_all_tasks()[:top]
+    print(f"get_all_tasks()[:{top}]        {time.perf_counter() - start:>7.3f}s")
+
+    start = time.perf_counter()
+    tasks = QueueSnapshot(path).iter_tasks()
+    for _ in range(top):
+        next(tasks)
+    print(f"QueueSnapshot.iter_tasks()   {time.perf_counter() - start:>7.3f}s")
+
+
+def main():
+    num_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    print("=" * 80)
+    print(f"BENCHMARK: AgentQueue snapshot ({num_tasks:,} tasks)")
+    print("=" * 80)
+
+    queue = _build_queue(num_tasks)
+    with tempfile.TemporaryDirectory() as tmp:
+        benchmark_save_load(Path(tmp), queue)
+        benchmark_listing(Path(tmp), queue)
+
+
+if __name__ == "__main__":
+    main()
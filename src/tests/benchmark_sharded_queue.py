@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Benchmark: ShardedAgentQueue (merge entre shards e escala multi-processo).
+
+1. Custo do merge num processo: fila única vs ShardedAgentQueue com merge
+   exato (refresh_interval=0) e com cabeças em cache, para 1-32 shards.
+2. Escala multi-processo: cada processo é dono de um shard e processa só os
+   clientes roteados para ele (shard_for), comparado a um único processo
+   com todas as tarefas.
+
+Uso:
+    python src/tests/benchmark_sharded_queue.py [num_tasks]
+"""
+
+import logging
+import multiprocessing
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, ".")
+
+from src.core.agent_queue import AgentQueue  # noqa: E402
+from src.core.sharded_queue import ShardedAgentQueue, shard_for  # noqa: E402
+
+NUM_CLIENTS = 1_000
+
+
+def _workload(num_tasks: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    base = datetime.now() + timedelta(days=1)
+    return [
+        (
+            rng.randint(1, 5),
+            base + timedelta(minutes=rng.randint(0, 1440)),
+            rng.randint(1, 5),
+            "agent",
+            f"client_{rng.randrange(NUM_CLIENTS)}",
+            {},
+        )
+        for _ in range(num_tasks)
+    ]
+
+
+def _push_pop(queue, workload: list) -> tuple:
+    start = time.perf_counter()
+    for args in workload:
+        queue.push(*args)
+    push_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    while queue.pop() is not None:
+        pass
+    pop_time = time.perf_counter() - start
+    return push_time, pop_time
+
+
+def benchmark_merge(workload: list) -> None:
+    """µs por push/pop: fila única vs shards (merge exato e em cache)."""
+    print("\n1. CUSTO DO MERGE (um processo)")
+    print("-" * 80)
+    print(f"{'QUEUE':>24} {'µs/PUSH':>10} {'µs/POP':>10}")
+
+    n = len(workload)
+    push_time, pop_time = _push_pop(AgentQueue(), workload)
+    print(
+        f"{'AgentQueue':>24} {push_time / n * 1e6:>10.2f} {pop_time / n * 1e6:>10.2f}"
+    )
+
+    for num_shards in (2, 8, 32):
+        for label, interval in (("exato", 0.0), ("cache 1s", 1.0)):
+            queue = ShardedAgentQueue(num_shards=num_shards, refresh_interval=interval)
+            push_time, pop_time = _push_pop(queue, workload)
+            name = f"{num_shards} shards/{label}"
+            print(
+                f"{name:>24} {push_time / n * 1e6:>10.2f} {pop_time / n * 1e6:>10.2f}"
+            )
+
+
+def _shard_worker(args: tuple) -> float:
+    """Processo dono de um shard: processa só os seus clientes."""
+    shard, num_shards, num_tasks = args
+    logging.getLogger("agent_queue").setLevel(logging.ERROR)
+    workload = [
+        item for item in _workload(num_tasks) if shard_for(item[4], num_shards) == shard
+    ]
+    start = time.perf_counter()
+    _push_pop(AgentQueue(), workload)
+    return time.perf_counter() - start
+
+
+def benchmark_processes(num_tasks: int) -> None:
+    """Vazão agregada com um processo por shard."""
+    print("\n2. ESCALA MULTI-PROCESSO (um processo por shard)")
+    print("-" * 80)
+    print(f"{'PROCESSES':>10} {'WALL s':>8} {'TASKS/s':>12} {'SPEEDUP':>8}")
+
+    baseline = None
+    for num_shards in (1, 2, 4, 8):
+        if num_shards > multiprocessing.cpu_count():
+            break
+        start = time.perf_counter()
+        with multiprocessing.Pool(num_shards) as pool:
+            pool.map(
+                _shard_worker, [(i, num_shards, num_tasks) for i in range(num_shards)]
+            )
+        wall = time.perf_counter() - start
+        baseline = baseline or wall
+        print(
+            f"{num_shards:>10} {wall:>8.2f} {num_tasks / wall:>12,.0f} {baseline / wall:>7.2f}x"
+        )
+
+    print(
+        "\nWALL inclui a geração da carga em cada processo (mesmo custo em todas as linhas)."
+    )
+
+
+def main():
+    logging.getLogger("agent_queue").setLevel(logging.ERROR)
+    num_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    print("=" * 80)
+    print(f"BENCHMARK: ShardedAgentQueue ({num_tasks:,} tarefas)")
+    print("=" * 80)
+    benchmark_merge(_workload(num_tasks))
+    benchmark_processes(num_tasks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Benchmark: SharedMemoryAgentQueue vs multiprocessing.Queue (pickle por pipe).
+
+1. Custo por operação num processo: AgentQueue vs SharedMemoryAgentQueue.
+2. Vazão com K processos consumidores: o processo pai enfileira N tarefas e
+   os workers consomem até esvaziar. Comparado com multiprocessing.Queue de
+   AgentTasks (cada tarefa é serializada com pickle e atravessa um pipe, e a
+   ordem de prioridade não é respeitada).
+
+Uso:
+    python src/tests/benchmark_shared_memory_queue.py [num_tasks]
+"""
+
+import logging
+import multiprocessing
+import queue as queue_module
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, ".")
+
+from src.core.agent_queue import AgentQueue, AgentTask  # noqa: E402
+from src.core.shared_memory_queue import SharedMemoryAgentQueue  # noqa: E402
+
+
+def _workload(num_tasks: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    base = datetime.now() + timedelta(days=1)
+    return [
+        (
+            rng.randint(1, 5),
+            base + timedelta(minutes=rng.randint(0, 1440)),
+            rng.randint(1, 5),
+            "pdf_agent",
+            f"client_{rng.randrange(1000)}",
+            {"nf": i, "valor": 150.0},
+        )
+        for i in range(num_tasks)
+    ]
+
+
+def benchmark_single_process(workload: list) -> None:
+    """µs por push/pop num único processo."""
+    print("\n1. CUSTO POR OPERAÇÃO (um processo)")
+    print("-" * 80)
+    print(f"{'QUEUE':>24} {'µs/PUSH':>10} {'µs/POP':>10}")
+
+    n = len(workload)
+    for label, queue in (
+        ("AgentQueue", AgentQueue()),
+        ("SharedMemoryAgentQueue", SharedMemoryAgentQueue(capacity=n)),
+    ):
+        start = time.perf_counter()
+        for args in workload:
+            queue.push(*args)
+        push_time = time.perf_counter() - start
+        start = time.perf_counter()
+        while queue.pop() is not None:
+            pass
+        pop_time = time.perf_counter() - start
+        print(f"{label:>24} {push_time / n * 1e6:>10.2f} {pop_time / n * 1e6:>10.2f}")
+        if isinstance(queue, SharedMemoryAgentQueue):
+            queue.close()
+            queue.unlink()
+
+
+def _shm_consumer(queue: SharedMemoryAgentQueue, done) -> None:
+    logging.getLogger("shared_memory_queue").setLevel(logging.ERROR)
+    count = 0
+    while queue.pop() is not None:
+        count += 1
+    queue.close()
+    done.put(count)
+
+
+def _pipe_consumer(tasks, done) -> None:
+    count = 0
+    while True:
+        try:
+            tasks.get(timeout=0.2)
+        except queue_module.Empty:
+            break
+        count += 1
+    done.put(count)
+
+
+def benchmark_processes(workload: list) -> None:
+    """Tarefas/s consumidas por K processos."""
+    print("\n2. VAZÃO COM K PROCESSOS CONSUMIDORES")
+    print("-" * 80)
+    print(f"{'TRANSPORT':>24} {'K':>3} {'PUSH s':>8} {'CONSUME s':>10} {'TASKS/s':>12}")
+
+    n = len(workload)
+    for workers in (1, 2, 4):
+        shm = SharedMemoryAgentQueue(capacity=n)
+        start = time.perf_counter()
+        for args in workload:
+            shm.push(*args)
+        push_time = time.perf_counter() - start
+        done = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(target=_shm_consumer, args=(shm, done))
+            for _ in range(workers)
+        ]
+        start = time.perf_counter()
+        for proc in procs:
+            proc.start()
+        consumed = sum(done.get() for _ in procs)
+        consume_time = time.perf_counter() - start
+        for proc in procs:
+            proc.join()
+        shm.close()
+        shm.unlink()
+        assert consumed == n
+        print(
+            f"{'shared memory':>24} {workers:>3} {push_time:>8.2f} {consume_time:>10.2f} {n / consume_time:>12,.0f}"
+        )
+
+        tasks = multiprocessing.Queue()
+        start = time.perf_counter()
+        for priority, deadline, cost, agent, client, payload in workload:
+            tasks.put(
+                AgentTask(
+                    priority, deadline.timestamp(), cost, "t", agent, client, payload
+                )
+            )
+        push_time = time.perf_counter() - start
+        done = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(target=_pipe_consumer, args=(tasks, done))
+            for _ in range(workers)
+        ]
+        start = time.perf_counter()
+        for proc in procs:
+            proc.start()
+        consumed = sum(done.get() for _ in procs)
+        # Desconta a espera final de cada consumidor pela fila vazia
+        consume_time = time.perf_counter() - start - 0.2
+        for proc in procs:
+            proc.join()
+        assert consumed == n
+        print(
+            f"{'multiprocessing.Queue':>24} {workers:>3} {push_time:>8.2f} {consume_time:>10.2f} {n / consume_time:>12,.0f}"
+        )
+
+    print("\nmultiprocessing.Queue é FIFO: não respeita prioridade/deadline.")
+
+
+def main():
+    logging.getLogger("agent_queue").setLevel(logging.ERROR)
+    logging.getLogger("shared_memory_queue").setLevel(logging.ERROR)
+    num_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+
+    print("=" * 80)
+    print(f"BENCHMARK: SharedMemoryAgentQueue ({num_tasks:,} tarefas)")
+    print("=" * 80)
+    workload = _workload(num_tasks)
+    benchmark_single_process(workload)
+    benchmark_processes(workload)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ Estratégia de teste:
 """
 
 import pytest
+import time
 from datetime import datetime, timedelta
 from src.core.agent_queue import (
     AgentQueue,
@@ -16,6 +17,12 @@ from src.core.agent_queue import (
     create_deadline,
     create_critical_deadline,
 )
+from src.core.cost_window import AgentCostWindow
+from src.core.payload_store import (
+    InMemoryPayloadStore,
+    PayloadStore,
+    SQLitePayloadStore,
+)
 
 
 class TestTaskPriorityEnum:
@@ -771,3 +778,1080 @@ class TestComplexScenarios:
 
         assert queue.size() == 0
         assert queue.stats["total_popped"] == 8  # 3 + 5
+
+
+class TestAgentQueueIndexedHeap:
+    """Testes para o heap indexado (remoção e repriorização O(log n))."""
+
+    def _assert_heap_invariant(self, queue):
+        heap = queue._heap
+        for pos, entry in enumerate(heap):
+            assert queue._index[entry[2].task_id] == pos
+            if pos > 0:
+                assert not entry < heap[(pos - 1) // 2]
+        assert len(queue._index) == len(heap)
+
+    def test_remove_preserves_order(self):
+        """Remover do meio da heap mantém a ordem de saída."""
+        queue = AgentQueue()
+        ids = []
+        for i in range(50):
+            ids.append(
+                queue.push(
+                    priority=TaskPriority((i % 5) + 1),
+                    deadline=create_deadline(days_ahead=i % 7),
+                    cost=i % 3,
+                    agent_name="agent",
+                    client_id=f"client_{i}",
+                    payload={},
+                )
+            )
+
+        for task_id in ids[::3]:
+            assert queue.remove_task(task_id)
+            self._assert_heap_invariant(queue)
+
+        assert queue.size() == 50 - len(ids[::3])
+        popped = [queue.pop() for _ in range(queue.size())]
+        keys = [(t.priority, t.deadline, t.cost) for t in popped]
+        assert keys == sorted(keys)
+        assert not any(t.task_id in ids[::3] for t in popped)
+
+    def test_update_priority_moves_task(self):
+        """update_priority promove a tarefa para o topo."""
+        queue = AgentQueue()
+        deadline = create_deadline(days_ahead=1)
+        for i in range(10):
+            queue.push(TaskPriority.MEDIUM, deadline, 1, "agent", f"c{i}", {})
+        late_id = queue.push(TaskPriority.LOW, deadline, 1, "agent", "late", {})
+
+        assert queue.update_priority(late_id, TaskPriority.CRITICAL)
+        self._assert_heap_invariant(queue)
+        assert queue.pop().task_id == late_id
+
+    def test_update_priority_demotes_task(self):
+        """update_priority rebaixa a tarefa do topo."""
+        queue = AgentQueue()
+        deadline = create_deadline(days_ahead=1)
+        top_id = queue.push(TaskPriority.CRITICAL, deadline, 1, "agent", "top", {})
+        for i in range(10):
+            queue.push(TaskPriority.HIGH, deadline, 1, "agent", f"c{i}", {})
+
+        assert queue.update_priority(top_id, TaskPriority.DEFERRED)
+        self._assert_heap_invariant(queue)
+        tasks = [queue.pop() for _ in range(11)]
+        assert tasks[-1].task_id == top_id
+
+    def test_update_deadline(self):
+        """update_deadline reordena dentro da mesma prioridade."""
+        queue = AgentQueue()
+        first = queue.push(
+            TaskPriority.MEDIUM, create_deadline(days_ahead=1), 1, "a", "c1", {}
+        )
+        second = queue.push(
+            TaskPriority.MEDIUM, create_deadline(days_ahead=2), 1, "a", "c2", {}
+        )
+
+        assert queue.update_deadline(second, create_deadline(days_ahead=0))
+        assert queue.pop().task_id == second
+        assert queue.pop().task_id == first
+
+    def test_update_missing_task(self):
+        """Atualizar tarefa inexistente retorna False."""
+        queue = AgentQueue()
+        assert not queue.update_priority("missing", TaskPriority.HIGH)
+        assert not queue.update_deadline("missing", create_deadline(days_ahead=1))
+
+    def test_update_priority_invalid(self):
+        """update_priority valida o novo nível."""
+        queue = AgentQueue()
+        task_id = queue.push(
+            TaskPriority.MEDIUM, create_deadline(days_ahead=1), 1, "a", "c", {}
+        )
+        with pytest.raises(ValueError):
+            queue.update_priority(task_id, 9)
+
+    def test_duplicate_task_id_rejected(self):
+        """task_id repetido na fila é rejeitado."""
+        queue = AgentQueue()
+        deadline = create_deadline(days_ahead=1)
+        queue.push(TaskPriority.MEDIUM, deadline, 1, "a", "c", {}, task_id="dup")
+
+        with pytest.raises(ValueError):
+            queue.push(TaskPriority.HIGH, deadline, 1, "a", "c", {}, task_id="dup")
+
+        assert "dup" in queue
+        task = queue.pop()
+        assert "dup" not in queue
+        queue.push_task(task)  # Re-push após pop é permitido
+        assert queue.size() == 1
+
+
+class TestAgentQueueSecondaryIndexes:
+    """Testes para índices por agente e por cliente."""
+
+    def test_indexes_follow_push_pop_remove(self):
+        """Índices acompanham push, pop e remove."""
+        queue = AgentQueue()
+        deadline = create_deadline(days_ahead=1)
+
+        critical_id = queue.push(
+            TaskPriority.CRITICAL, deadline, 1, "nf_agent", "client_a", {}
+        )
+        medium_id = queue.push(
+            TaskPriority.MEDIUM, deadline, 1, "nf_agent", "client_b", {}
+        )
+        queue.push(TaskPriority.LOW, deadline, 1, "deadlines_agent", "client_a", {})
+
+        assert queue.count_tasks_for_agent("nf_agent") == 2
+        assert queue.count_tasks_for_client("client_a") == 2
+
+        assert queue.pop().task_id == critical_id
+        assert queue.count_tasks_for_agent("nf_agent") == 1
+        assert queue.count_tasks_for_client("client_a") == 1
+
+        queue.remove_task(medium_id)
+        assert queue.get_tasks_for_agent("nf_agent") == []
+        assert queue.get_tasks_for_client("client_b") == []
+        assert "nf_agent" not in queue._by_agent  # Bucket vazio descartado
+
+    def test_count_unknown_keys(self):
+        """Chaves desconhecidas retornam zero/lista vazia."""
+        queue = AgentQueue()
+        assert queue.count_tasks_for_agent("ghost") == 0
+        assert queue.count_tasks_for_client("ghost") == 0
+        assert queue.get_tasks_for_agent("ghost") == []
+
+    def test_clear_resets_indexes(self):
+        """clear() esvazia os índices secundários."""
+        queue = AgentQueue()
+        deadline = create_deadline(days_ahead=1)
+        queue.push(TaskPriority.MEDIUM, deadline, 1, "agent", "client", {})
+
+        queue.clear()
+
+        assert queue.count_tasks_for_agent("agent") == 0
+        assert queue.count_tasks_for_client("client") == 0
+
+
+class TestCompactTaskAndPayloadStore:
+    """Testes para AgentTask compacto e payloads fora da heap."""
+
+    def test_task_has_no_dict(self):
+        """AgentTask usa __slots__ (sem __dict__ por instância)."""
+        task = AgentTask(priority=TaskPriority.MEDIUM, deadline=0.0, cost=1)
+        assert not hasattr(task, "__dict__")
+
+    def test_names_are_interned(self):
+        """agent_name e client_id são internados."""
+        suffix = "agent"
+        task1 = AgentTask(
+            priority=1, deadline=0.0, cost=1, agent_name="nf_" + suffix, client_id="c"
+        )
+        task2 = AgentTask(
+            priority=1, deadline=0.0, cost=1, agent_name="nf_" + suffix, client_id="c"
+        )
+        assert task1.agent_name is task2.agent_name
+
+    @pytest.mark.parametrize("store_cls", [InMemoryPayloadStore, SQLitePayloadStore])
+    def test_payload_offloaded_and_reloaded(self, store_cls):
+        """Payload fica no store enquanto enfileirado e volta no pop."""
+        store = store_cls()
+        queue = AgentQueue(payload_store=store)
+        deadline = create_deadline(days_ahead=1)
+
+        task_id = queue.push(
+            TaskPriority.HIGH, deadline, 1, "nf_agent", "c1", {"pdf": "x" * 100}
+        )
+
+        assert queue.peek().payload is None
+        assert len(store) == 1
+        assert queue.get_payload(task_id) == {"pdf": "x" * 100}
+
+        task = queue.pop()
+        assert task.payload == {"pdf": "x" * 100}
+        assert len(store) == 0
+
+    def test_payload_store_remove_and_clear(self):
+        """remove_task e clear descartam payloads do store."""
+        store = InMemoryPayloadStore()
+        queue = AgentQueue(payload_store=store)
+        deadline = create_deadline(days_ahead=1)
+
+        task_id = queue.push(TaskPriority.HIGH, deadline, 1, "a", "c1", {"k": 1})
+        queue.push(TaskPriority.HIGH, deadline, 1, "a", "c2", {"k": 2})
+
+        queue.remove_task(task_id)
+        assert len(store) == 1
+
+        queue.clear()
+        assert len(store) == 0
+
+    def test_empty_payload_not_stored(self):
+        """Payload vazio não é gravado no store."""
+        store = InMemoryPayloadStore()
+        queue = AgentQueue(payload_store=store)
+        queue.push(TaskPriority.HIGH, create_deadline(days_ahead=1), 1, "a", "c", {})
+
+        assert len(store) == 0
+        assert queue.pop().payload == {}
+
+    @pytest.mark.parametrize("queued", [0, 200])
+    def test_push_many_bad_payload_is_all_or_nothing(self, queued):
+        """Payload não serializável no meio do lote não deixa nada na fila."""
+        store = InMemoryPayloadStore()
+        queue = AgentQueue(payload_store=store)
+        deadline = create_deadline(days_ahead=1)
+        for i in range(queued):
+            queue.push(TaskPriority.LOW, deadline, 1, "a", f"q{i}", {"i": i})
+        items = [
+            dict(
+                priority=TaskPriority.HIGH,
+                deadline=deadline,
+                cost=1,
+                agent_name="a",
+                client_id=f"c{i}",
+                payload={"quando": datetime.now() if i == 5 else i},
+            )
+            for i in range(10)
+        ]
+
+        with pytest.raises(TypeError):
+            queue.push_many(items)
+
+        assert queue.size() == queued
+        assert len(store) == queued
+        assert len(queue._index) == queued
+        assert len(queue.drain()) == queued
+
+    def test_incomplete_store_fails_at_construction(self):
+        """Store sem todos os métodos abstratos não pode ser instanciado."""
+
+        class PutOnlyStore(PayloadStore):
+            def put(self, task_id, payload):
+                pass
+
+        with pytest.raises(TypeError):
+            PutOnlyStore()
+
+
+class TestAgentQueueSortKey:
+    """Testes para chave de ordenação pré-computada (sort_key, seq, task)."""
+
+    def test_strict_fifo_on_ties(self):
+        """Mesma priority/deadline/cost: sai na ordem de inserção."""
+        queue = AgentQueue()
+        deadline = create_deadline(days_ahead=1)
+
+        # client_id/task_id em ordem inversa não devem influenciar a ordem
+        ids = [
+            queue.push(
+                TaskPriority.MEDIUM,
+                deadline,
+                1,
+                "a",
+                f"client_{9 - i}",
+                {},
+                task_id=f"id_{9 - i}",
+            )
+            for i in range(10)
+        ]
+
+        assert [queue.pop().task_id for _ in range(10)] == ids
+
+    def test_reprioritized_task_keeps_fifo_position(self):
+        """Tarefa repriorizada mantém o seq original no desempate."""
+        queue = AgentQueue()
+        deadline = create_deadline(days_ahead=1)
+        first = queue.push(TaskPriority.LOW, deadline, 1, "a", "c1", {})
+        second = queue.push(TaskPriority.MEDIUM, deadline, 1, "a", "c2", {})
+
+        queue.update_priority(first, TaskPriority.MEDIUM)
+
+        assert queue.pop().task_id == first
+        assert queue.pop().task_id == second
+
+    def test_auto_task_ids_are_short_and_unique(self):
+        """IDs gerados pela fila têm 8 caracteres e não colidem."""
+        queue = AgentQueue()
+        deadline = create_deadline(days_ahead=1)
+        ids = {
+            queue.push(TaskPriority.MEDIUM, deadline, 1, "a", "c", {})
+            for _ in range(1000)
+        }
+        assert len(ids) == 1000
+        assert all(len(task_id) == 8 for task_id in ids)
+
+
+class TestAgentQueueBulkOperations:
+    """Testes para push_many, pop_many e drain."""
+
+    def _items(self, count, priority=TaskPriority.MEDIUM, cost=1):
+        deadline = create_deadline(days_ahead=1)
+        return [
+            {
+                "priority": priority,
+                "deadline": deadline,
+                "cost": cost,
+                "agent_name": "deadlines_agent",
+                "client_id": f"client_{i}",
+                "payload": {"i": i},
+            }
+            for i in range(count)
+        ]
+
+    @pytest.mark.parametrize("existing", [0, 5000])
+    def test_push_many_keeps_order_and_indexes(self, existing):
+        """push_many (heapify ou sift) mantém ordem, índice e stats."""
+        queue = AgentQueue()
+        queue.push_many(self._items(existing, priority=TaskPriority.LOW))
+        items = self._items(300)
+        items[150]["priority"] = TaskPriority.CRITICAL
+
+        task_ids = queue.push_many(items)
+
+        assert len(task_ids) == 300
+        assert queue.size() == existing + 300
+        assert queue.stats["total_pushed"] == existing + 300
+        assert queue.count_tasks_for_client("client_150") == (2 if existing else 1)
+        for pos, entry in enumerate(queue._heap):
+            assert queue._index[entry[2].task_id] == pos
+        assert queue.pop().task_id == task_ids[150]
+
+        popped = queue.pop_many(queue.size())
+        keys = [(t.priority, t.deadline, t.cost) for t in popped]
+        assert keys == sorted(keys)
+
+    def test_push_many_accepts_tasks(self):
+        """push_many aceita AgentTasks pré-construídas."""
+        queue = AgentQueue()
+        deadline = create_deadline(days_ahead=1).timestamp()
+        tasks = [
+            AgentTask(priority=TaskPriority.HIGH, deadline=deadline, cost=1)
+            for _ in range(3)
+        ]
+
+        assert queue.push_many(tasks) == [t.task_id for t in tasks]
+        assert queue.size() == 3
+
+    def test_push_many_is_atomic_on_invalid_item(self):
+        """Um item inválido rejeita o lote inteiro."""
+        queue = AgentQueue()
+        items = self._items(10)
+        items[7]["cost"] = -1
+
+        with pytest.raises(ValueError):
+            queue.push_many(items)
+
+        assert queue.is_empty()
+
+    def test_push_many_rejects_duplicate_ids(self):
+        """task_id repetido dentro do lote é rejeitado."""
+        queue = AgentQueue()
+        items = self._items(2)
+        items[0]["task_id"] = items[1]["task_id"] = "same"
+
+        with pytest.raises(ValueError):
+            queue.push_many(items)
+
+    def test_push_many_respects_max_size(self):
+        """Excedente do lote é rejeitado e contabilizado."""
+        queue = AgentQueue(max_size=5)
+
+        task_ids = queue.push_many(self._items(8))
+
+        assert len(task_ids) == 5
+        assert queue.size() == 5
+        assert queue.stats["total_rejected"] == 3
+
+    def test_pop_many(self):
+        """pop_many retorna até n tarefas em ordem."""
+        queue = AgentQueue()
+        queue.push_many(self._items(5))
+
+        assert len(queue.pop_many(3)) == 3
+        assert len(queue.pop_many(10)) == 2
+        assert queue.pop_many(1) == []
+        assert queue.stats["total_popped"] == 5
+
+    def test_drain_max_cost(self):
+        """drain para antes de estourar o orçamento de custo."""
+        queue = AgentQueue()
+        queue.push_many(self._items(10, cost=3))
+
+        tasks = queue.drain(max_cost=10)
+
+        assert len(tasks) == 3
+        assert queue.size() == 7
+
+    def test_drain_all(self):
+        """drain sem limites esvazia a fila."""
+        queue = AgentQueue()
+        queue.push_many(self._items(10))
+        assert len(queue.drain()) == 10
+        assert queue.is_empty()
+
+
+class TestAgentQueueScheduledTasks:
+    """Testes para tarefas agendadas (push com not_before)."""
+
+    def _push(
+        self,
+        queue,
+        not_before=None,
+        client_id="client_1",
+        priority=TaskPriority.MEDIUM,
+        payload=None,
+    ):
+        return queue.push(
+            priority=priority,
+            deadline=create_deadline(days_ahead=3),
+            cost=1,
+            agent_name="followup_agent",
+            client_id=client_id,
+            payload=payload or {},
+            not_before=not_before,
+        )
+
+    def test_future_task_is_not_ready(self):
+        """Tarefa agendada fica fora de pop/peek/size até vencer."""
+        queue = AgentQueue()
+        task_id = self._push(queue, datetime.now() + timedelta(days=2))
+
+        assert queue.size() == 0
+        assert queue.is_empty()
+        assert queue.peek() is None
+        assert queue.pop() is None
+        assert queue.scheduled_size() == 1
+        assert task_id in queue
+        assert queue.count_tasks_for_client("client_1") == 1
+        assert queue.get_stats()["scheduled"] == 1
+
+    def test_task_is_promoted_when_due(self):
+        """Quando not_before passa, a tarefa vai para a heap de prontas."""
+        queue = AgentQueue()
+        task_id = self._push(queue, datetime.now() + timedelta(milliseconds=30))
+        assert queue.pop() is None
+
+        time.sleep(0.05)
+
+        task = queue.pop()
+        assert task.task_id == task_id
+        assert queue.scheduled_size() == 0
+        assert queue.stats["total_promoted"] == 1
+
+    def test_past_not_before_is_ready_immediately(self):
+        """not_before no passado equivale a tarefa pronta."""
+        queue = AgentQueue()
+        task_id = self._push(queue, datetime.now() - timedelta(minutes=1))
+
+        assert queue.size() == 1
+        assert queue.scheduled_size() == 0
+        assert queue.pop().task_id == task_id
+
+    def test_promoted_task_respects_priority(self):
+        """Tarefa promovida entra na ordem normal de prioridade."""
+        queue = AgentQueue()
+        self._push(queue, client_id="medium")
+        self._push(
+            queue,
+            datetime.now() + timedelta(milliseconds=20),
+            client_id="critical",
+            priority=TaskPriority.CRITICAL,
+        )
+        time.sleep(0.04)
+
+        assert [task.client_id for task in queue.drain()] == ["critical", "medium"]
+
+    def test_next_due_in(self):
+        """next_due_in informa a espera até a próxima liberação."""
+        queue = AgentQueue()
+        assert queue.next_due_in() is None
+
+        self._push(queue, datetime.now() + timedelta(hours=1))
+        assert 3500 < queue.next_due_in() <= 3600
+
+    def test_remove_scheduled_task_and_compaction(self):
+        """Remoção de agendadas é lógica e a heap é compactada quando necessário."""
+        queue = AgentQueue()
+        later = datetime.now() + timedelta(days=1)
+        task_ids = [self._push(queue, later, client_id=f"c{i}") for i in range(300)]
+
+        for task_id in task_ids[:290]:
+            assert queue.remove_task(task_id) is True
+
+        assert queue.scheduled_size() == 10
+        assert len(queue._delayed) < 300
+        assert task_ids[0] not in queue
+        assert [task.task_id for task in queue.get_scheduled_tasks()] == task_ids[290:]
+        assert queue.count_tasks_for_client("c0") == 0
+
+    def test_update_scheduled_task(self):
+        """update_priority em tarefa agendada vale quando ela é promovida."""
+        queue = AgentQueue()
+        self._push(queue, client_id="medium")
+        task_id = self._push(
+            queue, datetime.now() + timedelta(milliseconds=20), client_id="late"
+        )
+        assert queue.update_priority(task_id, TaskPriority.CRITICAL) is True
+        time.sleep(0.04)
+
+        assert queue.pop().task_id == task_id
+
+    def test_max_size_counts_scheduled(self):
+        """Tarefas agendadas ocupam espaço no max_size."""
+        queue = AgentQueue(max_size=2)
+        later = datetime.now() + timedelta(days=1)
+        self._push(queue, later)
+        self._push(queue, later)
+
+        assert self._push(queue) is None
+        assert queue.stats["total_rejected"] == 1
+
+    def test_push_many_with_not_before(self):
+        """push_many separa tarefas prontas e agendadas (caminho heapify)."""
+        queue = AgentQueue()
+        deadline = create_deadline(days_ahead=1)
+        later = datetime.now() + timedelta(days=1)
+        queue.push_many(
+            [
+                {
+                    "priority": 3,
+                    "deadline": deadline,
+                    "cost": 1,
+                    "client_id": f"c{i}",
+                    "not_before": later if i % 2 else None,
+                }
+                for i in range(100)
+            ]
+        )
+
+        assert queue.size() == 50
+        assert queue.scheduled_size() == 50
+        assert all(int(task.client_id[1:]) % 2 == 0 for task in queue.drain())
+
+    def test_scheduled_payload_offloaded(self):
+        """Payload de tarefa agendada vai para o store e volta no pop."""
+        store = InMemoryPayloadStore()
+        queue = AgentQueue(payload_store=store)
+        task_id = self._push(
+            queue,
+            datetime.now() + timedelta(milliseconds=20),
+            payload={"msg": "lembrete"},
+        )
+
+        assert queue.get_payload(task_id) == {"msg": "lembrete"}
+        time.sleep(0.04)
+        assert queue.pop().payload == {"msg": "lembrete"}
+        assert len(store) == 0
+
+    def test_invalid_not_before(self):
+        """not_before precisa ser datetime."""
+        queue = AgentQueue()
+        with pytest.raises(ValueError):
+            self._push(queue, not_before="amanhã")
+
+    def test_clear_removes_scheduled(self):
+        """clear() descarta também as agendadas."""
+        queue = AgentQueue()
+        self._push(queue, datetime.now() + timedelta(days=1))
+        queue.clear()
+
+        assert queue.scheduled_size() == 0
+        assert queue.next_due_in() is None
+
+
+class TestAgentQueuePopBatch:
+    """Testes para pop_batch (lote com orçamento de custo, sem head-of-line blocking)."""
+
+    def _push(self, queue, priority, cost, agent_name="agent", hours=1):
+        return queue.push(
+            priority=priority,
+            deadline=datetime.now() + timedelta(hours=hours),
+            cost=cost,
+            agent_name=agent_name,
+            client_id="client_1",
+            payload={"cost": cost},
+        )
+
+    def test_skips_task_that_does_not_fit(self):
+        """Tarefa cara é pulada; as seguintes que cabem são retiradas."""
+        queue = AgentQueue()
+        cheap_high = self._push(queue, TaskPriority.HIGH, 2)
+        expensive = self._push(queue, TaskPriority.HIGH, 9, hours=2)
+        cheap_low = self._push(queue, TaskPriority.LOW, 3)
+
+        tasks = queue.pop_batch(budget=5)
+
+        assert [t.task_id for t in tasks] == [cheap_high, cheap_low]
+        assert expensive in queue
+        assert queue.size() == 1
+
+    def test_drain_stops_at_first_that_does_not_fit(self):
+        """drain() mantém o comportamento antigo (para no primeiro que não cabe)."""
+        queue = AgentQueue()
+        self._push(queue, TaskPriority.HIGH, 9)
+        self._push(queue, TaskPriority.LOW, 1)
+
+        assert queue.drain(max_cost=5) == []
+        assert len(queue.pop_batch(budget=5)) == 1
+
+    def test_returns_priority_order(self):
+        """Sem orçamento, pop_batch equivale a retirar tudo em ordem."""
+        queue = AgentQueue()
+        for i, priority in enumerate([5, 3, 1, 4, 2, 1, 3]):
+            self._push(queue, priority, 1, hours=i + 1)
+
+        tasks = queue.pop_batch()
+
+        keys = [(t.priority, t.deadline) for t in tasks]
+        assert keys == sorted(keys)
+        assert queue.is_empty()
+        assert queue.stats["total_popped"] == 7
+
+    def test_max_tasks(self):
+        """max_tasks limita o tamanho do lote."""
+        queue = AgentQueue()
+        for _ in range(5):
+            self._push(queue, TaskPriority.MEDIUM, 1)
+
+        assert len(queue.pop_batch(max_tasks=3)) == 3
+        assert queue.size() == 2
+
+    def test_payload_loaded_from_store(self):
+        """Payload offloaded volta nas tarefas do lote e sai do store."""
+        store = InMemoryPayloadStore()
+        queue = AgentQueue(payload_store=store)
+        self._push(queue, TaskPriority.HIGH, 4)
+
+        (task,) = queue.pop_batch(budget=10)
+
+        assert task.payload == {"cost": 4}
+        assert len(store) == 0
+
+    def test_cost_window_skips_saturated_agent(self):
+        """Agente sem cota é pulado sem bloquear tarefas de outros agentes."""
+        queue = AgentQueue()
+        for _ in range(3):
+            self._push(queue, TaskPriority.CRITICAL, 2, agent_name="whatsapp")
+        other = self._push(queue, TaskPriority.LOW, 2, agent_name="gmail")
+        window = AgentCostWindow({"whatsapp": 4})
+
+        tasks = queue.pop_batch(cost_window=window)
+
+        assert [t.agent_name for t in tasks] == ["whatsapp", "whatsapp", "gmail"]
+        assert tasks[-1].task_id == other
+        assert window.used("whatsapp") == 4
+        assert (
+            queue.get_tasks_for_agent("whatsapp")[0].priority == TaskPriority.CRITICAL
+        )
+        assert queue.pop_batch(cost_window=window) == []
+
+    def test_budget_skips_beyond_max_scan_do_not_block(self):
+        """Mais de max_scan tarefas caras no topo não escondem as que cabem."""
+        queue = AgentQueue()
+        for _ in range(10):
+            self._push(queue, TaskPriority.HIGH, 50)
+        small = self._push(queue, TaskPriority.LOW, 1)
+
+        assert [t.task_id for t in queue.pop_batch(budget=10, max_scan=5)] == [small]
+        assert queue.size() == 10
+
+    def test_max_scan_counts_only_skipped_tasks(self):
+        """Tarefas retiradas não contam para max_scan (lotes > max_scan)."""
+        queue = AgentQueue()
+        for _ in range(30):
+            self._push(queue, TaskPriority.MEDIUM, 1)
+
+        assert len(queue.pop_batch(max_tasks=25, max_scan=10)) == 25
+
+    def test_saturated_agent_beyond_max_scan_does_not_block(self):
+        """Agente sem cota com mais tarefas que max_scan não bloqueia os demais."""
+        queue = AgentQueue()
+        for _ in range(50):
+            self._push(queue, TaskPriority.CRITICAL, 1, agent_name="whatsapp")
+        gmail = [
+            self._push(queue, TaskPriority.LOW, 1, agent_name="gmail", hours=h)
+            for h in (3, 2)
+        ]
+        window = AgentCostWindow({"whatsapp": 5})
+
+        tasks = queue.pop_batch(cost_window=window, max_scan=10)
+
+        assert [t.agent_name for t in tasks] == ["whatsapp"] * 5 + ["gmail"] * 2
+        assert [t.task_id for t in tasks[5:]] == gmail[::-1]
+        assert queue.count_tasks_for_agent("whatsapp") == 45
+
+
+class TestAgentQueueLazyDelete:
+    """Testes do modo lazy_delete (tombstones + compactação automática)."""
+
+    def _fill(self, queue, n):
+        deadline = create_deadline(days_ahead=1)
+        return [
+            queue.push(TaskPriority.MEDIUM, deadline, 1, "agent", f"client_{i}", {})
+            for i in range(n)
+        ]
+
+    def test_remove_marks_tombstone_without_touching_heap(self):
+        """remove_task só marca a entrada; size/contains/índices ficam exatos."""
+        queue = AgentQueue(lazy_delete=True)
+        ids = self._fill(queue, 10)
+
+        assert queue.remove_task(ids[3])
+
+        assert len(queue._heap) == 10
+        assert queue.size() == 9
+        assert ids[3] not in queue
+        assert queue.count_tasks_for_client("client_3") == 0
+        assert not queue.remove_task(ids[3])
+        assert not queue.update_priority(ids[3], TaskPriority.HIGH)
+        stats = queue.get_stats()
+        assert stats["size_atual"] == 9
+        assert stats["tombstones"] == 1
+        assert stats["tombstone_ratio"] == pytest.approx(0.1)
+
+    def test_pop_and_peek_skip_dead_entries(self):
+        """Entradas mortas no topo são descartadas por pop/peek/drain."""
+        queue = AgentQueue(lazy_delete=True)
+        ids = self._fill(queue, 6)
+        queue.remove_task(ids[0])
+        queue.remove_task(ids[1])
+
+        assert queue.peek().task_id == ids[2]
+        assert queue.pop().task_id == ids[2]
+        assert [t.task_id for t in queue.drain()] == ids[3:]
+        assert queue.is_empty()
+        assert queue.get_stats()["tombstones"] == 0
+
+    def test_compacts_when_ratio_exceeded(self):
+        """Compacta a heap quando os tombstones passam de compact_ratio."""
+        queue = AgentQueue(lazy_delete=True, compact_ratio=0.25)
+        ids = self._fill(queue, 20)
+        for task_id in ids[10:14]:
+            queue.remove_task(task_id)
+        assert queue.stats["total_compactions"] == 0
+
+        queue.remove_task(ids[14])
+
+        assert queue.stats["total_compactions"] == 1
+        assert len(queue._heap) == 15
+        assert queue.get_stats()["tombstones"] == 0
+        for pos, entry in enumerate(queue._heap):
+            assert queue._index[entry[2].task_id] == pos
+        assert [t.task_id for t in queue.get_all_tasks()] == ids[:10] + ids[15:]
+
+    def test_reinsert_removed_task_id(self):
+        """Reinserir o task_id de uma tarefa removida substitui a entrada morta."""
+        queue = AgentQueue(lazy_delete=True)
+        ids = self._fill(queue, 4)
+        queue.remove_task(ids[1])
+
+        queue.push(
+            TaskPriority.CRITICAL,
+            create_deadline(days_ahead=1),
+            1,
+            "agent",
+            "client_x",
+            {},
+            task_id=ids[1],
+        )
+
+        assert queue.size() == 4
+        assert len(queue._heap) == 4
+        assert queue.pop().client_id == "client_x"
+
+    def test_order_matches_eager_mode(self):
+        """Mesma sequência de operações produz a mesma ordem nos dois modos."""
+        eager = AgentQueue()
+        lazy = AgentQueue(lazy_delete=True, compact_ratio=0.3)
+        deadline = create_deadline(days_ahead=1)
+        for queue in (eager, lazy):
+            for i in range(200):
+                queue.push(
+                    i % 5 + 1, deadline, i % 7, "agent", f"c{i}", {}, task_id=f"t{i}"
+                )
+            for i in range(0, 200, 3):
+                queue.remove_task(f"t{i}")
+            queue.update_priority("t1", TaskPriority.CRITICAL)
+
+        assert [t.task_id for t in lazy.drain()] == [t.task_id for t in eager.drain()]
+        assert lazy.stats["total_compactions"] >= 1
+
+    def test_pop_batch_skips_tombstones(self):
+        """pop_batch ignora entradas mortas."""
+        queue = AgentQueue(lazy_delete=True)
+        ids = self._fill(queue, 5)
+        queue.remove_task(ids[0])
+
+        assert [t.task_id for t in queue.pop_batch(budget=2)] == ids[1:3]
+
+    def test_max_size_counts_only_live_tasks(self):
+        """Tombstones não ocupam vaga de max_size."""
+        queue = AgentQueue(max_size=2, lazy_delete=True)
+        ids = self._fill(queue, 2)
+        queue.remove_task(ids[0])
+
+        assert self._fill(queue, 1)[0] is not None
+        assert queue.size() == 2
+
+    def test_invalid_compact_ratio(self):
+        """compact_ratio precisa estar em (0, 1]."""
+        with pytest.raises(ValueError):
+            AgentQueue(lazy_delete=True, compact_ratio=0)
+        with pytest.raises(ValueError):
+            AgentQueue(lazy_delete=True, compact_ratio=1.5)
+
+
+class TestAgentQueueIterOrdered:
+    """Testes de iter_ordered (iteração preguiçosa por fronteira)."""
+
+    def _fill(self, queue, n):
+        deadline = create_deadline(days_ahead=1)
+        for i in range(n):
+            queue.push(
+                i % 5 + 1,
+                deadline + timedelta(minutes=i % 11),
+                i % 3,
+                "agent",
+                f"client_{i}",
+                {},
+                task_id=f"t{i}",
+            )
+
+    def test_matches_get_all_tasks(self):
+        """Iteração completa e top-k na mesma ordem de get_all_tasks."""
+        queue = AgentQueue()
+        self._fill(queue, 300)
+        expected = [task.task_id for task in queue.get_all_tasks()]
+
+        assert [task.task_id for task in queue.iter_ordered()] == expected
+        assert [task.task_id for task in queue.iter_ordered(limit=7)] == expected[:7]
+        assert list(queue.iter_ordered(limit=0)) == []
+        assert queue.size() == 300
+
+    def test_does_not_copy_heap(self):
+        """Só a fronteira é visitada: a heap não é copiada nem alterada."""
+        queue = AgentQueue()
+        self._fill(queue, 1000)
+        heap_before = list(queue._heap)
+
+        tasks = queue.iter_ordered()
+        first = next(tasks)
+
+        assert first.task_id == queue.peek().task_id
+        assert queue._heap == heap_before
+
+    def test_skips_tombstones_and_promotes_due(self):
+        """Tarefas removidas (lazy) não aparecem; agendadas vencidas sim."""
+        queue = AgentQueue(lazy_delete=True, compact_ratio=1.0)
+        self._fill(queue, 20)
+        queue.remove_task("t0")
+        queue.remove_task("t5")
+        queue.push(
+            TaskPriority.CRITICAL,
+            create_deadline(days_ahead=1),
+            0,
+            "agent",
+            "client_due",
+            {},
+            task_id="due",
+            not_before=datetime.now() - timedelta(seconds=1),
+        )
+
+        ids = [task.task_id for task in queue.iter_ordered()]
+
+        assert "t0" not in ids and "t5" not in ids
+        assert ids[0] == "due"
+        assert ids == [task.task_id for task in queue.get_all_tasks()]
+
+    def test_invalid_limit(self):
+        """limit negativo é rejeitado na chamada."""
+        with pytest.raises(ValueError):
+            AgentQueue().iter_ordered(limit=-1)
+
+
+class TestAgentQueueDeduplication:
+    """Testes para push(dedup_key=...) e políticas de merge."""
+
+    def test_duplicate_keeps_earliest_deadline(self):
+        """Padrão: o push duplicado só adianta o deadline da tarefa existente."""
+        queue = AgentQueue()
+        later = create_deadline(days_ahead=3)
+        sooner = create_deadline(days_ahead=1)
+
+        first = queue.push(
+            TaskPriority.MEDIUM, later, 1, "a", "c", {"v": 1}, dedup_key="das:c"
+        )
+        second = queue.push(
+            TaskPriority.CRITICAL, sooner, 1, "a", "c", {"v": 2}, dedup_key="das:c"
+        )
+        third = queue.push(
+            TaskPriority.CRITICAL, later, 1, "a", "c", {}, dedup_key="das:c"
+        )
+
+        assert first == second == third
+        assert queue.size() == 1
+        task = queue.peek()
+        assert task.deadline == sooner.timestamp()
+        assert task.priority == TaskPriority.MEDIUM
+        assert task.payload == {"v": 1}
+        assert queue.get_stats()["total_deduplicated"] == 2
+        assert queue.get_stats()["total_pushed"] == 1
+
+    def test_duplicate_keeps_highest_priority(self):
+        """highest_priority: sobe a prioridade e reposiciona na heap."""
+        queue = AgentQueue(dedup_policy="highest_priority")
+        deadline = create_deadline(days_ahead=1)
+        queue.push(TaskPriority.HIGH, deadline, 1, "a", "c", {}, task_id="other")
+        task_id = queue.push(TaskPriority.LOW, deadline, 1, "a", "c", {}, dedup_key="k")
+
+        assert (
+            queue.push(TaskPriority.CRITICAL, deadline, 1, "a", "c", {}, dedup_key="k")
+            == task_id
+        )
+        assert (
+            queue.push(TaskPriority.DEFERRED, deadline, 1, "a", "c", {}, dedup_key="k")
+            == task_id
+        )
+
+        assert queue.pop().task_id == task_id
+        assert queue.pop().task_id == "other"
+
+    def test_duplicate_replace(self):
+        """replace: a tarefa enfileirada sai e a nova entra com seu payload."""
+        queue = AgentQueue(dedup_policy="replace", max_size=1)
+        deadline = create_deadline(days_ahead=1)
+        old_id = queue.push(
+            TaskPriority.LOW, deadline, 1, "a", "c", {"v": 1}, dedup_key="k"
+        )
+        new_id = queue.push(
+            TaskPriority.HIGH, deadline, 1, "a", "c", {"v": 2}, dedup_key="k"
+        )
+
+        assert new_id != old_id
+        assert old_id not in queue
+        task = queue.pop()
+        assert task.task_id == new_id
+        assert task.payload == {"v": 2}
+
+    def test_duplicate_not_rejected_when_full(self):
+        """Push duplicado com a fila cheia é mesclado, não rejeitado."""
+        queue = AgentQueue(max_size=1)
+        deadline = create_deadline(days_ahead=1)
+        task_id = queue.push(TaskPriority.LOW, deadline, 1, "a", "c", {}, dedup_key="k")
+
+        assert (
+            queue.push(TaskPriority.LOW, deadline, 1, "a", "c", {}, dedup_key="k")
+            == task_id
+        )
+        assert queue.get_stats()["total_rejected"] == 0
+
+    def test_key_released_on_removal(self):
+        """Após pop/remove (sem dedup_ttl) a mesma chave volta a ser aceita."""
+        queue = AgentQueue(lazy_delete=True)
+        deadline = create_deadline(days_ahead=1)
+        first = queue.push(TaskPriority.LOW, deadline, 1, "a", "c", {}, dedup_key="k")
+        queue.remove_task(first)
+        second = queue.push(TaskPriority.LOW, deadline, 1, "a", "c", {}, dedup_key="k")
+        queue.pop()
+        third = queue.push(TaskPriority.LOW, deadline, 1, "a", "c", {}, dedup_key="k")
+
+        assert len({first, second, third}) == 3
+        assert queue._dedup == {"k": third}
+
+    def test_scheduled_task_is_deduplicated(self):
+        """Tarefas agendadas (not_before) também absorvem pushes duplicados."""
+        queue = AgentQueue()
+        later = create_deadline(days_ahead=3)
+        sooner = create_deadline(days_ahead=1)
+        not_before = datetime.now() + timedelta(hours=1)
+        task_id = queue.push(
+            TaskPriority.LOW,
+            later,
+            1,
+            "followup",
+            "c",
+            {},
+            not_before=not_before,
+            dedup_key="f",
+        )
+
+        assert (
+            queue.push(TaskPriority.LOW, sooner, 1, "followup", "c", {}, dedup_key="f")
+            == task_id
+        )
+        assert queue.scheduled_size() == 1
+        assert queue.get_scheduled_tasks()[0].deadline == sooner.timestamp()
+
+    def test_completed_keys_expire(self, monkeypatch):
+        """Com dedup_ttl, chaves retiradas absorvem pushes até expirarem."""
+        clock = [1000.0]
+        monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+        queue = AgentQueue(dedup_ttl=60)
+        deadline = create_deadline(days_ahead=1)
+        task_id = queue.push(TaskPriority.LOW, deadline, 1, "a", "c", {}, dedup_key="k")
+        queue.pop()
+
+        assert (
+            queue.push(TaskPriority.LOW, deadline, 1, "a", "c", {}, dedup_key="k")
+            == task_id
+        )
+        assert queue.is_empty()
+
+        clock[0] += 61
+        assert (
+            queue.push(TaskPriority.LOW, deadline, 1, "a", "c", {}, dedup_key="k")
+            != task_id
+        )
+        assert queue.size() == 1
+        assert not queue._done_keys
+
+    def test_completed_keys_are_bounded(self):
+        """dedup_max_keys limita as chaves retiradas lembradas (as mais antigas saem)."""
+        queue = AgentQueue(dedup_ttl=3600, dedup_max_keys=10)
+        deadline = create_deadline(days_ahead=1)
+        for i in range(50):
+            queue.push(TaskPriority.LOW, deadline, 1, "a", "c", {}, dedup_key=f"k{i}")
+        queue.drain()
+
+        assert list(queue._done_keys) == [f"k{i}" for i in range(40, 50)]
+        assert not queue._dedup
+
+    def test_push_many_with_keys(self):
+        """push_many mescla chaves já enfileiradas e repetidas no próprio lote."""
+        queue = AgentQueue()
+        deadline = create_deadline(days_ahead=2)
+        sooner = create_deadline(days_ahead=1)
+        existing = queue.push(
+            TaskPriority.LOW, deadline, 1, "a", "c", {}, dedup_key="a"
+        )
+
+        def item(key, when=deadline):
+            return {
+                "priority": TaskPriority.LOW,
+                "deadline": when,
+                "cost": 1,
+                "dedup_key": key,
+            }
+
+        ids = queue.push_many(
+            [item("a", sooner), item("b"), item(None), item("b", sooner)]
+        )
+
+        assert ids[0] == existing
+        assert ids[1] == ids[3]
+        assert queue.size() == 3
+        assert all(
+            task.deadline == sooner.timestamp() for task in queue.get_all_tasks()[:2]
+        )
+        assert queue.get_stats()["total_deduplicated"] == 2
+
+    def test_invalid_dedup_arguments(self):
+        """Política desconhecida, ttl negativo e limite < 1 são rejeitados."""
+        with pytest.raises(ValueError):
+            AgentQueue(dedup_policy="newest")
+        with pytest.raises(ValueError):
+            AgentQueue(dedup_ttl=-1)
+        with pytest.raises(ValueError):
+            AgentQueue(dedup_max_keys=0)
@@ -0,0 +1,277 @@
+"""Testes para CircuitBreakerRegistry e estado compartilhado entre processos.
+
+Cobertura: get_or_create por nome, config padrão, propagação de OPEN/CLOSED
+via SQLiteBreakerStateStore (entre registros e entre processos), tempo
+restante do timeout adotado e tolerância a falhas do store.
+"""
+
+import multiprocessing
+import time
+
+import pytest
+
+from src.core.breaker_registry import (
+    BreakerStateStore,
+    CircuitBreakerRegistry,
+    SharedCircuitBreaker,
+    SQLiteBreakerStateStore,
+    get_circuit_breaker_registry,
+    reset_circuit_breaker_registry,
+)
+from src.core.circuit_breaker import CircuitBreaker, CircuitBreakerConfig, CircuitState
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _fail(cb, times=1):
+    for _ in range(times):
+        with pytest.raises(ConnectionError):
+            cb.call(_down)
+
+
+def _down():
+    raise ConnectionError("API fora do ar")
+
+
+class LockProbeStore(SQLiteBreakerStateStore):
+    """Registra se o lock do breaker estava preso durante publish() e read()."""
+
+    def __init__(self) -> None:
+        super().__init__(":memory:")
+        self.breaker = None
+        self.locked = []
+        self.read_locked = []
+
+    def publish(self, name, state, opened_at, open_timeout=0.0):
+        self.locked.append(self.breaker._lock.locked())
+        return super().publish(name, state, opened_at, open_timeout)
+
+    def read(self, name):
+        if self.breaker is not None:
+            self.read_locked.append(self.breaker._lock.locked())
+        return super().read(name)
+
+
+def _trip_in_child(db_path):
+    registry = CircuitBreakerRegistry(
+        store=SQLiteBreakerStateStore(db_path),
+        default_config=CircuitBreakerConfig(failure_threshold=2, timeout=60),
+    )
+    cb = registry.get_or_create("whatsapp")
+    for _ in range(2):
+        try:
+            cb.call(_down)
+        except ConnectionError:
+            pass
+    registry.cleanup()
+
+
+class TestCircuitBreakerRegistry:
+    """Testes do registro no processo."""
+
+    def test_same_breaker_per_name(self):
+        """get_or_create devolve o mesmo breaker para o mesmo nome."""
+        registry = CircuitBreakerRegistry(
+            default_config=CircuitBreakerConfig(failure_threshold=3)
+        )
+        whatsapp = registry.get_or_create("whatsapp")
+        gmail = registry.get_or_create(
+            "gmail", CircuitBreakerConfig(failure_threshold=7)
+        )
+
+        assert registry.get_or_create("whatsapp") is whatsapp
+        assert type(whatsapp) is CircuitBreaker
+        assert whatsapp.config.name == "whatsapp"
+        assert whatsapp.config.failure_threshold == 3
+        assert gmail.config.failure_threshold == 7
+        assert sorted(registry.names()) == ["gmail", "whatsapp"]
+        assert "gmail" in registry and len(registry) == 2
+        assert registry.get("sms") is None
+        assert set(registry.get_all_stats()) == {"gmail", "whatsapp"}
+
+    def test_global_registry_uses_env_store(self, tmp_path, monkeypatch):
+        """O singleton usa CIRCUIT_BREAKER_STATE_DB quando definido."""
+        monkeypatch.setenv("CIRCUIT_BREAKER_STATE_DB", str(tmp_path / "cb.db"))
+        reset_circuit_breaker_registry()
+        try:
+            registry = get_circuit_breaker_registry()
+            assert get_circuit_breaker_registry() is registry
+            assert isinstance(registry.get_or_create("gmail"), SharedCircuitBreaker)
+        finally:
+            reset_circuit_breaker_registry()
+
+
+class TestSharedState:
+    """Propagação de estado via SQLiteBreakerStateStore."""
+
+    def _registries(self, tmp_path, **config):
+        db_path = str(tmp_path / "breakers.db")
+        defaults = CircuitBreakerConfig(failure_threshold=2, timeout=60, **config)
+        return [
+            CircuitBreakerRegistry(
+                store=SQLiteBreakerStateStore(db_path),
+                default_config=defaults,
+                poll_interval=0,
+            )
+            for _ in range(2)
+        ]
+
+    def test_open_spreads_to_other_workers(self, tmp_path):
+        """Quem abre publica; o outro worker rejeita sem gastar requisições."""
+        worker_a, worker_b = self._registries(tmp_path)
+        cb_a = worker_a.get_or_create("whatsapp")
+        cb_b = worker_b.get_or_create("whatsapp")
+        calls = []
+
+        _fail(cb_a, 2)
+        assert cb_a.state == CircuitState.OPEN
+
+        assert cb_b.call(lambda: calls.append(1)) is None
+        assert cb_b.state == CircuitState.OPEN
+        assert calls == []
+        assert worker_b.get_or_create("gmail").state == CircuitState.CLOSED
+
+    def test_close_spreads_after_successful_probe(self, tmp_path):
+        """HALF_OPEN bem-sucedido em um worker fecha os demais."""
+        worker_a, worker_b = self._registries(tmp_path, success_threshold=1)
+        cb_a = worker_a.get_or_create("gmail")
+        cb_b = worker_b.get_or_create("gmail")
+        cb_a.force_open()
+        assert cb_b.call(lambda: "x") is None
+
+        cb_a.force_closed()
+
+        assert cb_b.call(lambda: "ok") == "ok"
+        assert cb_b.state == CircuitState.CLOSED
+
+    def test_adopted_open_keeps_remaining_timeout(self):
+        """O worker que adota OPEN espera só o restante do timeout de quem abriu."""
+        store = SQLiteBreakerStateStore(":memory:")
+        wall = FakeClock(1_700_000_000.0)
+        config = CircuitBreakerConfig(name="llm", timeout=60, success_threshold=1)
+        opener = SharedCircuitBreaker(config, store, poll_interval=0, wall_clock=wall)
+        opener.force_open()
+
+        wall.now += 50
+        clock = FakeClock()
+        follower = SharedCircuitBreaker(
+            config, store, poll_interval=0, clock=clock, wall_clock=wall
+        )
+        assert follower.call(lambda: "x") is None
+        clock.now += 9
+        assert follower.call(lambda: "x") is None
+        clock.now += 1
+        assert follower.call(lambda: "ok") == "ok"
+
+    def test_store_errors_do_not_break_calls(self, tmp_path):
+        """Store indisponível: o breaker segue funcionando localmente."""
+        store = SQLiteBreakerStateStore(str(tmp_path / "breakers.db"))
+        cb = SharedCircuitBreaker(
+            CircuitBreakerConfig(name="sms", failure_threshold=1),
+            store,
+            poll_interval=0,
+        )
+        store.close()
+
+        assert cb.call(lambda: "ok") == "ok"
+        _fail(cb)
+        assert cb.state == CircuitState.OPEN
+
+    def test_publish_happens_outside_breaker_lock(self):
+        """O publish (escrita bloqueante no banco) não segura o lock do breaker."""
+        store = LockProbeStore()
+        cb = SharedCircuitBreaker(
+            CircuitBreakerConfig(
+                name="pix", failure_threshold=1, success_threshold=1, timeout=0
+            ),
+            store,
+            poll_interval=0,
+        )
+        store.breaker = cb
+
+        _fail(cb)
+        assert cb.call(lambda: "ok") == "ok"
+        cb.force_open()
+        cb.reset()
+
+        assert store.locked == [False, False, False, False]
+        assert store.read("pix")[0] == "CLOSED"
+
+    def test_sync_reads_store_outside_breaker_lock(self):
+        """A consulta periódica ao store não segura o lock do breaker."""
+        store = LockProbeStore()
+        cb = SharedCircuitBreaker(
+            CircuitBreakerConfig(name="pix", failure_threshold=1),
+            store,
+            poll_interval=0,
+        )
+        store.breaker = cb
+        store.publish("pix", "OPEN", time.time(), 60)
+
+        assert cb.call(lambda: "ok") is None  # adotou o OPEN publicado
+        assert cb.state == CircuitState.OPEN
+        assert store.read_locked and not any(store.read_locked)
+
+    def test_incomplete_store_fails_at_construction(self):
+        """BreakerStateStore é abstrato: faltar publish/read falha ao instanciar."""
+
+        class ReadOnlyStore(BreakerStateStore):
+            def read(self, name):
+                return None
+
+        with pytest.raises(TypeError):
+            ReadOnlyStore()
+
+    def test_open_spreads_across_processes(self, tmp_path):
+        """OPEN decidido em outro processo chega a este pelo banco."""
+        db_path = str(tmp_path / "breakers.db")
+        registry = CircuitBreakerRegistry(
+            store=SQLiteBreakerStateStore(db_path), poll_interval=0
+        )
+        cb = registry.get_or_create("whatsapp")
+        assert cb.call(lambda: "ok") == "ok"
+
+        child = multiprocessing.Process(target=_trip_in_child, args=(db_path,))
+        child.start()
+        child.join(10)
+
+        assert child.exitcode == 0
+        assert cb.call(lambda: "ok") is None
+        assert cb.stats.total_failures == 0
+        registry.cleanup()
+
+    def test_adopted_open_keeps_backoff_duration(self):
+        """O OPEN adotado usa a duração (com backoff) de quem reabriu."""
+        store = SQLiteBreakerStateStore(":memory:")
+        wall = FakeClock(1_700_000_000.0)
+        config = CircuitBreakerConfig(
+            name="llm",
+            failure_threshold=1,
+            timeout=5,
+            backoff_multiplier=4,
+            max_timeout=300,
+        )
+        opener_clock = FakeClock()
+        opener = SharedCircuitBreaker(
+            config, store, poll_interval=0, clock=opener_clock, wall_clock=wall
+        )
+        _fail(opener)
+        opener_clock.now += 5
+        _fail(opener)  # teste em HALF_OPEN falha: OPEN por 20s
+        assert opener.get_stats()["open_timeout"] == 20
+
+        clock = FakeClock()
+        follower = SharedCircuitBreaker(
+            config, store, poll_interval=0, clock=clock, wall_clock=wall
+        )
+        assert follower.call(lambda: "x") is None
+        clock.now += 19
+        assert follower.call(lambda: "x") is None
+        clock.now += 1
+        assert follower.call(lambda: "ok") == "ok"
@@ -4,7 +4,12 @@ Cobertura: Estados (CLOSED/OPEN/HALF_OPEN), transições, fallback, recovery.
 Estratégia: Unit tests para lógica de estado, integration tests para decorador.
 """
 
+import asyncio
+import logging
+import math
 import pytest
+import random
+import threading
 import time
 from datetime import datetime
 
@@ -12,6 +17,7 @@ from src.core.circuit_breaker import (
     CircuitBreaker,
     CircuitBreakerConfig,
     CircuitBreakerStats,
+    CircuitBreakerTimeout,
     CircuitState,
 )
 
@@ -405,9 +411,7 @@ class TestCircuitBreakerManualControl:
     def test_force_open(self):
         """Force circuit para OPEN."""
         cb = CircuitBreaker()
-        initial_time = datetime.now()
-        cb.force_open()
-        cb._last_failure_time = initial_time  # Evita que timeout permita HALF_OPEN
+        cb.force_open()  # O timeout de OPEN conta a partir daqui
 
         assert cb.state == CircuitState.OPEN
         result = cb.call(lambda: "test")
@@ -529,3 +533,696 @@ class TestCircuitBreakerEdgeCases:
 
         with pytest.raises(RuntimeError, match="test error"):
             cb.call(failing_func)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _fail(cb):
+    with pytest.raises(ZeroDivisionError):
+        cb.call(lambda: 1 / 0)
+
+
+class TestCircuitBreakerSlidingWindow:
+    """Testes do modo janela deslizante (window_type="count"/"time")."""
+
+    def test_failure_rate_trips_without_consecutive_failures(self):
+        """40% de falhas intercaladas abrem com failure_rate_threshold=30."""
+        cb = CircuitBreaker(
+            CircuitBreakerConfig(
+                window_type="count",
+                window_size=10,
+                minimum_calls=10,
+                failure_rate_threshold=30,
+            )
+        )
+
+        for i in range(10):
+            assert cb.state == CircuitState.CLOSED
+            if i % 5 in (1, 3):
+                _fail(cb)
+            else:
+                cb.call(lambda: "ok")
+
+        assert cb.state == CircuitState.OPEN
+        assert cb.stats.consecutive_failures < cb.config.failure_threshold
+
+    def test_window_trip_logs_rate_and_window(self, caplog):
+        """Abertura pela janela loga a taxa e a janela, não "falhas consecutivas"."""
+        cb = CircuitBreaker(
+            CircuitBreakerConfig(
+                name="janela",
+                window_type="count",
+                window_size=10,
+                minimum_calls=4,
+                failure_rate_threshold=50,
+            )
+        )
+        cb.call(lambda: "ok")
+        _fail(cb)
+        cb.call(lambda: "ok")
+
+        with caplog.at_level(logging.ERROR, logger="src.core.circuit_breaker"):
+            _fail(cb)
+
+        assert cb.state == CircuitState.OPEN
+        message = caplog.records[-1].getMessage()
+        assert "taxa de falha 50.0% (limite 50%) em 4 chamadas" in message
+        assert "janela das últimas 10 chamadas" in message
+        assert "consecutivas" not in message
+
+    def test_minimum_calls_before_evaluating(self):
+        """Com menos de minimum_calls chamadas a janela não abre."""
+        cb = CircuitBreaker(
+            CircuitBreakerConfig(window_type="count", window_size=20, minimum_calls=5)
+        )
+        for _ in range(4):
+            _fail(cb)
+
+        assert cb.state == CircuitState.CLOSED
+        _fail(cb)
+        assert cb.state == CircuitState.OPEN
+
+    def test_ring_buffer_forgets_old_calls(self):
+        """Falhas antigas saem da janela das últimas N chamadas."""
+        cb = CircuitBreaker(
+            CircuitBreakerConfig(
+                window_type="count",
+                window_size=4,
+                minimum_calls=4,
+                failure_rate_threshold=75,
+            )
+        )
+        _fail(cb)
+        _fail(cb)
+        for _ in range(6):
+            cb.call(lambda: "ok")
+        _fail(cb)
+        _fail(cb)
+
+        assert cb.state == CircuitState.CLOSED
+        assert cb.get_stats()["window_failure_rate"] == "50.0%"
+        _fail(cb)
+        assert cb.state == CircuitState.OPEN
+
+    def test_slow_call_rate_trips(self):
+        """Chamadas bem-sucedidas porém lentas também abrem o circuito."""
+        cb = CircuitBreaker(
+            CircuitBreakerConfig(
+                window_type="count",
+                window_size=4,
+                minimum_calls=2,
+                slow_call_duration=0.01,
+                slow_call_rate_threshold=50,
+            )
+        )
+        cb.call(lambda: "ok")
+        cb.call(time.sleep, 0.02)
+
+        assert cb.state == CircuitState.OPEN
+        assert cb.stats.total_slow_calls == 1
+        assert cb.stats.total_failures == 0
+
+    def test_time_window_expires_buckets(self):
+        """Na janela "time" só contam as chamadas dos últimos window_size segundos."""
+        clock = FakeClock()
+        cb = CircuitBreaker(
+            CircuitBreakerConfig(
+                window_type="time",
+                window_size=10,
+                minimum_calls=3,
+                failure_rate_threshold=50,
+            ),
+            clock=clock,
+        )
+        _fail(cb)
+        _fail(cb)
+        clock.now += 11
+        cb.call(lambda: "ok")
+        cb.call(lambda: "ok")
+
+        assert cb.get_stats()["window_calls"] == 2
+        clock.now += 5
+        _fail(cb)
+        assert cb.state == CircuitState.CLOSED
+        _fail(cb)
+        assert cb.state == CircuitState.OPEN
+
+    def test_half_open_failure_reopens_and_success_closes(self):
+        """Em HALF_OPEN valem success_threshold e reabertura na primeira falha."""
+        cb = CircuitBreaker(
+            CircuitBreakerConfig(
+                window_type="count",
+                window_size=4,
+                minimum_calls=2,
+                success_threshold=2,
+                timeout=0,
+            )
+        )
+        _fail(cb)
+        _fail(cb)
+        assert cb.state == CircuitState.OPEN
+
+        _fail(cb)  # timeout=0: tenta em HALF_OPEN e reabre
+        assert cb.state == CircuitState.OPEN
+
+        cb.call(lambda: "ok")
+        cb.call(lambda: "ok")
+        assert cb.state == CircuitState.CLOSED
+        assert cb.get_stats()["window_calls"] == 0
+
+    def test_invalid_window_config(self):
+        """Parâmetros da janela fora do intervalo são rejeitados."""
+        with pytest.raises(ValueError):
+            CircuitBreakerConfig(window_type="ewma")
+        with pytest.raises(ValueError):
+            CircuitBreakerConfig(failure_rate_threshold=0)
+        with pytest.raises(ValueError):
+            CircuitBreakerConfig(window_type="count", window_size=5, minimum_calls=10)
+        with pytest.raises(ValueError):
+            CircuitBreakerConfig(slow_call_duration=0)
+
+
+class TestCircuitBreakerTimeoutAndLatency:
+    """Testes de call_timeout e dos percentis de latência."""
+
+    def test_hung_call_times_out_and_counts_as_failure(self):
+        """Chamada pendurada levanta CircuitBreakerTimeout e conta como falha."""
+        cb = CircuitBreaker(
+            CircuitBreakerConfig(call_timeout=0.05, failure_threshold=2)
+        )
+        start = time.perf_counter()
+
+        with pytest.raises(CircuitBreakerTimeout):
+            cb.call(time.sleep, 1)
+        with pytest.raises(TimeoutError):
+            cb.call(time.sleep, 1)
+
+        assert time.perf_counter() - start < 0.5
+        assert cb.state == CircuitState.OPEN
+        assert cb.stats.total_timeouts == 2
+        assert cb.stats.total_failures == 2
+        cb.cleanup()
+
+    def test_timeout_passes_result_and_exceptions(self):
+        """Dentro do prazo, resultado e exceções de func passam normalmente."""
+        cb = CircuitBreaker(CircuitBreakerConfig(call_timeout=1))
+
+        assert cb.call(lambda x, y=0: x + y, 1, y=2) == 3
+        with pytest.raises(ZeroDivisionError):
+            cb.call(lambda: 1 / 0)
+        assert cb.stats.total_timeouts == 0
+        cb.cleanup()
+
+    def test_slow_calls_are_degraded_in_consecutive_mode(self):
+        """Chamadas >= slow_call_duration contam como lentas (sem abrir)."""
+        cb = CircuitBreaker(CircuitBreakerConfig(slow_call_duration=0.01))
+        cb.call(time.sleep, 0.02)
+        cb.call(lambda: "ok")
+
+        assert cb.state == CircuitState.CLOSED
+        assert cb.get_stats()["total_slow_calls"] == 1
+
+    def test_latency_percentiles(self):
+        """p50/p95/p99 refletem a distribuição com resolução de ~5%."""
+        from src.core.circuit_breaker import _LatencyHistogram
+
+        histogram = _LatencyHistogram()
+        for ms in range(1, 101):
+            histogram.record(ms / 1000)
+
+        assert histogram.percentile(50) == pytest.approx(0.050, rel=0.06)
+        assert histogram.percentile(95) == pytest.approx(0.095, rel=0.06)
+        assert histogram.percentile(99) == pytest.approx(0.099, rel=0.06)
+        assert histogram.percentile(100) == 0.1
+
+    def test_latency_in_stats(self):
+        """get_stats() expõe os percentis em ms (None sem chamadas)."""
+        cb = CircuitBreaker()
+        assert cb.get_stats()["latency_p99_ms"] is None
+
+        cb.call(lambda: "ok")
+        with pytest.raises(ZeroDivisionError):
+            cb.call(lambda: 1 / 0)
+
+        stats = cb.get_stats()
+        assert (
+            0
+            <= stats["latency_p50_ms"]
+            <= stats["latency_p95_ms"]
+            <= stats["latency_p99_ms"]
+        )
+        cb.reset()
+        assert cb.get_stats()["latency_p50_ms"] is None
+
+
+class TestCircuitBreakerConcurrency:
+    """Testes de thread-safety e do relógio monotônico."""
+
+    def test_counters_are_exact_under_threads(self):
+        """Contadores não perdem incrementos com várias threads."""
+        cb = CircuitBreaker(CircuitBreakerConfig(failure_threshold=10**9))
+
+        def worker(i):
+            for j in range(2000):
+                try:
+                    cb.call(lambda: 1 / ((i + j) % 2))
+                except ZeroDivisionError:
+                    pass
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert cb.stats.total_requests == 16000
+        assert cb.stats.total_successes == 8000
+        assert cb.stats.total_failures == 8000
+
+    def test_half_open_admits_bounded_probes(self):
+        """HALF_OPEN deixa passar só half_open_max_calls chamadas simultâneas."""
+        clock = FakeClock()
+        cb = CircuitBreaker(
+            CircuitBreakerConfig(timeout=30, half_open_max_calls=2), clock=clock
+        )
+        cb.force_open()
+        clock.now += 30
+        release = threading.Event()
+        running = []
+        results = []
+
+        def probe():
+            running.append(1)
+            release.wait(5)
+            return "ok"
+
+        threads = [
+            threading.Thread(target=lambda: results.append(cb.call(probe)))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while len(results) < 8 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(running) == 2
+        assert cb.state == CircuitState.HALF_OPEN
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert results.count("ok") == 2
+        assert cb.stats.total_rejections == 8
+        assert cb.state == CircuitState.CLOSED
+
+    def test_open_timeout_uses_monotonic_clock(self):
+        """O timeout de OPEN é medido pelo relógio injetado, desde a abertura."""
+        clock = FakeClock()
+        cb = CircuitBreaker(
+            CircuitBreakerConfig(failure_threshold=1, success_threshold=1, timeout=30),
+            clock=clock,
+        )
+        _fail(cb)
+        clock.now += 29
+        assert cb.call(lambda: "ok") is None
+
+        clock.now += 1
+        assert cb.call(lambda: "ok") == "ok"
+        assert cb.state == CircuitState.CLOSED
+
+    def test_late_result_does_not_close_half_open(self):
+        """Sucesso de chamada admitida em CLOSED não conta como teste em HALF_OPEN."""
+        clock = FakeClock()
+        cb = CircuitBreaker(
+            CircuitBreakerConfig(failure_threshold=1, success_threshold=1, timeout=30),
+            clock=clock,
+        )
+
+        def blocking(started, release):
+            started.set()
+            release.wait(5)
+            return "ok"
+
+        events = {name: (threading.Event(), threading.Event()) for name in "ab"}
+        late = threading.Thread(target=cb.call, args=(blocking, *events["a"]))
+        late.start()
+        events["a"][0].wait(5)
+        _fail(cb)
+        clock.now += 30
+        probe = threading.Thread(target=cb.call, args=(blocking, *events["b"]))
+        probe.start()
+        events["b"][0].wait(5)
+
+        events["a"][1].set()
+        late.join()
+        assert cb.state == CircuitState.HALF_OPEN
+
+        events["b"][1].set()
+        probe.join()
+        assert cb.state == CircuitState.CLOSED
+
+
+class TestCircuitBreakerAsync:
+    """Testes de async_call() e async_guard()."""
+
+    def test_async_failures_open_shared_state(self):
+        """Falhas async abrem o circuito também para a API síncrona."""
+        cb = CircuitBreaker(CircuitBreakerConfig(failure_threshold=2))
+
+        async def failing():
+            raise ConnectionError("API fora do ar")
+
+        async def scenario():
+            for _ in range(2):
+                with pytest.raises(ConnectionError):
+                    await cb.async_call(failing)
+
+        asyncio.run(scenario())
+
+        assert cb.state == CircuitState.OPEN
+        assert cb.call(lambda: "sync") is None
+        assert cb.stats.total_failures == 2
+        assert cb.stats.total_rejections == 1
+
+    def test_async_guard(self):
+        """async_guard() preserva metadados, passa argumentos e faz fail-fast."""
+        cb = CircuitBreaker(CircuitBreakerConfig(failure_threshold=1))
+
+        @cb.async_guard()
+        async def send(phone, message="oi"):
+            """Envia mensagem."""
+            if phone is None:
+                raise ValueError("sem telefone")
+            return {"phone": phone, "message": message}
+
+        async def scenario():
+            ok = await send("5511", message="olá")
+            with pytest.raises(ValueError):
+                await send(None)
+            return ok, await send("5511")
+
+        ok, rejected = asyncio.run(scenario())
+
+        assert send.__name__ == "send"
+        assert send.__doc__ == "Envia mensagem."
+        assert ok == {"phone": "5511", "message": "olá"}
+        assert rejected is None
+
+    def test_async_timeout_counts_as_failure(self):
+        """call_timeout vira asyncio.timeout e conta como falha."""
+        cb = CircuitBreaker(
+            CircuitBreakerConfig(call_timeout=0.05, failure_threshold=1)
+        )
+
+        async def hung():
+            await asyncio.sleep(5)
+
+        start = time.perf_counter()
+        with pytest.raises(CircuitBreakerTimeout):
+            asyncio.run(cb.async_call(hung))
+
+        assert time.perf_counter() - start < 1
+        assert cb.state == CircuitState.OPEN
+        assert cb.stats.total_timeouts == 1
+
+    def test_cancellation_releases_probe_slot(self):
+        """Chamada de teste cancelada não conta falha e libera a vaga em HALF_OPEN."""
+        clock = FakeClock()
+        cb = CircuitBreaker(
+            CircuitBreakerConfig(timeout=30, success_threshold=1), clock=clock
+        )
+        cb.force_open()
+        clock.now += 30
+
+        async def slow():
+            await asyncio.sleep(5)
+            return "ok"
+
+        async def fast():
+            return "ok"
+
+        async def scenario():
+            probe = asyncio.create_task(cb.async_call(slow))
+            await asyncio.sleep(0)
+            assert await cb.async_call(fast) is None  # vaga ocupada
+            probe.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await probe
+            return await cb.async_call(fast)
+
+        assert asyncio.run(scenario()) == "ok"
+        assert cb.state == CircuitState.CLOSED
+        assert cb.stats.total_failures == 0
+
+    def test_concurrent_calls_do_not_block_loop(self):
+        """Chamadas async concorrentes rodam em paralelo no event loop."""
+        cb = CircuitBreaker()
+
+        async def io_bound(i):
+            await asyncio.sleep(0.1)
+            return i
+
+        async def scenario():
+            return await asyncio.gather(
+                *(cb.async_call(io_bound, i) for i in range(20))
+            )
+
+        start = time.perf_counter()
+        assert asyncio.run(scenario()) == list(range(20))
+        assert time.perf_counter() - start < 1
+        assert cb.stats.total_successes == 20
+
+
+class TestCircuitBreakerFallbackAndCache:
+    """Testes de fallback= e do cache last-known-good."""
+
+    def test_fallback_when_open(self):
+        """OPEN com fallback: devolve fallback(*args, **kwargs) em vez de None."""
+        cb = CircuitBreaker(CircuitBreakerConfig(failure_threshold=1))
+        _fail(cb)
+
+        result = cb.call(
+            lambda sale, tone="": "llm",
+            "venda-1",
+            tone="curto",
+            fallback=lambda sale, tone="": f"padrão para {sale} ({tone})",
+        )
+
+        assert result == "padrão para venda-1 (curto)"
+        assert cb.stats.total_fallbacks == 1
+        assert cb.stats.total_rejections == 1
+
+    def test_fallback_on_failure_counts_failure(self):
+        """Falha com fallback: conta a falha e devolve o fallback sem levantar."""
+        cb = CircuitBreaker(CircuitBreakerConfig(failure_threshold=2))
+
+        assert cb.call(lambda: 1 / 0, fallback=lambda: "ok") == "ok"
+        assert cb.stats.total_failures == 1
+        with pytest.raises(ZeroDivisionError):
+            cb.call(lambda: 1 / 0)  # sem fallback: comportamento original
+
+    def test_cache_serves_last_known_good_when_open(self):
+        """Com cache_ttl, OPEN devolve o último resultado bom dos mesmos argumentos."""
+        clock = FakeClock()
+        cb = CircuitBreaker(
+            CircuitBreakerConfig(failure_threshold=1, cache_ttl=60, timeout=600),
+            clock=clock,
+        )
+        responses = iter(["explicação A", "explicação B"])
+
+        def explain(template, **options):
+            response = next(responses, None)
+            if response is None:
+                raise ConnectionError("LLM fora do ar")
+            return response
+
+        assert cb.call(explain, "mei_servico", lang="pt") == "explicação A"
+        assert cb.call(explain, "mei_produto") == "explicação B"
+        with pytest.raises(ConnectionError):
+            cb.call(explain, "mei_novo")
+        assert cb.state == CircuitState.OPEN
+
+        assert cb.call(explain, "mei_servico", lang="pt") == "explicação A"
+        assert cb.call(explain, "mei_servico") is None  # outros argumentos
+        assert cb.stats.total_cache_hits == 1
+
+        clock.now += 61
+        assert cb.call(explain, "mei_produto", fallback=lambda t: "padrão") == "padrão"
+
+    def test_cache_serves_on_failure_and_is_bounded(self):
+        """Falha com cache válido devolve o cache; o cache guarda max entradas."""
+        cb = CircuitBreaker(
+            CircuitBreakerConfig(
+                cache_ttl=60, cache_max_entries=2, failure_threshold=10
+            )
+        )
+        healthy = {"up": True}
+
+        def lookup(key):
+            if not healthy["up"]:
+                raise ConnectionError("fora do ar")
+            return key.upper()
+
+        for key in ("a", "b", "c"):
+            cb.call(lookup, key)
+        healthy["up"] = False
+
+        assert cb.call(lookup, "c") == "C"
+        assert cb.call(lookup, "b") == "B"
+        with pytest.raises(ConnectionError):
+            cb.call(lookup, "a")  # saiu do cache (LRU)
+        assert cb.call(lookup, ["não", "hashable"], fallback=lambda k: "fb") == "fb"
+
+    def test_cache_rewrite_refreshes_lru_order(self):
+        """Regravar uma chave a move para o fim: quem sai é a menos usada."""
+        cb = CircuitBreaker(CircuitBreakerConfig(cache_ttl=60, cache_max_entries=2))
+        keys = {item: cb._cache_key(str.upper, (item,), {}) for item in "abc"}
+
+        cb._cache_put(keys["a"], "A")
+        cb._cache_put(keys["b"], "B")
+        cb._cache_put(keys["a"], "A")
+        cb._cache_put(keys["c"], "C")
+
+        assert list(cb._cache) == [keys["a"], keys["c"]]
+
+    def test_guard_and_async_fallback(self):
+        """guard(fallback=...) e async_call com fallback async."""
+        cb = CircuitBreaker(CircuitBreakerConfig(failure_threshold=1))
+        cb.force_open()
+
+        @cb.guard(fallback=lambda phone: {"queued": phone})
+        def send(phone):
+            return {"sent": phone}
+
+        async def async_fallback(phone):
+            return {"async_queued": phone}
+
+        async def async_send(phone):
+            return {"sent": phone}
+
+        assert send("5511") == {"queued": "5511"}
+        assert asyncio.run(
+            cb.async_call(async_send, "5511", fallback=async_fallback)
+        ) == {"async_queued": "5511"}
+        assert cb.get_stats()["total_fallbacks"] == 2
+
+
+class TestCircuitBreakerOpenBackoff:
+    """Testes do backoff exponencial da duração do OPEN."""
+
+    def _breaker(self, clock, **config):
+        defaults = dict(
+            failure_threshold=1,
+            success_threshold=1,
+            timeout=5,
+            backoff_multiplier=2,
+            max_timeout=30,
+        )
+        defaults.update(config)
+        return CircuitBreaker(CircuitBreakerConfig(**defaults), clock=clock)
+
+    def test_failed_probes_grow_open_duration_up_to_cap(self):
+        """Cada teste que falha dobra o OPEN (5, 10, 20, 30, 30)."""
+        clock = FakeClock()
+        cb = self._breaker(clock)
+        _fail(cb)
+
+        durations = []
+        for _ in range(5):
+            stats = cb.get_stats()
+            durations.append(stats["open_timeout"])
+            clock.now += stats["open_timeout"]
+            _fail(cb)  # teste em HALF_OPEN falha e reabre
+
+        assert durations == [5, 10, 20, 30, 30]
+        assert cb.get_stats()["open_cycles"] == 5
+
+    def test_thousands_of_failed_probes_do_not_overflow(self):
+        """Mais de 1100 testes em HALF_OPEN que falham: OPEN fica no teto."""
+        clock = FakeClock()
+        cb = self._breaker(clock, backoff_multiplier=2.0)
+        _fail(cb)
+
+        for _ in range(1100):
+            clock.now += cb.get_stats()["open_timeout"]
+            _fail(cb)
+            assert cb.state == CircuitState.OPEN
+
+        assert cb.get_stats()["open_timeout"] == 30
+        assert cb.get_stats()["open_cycles"] == 1100
+        assert cb.call(lambda: "ok") is None  # reaberto agora, ainda rejeita
+
+    def test_backoff_without_cap_stays_finite(self):
+        """Sem max_timeout o expoente também é limitado (duração finita)."""
+        clock = FakeClock()
+        cb = self._breaker(clock, backoff_multiplier=2.0, max_timeout=None)
+        _fail(cb)
+        cb._open_cycles = 5000
+        clock.now += 5
+        _fail(cb)
+
+        assert cb.state == CircuitState.OPEN
+        assert math.isfinite(cb.get_stats()["open_timeout"])
+        assert cb.get_stats()["open_timeout"] > 1e300
+
+    def test_successful_close_resets_backoff(self):
+        """Fechar após teste bem-sucedido volta ao timeout base."""
+        clock = FakeClock()
+        cb = self._breaker(clock)
+        _fail(cb)
+        clock.now += 5
+        _fail(cb)
+        assert cb.get_stats()["open_timeout"] == 10
+
+        clock.now += 10
+        assert cb.call(lambda: "ok") == "ok"
+        assert cb.state == CircuitState.CLOSED
+
+        _fail(cb)
+        assert cb.get_stats()["open_timeout"] == 5
+        assert cb.get_stats()["open_cycles"] == 0
+
+    def test_jitter_shortens_within_bounds(self):
+        """timeout_jitter sorteia a duração em [d * (1 - jitter), d]."""
+        clock = FakeClock()
+        cb = CircuitBreaker(
+            CircuitBreakerConfig(failure_threshold=1, timeout=10, timeout_jitter=0.5),
+            clock=clock,
+            rng=random.Random(3),
+        )
+        durations = set()
+        for _ in range(50):
+            cb.force_closed()
+            _fail(cb)
+            durations.add(cb.get_stats()["open_timeout"])
+
+        assert all(5 <= d <= 10 for d in durations)
+        assert len(durations) > 10
+
+    def test_default_keeps_fixed_timeout(self):
+        """Sem backoff_multiplier o OPEN dura sempre config.timeout."""
+        clock = FakeClock()
+        cb = CircuitBreaker(
+            CircuitBreakerConfig(failure_threshold=1, timeout=60), clock=clock
+        )
+        _fail(cb)
+        for _ in range(3):
+            clock.now += 60
+            _fail(cb)
+
+        assert cb.get_stats()["open_timeout"] == 60
+
+    def test_invalid_backoff_config(self):
+        """Parâmetros de backoff fora do intervalo são rejeitados."""
+        with pytest.raises(ValueError):
+            CircuitBreakerConfig(backoff_multiplier=0.5)
+        with pytest.raises(ValueError):
+            CircuitBreakerConfig(timeout=60, max_timeout=30)
+        with pytest.raises(ValueError):
+            CircuitBreakerConfig(timeout_jitter=1.5)
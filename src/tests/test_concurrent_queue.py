@@ -0,0 +1,294 @@
+"""Testes para ThreadSafeAgentQueue e AsyncAgentQueue.
+
+Cobertura: produtores/consumidores concorrentes sem perda nem duplicação,
+get() bloqueante com timeout, composição com a fila persistente e espera
+sem polling em get()/put() no asyncio (incluindo cancelamento).
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+
+from src.core.agent_queue import TaskPriority, create_deadline
+from src.core.concurrent_queue import AsyncAgentQueue, ThreadSafeAgentQueue
+from src.core.persistent_queue import PersistentAgentQueue
+
+DEADLINE = create_deadline(days_ahead=1)
+
+
+def _push(queue, i=0, priority=TaskPriority.MEDIUM):
+    return queue.push(priority, DEADLINE, 1, f"agent_{i % 3}", f"client_{i}", {})
+
+
+class TestThreadSafeAgentQueue:
+    """Testes da variante com lock."""
+
+    def test_concurrent_producers_and_consumers(self):
+        """Nenhuma tarefa é perdida ou entregue duas vezes; stats batem."""
+        queue = ThreadSafeAgentQueue()
+        producers, consumers, per_producer = 8, 8, 500
+        consumed = []
+        consumed_lock = threading.Lock()
+
+        def produce(offset):
+            for i in range(per_producer):
+                _push(queue, offset * per_producer + i)
+
+        def consume():
+            while True:
+                task = queue.get(timeout=0.5)
+                if task is None:
+                    return
+                with consumed_lock:
+                    consumed.append(task.task_id)
+
+        threads = [
+            threading.Thread(target=produce, args=(p,)) for p in range(producers)
+        ]
+        threads += [threading.Thread(target=consume) for _ in range(consumers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        total = producers * per_producer
+        assert len(consumed) == total
+        assert len(set(consumed)) == total
+        stats = queue.get_stats()
+        assert stats["total_pushed"] == total
+        assert stats["total_popped"] == total
+        assert queue.is_empty()
+
+    def test_get_timeout_returns_none(self):
+        """get() devolve None quando o timeout expira com a fila vazia."""
+        queue = ThreadSafeAgentQueue()
+        start = time.perf_counter()
+
+        assert queue.get(timeout=0.05) is None
+        assert time.perf_counter() - start >= 0.04
+
+    def test_get_blocks_until_push(self):
+        """Consumidor bloqueado é acordado pelo push de outra thread."""
+        queue = ThreadSafeAgentQueue()
+        result = []
+        consumer = threading.Thread(target=lambda: result.append(queue.get(timeout=5)))
+        consumer.start()
+        time.sleep(0.05)
+
+        task_id = _push(queue)
+        consumer.join(timeout=5)
+
+        assert [task.task_id for task in result] == [task_id]
+
+    def test_push_many_wakes_multiple_consumers(self):
+        """push_many acorda um consumidor por tarefa inserida."""
+        queue = ThreadSafeAgentQueue()
+        results = []
+        consumers = [
+            threading.Thread(target=lambda: results.append(queue.get(timeout=5)))
+            for _ in range(3)
+        ]
+        for consumer in consumers:
+            consumer.start()
+        time.sleep(0.05)
+
+        queue.push_many(
+            [
+                {
+                    "priority": 3,
+                    "deadline": DEADLINE,
+                    "cost": 1,
+                    "agent_name": "a",
+                    "client_id": f"c{i}",
+                }
+                for i in range(3)
+            ]
+        )
+        for consumer in consumers:
+            consumer.join(timeout=5)
+
+        assert len([task for task in results if task is not None]) == 3
+
+    def test_iter_ordered_is_a_copy(self):
+        """iter_ordered coleta sob o lock: mutações depois não afetam o iterador."""
+        queue = ThreadSafeAgentQueue()
+        ids = [_push(queue, i) for i in range(5)]
+
+        tasks = queue.iter_ordered(limit=3)
+        queue.pop()
+
+        assert [task.task_id for task in tasks] == ids[:3]
+
+    def test_composes_with_persistent_queue(self, tmp_path):
+        """ThreadSafeAgentQueue combina com PersistentAgentQueue via herança."""
+
+        class SharedPersistentQueue(ThreadSafeAgentQueue, PersistentAgentQueue):
+            pass
+
+        path = str(tmp_path / "queue.db")
+        queue = SharedPersistentQueue(path)
+        task_id = _push(queue)
+        queue.close()
+
+        reopened = SharedPersistentQueue(path)
+        assert reopened.get(timeout=1).task_id == task_id
+        reopened.close()
+
+
+class TestAsyncAgentQueue:
+    """Testes da variante asyncio."""
+
+    def test_get_waits_for_put(self):
+        """await get() é acordado por um put posterior."""
+
+        async def scenario():
+            queue = AsyncAgentQueue()
+            getter = asyncio.create_task(queue.get())
+            await asyncio.sleep(0)
+            assert not getter.done()
+
+            task_id = await queue.put(TaskPriority.HIGH, DEADLINE, 1, "a", "c", {})
+            task = await asyncio.wait_for(getter, timeout=1)
+            return task_id, task.task_id
+
+        task_id, received = asyncio.run(scenario())
+        assert received == task_id
+
+    def test_put_waits_for_room(self):
+        """await put() aguarda espaço quando a fila está cheia (max_size)."""
+
+        async def scenario():
+            queue = AsyncAgentQueue(max_size=1)
+            await queue.put(TaskPriority.HIGH, DEADLINE, 1, "a", "c1", {})
+            putter = asyncio.create_task(
+                queue.put(TaskPriority.HIGH, DEADLINE, 1, "a", "c2", {})
+            )
+            await asyncio.sleep(0)
+            assert not putter.done()
+
+            first = await queue.get()
+            await asyncio.wait_for(putter, timeout=1)
+            second = await queue.get()
+            return (
+                first.client_id,
+                second.client_id,
+                queue.get_stats()["total_rejected"],
+            )
+
+        assert asyncio.run(scenario()) == ("c1", "c2", 0)
+
+    def test_duplicate_put_does_not_wait(self):
+        """put() com dedup_key já enfileirada retorna sem esperar espaço."""
+
+        async def scenario():
+            queue = AsyncAgentQueue(max_size=1)
+            task_id = await queue.put(
+                TaskPriority.LOW, DEADLINE, 1, "a", "c", {}, dedup_key="k"
+            )
+            merged = await asyncio.wait_for(
+                queue.put(TaskPriority.LOW, DEADLINE, 1, "a", "c", {}, dedup_key="k"),
+                timeout=1,
+            )
+            return task_id == merged, queue.size()
+
+        assert asyncio.run(scenario()) == (True, 1)
+
+    def test_lazy_remove_wakes_putter(self):
+        """remove_task com lazy_delete libera espaço para put() pendente."""
+
+        async def scenario():
+            queue = AsyncAgentQueue(max_size=1, lazy_delete=True)
+            task_id = await queue.put(TaskPriority.HIGH, DEADLINE, 1, "a", "c1", {})
+            putter = asyncio.create_task(
+                queue.put(TaskPriority.LOW, DEADLINE, 1, "a", "c2", {})
+            )
+            await asyncio.sleep(0)
+            assert not putter.done()
+
+            queue.remove_task(task_id)
+            await asyncio.wait_for(putter, timeout=1)
+            return (await queue.get()).client_id
+
+        assert asyncio.run(scenario()) == "c2"
+
+    def test_cancelled_get_does_not_lose_task(self):
+        """Cancelar um get() pendente não consome nem perde tarefas."""
+
+        async def scenario():
+            queue = AsyncAgentQueue()
+            cancelled = asyncio.create_task(queue.get())
+            waiting = asyncio.create_task(queue.get())
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            _push(queue)
+            task = await asyncio.wait_for(waiting, timeout=1)
+            return task, queue.size()
+
+        task, remaining = asyncio.run(scenario())
+        assert task is not None
+        assert remaining == 0
+
+    def test_sync_push_many_wakes_all_getters(self):
+        """push_many síncrono acorda os consumidores aguardando."""
+
+        async def scenario():
+            queue = AsyncAgentQueue()
+            getters = [asyncio.create_task(queue.get()) for _ in range(3)]
+            await asyncio.sleep(0)
+            queue.push_many(
+                [
+                    {
+                        "priority": p,
+                        "deadline": DEADLINE,
+                        "cost": 1,
+                        "agent_name": "a",
+                        "client_id": "c",
+                    }
+                    for p in (3, 1, 2)
+                ]
+            )
+            tasks = await asyncio.wait_for(asyncio.gather(*getters), timeout=1)
+            return [task.priority for task in tasks]
+
+        assert sorted(asyncio.run(scenario())) == [1, 2, 3]
+
+
+class TestConcurrentScheduledTasks:
+    """get() bloqueante acorda quando uma tarefa agendada vence."""
+
+    def test_thread_safe_get_wakes_for_scheduled_task(self):
+        """get() retorna a tarefa agendada assim que ela vence."""
+        queue = ThreadSafeAgentQueue()
+        task_id = queue.push(
+            TaskPriority.MEDIUM,
+            DEADLINE,
+            1,
+            "a",
+            "c",
+            {},
+            not_before=datetime.now() + timedelta(milliseconds=50),
+        )
+
+        assert queue.get(timeout=0.01) is None
+        assert queue.get(timeout=2).task_id == task_id
+
+    def test_async_get_wakes_for_scheduled_task(self):
+        """await get() acorda no vencimento, sem novo push."""
+
+        async def scenario():
+            queue = AsyncAgentQueue()
+            task_id = queue.push(
+                TaskPriority.MEDIUM,
+                DEADLINE,
+                1,
+                "a",
+                "c",
+                {},
+                not_before=datetime.now() + timedelta(milliseconds=50),
+            )
+            task = await asyncio.wait_for(queue.get(), timeout=2)
+            return task_id, task.task_id
+
+        task_id, received = asyncio.run(scenario())
+        assert received == task_id
@@ -0,0 +1,82 @@
+"""Testes para AgentCostWindow (cota de custo por agente em janela deslizante)."""
+
+import math
+
+import pytest
+
+from src.core.cost_window import AgentCostWindow
+
+
+class FakeClock:
+    """Relógio controlado manualmente."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAgentCostWindow:
+    """Testes da janela deslizante."""
+
+    def test_records_and_limits(self):
+        """Gasto registrado reduz a cota restante."""
+        window = AgentCostWindow({"llm": 10}, clock=FakeClock())
+        window.record("llm", 7)
+
+        assert window.used("llm") == 7
+        assert window.remaining("llm") == 3
+        assert window.can_spend("llm", 3)
+        assert not window.can_spend("llm", 4)
+
+    def test_agent_without_quota_is_unlimited(self):
+        """Agentes fora de `limits` não são contabilizados."""
+        window = AgentCostWindow({"llm": 10}, clock=FakeClock())
+        window.record("gmail", 1000)
+
+        assert window.can_spend("gmail", 10**6)
+        assert window.remaining("gmail") is None
+        assert window.used("gmail") == 0
+
+    def test_events_expire_after_window(self):
+        """Gastos saem da janela após window_seconds."""
+        clock = FakeClock()
+        window = AgentCostWindow({"llm": 10}, window_seconds=60, clock=clock)
+        window.record("llm", 6)
+        clock.now += 30
+        window.record("llm", 4)
+
+        clock.now += 30
+        assert window.used("llm") == 4
+        clock.now += 30
+        assert window.used("llm") == 0
+
+    def test_next_available_in(self):
+        """Tempo até o custo caber considera os eventos mais antigos primeiro."""
+        clock = FakeClock()
+        window = AgentCostWindow({"llm": 10}, window_seconds=60, clock=clock)
+        window.record("llm", 5)
+        clock.now += 20
+        window.record("llm", 5)
+
+        assert window.next_available_in("llm", 5) == pytest.approx(40)
+        assert window.next_available_in("llm", 8) == pytest.approx(60)
+        assert window.next_available_in("llm", 11) == math.inf
+        assert window.next_available_in("gmail", 100) == 0.0
+
+    def test_stats(self):
+        """get_stats expõe uso e cota por agente."""
+        window = AgentCostWindow({"llm": 10}, window_seconds=30, clock=FakeClock())
+        window.record("llm", 2)
+
+        assert window.get_stats() == {
+            "llm": {"used": 2, "limit": 10, "window_seconds": 30}
+        }
+
+    def test_invalid_arguments(self):
+        """Janela e cotas precisam ser válidas."""
+        with pytest.raises(ValueError):
+            AgentCostWindow({"llm": 10}, window_seconds=0)
+        with pytest.raises(ValueError):
+            AgentCostWindow({"llm": -1})
@@ -0,0 +1,227 @@
+"""Testes para AgentDispatcher (execução concorrente de tarefas da fila).
+
+Cobertura: sucesso, retry e falha definitiva, limite por agente, handler
+ausente, limites de tarefas/custo e callback de resultados.
+"""
+
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from src.core.agent_queue import AgentQueue, TaskPriority, create_deadline
+from src.core.cost_window import AgentCostWindow
+from src.core.dispatcher import AgentDispatcher
+from src.core.retry import RetryPolicy
+
+
+def _fill(queue, agents, cost=1):
+    deadline = create_deadline(days_ahead=1)
+    return [
+        queue.push(TaskPriority.MEDIUM, deadline, cost, agent, f"client_{i}", {})
+        for i, agent in enumerate(agents)
+    ]
+
+
+class TestAgentDispatcher:
+    """Testes do dispatcher multi-worker."""
+
+    def test_runs_all_tasks_successfully(self):
+        """Todas as tarefas são executadas e a fila esvazia."""
+        queue = AgentQueue()
+        _fill(queue, ["a", "b", "c"] * 5)
+        dispatcher = AgentDispatcher(
+            queue, default_handler=lambda t: t.task_id, max_workers=4
+        )
+
+        results = dispatcher.run()
+
+        assert len(results) == 15
+        assert all(r.status == "success" for r in results)
+        assert all(r.result == r.task.task_id for r in results)
+        assert queue.is_empty()
+        assert dispatcher.get_stats()["succeeded"] == 15
+
+    def test_failed_task_is_retried_then_marked_failed(self):
+        """Com backoff=False, falhas voltam na hora até max_retries e viram 'failed'."""
+        queue = AgentQueue()
+        _fill(queue, ["flaky"])
+
+        def handler(task):
+            raise RuntimeError("timeout")
+
+        dispatcher = AgentDispatcher(
+            queue, handlers={"flaky": handler}, max_retries=2, backoff=False
+        )
+        results = dispatcher.run()
+
+        assert [r.status for r in results] == ["retry", "retry", "failed"]
+        assert [r.attempt for r in results] == [1, 2, 3]
+        assert results[-1].error == "timeout"
+        stats = dispatcher.get_stats()
+        assert stats["retried"] == 2
+        assert stats["failed"] == 1
+        assert queue.is_empty()
+
+    def test_default_retry_is_scheduled_with_backoff(self):
+        """Por padrão a falha passa por queue.retry(): agendada, sem loop quente."""
+        queue = AgentQueue()
+        _fill(queue, ["flaky"])
+        calls = []
+
+        def handler(task):
+            calls.append(task.task_id)
+            raise RuntimeError("timeout")
+
+        results = AgentDispatcher(queue, handlers={"flaky": handler}).run()
+
+        assert [r.status for r in results] == ["retry"]
+        assert len(calls) == 1
+        assert queue.scheduled_size() == 1
+
+    def test_retry_succeeds_on_second_attempt(self):
+        """Uma falha transitória é recuperada pelo retry."""
+        queue = AgentQueue(retry_policy=RetryPolicy(base_delay=0, max_delay=0))
+        _fill(queue, ["flaky"])
+        calls = Counter()
+
+        def handler(task):
+            calls[task.task_id] += 1
+            if calls[task.task_id] == 1:
+                raise RuntimeError("falha transitória")
+            return "ok"
+
+        results = AgentDispatcher(queue, handlers={"flaky": handler}).run()
+
+        assert [r.status for r in results] == ["retry", "success"]
+        assert results[-1].attempt == 2
+
+    def test_missing_handler_is_not_retried(self):
+        """Agente sem handler falha imediatamente (sem retry)."""
+        queue = AgentQueue()
+        _fill(queue, ["desconhecido"])
+
+        results = AgentDispatcher(queue, max_retries=3).run()
+
+        assert len(results) == 1
+        assert results[0].status == "failed"
+        assert "desconhecido" in results[0].error
+
+    def test_handler_lookup_errors_are_retried(self):
+        """KeyError do handler (ex: payload["x"]) é falha comum, com retry."""
+        queue = AgentQueue()
+        _fill(queue, ["nf_agent"])
+
+        def handler(task):
+            return task.payload["numero"]
+
+        results = AgentDispatcher(
+            queue, handlers={"nf_agent": handler}, max_retries=1, backoff=False
+        ).run()
+
+        assert [r.status for r in results] == ["retry", "failed"]
+
+    def test_agent_limit_is_respected_without_blocking_others(self):
+        """No máximo N execuções simultâneas do agente limitado; outros seguem."""
+        queue = AgentQueue()
+        _fill(queue, ["nf_agent"] * 8 + ["attendance_agent"] * 8)
+        lock = threading.Lock()
+        active = Counter()
+        peak = Counter()
+
+        def handler(task):
+            with lock:
+                active[task.agent_name] += 1
+                peak[task.agent_name] = max(
+                    peak[task.agent_name], active[task.agent_name]
+                )
+            time.sleep(0.01)
+            with lock:
+                active[task.agent_name] -= 1
+
+        dispatcher = AgentDispatcher(
+            queue,
+            default_handler=handler,
+            max_workers=6,
+            agent_limits={"nf_agent": 2},
+        )
+        results = dispatcher.run()
+
+        assert len(results) == 16
+        assert peak["nf_agent"] <= 2
+        assert peak["attendance_agent"] > 2
+
+    def test_max_tasks_and_max_cost(self):
+        """run() respeita max_tasks e o orçamento de custo."""
+        queue = AgentQueue()
+        _fill(queue, ["a"] * 10, cost=2)
+        dispatcher = AgentDispatcher(queue, default_handler=lambda t: None)
+
+        assert len(dispatcher.run(max_tasks=3)) == 3
+        assert len(dispatcher.run(max_cost=5)) == 2
+        assert queue.size() == 5
+
+    @pytest.mark.parametrize("backoff", [True, False])
+    def test_max_tasks_counts_only_first_attempts(self, backoff):
+        """Retries de tarefas já retiradas não consomem max_tasks."""
+        queue = AgentQueue(retry_policy=RetryPolicy(base_delay=0, max_delay=0))
+        first, second = _fill(queue, ["a"] * 2)
+        third = queue.push(
+            TaskPriority.LOW, create_deadline(days_ahead=1), 1, "a", "c", {}
+        )
+        calls = Counter()
+
+        def handler(task):
+            calls[task.task_id] += 1
+            if task.task_id == first and calls[first] == 1:
+                raise RuntimeError("falha transitória")
+
+        dispatcher = AgentDispatcher(
+            queue, default_handler=handler, max_workers=1, backoff=backoff
+        )
+        results = dispatcher.run(max_tasks=2)
+
+        assert [(r.task.task_id, r.status) for r in results] == [
+            (first, "retry"),
+            (second, "success"),
+            (first, "success"),
+        ]
+        assert [task.task_id for task in queue.drain()] == [third]
+
+    def test_on_result_callback(self):
+        """on_result recebe cada TaskResult."""
+        queue = AgentQueue()
+        _fill(queue, ["a", "b"])
+        seen = []
+
+        AgentDispatcher(
+            queue, default_handler=lambda t: None, on_result=seen.append
+        ).run()
+
+        assert sorted(r.task.agent_name for r in seen) == ["a", "b"]
+
+    def test_invalid_configuration(self):
+        """Parâmetros inválidos lançam ValueError."""
+        queue = AgentQueue()
+        with pytest.raises(ValueError):
+            AgentDispatcher(queue, max_workers=0)
+        with pytest.raises(ValueError):
+            AgentDispatcher(queue, agent_limits={"a": 0})
+        with pytest.raises(ValueError):
+            AgentDispatcher(queue, max_retries=-1)
+
+    def test_cost_window_keeps_saturated_agent_in_queue(self):
+        """Cota esgotada de um agente não bloqueia os demais; o excedente fica na fila."""
+        queue = AgentQueue()
+        _fill(queue, ["llm"] * 4 + ["gmail"] * 2, cost=3)
+        window = AgentCostWindow({"llm": 6})
+        dispatcher = AgentDispatcher(
+            queue, default_handler=lambda t: None, max_workers=2, cost_window=window
+        )
+
+        results = dispatcher.run()
+
+        assert Counter(r.task.agent_name for r in results) == {"llm": 2, "gmail": 2}
+        assert queue.count_tasks_for_agent("llm") == 2
+        assert dispatcher.get_stats()["cost_window"]["llm"]["used"] == 6
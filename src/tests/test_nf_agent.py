@@ -1,7 +1,10 @@
+import importlib
 import tempfile
 import pytest
 from pathlib import Path
+from src.agents import nf_agent
 from src.agents.nf_agent import prepare_invoice_steps, load_sales
+from src.core import breaker_registry
 
 
 def test_prepare_invoice_steps_complete():
@@ -28,6 +31,19 @@ def test_prepare_invoice_steps_missing_fields():
     assert isinstance(result["missing_fields"], list)
 
 
+def test_llm_breaker_resolved_on_use(monkeypatch):
+    breaker_registry.reset_circuit_breaker_registry()
+    importlib.reload(nf_agent)
+    assert breaker_registry._registry is None
+
+    monkeypatch.setattr(nf_agent, "gerar_texto_simples", lambda prompt: "texto")
+    result = nf_agent.prepare_invoice_steps({"client_name": "C", "amount": 10.0})
+
+    assert result["explicacao"] == "texto"
+    assert "llm_nf_agent" in breaker_registry.get_circuit_breaker_registry().names()
+    breaker_registry.reset_circuit_breaker_registry()
+
+
 def test_load_sales_file_not_found():
     missing = Path("nonexistent_file_for_testing_12345.json")
     assert load_sales(missing) is None
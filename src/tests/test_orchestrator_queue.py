@@ -6,21 +6,29 @@ Valida que:
 - Backward compatibility com comandos 'executar' e 'nf'
 """
 
+import argparse
 from datetime import datetime, timedelta
 from unittest.mock import MagicMock
 import sys
 
+import pytest
+
 # Mock Playwright para evitar instalação em testes
 sys.modules["playwright"] = MagicMock()
 sys.modules["playwright.sync_api"] = MagicMock()
 
 from src.orchestrator import (  # noqa: E402
+    close_task_queue,
     get_task_queue,
     _handle_queue_stats,
     _handle_queue_list,
     _handle_queue_clear,
     _handle_queue_process,
     _handle_queue_push,
+    _handle_queue_push_batch,
+    _handle_queue_snapshot,
+    _parse_agent_limit,
+    _parse_args,
 )
 from src.core.agent_queue import TaskPriority, create_deadline  # noqa: E402
 
@@ -174,6 +182,8 @@ class TestQueueCommands:
         args.days = 3
         args.cost = 5
         args.payload = None
+        args.delay_minutes = None
+        args.dedup_key = None
 
         queue = get_task_queue()
         initial_size = queue.size()
@@ -197,6 +207,8 @@ class TestQueueCommands:
         args.days = 1
         args.cost = 3
         args.payload = payload_json
+        args.delay_minutes = None
+        args.dedup_key = None
 
         queue = get_task_queue()
         result = _handle_queue_push(args)
@@ -216,6 +228,8 @@ class TestQueueCommands:
         args.days = 1
         args.cost = 1
         args.payload = "{ invalid json }"  # Inválido
+        args.delay_minutes = None
+        args.dedup_key = None
 
         result = _handle_queue_push(args)
 
@@ -245,6 +259,8 @@ class TestQueueCommands:
         args.days = 1
         args.cost = 1
         args.payload = None
+        args.delay_minutes = None
+        args.dedup_key = None
 
         result = _handle_queue_push(args)
 
@@ -292,6 +308,8 @@ class TestQueueEdgeCases:
         args.days = 1
         args.cost = 1
         args.payload = None
+        args.delay_minutes = None
+        args.dedup_key = None
 
         result = _handle_queue_push(args)
 
@@ -314,3 +332,315 @@ class TestQueueEdgeCases:
         assert result == 0
         captured = capsys.readouterr()
         assert "[OVERDUE]" in captured.out  # Deve marcar como vencida
+
+
+class TestQueueBatchCommands:
+    """Testes para variantes em lote (push-batch, process --max-cost)."""
+
+    def setup_method(self):
+        """Reinicia fila antes de cada teste."""
+        import src.orchestrator
+
+        src.orchestrator._TASK_QUEUE = None
+
+    def test_handle_queue_push_batch(self, tmp_path, capsys):
+        """push-batch insere todas as tarefas do arquivo."""
+        tasks_file = tmp_path / "tasks.json"
+        tasks_file.write_text(
+            '[{"agent": "nf_agent", "client": "c1", "priority": 1},'
+            ' {"agent": "deadlines_agent", "client": "c2", "cost": 4,'
+            ' "payload": {"obligation": "DAS"}}]',
+            encoding="utf-8",
+        )
+
+        result = _handle_queue_push_batch(str(tasks_file))
+
+        assert result == 0
+        queue = get_task_queue()
+        assert queue.size() == 2
+        assert queue.peek().agent_name == "nf_agent"
+        assert "2 tarefa(s) adicionada(s)" in capsys.readouterr().out
+
+    def test_handle_queue_push_batch_invalid(self, tmp_path, capsys):
+        """push-batch com item inválido não insere nada."""
+        tasks_file = tmp_path / "tasks.json"
+        tasks_file.write_text(
+            '[{"agent": "a", "client": "c1"}, {"agent": "b", "client": "c2", "priority": 9}]',
+            encoding="utf-8",
+        )
+
+        result = _handle_queue_push_batch(str(tasks_file))
+
+        assert result == 1
+        assert get_task_queue().is_empty()
+
+    @pytest.mark.parametrize(
+        "content, message",
+        [
+            ('{"agent": "a", "client": "c1"}', "lista JSON"),
+            ('[{"agent": "a", "client": "c1"}, "b"]', "tarefa 1"),
+            ('[{"agent": "a", "client": "c1", "days": "dois"}]', "Erro"),
+        ],
+    )
+    def test_handle_queue_push_batch_bad_shape(
+        self, tmp_path, capsys, content, message
+    ):
+        """Arquivo que não é lista de objetos vira erro claro, sem traceback."""
+        tasks_file = tmp_path / "tasks.json"
+        tasks_file.write_text(content, encoding="utf-8")
+
+        result = _handle_queue_push_batch(str(tasks_file))
+
+        assert result == 1
+        assert message in capsys.readouterr().out
+        assert get_task_queue().is_empty()
+
+    def test_handle_queue_push_batch_missing_file(self, tmp_path, capsys):
+        """push-batch com arquivo inexistente retorna erro."""
+        result = _handle_queue_push_batch(str(tmp_path / "missing.json"))
+
+        assert result == 1
+        assert "não encontrado" in capsys.readouterr().out
+
+    def test_handle_queue_process_max_cost(self, capsys):
+        """process --max-cost limita o custo total do lote."""
+        queue = get_task_queue()
+        deadline = create_deadline(days_ahead=1)
+        for i in range(5):
+            queue.push(TaskPriority.MEDIUM, deadline, 2, "agent", f"client_{i}", {})
+
+        result = _handle_queue_process(count=10, max_cost=5)
+
+        assert result == 0
+        assert queue.size() == 3
+        assert "2 tarefa(s) processada(s)" in capsys.readouterr().out
+
+    def test_handle_queue_process_count_above_max_scan(self, capsys):
+        """process --count maior que max_scan (1000) processa todas."""
+        queue = get_task_queue(max_size=5000)
+        deadline = create_deadline(days_ahead=1)
+        queue.push_many(
+            {
+                "priority": TaskPriority.MEDIUM,
+                "deadline": deadline,
+                "cost": 1,
+                "agent_name": "agent",
+                "client_id": f"client_{i}",
+                "payload": {},
+            }
+            for i in range(2600)
+        )
+
+        result = _handle_queue_process(count=2500)
+
+        assert result == 0
+        assert queue.size() == 100
+        assert "2500 tarefa(s) processada(s)" in capsys.readouterr().out
+
+    def test_handle_queue_process_with_workers(self, capsys):
+        """process --workers executa as tarefas via AgentDispatcher."""
+        queue = get_task_queue()
+        deadline = create_deadline(days_ahead=1)
+        for i in range(6):
+            queue.push(TaskPriority.MEDIUM, deadline, 1, "nf_agent", f"client_{i}", {})
+
+        result = _handle_queue_process(count=4, workers=3, agent_limits={"nf_agent": 2})
+
+        output = capsys.readouterr().out
+        assert result == 0
+        assert queue.size() == 2
+        assert output.count("Processando: nf_agent") == 4
+        assert "4 tarefa(s) processada(s)" in output
+
+    def test_parse_agent_limit(self):
+        """--agent-limit agente=N vira par; formato inválido é rejeitado."""
+        assert _parse_agent_limit("nf_agent=2") == ("nf_agent", 2)
+        with pytest.raises(argparse.ArgumentTypeError):
+            _parse_agent_limit("nf_agent")
+
+    def test_invalid_agent_limit_is_a_usage_error(self, monkeypatch, capsys):
+        """--agent-limit inválido encerra com erro de uso, sem traceback."""
+        argv = ["orchestrator", "queue", "process", "--agent-limit", "nf_agent=2"]
+        monkeypatch.setattr(sys, "argv", argv + ["--agent-limit", "gmail_agent=1"])
+        assert _parse_args().agent_limit == [("nf_agent", 2), ("gmail_agent", 1)]
+
+        monkeypatch.setattr(sys, "argv", argv[:3] + ["--agent-limit", "foo"])
+        with pytest.raises(SystemExit) as exc:
+            _parse_args()
+        assert exc.value.code == 2
+        assert "Limite inválido" in capsys.readouterr().err
+
+
+class TestScheduledQueueCommands:
+    """Testes para tarefas agendadas via CLI (--delay-minutes)."""
+
+    def setup_method(self):
+        """Reinicia fila antes de cada teste."""
+        import src.orchestrator
+
+        src.orchestrator._TASK_QUEUE = None
+
+    def test_handle_queue_push_delayed(self, capsys):
+        """push --delay-minutes agenda a tarefa (fora de pop/size até vencer)."""
+        args = MagicMock()
+        args.agent = "followup_agent"
+        args.client = "client_1"
+        args.priority = 3
+        args.days = 3
+        args.cost = 1
+        args.payload = None
+        args.delay_minutes = 60
+        args.dedup_key = None
+
+        result = _handle_queue_push(args)
+
+        queue = get_task_queue()
+        assert result == 0
+        assert queue.size() == 0
+        assert queue.scheduled_size() == 1
+        assert "Agendada para" in capsys.readouterr().out
+
+    def test_handle_queue_push_batch_delayed(self, tmp_path, capsys):
+        """push-batch aceita delay_minutes por entrada."""
+        path = tmp_path / "tasks.json"
+        path.write_text(
+            '[{"agent": "a", "client": "c1"},'
+            ' {"agent": "a", "client": "c2", "delay_minutes": 30}]',
+            encoding="utf-8",
+        )
+
+        assert _handle_queue_push_batch(str(path)) == 0
+
+        queue = get_task_queue()
+        assert queue.size() == 1
+        assert queue.scheduled_size() == 1
+
+    def test_handle_queue_push_batch_dedup_key(self, tmp_path):
+        """push-batch mescla entradas com a mesma dedup_key."""
+        path = tmp_path / "tasks.json"
+        path.write_text(
+            '[{"agent": "a", "client": "c1", "dedup_key": "das:c1"},'
+            ' {"agent": "a", "client": "c1", "dedup_key": "das:c1"}]',
+            encoding="utf-8",
+        )
+
+        assert _handle_queue_push_batch(str(path)) == 0
+
+        queue = get_task_queue()
+        assert queue.size() == 1
+        assert queue.get_stats()["total_deduplicated"] == 1
+
+    def test_handle_queue_list_shows_scheduled(self, capsys):
+        """queue list mostra as tarefas agendadas separadamente."""
+        queue = get_task_queue()
+        queue.push(
+            TaskPriority.MEDIUM,
+            create_deadline(days_ahead=3),
+            1,
+            "followup_agent",
+            "client_1",
+            {},
+            not_before=datetime.now() + timedelta(days=2),
+        )
+
+        assert _handle_queue_list() == 0
+        output = capsys.readouterr().out
+        assert "Agendadas: 1" in output
+        assert "followup_agent" in output
+
+
+class TestPersistentTaskQueue:
+    """Testes para fila persistente usada pela CLI."""
+
+    def setup_method(self):
+        """Reinicia fila antes de cada teste."""
+        import src.orchestrator
+
+        src.orchestrator._TASK_QUEUE = None
+
+    def test_queue_survives_between_cli_invocations(self, tmp_path, capsys):
+        """push e list em "processos" diferentes enxergam a mesma fila."""
+        db_path = str(tmp_path / "queue.db")
+        args = MagicMock()
+        args.agent = "nf_agent"
+        args.client = "client_123"
+        args.priority = 2
+        args.days = 1
+        args.cost = 1
+        args.payload = None
+        args.delay_minutes = None
+        args.dedup_key = None
+
+        get_task_queue(db_path=db_path)
+        assert _handle_queue_push(args) == 0
+        close_task_queue()
+
+        queue = get_task_queue(db_path=db_path)
+        assert queue.size() == 1
+        assert _handle_queue_list() == 0
+        assert "nf_agent" in capsys.readouterr().out
+        close_task_queue()
+
+
+class TestQueueSnapshotCommands:
+    """Testes para queue snapshot e queue list --snapshot."""
+
+    def setup_method(self):
+        """Reinicia fila antes de cada teste."""
+        import src.orchestrator
+
+        src.orchestrator._TASK_QUEUE = None
+
+    def test_snapshot_and_list_from_snapshot(self, tmp_path, capsys):
+        """list --snapshot lê o arquivo em ordem, sem a fila em memória."""
+        import src.orchestrator
+
+        path = str(tmp_path / "queue.snap")
+        queue = get_task_queue()
+        deadline = create_deadline(days_ahead=1)
+        queue.push(TaskPriority.LOW, deadline, 1, "low_agent", "c1", {})
+        queue.push(TaskPriority.CRITICAL, deadline, 1, "critical_agent", "c2", {})
+
+        assert _handle_queue_snapshot(path) == 0
+        assert "2 tarefas" in capsys.readouterr().out
+
+        src.orchestrator._TASK_QUEUE = None
+        assert _handle_queue_list(path) == 0
+        output = capsys.readouterr().out
+        assert output.index("critical_agent") < output.index("low_agent")
+        assert "Total: 2 tarefas" in output
+        assert src.orchestrator._TASK_QUEUE is None
+
+    def test_snapshot_with_non_json_payload(self, tmp_path, capsys):
+        """Payload não serializável vira erro da CLI, sem deixar .tmp no disco."""
+        path = tmp_path / "queue.snap"
+        queue = get_task_queue()
+        deadline = create_deadline(days_ahead=1)
+        queue.push(TaskPriority.LOW, deadline, 1, "a", "c1", {"em": datetime.now()})
+
+        assert _handle_queue_snapshot(str(path)) == 1
+        assert "✗ Erro" in capsys.readouterr().out
+        assert list(tmp_path.iterdir()) == []
+
+    def test_list_invalid_snapshot(self, tmp_path, capsys):
+        """Arquivo que não é snapshot retorna erro."""
+        path = tmp_path / "queue.snap"
+        path.write_bytes(b"not a snapshot")
+
+        assert _handle_queue_list(str(path)) == 1
+        assert "✗ Erro" in capsys.readouterr().out
+
+    def test_list_top_and_offset(self, capsys):
+        """--top/--offset exibem só a janela pedida, em ordem."""
+        queue = get_task_queue()
+        deadline = create_deadline(days_ahead=1)
+        for i in range(5):
+            queue.push(i + 1, deadline, 1, f"agent_{i}", f"c{i}", {})
+
+        assert _handle_queue_list(top=2, offset=1) == 0
+        output = capsys.readouterr().out
+        assert "agent_1" in output and "agent_2" in output
+        assert "agent_0" not in output and "agent_3" not in output
+        assert "Exibindo 2 de 5 tarefas" in output
+
+        assert _handle_queue_list(top=-1) == 1
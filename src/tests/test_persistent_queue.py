@@ -0,0 +1,284 @@
+"""Testes para PersistentAgentQueue (SQLite WAL + group commit).
+
+Cobertura: replay após reinício, group commit, coalescência de operações,
+updates, clear e persistência das estatísticas.
+"""
+
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from src.core.agent_queue import TaskPriority, create_deadline
+from src.core.payload_store import InMemoryPayloadStore
+from src.core.persistent_queue import PersistentAgentQueue
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "queue.db")
+
+
+def _row_count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class TestPersistentAgentQueue:
+    """Testes de durabilidade da fila."""
+
+    def test_tasks_survive_restart(self, db_path):
+        """Tarefas e payloads sobrevivem a um novo processo/instância."""
+        queue = PersistentAgentQueue(db_path)
+        deadline = create_deadline(days_ahead=1)
+        low_id = queue.push(TaskPriority.LOW, deadline, 1, "a", "c1", {"k": 1})
+        critical_id = queue.push(TaskPriority.CRITICAL, deadline, 2, "b", "c2", {})
+        queue.close()
+
+        reopened = PersistentAgentQueue(db_path)
+        assert reopened.size() == 2
+        task = reopened.pop()
+        assert task.task_id == critical_id
+        assert reopened.pop().payload == {"k": 1}
+        reopened.close()
+
+        assert PersistentAgentQueue(db_path).is_empty()
+        assert low_id is not None
+
+    def test_replay_preserves_fifo(self, db_path):
+        """Empates continuam saindo em ordem de inserção após replay."""
+        queue = PersistentAgentQueue(db_path, commit_every=100)
+        deadline = create_deadline(days_ahead=1)
+        ids = [
+            queue.push(TaskPriority.MEDIUM, deadline, 1, "a", f"c{i}", {})
+            for i in range(20)
+        ]
+        queue.close()
+
+        reopened = PersistentAgentQueue(db_path)
+        assert [t.task_id for t in reopened.pop_many(20)] == ids
+
+    def test_group_commit(self, db_path):
+        """Com commit_every > 1, escritas ficam no buffer até o lote encher."""
+        queue = PersistentAgentQueue(db_path, commit_every=3, commit_interval=3600)
+        deadline = create_deadline(days_ahead=1)
+
+        queue.push(TaskPriority.MEDIUM, deadline, 1, "a", "c1", {})
+        queue.push(TaskPriority.MEDIUM, deadline, 1, "a", "c2", {})
+        assert _row_count(db_path) == 0
+
+        queue.push(TaskPriority.MEDIUM, deadline, 1, "a", "c3", {})
+        assert _row_count(db_path) == 3
+
+        queue.pop()
+        queue.flush()
+        assert _row_count(db_path) == 2
+
+    def test_push_then_pop_before_commit(self, db_path):
+        """Push seguido de pop no mesmo lote não deixa resíduo no banco."""
+        queue = PersistentAgentQueue(db_path, commit_every=100, commit_interval=3600)
+        deadline = create_deadline(days_ahead=1)
+        queue.push(TaskPriority.MEDIUM, deadline, 1, "a", "c1", {})
+        queue.pop()
+        queue.close()
+
+        assert _row_count(db_path) == 0
+
+    def test_updates_are_persisted(self, db_path):
+        """update_priority/update_deadline são gravados."""
+        queue = PersistentAgentQueue(db_path)
+        deadline = create_deadline(days_ahead=1)
+        first = queue.push(TaskPriority.MEDIUM, deadline, 1, "a", "c1", {})
+        second = queue.push(TaskPriority.MEDIUM, deadline, 1, "a", "c2", {})
+        queue.update_priority(second, TaskPriority.CRITICAL)
+        queue.close()
+
+        reopened = PersistentAgentQueue(db_path)
+        assert reopened.pop().task_id == second
+        assert reopened.pop().task_id == first
+
+    def test_remove_and_clear(self, db_path):
+        """remove_task e clear apagam linhas do banco."""
+        queue = PersistentAgentQueue(db_path)
+        deadline = create_deadline(days_ahead=1)
+        task_id = queue.push(TaskPriority.MEDIUM, deadline, 1, "a", "c1", {})
+        queue.push(TaskPriority.MEDIUM, deadline, 1, "a", "c2", {})
+
+        queue.remove_task(task_id)
+        assert _row_count(db_path) == 1
+
+        queue.clear()
+        assert _row_count(db_path) == 0
+
+    def test_push_many_persisted(self, db_path):
+        """push_many (caminho heapify) também é gravado."""
+        queue = PersistentAgentQueue(db_path, commit_every=1000)
+        deadline = create_deadline(days_ahead=1)
+        queue.push_many(
+            {
+                "priority": TaskPriority.MEDIUM,
+                "deadline": deadline,
+                "cost": 1,
+                "agent_name": "a",
+                "client_id": f"c{i}",
+                "payload": {"i": i},
+            }
+            for i in range(50)
+        )
+        queue.close()
+
+        reopened = PersistentAgentQueue(db_path)
+        assert reopened.size() == 50
+        assert reopened.count_tasks_for_client("c7") == 1
+
+    def test_stats_persisted(self, db_path):
+        """Contadores de stats sobrevivem ao reinício."""
+        queue = PersistentAgentQueue(db_path)
+        deadline = create_deadline(days_ahead=1)
+        queue.push(TaskPriority.MEDIUM, deadline, 1, "a", "c1", {})
+        queue.push(TaskPriority.MEDIUM, deadline, 1, "a", "c2", {})
+        queue.pop()
+        queue.close()
+
+        stats = PersistentAgentQueue(db_path).get_stats()
+        assert stats["total_pushed"] == 2
+        assert stats["total_popped"] == 1
+        assert stats["size_atual"] == 1
+
+    def test_payload_store_with_persistence(self, db_path):
+        """Payload fora da heap continua sendo persistido."""
+        queue = PersistentAgentQueue(db_path, payload_store=InMemoryPayloadStore())
+        deadline = create_deadline(days_ahead=1)
+        queue.push(TaskPriority.MEDIUM, deadline, 1, "a", "c1", {"big": "x" * 10})
+        queue.close()
+
+        assert PersistentAgentQueue(db_path).pop().payload == {"big": "x" * 10}
+
+    def test_non_json_payload_rejected_before_memory(self, db_path):
+        """Payload não serializável levanta ValueError sem travar a fila."""
+        queue = PersistentAgentQueue(db_path, commit_every=100, commit_interval=3600)
+        deadline = create_deadline(days_ahead=1)
+        ok = queue.push(TaskPriority.MEDIUM, deadline, 1, "a", "c1", {"k": 1})
+
+        with pytest.raises(ValueError):
+            queue.push(TaskPriority.HIGH, deadline, 1, "a", "c2", {"v": Decimal("1.5")})
+        with pytest.raises(ValueError):
+            queue.push_many(
+                [
+                    {
+                        "priority": TaskPriority.HIGH,
+                        "deadline": deadline,
+                        "cost": 1,
+                        "agent_name": "a",
+                        "client_id": "c3",
+                        "payload": {"em": datetime.now()},
+                    }
+                ]
+            )
+
+        assert queue.size() == 1
+        queue.flush()
+        queue.push(TaskPriority.LOW, deadline, 1, "a", "c4", {})
+        queue.close()
+
+        reopened = PersistentAgentQueue(db_path)
+        assert reopened.size() == 2
+        assert reopened.pop().task_id == ok
+
+    def test_invalid_commit_every(self, db_path):
+        """commit_every precisa ser >= 1."""
+        with pytest.raises(ValueError):
+            PersistentAgentQueue(db_path, commit_every=0)
+
+
+class TestPersistentScheduledTasks:
+    """Tarefas agendadas (not_before) na fila persistente."""
+
+    def test_scheduled_tasks_survive_restart(self, db_path):
+        """Agendadas voltam como agendadas; vencidas voltam prontas."""
+        queue = PersistentAgentQueue(db_path)
+        deadline = create_deadline(days_ahead=3)
+        later_id = queue.push(
+            TaskPriority.MEDIUM,
+            deadline,
+            1,
+            "a",
+            "c1",
+            {},
+            not_before=datetime.now() + timedelta(days=1),
+        )
+        soon_id = queue.push(
+            TaskPriority.MEDIUM,
+            deadline,
+            1,
+            "a",
+            "c2",
+            {},
+            not_before=datetime.now() + timedelta(milliseconds=20),
+        )
+        queue.close()
+        time.sleep(0.04)
+
+        reopened = PersistentAgentQueue(db_path)
+        assert reopened.pop().task_id == soon_id
+        assert [task.task_id for task in reopened.get_scheduled_tasks()] == [later_id]
+        reopened.close()
+
+    def test_removed_scheduled_task_is_deleted(self, db_path):
+        """remove_task de agendada apaga a linha no banco."""
+        queue = PersistentAgentQueue(db_path)
+        task_id = queue.push(
+            TaskPriority.MEDIUM,
+            create_deadline(days_ahead=3),
+            1,
+            "a",
+            "c1",
+            {},
+            not_before=datetime.now() + timedelta(days=1),
+        )
+        queue.remove_task(task_id)
+        queue.close()
+
+        assert _row_count(db_path) == 0
+
+    def test_lazy_delete_records_removal(self, db_path):
+        """Com lazy_delete, o DELETE vai para o banco no remove_task."""
+        queue = PersistentAgentQueue(db_path, lazy_delete=True)
+        deadline = create_deadline(days_ahead=1)
+        removed = queue.push(TaskPriority.HIGH, deadline, 1, "a", "c1", {})
+        kept = queue.push(TaskPriority.LOW, deadline, 1, "a", "c2", {})
+        queue.remove_task(removed)
+        queue.close()
+
+        assert _row_count(db_path) == 1
+        reopened = PersistentAgentQueue(db_path)
+        assert reopened.pop().task_id == kept
+        reopened.close()
+
+    def test_dedup_keys_survive_restart(self, db_path):
+        """dedup_key é gravada e o índice é reconstruído no replay."""
+        queue = PersistentAgentQueue(db_path)
+        deadline = create_deadline(days_ahead=2)
+        task_id = queue.push(
+            TaskPriority.LOW, deadline, 1, "a", "c", {}, dedup_key="das:c"
+        )
+        queue.close()
+
+        reopened = PersistentAgentQueue(db_path)
+        sooner = create_deadline(days_ahead=1)
+        assert (
+            reopened.push(TaskPriority.LOW, sooner, 1, "a", "c", {}, dedup_key="das:c")
+            == task_id
+        )
+        reopened.close()
+
+        reopened = PersistentAgentQueue(db_path)
+        task = reopened.pop()
+        assert task.dedup_key == "das:c"
+        assert task.deadline == sooner.timestamp()
+        reopened.close()
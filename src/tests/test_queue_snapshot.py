@@ -0,0 +1,280 @@
+"""Testes para snapshot/load da AgentQueue (formato binário colunar).
+
+Cobertura: roundtrip com ordem, FIFO, payloads e stats; agendadas;
+tombstones; payload_store; troca de política no load; leitura em streaming
+(QueueSnapshot) e erros.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.agent_queue import AgentQueue, TaskPriority, create_deadline
+from src.core.payload_store import InMemoryPayloadStore
+from src.core.persistent_queue import PersistentAgentQueue
+from src.core.queue_snapshot import QueueSnapshot
+from src.core.scheduling import AgingPolicy, EDFPolicy, WeightedFairPolicy
+
+
+def _fill(queue, n, seed=5):
+    rng = random.Random(seed)
+    base = datetime.now() + timedelta(days=1)
+    for i in range(n):
+        queue.push(
+            rng.randint(1, 5),
+            base + timedelta(minutes=rng.randint(0, 20)),
+            rng.randint(0, 2),
+            f"agent_{i % 3}",
+            f"client_{rng.randrange(10)}",
+            {"i": i, "texto": "ação"},
+            task_id=f"t{i}",
+        )
+
+
+class TestQueueSnapshot:
+    """Testes do snapshot binário."""
+
+    def test_roundtrip_preserves_order_and_payloads(self, tmp_path):
+        """load() devolve a mesma ordem de saída (com FIFO) e os payloads."""
+        path = str(tmp_path / "queue.snap")
+        queue = AgentQueue()
+        _fill(queue, 300)
+        queue.pop()
+
+        assert queue.snapshot(path) == 299
+        loaded = AgentQueue.load(path)
+
+        assert loaded.size() == 299
+        assert loaded.get_stats()["total_popped"] == 1
+        assert loaded.count_tasks_for_agent("agent_1") == queue.count_tasks_for_agent(
+            "agent_1"
+        )
+        expected = queue.drain()
+        popped = loaded.drain()
+        assert [task.task_id for task in popped] == [task.task_id for task in expected]
+        assert [task.payload for task in popped] == [task.payload for task in expected]
+
+    def test_new_pushes_after_load_keep_fifo(self, tmp_path):
+        """Tarefas empatadas inseridas após o load saem depois das restauradas."""
+        path = str(tmp_path / "queue.snap")
+        queue = AgentQueue()
+        deadline = create_deadline(days_ahead=1)
+        for i in range(5):
+            queue.push(TaskPriority.HIGH, deadline, 1, "a", "c", {}, task_id=f"old{i}")
+        queue.snapshot(path)
+
+        loaded = AgentQueue.load(path)
+        loaded.push(TaskPriority.HIGH, deadline, 1, "a", "c", {}, task_id="new")
+
+        assert [task.task_id for task in loaded.drain()] == [
+            "old0",
+            "old1",
+            "old2",
+            "old3",
+            "old4",
+            "new",
+        ]
+
+    def test_scheduled_and_tombstones(self, tmp_path):
+        """Agendadas voltam agendadas; tarefas removidas (lazy) não vão."""
+        path = str(tmp_path / "queue.snap")
+        queue = AgentQueue(lazy_delete=True)
+        deadline = create_deadline(days_ahead=1)
+        ids = [
+            queue.push(TaskPriority.LOW, deadline, 1, "a", "c", {}) for _ in range(10)
+        ]
+        queue.remove_task(ids[0])
+        queue.push(
+            TaskPriority.HIGH,
+            deadline,
+            1,
+            "followup",
+            "c",
+            {"x": 1},
+            task_id="later",
+            not_before=datetime.now() + timedelta(days=1),
+        )
+
+        assert queue.snapshot(path) == 10
+        loaded = AgentQueue.load(path)
+
+        assert ids[0] not in loaded
+        assert loaded.size() == 9
+        assert loaded.scheduled_size() == 1
+        assert loaded.get_payload("later") == {"x": 1}
+
+    def test_dedup_keys_roundtrip(self, tmp_path):
+        """dedup_keys vão para o snapshot e o índice volta no load."""
+        path = str(tmp_path / "queue.snap")
+        queue = AgentQueue()
+        _fill(queue, 10)
+        deadline = create_deadline(days_ahead=1)
+        task_id = queue.push(TaskPriority.LOW, deadline, 1, "a", "c", {}, dedup_key="k")
+        queue.snapshot(path)
+
+        loaded = AgentQueue.load(path)
+
+        assert (
+            loaded.push(TaskPriority.LOW, deadline, 1, "a", "c", {}, dedup_key="k")
+            == task_id
+        )
+        assert loaded.size() == 11
+        assert [task.dedup_key for task in QueueSnapshot(path).tasks()].count("k") == 1
+
+    def test_payload_store(self, tmp_path):
+        """Payloads guardados no store vão para o snapshot e voltam ao store."""
+        path = str(tmp_path / "queue.snap")
+        queue = AgentQueue(payload_store=InMemoryPayloadStore())
+        queue.push(TaskPriority.HIGH, create_deadline(1), 1, "a", "c", {"k": "v"})
+        queue.snapshot(path)
+
+        store = InMemoryPayloadStore()
+        loaded = AgentQueue.load(path, payload_store=store)
+
+        assert len(store) == 1
+        assert loaded.pop().payload == {"k": "v"}
+
+    def test_load_with_other_policy(self, tmp_path):
+        """As chaves são recalculadas pela política da fila que carrega."""
+        path = str(tmp_path / "queue.snap")
+        queue = AgentQueue()
+        _fill(queue, 100)
+        queue.snapshot(path)
+
+        loaded = AgentQueue.load(path, policy=EDFPolicy())
+        reference = AgentQueue(policy=EDFPolicy())
+        _fill(reference, 100)
+
+        assert [t.task_id for t in loaded.drain()] == [
+            t.task_id for t in reference.drain()
+        ]
+
+    @pytest.mark.parametrize(
+        "saved, loading",
+        [
+            (AgingPolicy, lambda: AgingPolicy(slack={4: 0.0, 5: 0.0})),
+            (
+                WeightedFairPolicy,
+                lambda: WeightedFairPolicy(weights={"client_1": 5.0}),
+            ),
+        ],
+    )
+    def test_load_with_other_policy_config(self, tmp_path, saved, loading):
+        """Mesma política com outra config: as chaves são recalculadas."""
+        path = str(tmp_path / "queue.snap")
+        queue = AgentQueue(policy=saved())
+        _fill(queue, 100)
+        queue.snapshot(path)
+
+        loaded = AgentQueue.load(path, policy=loading())
+        reference = AgentQueue(policy=loading())
+        _fill(reference, 100)
+
+        assert QueueSnapshot(path).policy_config == saved().config()
+        assert [t.task_id for t in loaded.drain()] == [
+            t.task_id for t in reference.drain()
+        ]
+
+    def test_wfq_roundtrip_keeps_order_and_state(self, tmp_path):
+        """Com a mesma política (wfq) chaves e tempo virtual são restaurados."""
+        path = str(tmp_path / "queue.snap")
+        queue = AgentQueue(policy=WeightedFairPolicy({"client_0": 3}))
+        _fill(queue, 300)
+        queue.pop_many(40)
+        queue.snapshot(path)
+
+        loaded = AgentQueue.load(path, policy=WeightedFairPolicy({"client_0": 3}))
+        deadline = create_deadline(1)
+        for q in (queue, loaded):
+            q.push(TaskPriority.LOW, deadline, 1, "a", "client_1", {}, task_id="n1")
+            q.push(TaskPriority.LOW, deadline, 1, "a", "novo", {}, task_id="n2")
+
+        expected = [task.task_id for task in queue.drain()]
+        assert [task.task_id for task in loaded.drain()] == expected
+        assert len(expected) == 262
+
+    def test_stateful_policy_rekeys_in_arrival_order(self, tmp_path):
+        """Recalculando chaves (outra política), o wfq mantém o FIFO por cliente."""
+        path = str(tmp_path / "queue.snap")
+        queue = AgentQueue()
+        _fill(queue, 200)
+        queue.snapshot(path)
+
+        popped = AgentQueue.load(path, policy=WeightedFairPolicy()).drain()
+
+        for client in {task.client_id for task in popped}:
+            ids = [int(t.task_id[1:]) for t in popped if t.client_id == client]
+            assert ids == sorted(ids)
+
+    def test_stream_in_priority_order(self, tmp_path):
+        """QueueSnapshot.iter_tasks percorre a heap gravada em ordem de saída."""
+        path = str(tmp_path / "queue.snap")
+        queue = AgentQueue()
+        _fill(queue, 200)
+        queue.snapshot(path)
+
+        snapshot = QueueSnapshot(path)
+        assert len(snapshot) == 200
+        assert snapshot.policy == "priority"
+        streamed = snapshot.iter_tasks()
+        first = [next(streamed).task_id for _ in range(10)]
+        assert first == [task.task_id for task in queue.get_all_tasks()[:10]]
+        assert [task.task_id for task in snapshot.iter_tasks()] == [
+            task.task_id for task in queue.get_all_tasks()
+        ]
+
+    def test_empty_queue(self, tmp_path):
+        """Fila vazia gera snapshot válido."""
+        path = str(tmp_path / "queue.snap")
+        assert AgentQueue().snapshot(path) == 0
+
+        assert AgentQueue.load(path).is_empty()
+        assert list(QueueSnapshot(path).iter_tasks()) == []
+
+    def test_invalid_file_and_limits(self, tmp_path):
+        """Arquivo inválido, versão desconhecida, max_size excedido e task_id com NUL."""
+        bad = tmp_path / "bad.snap"
+        bad.write_bytes(b"xxxxxxxxxxxx")
+        with pytest.raises(ValueError):
+            AgentQueue.load(str(bad))
+
+        path = str(tmp_path / "queue.snap")
+        queue = AgentQueue()
+        _fill(queue, 5)
+        queue.snapshot(path)
+        with pytest.raises(ValueError):
+            AgentQueue.load(path, max_size=3)
+
+        future = tmp_path / "future.snap"
+        future.write_bytes(
+            (tmp_path / "queue.snap")
+            .read_bytes()
+            .replace(b'"version": 1', b'"version": 9', 1)
+        )
+        with pytest.raises(ValueError, match="Versão"):
+            QueueSnapshot(str(future))
+
+        queue.push(
+            TaskPriority.LOW, create_deadline(1), 1, "a", "c", {}, task_id="a\x00b"
+        )
+        with pytest.raises(ValueError):
+            queue.snapshot(path)
+        assert QueueSnapshot(path).ready == 5  # arquivo anterior intacto
+
+    def test_load_into_persistent_queue(self, tmp_path):
+        """PersistentAgentQueue.load grava as tarefas restauradas no banco."""
+        path = str(tmp_path / "queue.snap")
+        db_path = str(tmp_path / "queue.db")
+        queue = AgentQueue()
+        _fill(queue, 20)
+        queue.snapshot(path)
+
+        loaded = PersistentAgentQueue.load(path, path=db_path)
+        loaded.close()
+
+        reopened = PersistentAgentQueue(db_path)
+        assert reopened.size() == 20
+        with pytest.raises(ValueError):
+            PersistentAgentQueue.load(path, path=db_path)
+        reopened.close()
@@ -0,0 +1,284 @@
+"""Testes para AgentQueue.retry (backoff com jitter, dead-letter, orçamento).
+
+Cobertura: atraso exponencial com teto e jitter, reagendamento via
+not_before, dead-letter por max_attempts e por orçamento do agente,
+persistência de tentativas/dead-letters, snapshot e dispatcher com backoff.
+"""
+
+import random
+import time
+
+import pytest
+
+from src.core.agent_queue import AgentQueue, TaskPriority, create_deadline
+from src.core.dispatcher import AgentDispatcher
+from src.core.persistent_queue import PersistentAgentQueue
+from src.core.retry import MAX_ATTEMPTS, RETRY_BUDGET, RetryPolicy
+from src.core.sharded_queue import ShardedAgentQueue
+
+DEADLINE = create_deadline(days_ahead=1)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _pop_one(queue):
+    queue.push(TaskPriority.HIGH, DEADLINE, 1, "nf_agent", "c1", {"k": 1})
+    return queue.pop()
+
+
+class TestRetryPolicy:
+    """Testes do cálculo de atraso."""
+
+    def test_exponential_delay_with_cap(self):
+        """Sem jitter: base * multiplier^(n-1), limitado a max_delay."""
+        policy = RetryPolicy(base_delay=2, max_delay=20, multiplier=3, jitter=0)
+
+        assert [policy.delay(n) for n in range(1, 5)] == [2, 6, 18, 20]
+
+    def test_jitter_stays_within_bounds(self):
+        """Com jitter, o atraso fica em [backoff * (1 - jitter), backoff]."""
+        policy = RetryPolicy(base_delay=10, jitter=0.5, rng=random.Random(1))
+        delays = [policy.delay(1) for _ in range(200)]
+
+        assert all(5 <= delay <= 10 for delay in delays)
+        assert len(set(delays)) > 100
+
+    def test_delay_does_not_overflow_after_many_attempts(self):
+        """Milhares de tentativas ficam no teto, sem OverflowError."""
+        policy = RetryPolicy(max_attempts=5000, jitter=0)
+
+        assert policy.delay(1100) == policy.max_delay
+        assert policy.delay(5000) == policy.max_delay
+
+        queue = AgentQueue(retry_policy=policy)
+        task = _pop_one(queue)
+        task.attempts = 1100
+        assert queue.retry(task, "erro") == task.task_id
+
+    def test_invalid_arguments(self):
+        """Parâmetros fora do intervalo são rejeitados."""
+        with pytest.raises(ValueError):
+            RetryPolicy(base_delay=10, max_delay=5)
+        with pytest.raises(ValueError):
+            RetryPolicy(multiplier=0.5)
+        with pytest.raises(ValueError):
+            RetryPolicy(max_delay=float("inf"))
+        with pytest.raises(ValueError):
+            RetryPolicy(base_delay=1e-300, max_delay=1e300, multiplier=1e300)
+        with pytest.raises(ValueError):
+            RetryPolicy(jitter=2)
+        with pytest.raises(ValueError):
+            RetryPolicy(max_attempts=0)
+
+
+class TestAgentQueueRetry:
+    """Testes de retry() na fila."""
+
+    def test_retry_is_scheduled_with_backoff(self):
+        """A tarefa volta agendada (fora de pop) com o atraso da política."""
+        queue = AgentQueue(retry_policy=RetryPolicy(base_delay=30, jitter=0))
+        task = _pop_one(queue)
+        before = time.time()
+
+        assert queue.retry(task, RuntimeError("timeout")) == task.task_id
+
+        assert task.attempts == 1
+        assert queue.size() == 0
+        assert queue.scheduled_size() == 1
+        assert task.not_before == pytest.approx(before + 30, abs=1)
+        assert queue.get_stats()["total_retried"] == 1
+
+    def test_fresh_work_goes_first(self):
+        """Retry agendado não passa na frente de trabalho novo pronto."""
+        queue = AgentQueue(retry_policy=RetryPolicy(base_delay=60))
+        failed = _pop_one(queue)
+        queue.retry(failed, "erro")
+        fresh = queue.push(TaskPriority.LOW, DEADLINE, 1, "nf_agent", "c2", {})
+
+        assert queue.pop().task_id == fresh
+        assert queue.pop() is None
+
+    def test_due_retry_keeps_payload_and_attempts(self):
+        """Com atraso zero a tarefa volta pronta com payload e contagem."""
+        queue = AgentQueue(retry_policy=RetryPolicy(base_delay=0, max_delay=0))
+        task = _pop_one(queue)
+        queue.retry(task, "erro")
+
+        again = queue.pop()
+        assert again.task_id == task.task_id
+        assert again.payload == {"k": 1}
+        assert again.attempts == 1
+
+    def test_dead_letter_after_max_attempts(self):
+        """Após max_attempts execuções a tarefa vai para dead-letter."""
+        queue = AgentQueue(
+            retry_policy=RetryPolicy(base_delay=0, max_delay=0, max_attempts=3)
+        )
+        task = _pop_one(queue)
+        assert queue.retry(task, "1") is not None
+        assert queue.retry(queue.pop(), "2") is not None
+
+        assert queue.retry(queue.pop(), ValueError("3")) is None
+
+        (dead,) = queue.get_dead_letters()
+        assert dead.task.task_id == task.task_id
+        assert dead.task.attempts == 3
+        assert dead.reason == MAX_ATTEMPTS
+        assert dead.error == "ValueError: 3"
+        assert queue.is_empty() and queue.scheduled_size() == 0
+        assert queue.get_stats()["total_dead_lettered"] == 1
+
+    def test_agent_budget_sends_storm_to_dead_letter(self):
+        """Orçamento esgotado: as falhas seguintes do agente não voltam à fila."""
+        clock = FakeClock()
+        policy = RetryPolicy(budgets={"nf_agent": 2}, budget_window=60, clock=clock)
+        queue = AgentQueue(retry_policy=policy)
+        for i in range(4):
+            queue.push(TaskPriority.HIGH, DEADLINE, 1, "nf_agent", f"c{i}", {})
+        queue.push(TaskPriority.HIGH, DEADLINE, 1, "llm_agent", "c9", {})
+        tasks = queue.drain()
+
+        results = [queue.retry(task, "503") for task in tasks]
+
+        assert results[:2] == [tasks[0].task_id, tasks[1].task_id]
+        assert results[2:4] == [None, None]
+        assert results[4] == tasks[4].task_id  # outro agente não é afetado
+        assert {dead.reason for dead in queue.get_dead_letters()} == {RETRY_BUDGET}
+
+        clock.now += 61
+        extra = _pop_one(queue)
+        assert queue.retry(extra, "503") is not None
+
+    def test_dead_letters_are_bounded(self):
+        """A lista de dead-letter guarda só as max_dead_letters mais recentes."""
+        queue = AgentQueue(retry_policy=RetryPolicy(max_attempts=1, max_dead_letters=3))
+        for i in range(5):
+            queue.push(TaskPriority.LOW, DEADLINE, 1, "a", "c", {}, task_id=f"t{i}")
+        for task in queue.drain():
+            queue.retry(task, "erro")
+
+        assert [dead.task.task_id for dead in queue.get_dead_letters()] == [
+            "t2",
+            "t3",
+            "t4",
+        ]
+
+    def test_retry_task_still_queued(self):
+        """retry() de tarefa ainda enfileirada é rejeitado."""
+        queue = AgentQueue()
+        queue.push(TaskPriority.LOW, DEADLINE, 1, "a", "c", {}, task_id="t1")
+
+        with pytest.raises(ValueError):
+            queue.retry(queue.peek(), "erro")
+
+    def test_sharded_retry(self):
+        """ShardedAgentQueue reagenda no shard do cliente e agrega dead-letters."""
+        queue = ShardedAgentQueue(
+            num_shards=2,
+            shard_factory=lambda i: AgentQueue(
+                retry_policy=RetryPolicy(max_attempts=1)
+            ),
+        )
+        task = _pop_one(queue)
+
+        assert queue.retry(task, "erro") is None
+        assert [dead.task.task_id for dead in queue.get_dead_letters()] == [
+            task.task_id
+        ]
+
+
+class TestRetryPersistence:
+    """Tentativas e dead-letters sobrevivem a reinícios."""
+
+    def test_attempts_and_dead_letters_survive_restart(self, tmp_path):
+        """task.attempts é gravado e os dead-letters voltam no replay."""
+        db_path = str(tmp_path / "queue.db")
+        queue = PersistentAgentQueue(db_path, retry_policy=RetryPolicy(max_attempts=2))
+        retried = _pop_one(queue)
+        queue.retry(retried, "timeout")
+        queue.push(TaskPriority.HIGH, DEADLINE, 1, "a", "c2", {"x": 1}, task_id="dead")
+        dead = queue.pop()
+        dead.attempts = 1
+        queue.retry(dead, "401")
+        queue.close()
+
+        reopened = PersistentAgentQueue(db_path)
+        assert reopened.get_scheduled_tasks()[0].attempts == 1
+        (letter,) = reopened.get_dead_letters()
+        assert letter.task.task_id == "dead"
+        assert letter.task.payload == {"x": 1}
+        assert letter.error == "401"
+        reopened.close()
+
+    def test_clear_drops_dead_letters_across_restart(self, tmp_path):
+        """clear() apaga dead-letters gravados e pendentes, e zera as stats."""
+        db_path = str(tmp_path / "queue.db")
+        queue = PersistentAgentQueue(
+            db_path, commit_every=1000, retry_policy=RetryPolicy(max_attempts=1)
+        )
+        queue.retry(_pop_one(queue), "gravado")
+        queue.flush()
+        queue.retry(_pop_one(queue), "pendente")
+        queue.clear()
+        assert queue.get_dead_letters() == []
+        queue.close()
+
+        reopened = PersistentAgentQueue(db_path)
+        assert reopened.get_dead_letters() == []
+        assert reopened.get_stats()["total_dead_lettered"] == 0
+        reopened.close()
+
+    def test_snapshot_keeps_attempts(self, tmp_path):
+        """snapshot/load preserva task.attempts das tarefas em retry."""
+        path = str(tmp_path / "queue.snap")
+        queue = AgentQueue(retry_policy=RetryPolicy(base_delay=0, max_delay=0))
+        queue.retry(_pop_one(queue), "erro")
+        queue.push(TaskPriority.LOW, DEADLINE, 1, "a", "c", {})
+        queue.snapshot(path)
+
+        loaded = AgentQueue.load(path)
+        assert [task.attempts for task in loaded.drain()] == [1, 0]
+
+
+class TestDispatcherBackoff:
+    """AgentDispatcher com backoff=True."""
+
+    def test_failures_are_rescheduled_not_hot_looped(self):
+        """A falha é reagendada e não volta no mesmo run()."""
+        queue = AgentQueue(retry_policy=RetryPolicy(base_delay=60))
+        queue.push(TaskPriority.HIGH, DEADLINE, 1, "flaky", "c1", {})
+        calls = []
+
+        def handler(task):
+            calls.append(task.task_id)
+            raise ConnectionError("API fora do ar")
+
+        dispatcher = AgentDispatcher(queue, handlers={"flaky": handler}, backoff=True)
+        results = dispatcher.run()
+
+        assert [r.status for r in results] == ["retry"]
+        assert len(calls) == 1
+        assert queue.scheduled_size() == 1
+
+    def test_dead_letter_reported_as_failed(self):
+        """Quando a fila desiste (dead-letter), o resultado é 'failed'."""
+        queue = AgentQueue(
+            retry_policy=RetryPolicy(base_delay=0, max_delay=0, max_attempts=2)
+        )
+        queue.push(TaskPriority.HIGH, DEADLINE, 1, "flaky", "c1", {})
+
+        def handler(task):
+            raise ConnectionError("API fora do ar")
+
+        results = AgentDispatcher(
+            queue, handlers={"flaky": handler}, backoff=True
+        ).run()
+
+        assert [(r.status, r.attempt) for r in results] == [("retry", 1), ("failed", 2)]
+        assert len(queue.get_dead_letters()) == 1
@@ -0,0 +1,186 @@
+"""Testes para as políticas de escalonamento da AgentQueue.
+
+Cobertura: política padrão, aging por folga, EDF, fair queuing ponderado por
+cliente, repriorização, integração com clear/stats e create_policy.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.agent_queue import AgentQueue, TaskPriority
+from src.core.persistent_queue import PersistentAgentQueue
+from src.core.scheduling import (
+    AgingPolicy,
+    EDFPolicy,
+    PriorityPolicy,
+    WeightedFairPolicy,
+    create_policy,
+)
+
+
+def _in(hours: float) -> datetime:
+    return datetime.now() + timedelta(hours=hours)
+
+
+def _drain_clients(queue):
+    return [task.client_id for task in queue.drain()]
+
+
+class TestSchedulingPolicies:
+    """Ordem de saída de cada política."""
+
+    def test_default_policy_is_static_priority(self):
+        """Sem policy, a ordem continua priority -> deadline -> cost."""
+        queue = AgentQueue()
+        queue.push(TaskPriority.LOW, _in(1), 1, "a", "low_soon", {})
+        queue.push(TaskPriority.CRITICAL, _in(72), 1, "a", "critical_late", {})
+
+        assert isinstance(queue.policy, PriorityPolicy)
+        assert _drain_clients(queue) == ["critical_late", "low_soon"]
+        assert queue.get_stats()["policy"] == "priority"
+
+    def test_aging_promotes_low_task_near_deadline(self):
+        """LOW perto do vencimento passa na frente de CRITICAL distante."""
+        queue = AgentQueue(policy=AgingPolicy())
+        queue.push(TaskPriority.CRITICAL, _in(48), 1, "a", "critical_late", {})
+        queue.push(TaskPriority.LOW, _in(1), 1, "a", "low_soon", {})
+        queue.push(TaskPriority.CRITICAL, _in(2), 1, "a", "critical_soon", {})
+
+        # LOW em 1h + 24h de folga = 25h: antes do CRITICAL de 48h
+        assert _drain_clients(queue) == ["critical_soon", "low_soon", "critical_late"]
+
+    def test_aging_custom_slack(self):
+        """Folga configurável por prioridade."""
+        policy = AgingPolicy(slack={TaskPriority.LOW: 0})
+        queue = AgentQueue(policy=policy)
+        queue.push(TaskPriority.CRITICAL, _in(2), 1, "a", "critical", {})
+        queue.push(TaskPriority.LOW, _in(1), 1, "a", "low", {})
+
+        assert _drain_clients(queue) == ["low", "critical"]
+
+    def test_edf_orders_by_deadline_then_priority(self):
+        """EDF: deadline mais próximo primeiro; prioridade só desempata."""
+        queue = AgentQueue(policy=EDFPolicy())
+        same_deadline = _in(5)
+        queue.push(TaskPriority.CRITICAL, _in(10), 1, "a", "critical", {})
+        queue.push(TaskPriority.DEFERRED, _in(1), 1, "a", "deferred", {})
+        queue.push(TaskPriority.LOW, same_deadline, 1, "a", "low", {})
+        queue.push(TaskPriority.HIGH, same_deadline, 1, "a", "high", {})
+
+        assert _drain_clients(queue) == ["deferred", "high", "low", "critical"]
+
+    def test_weighted_fair_interleaves_clients(self):
+        """Cliente que enfileira muito não monopoliza a fila."""
+        queue = AgentQueue(policy=WeightedFairPolicy())
+        for _ in range(6):
+            queue.push(TaskPriority.MEDIUM, _in(1), 1, "a", "heavy", {})
+        queue.push(TaskPriority.MEDIUM, _in(1), 1, "a", "light", {})
+
+        order = _drain_clients(queue)
+        assert order.index("light") <= 1
+
+    def test_weighted_fair_respects_weights(self):
+        """Peso 2 recebe o dobro de vazão enquanto ambos têm backlog."""
+        queue = AgentQueue(policy=WeightedFairPolicy(weights={"gold": 2.0}))
+        for _ in range(20):
+            queue.push(TaskPriority.MEDIUM, _in(1), 1, "a", "gold", {})
+            queue.push(TaskPriority.MEDIUM, _in(1), 1, "a", "basic", {})
+
+        first = [task.client_id for task in queue.pop_many(12)]
+        assert first.count("gold") == 8
+        assert first.count("basic") == 4
+
+    def test_weighted_fair_new_client_starts_at_virtual_time(self):
+        """Cliente que chega tarde não ganha crédito acumulado do passado."""
+        queue = AgentQueue(policy=WeightedFairPolicy())
+        for _ in range(10):
+            queue.push(TaskPriority.MEDIUM, _in(1), 1, "a", "old", {})
+        queue.pop_many(8)
+        for _ in range(4):
+            queue.push(TaskPriority.MEDIUM, _in(1), 1, "a", "new", {})
+
+        assert _drain_clients(queue) == ["old", "new", "old", "new", "new", "new"]
+
+    def test_weighted_fair_update_keeps_fair_position(self):
+        """update_priority não reposiciona a tarefa além do seu turno justo."""
+        queue = AgentQueue(policy=WeightedFairPolicy())
+        first = queue.push(TaskPriority.LOW, _in(1), 1, "a", "c1", {})
+        second = queue.push(TaskPriority.LOW, _in(1), 1, "a", "c1", {})
+        queue.update_priority(second, TaskPriority.CRITICAL)
+
+        assert [task.task_id for task in queue.drain()] == [first, second]
+
+    def test_weighted_fair_forgets_idle_clients(self):
+        """Finishes já alcançados pelo tempo virtual não acumulam no estado."""
+        policy = WeightedFairPolicy()
+        queue = AgentQueue(policy=policy)
+        for n in range(1000):
+            queue.push(TaskPriority.MEDIUM, _in(1), 1, "a", f"c{n}", {})
+            queue.pop()
+
+        assert len(policy.state()["finish"]) <= 64
+        queue.push(TaskPriority.MEDIUM, _in(1), 1, "a", "c1", {})
+        queue.push(TaskPriority.MEDIUM, _in(1), 1, "a", "new", {})
+        assert _drain_clients(queue) == ["c1", "new"]
+
+    def test_weighted_fair_invalid_weight(self):
+        """Pesos não positivos são rejeitados."""
+        with pytest.raises(ValueError):
+            WeightedFairPolicy(weights={"c": 0})
+
+    def test_update_deadline_rekeys_under_edf(self):
+        """update_deadline recalcula a chave na política ativa."""
+        queue = AgentQueue(policy=EDFPolicy())
+        late = queue.push(TaskPriority.MEDIUM, _in(10), 1, "a", "late", {})
+        queue.push(TaskPriority.MEDIUM, _in(5), 1, "a", "soon", {})
+        queue.update_deadline(late, _in(1))
+
+        assert _drain_clients(queue) == ["late", "soon"]
+
+
+class TestPolicyIntegration:
+    """Integração das políticas com a fila."""
+
+    def test_clear_resets_policy_state(self):
+        """clear() zera o tempo virtual do fair queuing."""
+        policy = WeightedFairPolicy()
+        queue = AgentQueue(policy=policy)
+        queue.push(TaskPriority.MEDIUM, _in(1), 5, "a", "c1", {})
+        queue.pop()
+        assert policy.virtual_time > 0
+
+        queue.clear()
+        assert policy.virtual_time == 0
+
+    def test_overdue_pops_are_counted(self):
+        """Tarefas retiradas após o deadline entram em total_overdue."""
+        queue = AgentQueue()
+        queue.push(TaskPriority.MEDIUM, _in(-1), 1, "a", "c1", {})
+        queue.push(TaskPriority.MEDIUM, _in(-1), 1, "a", "c2", {})
+        queue.push(TaskPriority.MEDIUM, _in(1), 1, "a", "c3", {})
+
+        queue.pop()
+        queue.drain()
+
+        assert queue.get_stats()["total_overdue"] == 2
+
+    def test_persistent_queue_replays_with_policy(self, tmp_path):
+        """A fila persistente reconstrói a heap com a política informada."""
+        path = str(tmp_path / "queue.db")
+        queue = PersistentAgentQueue(path)
+        queue.push(TaskPriority.CRITICAL, _in(10), 1, "a", "critical", {})
+        queue.push(TaskPriority.LOW, _in(1), 1, "a", "low", {})
+        queue.close()
+
+        reopened = PersistentAgentQueue(path, policy=EDFPolicy())
+        assert _drain_clients(reopened) == ["low", "critical"]
+        reopened.close()
+
+    def test_create_policy(self):
+        """create_policy resolve nomes e rejeita desconhecidos."""
+        assert isinstance(create_policy("aging"), AgingPolicy)
+        assert isinstance(create_policy("edf"), EDFPolicy)
+        assert isinstance(create_policy("wfq"), WeightedFairPolicy)
+        with pytest.raises(ValueError):
+            create_policy("lifo")
@@ -0,0 +1,213 @@
+"""Testes para ShardedAgentQueue (fila particionada por client_id).
+
+Cobertura: roteamento estável, merge exato equivalente a uma fila única,
+FIFO por cliente, operações por task_id, estatísticas agregadas e merge com
+cabeças em cache (refresh_interval).
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.agent_queue import AgentQueue, TaskPriority, create_deadline
+from src.core.persistent_queue import PersistentAgentQueue
+from src.core.sharded_queue import ShardedAgentQueue, shard_for
+
+
+def _push_random(queues, n, seed=7):
+    rng = random.Random(seed)
+    base = datetime.now() + timedelta(days=1)
+    for i in range(n):
+        args = (
+            rng.randint(1, 5),
+            base + timedelta(minutes=rng.randint(0, 600)),
+            rng.randint(0, 5),
+            f"agent_{i % 4}",
+            f"client_{rng.randrange(30)}",
+            {"i": i},
+        )
+        for queue in queues:
+            queue.push(*args, task_id=f"t{i}")
+
+
+class TestShardedAgentQueue:
+    """Testes da fila particionada."""
+
+    def test_shard_for_is_stable(self):
+        """Roteamento por CRC32: mesmo resultado em qualquer processo."""
+        assert shard_for("client_1", 8) == shard_for("client_1", 8)
+        assert 0 <= shard_for("client_1", 8) < 8
+        queue = ShardedAgentQueue(num_shards=8)
+        queue.push(TaskPriority.HIGH, create_deadline(1), 1, "a", "client_1", {})
+        assert queue.shards[shard_for("client_1", 8)].size() == 1
+
+    def test_exact_merge_matches_single_queue(self):
+        """Com refresh_interval=0 a ordem global é a de uma fila única."""
+        single = AgentQueue()
+        sharded = ShardedAgentQueue(num_shards=5)
+        _push_random([single, sharded], 300)
+
+        assert sharded.size() == 300
+        assert [t.task_id for t in sharded.get_all_tasks()] == [
+            t.task_id for t in single.get_all_tasks()
+        ]
+        popped = [sharded.pop().task_id for _ in range(300)]
+        assert [t.task_id for t in single.drain()] == popped
+        assert sharded.pop() is None
+
+    def test_per_client_fifo(self):
+        """Tarefas empatadas do mesmo cliente saem em ordem de chegada."""
+        queue = ShardedAgentQueue(num_shards=4)
+        deadline = create_deadline(days_ahead=1)
+        ids = [
+            queue.push(TaskPriority.MEDIUM, deadline, 1, "a", f"client_{i % 3}", {})
+            for i in range(30)
+        ]
+
+        order = [task.task_id for task in queue.drain()]
+        for client in range(3):
+            expected = [tid for i, tid in enumerate(ids) if i % 3 == client]
+            assert [tid for tid in order if tid in expected] == expected
+
+    def test_operations_by_task_id(self):
+        """remove/update/contains/get_payload encontram o shard da tarefa."""
+        queue = ShardedAgentQueue(num_shards=3)
+        deadline = create_deadline(days_ahead=1)
+        low = queue.push(TaskPriority.LOW, deadline, 1, "a", "c1", {"k": 1})
+        other = queue.push(TaskPriority.HIGH, deadline, 1, "a", "c2", {})
+        gone = queue.push(TaskPriority.HIGH, deadline, 1, "a", "c3", {})
+
+        assert low in queue
+        assert queue.get_payload(low) == {"k": 1}
+        assert queue.remove_task(gone)
+        assert not queue.remove_task(gone)
+        assert queue.update_priority(low, TaskPriority.CRITICAL)
+        assert queue.peek().task_id == low
+        assert queue.pop().task_id == low
+        assert queue.pop().task_id == other
+
+    def test_duplicate_task_id_across_shards(self):
+        """task_id é único em todos os shards."""
+        queue = ShardedAgentQueue(num_shards=4)
+        deadline = create_deadline(days_ahead=1)
+        queue.push(TaskPriority.HIGH, deadline, 1, "a", "c1", {}, task_id="dup")
+        with pytest.raises(ValueError):
+            queue.push(TaskPriority.HIGH, deadline, 1, "a", "c2", {}, task_id="dup")
+
+    def test_push_many_all_or_nothing(self):
+        """Lote inválido não insere nada em nenhum shard."""
+        queue = ShardedAgentQueue(num_shards=4)
+        deadline = create_deadline(days_ahead=1)
+        items = [
+            {
+                "priority": TaskPriority.MEDIUM,
+                "deadline": deadline,
+                "cost": 1,
+                "agent_name": "a",
+                "client_id": f"c{i}",
+                "payload": {},
+            }
+            for i in range(10)
+        ]
+
+        with pytest.raises(ValueError):
+            queue.push_many(items + [{**items[0], "priority": 9}])
+        assert queue.size() == 0
+
+        ids = queue.push_many(items)
+        assert len(ids) == 10
+        assert sorted(t.task_id for t in queue.drain()) == sorted(ids)
+
+    def test_dedup_in_client_shard(self):
+        """dedup_key é resolvida no shard do cliente, também em push_many."""
+        queue = ShardedAgentQueue(num_shards=4)
+        deadline = create_deadline(days_ahead=1)
+        task_id = queue.push(
+            TaskPriority.LOW, deadline, 1, "a", "client_1", {}, dedup_key="k"
+        )
+
+        def item(client_id):
+            return {
+                "priority": TaskPriority.LOW,
+                "deadline": deadline,
+                "cost": 1,
+                "client_id": client_id,
+                "dedup_key": "k",
+            }
+
+        ids = queue.push_many([item("client_1"), item("client_2")])
+
+        assert ids[0] == task_id
+        assert ids[1] != task_id
+        assert queue.size() == 2
+
+    def test_stats_are_aggregated(self):
+        """get_stats soma contadores e mostra a distribuição por shard."""
+        queue = ShardedAgentQueue(num_shards=4)
+        _push_random([queue], 40)
+        queue.pop()
+
+        stats = queue.get_stats()
+        assert stats["total_pushed"] == 40
+        assert stats["total_popped"] == 1
+        assert stats["size_atual"] == 39
+        assert sum(stats["shard_sizes"]) == 39
+        assert stats["num_shards"] == 4
+        assert stats["imbalance"] >= 1.0
+        assert "Shards: 4" in queue.print_stats()
+
+    def test_cached_heads_follow_local_mutations(self):
+        """Com cache, mutações feitas pela própria fila mantêm o merge exato."""
+        single = AgentQueue()
+        sharded = ShardedAgentQueue(num_shards=4, refresh_interval=3600)
+        _push_random([single, sharded], 100)
+
+        assert [sharded.pop().task_id for _ in range(100)] == [
+            t.task_id for t in single.drain()
+        ]
+        assert sharded.pop() is None
+
+    def test_cached_heads_pick_up_external_changes(self):
+        """Mudança feita direto num shard é vista no próximo refresh."""
+        queue = ShardedAgentQueue(num_shards=2, refresh_interval=3600)
+        deadline = create_deadline(days_ahead=1)
+        index = queue.shard_index("c1")
+        queue.shards[index].push(TaskPriority.HIGH, deadline, 1, "a", "c1", {})
+
+        assert queue.pop().client_id == "c1"
+
+    def test_invalid_arguments(self):
+        """num_shards >= 1 e refresh_interval >= 0."""
+        with pytest.raises(ValueError):
+            ShardedAgentQueue(num_shards=0)
+        with pytest.raises(ValueError):
+            ShardedAgentQueue(refresh_interval=-1)
+
+    def test_persistent_shards(self, tmp_path):
+        """Cada shard pode ser uma PersistentAgentQueue (um arquivo por shard)."""
+
+        def factory(index):
+            return PersistentAgentQueue(str(tmp_path / f"queue_{index}.db"))
+
+        queue = ShardedAgentQueue(num_shards=3, shard_factory=factory)
+        _push_random([queue], 30)
+        for shard in queue.shards:
+            shard.close()
+
+        reopened = ShardedAgentQueue(num_shards=3, shard_factory=factory)
+        assert reopened.size() == 30
+        assert len(reopened.drain()) == 30
+
+    def test_iter_ordered_matches_single_queue(self):
+        """iter_ordered faz merge preguiçoso na ordem de get_all_tasks."""
+        single = AgentQueue()
+        sharded = ShardedAgentQueue(num_shards=4)
+        _push_random([single, sharded], 200)
+
+        expected = [t.task_id for t in sharded.get_all_tasks()]
+        assert [t.task_id for t in sharded.iter_ordered()] == expected
+        assert [t.task_id for t in sharded.iter_ordered(limit=10)] == [
+            t.task_id for t in single.iter_ordered(limit=10)
+        ]
+        assert sharded.size() == 200
@@ -0,0 +1,181 @@
+"""Testes para SharedMemoryAgentQueue (heap em memória compartilhada).
+
+Cobertura: ordem igual à AgentQueue, payloads e reuso de slots, capacidade,
+validações, get() com timeout e produtores/consumidores em processos.
+"""
+
+import multiprocessing
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.agent_queue import AgentQueue, TaskPriority, create_deadline
+from src.core.shared_memory_queue import SharedMemoryAgentQueue
+
+
+@pytest.fixture
+def shm_queue():
+    queue = SharedMemoryAgentQueue(capacity=256, payload_size=128)
+    yield queue
+    queue.close()
+    queue.unlink()
+
+
+def _producer(queue, start, count):
+    deadline = datetime.now() + timedelta(days=1)
+    for i in range(start, start + count):
+        queue.push(TaskPriority.MEDIUM, deadline, 1, "a", f"c{i}", {"i": i})
+
+
+def _consumer(queue, results):
+    while True:
+        task = queue.get(timeout=2)
+        if task is None:
+            break
+        results.put(task.payload["i"])
+
+
+class TestSharedMemoryAgentQueue:
+    """Testes da fila em memória compartilhada."""
+
+    def test_order_matches_agent_queue(self, shm_queue):
+        """Mesma ordem de saída da AgentQueue (priority, deadline, cost, FIFO)."""
+        single = AgentQueue()
+        rng = random.Random(3)
+        base = datetime.now() + timedelta(days=1)
+        for i in range(200):
+            args = (
+                rng.randint(1, 5),
+                base + timedelta(minutes=rng.randint(0, 30)),
+                rng.randint(0, 3),
+                "agent",
+                f"client_{i}",
+                {"i": i},
+            )
+            single.push(*args, task_id=f"t{i}")
+            shm_queue.push(*args, task_id=f"t{i}")
+
+        assert shm_queue.size() == 200
+        assert shm_queue.peek().task_id == single.peek().task_id
+        expected = [task.task_id for task in single.drain()]
+        assert [shm_queue.pop().task_id for _ in range(200)] == expected
+        assert shm_queue.pop() is None
+
+    def test_payload_roundtrip_and_slot_reuse(self, shm_queue):
+        """Payloads voltam intactos e slots liberados são reaproveitados."""
+        deadline = create_deadline(days_ahead=1)
+        for round_ in range(3):
+            for i in range(256):
+                shm_queue.push(
+                    TaskPriority.HIGH, deadline, 1, "nf_agent", "c", {"n": i, "r": "ç"}
+                )
+            payloads = [shm_queue.pop().payload for _ in range(256)]
+            assert payloads == [{"n": i, "r": "ç"} for i in range(256)]
+
+        assert shm_queue.get_stats()["total_popped"] == 768
+
+    def test_capacity_rejects(self):
+        """Além de capacity, push retorna None e conta em total_rejected."""
+        with SharedMemoryAgentQueue(capacity=2) as queue:
+            deadline = create_deadline(days_ahead=1)
+            assert queue.push(TaskPriority.LOW, deadline, 1, "a", "c", {})
+            assert queue.push(TaskPriority.LOW, deadline, 1, "a", "c", {})
+            assert queue.push(TaskPriority.LOW, deadline, 1, "a", "c", {}) is None
+            assert queue.get_stats()["total_rejected"] == 1
+
+    def test_validation(self, shm_queue):
+        """Campos inválidos, textos longos e payload grande são rejeitados."""
+        deadline = create_deadline(days_ahead=1)
+        with pytest.raises(ValueError):
+            shm_queue.push(9, deadline, 1, "a", "c", {})
+        with pytest.raises(ValueError):
+            shm_queue.push(TaskPriority.LOW, deadline, 1, "a" * 40, "c", {})
+        with pytest.raises(ValueError):
+            shm_queue.push(TaskPriority.LOW, deadline, 1, "a", "c", {"x": "y" * 200})
+        assert shm_queue.is_empty()
+
+    @pytest.mark.parametrize("cost", [-1, 2**32, 1.5])
+    def test_cost_out_of_range(self, shm_queue, cost):
+        """cost fora de uint32 vira ValueError, não struct.error."""
+        deadline = create_deadline(days_ahead=1)
+        with pytest.raises(ValueError):
+            shm_queue.push(TaskPriority.LOW, deadline, cost, "a", "c", {})
+        assert shm_queue.push(TaskPriority.LOW, deadline, 2**32 - 1, "a", "c", {})
+        assert shm_queue.pop().cost == 2**32 - 1
+
+    def test_duplicate_task_id(self, shm_queue):
+        """task_id duplicado é rejeitado; após o pop o ID pode ser reusado."""
+        deadline = create_deadline(days_ahead=1)
+        shm_queue.push(TaskPriority.LOW, deadline, 1, "a", "c", {}, task_id="t1")
+        with pytest.raises(ValueError, match="duplicado"):
+            shm_queue.push(TaskPriority.HIGH, deadline, 1, "a", "c", {}, task_id="t1")
+        assert shm_queue.size() == 1
+        assert "t1" in shm_queue
+
+        shm_queue.pop()
+        assert "t1" not in shm_queue
+        shm_queue.push(TaskPriority.LOW, deadline, 1, "a", "c", {}, task_id="t1")
+        assert "t1" in shm_queue
+
+    def test_task_id_index_matches_queue(self):
+        """Índice continua consistente após muitos pushes e pops intercalados."""
+        deadline = create_deadline(days_ahead=1)
+        rng = random.Random(7)
+        with SharedMemoryAgentQueue(capacity=32) as queue:
+            present = set()
+            for n in range(2000):
+                if present and (len(present) == 32 or rng.random() < 0.5):
+                    present.remove(queue.pop().task_id)
+                else:
+                    task_id = f"t{rng.randrange(10**6)}"
+                    if task_id in present:
+                        continue
+                    queue.push(
+                        rng.choice(list(TaskPriority)),
+                        deadline,
+                        1,
+                        "a",
+                        "c",
+                        {},
+                        task_id=task_id,
+                    )
+                    present.add(task_id)
+                for task_id in list(present)[:4]:
+                    assert task_id in queue
+            queue.clear()
+            assert not any(task_id in queue for task_id in present)
+
+    def test_get_timeout(self, shm_queue):
+        """get() retorna None após o timeout com a fila vazia."""
+        assert shm_queue.get(timeout=0.05) is None
+
+    def test_clear(self, shm_queue):
+        """clear() esvazia e libera todos os slots."""
+        _producer(shm_queue, 0, 256)
+        shm_queue.clear()
+
+        assert shm_queue.is_empty()
+        _producer(shm_queue, 0, 256)
+        assert shm_queue.size() == 256
+
+    def test_processes_share_queue(self, shm_queue):
+        """Produtores e consumidores em processos distintos, sem perda."""
+        results = multiprocessing.Queue()
+        producers = [
+            multiprocessing.Process(target=_producer, args=(shm_queue, i * 50, 50))
+            for i in range(2)
+        ]
+        consumers = [
+            multiprocessing.Process(target=_consumer, args=(shm_queue, results))
+            for _ in range(2)
+        ]
+        for process in producers + consumers:
+            process.start()
+        for process in producers + consumers:
+            process.join(timeout=30)
+
+        received = sorted(results.get(timeout=5) for _ in range(100))
+        assert received == list(range(100))
+        stats = shm_queue.get_stats()
+        assert stats["total_pushed"] == stats["total_popped"] == 100